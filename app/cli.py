@@ -0,0 +1,167 @@
+"""
+Command Line
+------------
+Headless entry point for reports and maintenance jobs, for cron on the
+database host or ad-hoc runs without the GUI:
+
+    python -m app.cli reports
+    python -m app.cli report daily_revenue "/srv/reports/revenue-{date}.csv.gz" --days 1
+    python -m app.cli rollups --rebuild
+    python -m app.cli stats
+    python -m app.cli archive notifications --older-than 90 --dir /srv/archive
+    python -m app.cli purge deleted_messages --older-than 30
+
+Nothing here imports Qt, and the database modules are only imported by the
+subcommand that runs, so --help and argument errors return immediately.
+Connection settings come from the same environment variables (or .env) as
+the application. The exit status is 0 on success and 1 if anything failed.
+"""
+
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+
+
+def _date(text):
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a YYYY-MM-DD date: {text!r}")
+
+
+def _positive(text):
+    value = int(text)
+    if value <= 0:
+        raise argparse.ArgumentTypeError("must be a positive number")
+    return value
+
+
+def _progress(quiet):
+    """Progress callback printing at most one line every few seconds to stderr."""
+    last = [0.0]
+
+    def _report(stage, done, total):
+        now = time.monotonic()
+        if quiet or not done or now - last[0] < 5:
+            return
+        last[0] = now
+        of = f" / {total:,}" if total else ""
+        print(f"{stage.capitalize()}... {done:,}{of}", file=sys.stderr, flush=True)
+    return _report
+
+
+def cmd_reports(args):
+    from app.utils.report_generator import available_reports, get_report
+    for name, title in available_reports():
+        dates = "date range" if get_report(name).uses_dates else "no dates"
+        print(f"{name:24s} {title} ({dates})")
+    return 0
+
+
+def cmd_report(args):
+    from app.utils.report_generator import FORMATS, get_report, run_report
+    if get_report(args.name) is None:
+        print(f"Unknown report {args.name!r}; see 'python -m app.cli reports'.", file=sys.stderr)
+        return 1
+    start_date, end_date = args.start, args.end
+    if args.days:
+        end_date = date.today() - timedelta(days=1)
+        start_date = end_date - timedelta(days=args.days - 1)
+    if start_date and end_date and start_date > end_date:
+        print("The start date must not be after the end date.", file=sys.stderr)
+        return 1
+    if args.format and args.format not in FORMATS:
+        print(f"Unknown format {args.format!r}; use one of {', '.join(FORMATS)}.", file=sys.stderr)
+        return 1
+    path = args.output.replace("{date}", date.today().isoformat())
+    result = run_report(args.name, path, start_date, end_date, fmt=args.format,
+                        progress=_progress(args.quiet), use_cache=not args.no_cache)
+    print(result.summary(), file=sys.stderr if result.error else sys.stdout)
+    return 1 if result.error else 0
+
+
+def cmd_rollups(args):
+    from app.utils.rollups import ROLLUPS, refresh_rollups
+    unknown = [name for name in args.rollups if name not in ROLLUPS]
+    if unknown:
+        print(f"Unknown rollups: {', '.join(unknown)} (available: {', '.join(ROLLUPS)})", file=sys.stderr)
+        return 1
+    results = refresh_rollups(args.rollups or None, rebuild=args.rebuild)
+    for name, buckets in results.items():
+        print(f"{name}: " + ("FAILED" if buckets is None else f"{buckets} buckets recomputed"))
+    return 0 if all(buckets is not None for buckets in results.values()) else 1
+
+
+def cmd_stats(args):
+    from app.utils.maintenance import rebuild_dashboard_stats
+    result = rebuild_dashboard_stats()
+    print(result.summary(), file=sys.stderr if result.error else sys.stdout)
+    return 1 if result.error else 0
+
+
+def cmd_archive(args):
+    from app.utils.maintenance import ARCHIVE_JOBS, run_archive_job
+    if args.job == "list":
+        for job in ARCHIVE_JOBS.values():
+            print(f"{job.name:20s} {job.table}: {job.description}")
+        return 0
+    if args.job not in ARCHIVE_JOBS:
+        print(f"Unknown job {args.job!r} (available: {', '.join(ARCHIVE_JOBS)})", file=sys.stderr)
+        return 1
+    directory = getattr(args, "dir", None)
+    result = run_archive_job(args.job, args.older_than, directory, progress=_progress(args.quiet))
+    print(result.summary(), file=sys.stderr if result.error else sys.stdout)
+    return 1 if result.error else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m app.cli",
+                                     description="Reports and maintenance jobs without the GUI.")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no progress lines on stderr")
+    sub = parser.add_subparsers(dest="command", metavar="command")
+    sub.required = True
+
+    p = sub.add_parser("reports", help="list the registered reports")
+    p.set_defaults(func=cmd_reports)
+
+    p = sub.add_parser("report", help="run a report to a file")
+    p.add_argument("name", help="report name (see 'reports')")
+    p.add_argument("output", help="output file (.xlsx, .csv, .csv.gz, .jsonl, .jsonl.gz); "
+                                  "{date} is replaced with today's date")
+    p.add_argument("--from", dest="start", type=_date, help="first day (YYYY-MM-DD)")
+    p.add_argument("--to", dest="end", type=_date, help="last day (YYYY-MM-DD)")
+    p.add_argument("--days", type=_positive, help="the last N complete days (up to yesterday)")
+    p.add_argument("--format", help="output format (default: from the extension)")
+    p.add_argument("--no-cache", action="store_true", help="always query, do not use the report cache")
+    p.set_defaults(func=cmd_report)
+
+    p = sub.add_parser("rollups", help="bring the report rollup tables up to date")
+    p.add_argument("rollups", nargs="*", help="rollups to refresh (default: all)")
+    p.add_argument("--rebuild", action="store_true", help="recompute everything, not just changes")
+    p.set_defaults(func=cmd_rollups)
+
+    p = sub.add_parser("stats", help="rebuild the student dashboard stats table")
+    p.set_defaults(func=cmd_stats)
+
+    p = sub.add_parser("archive", help="move expired rows to a gzip JSON Lines file ('archive list' for jobs)")
+    p.add_argument("job", help="archive job name, or 'list'")
+    p.add_argument("--older-than", type=_positive, default=365, metavar="DAYS",
+                   help="retention in days (default: 365)")
+    p.add_argument("--dir", default="archive", help="directory for the archive files (default: ./archive)")
+    p.set_defaults(func=cmd_archive)
+
+    p = sub.add_parser("purge", help="delete expired rows without archiving them")
+    p.add_argument("job", help="archive job name, or 'list'")
+    p.add_argument("--older-than", type=_positive, required=True, metavar="DAYS", help="retention in days")
+    p.set_defaults(func=cmd_archive)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,6 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from app.models.user_model import User
+from app.models.chat_outbox import get_outbox
 
 class Chat:
     """
@@ -18,32 +19,45 @@ class Chat:
         return User.get_or_create_chat(user1_id, user2_id)
 
     @staticmethod
-    def get_messages(chat_id: int, limit: int = 200, after_id: int = None) -> List[Dict[str, Any]]:
-        """Return messages for a chat."""
-        return User.get_messages(chat_id, limit=limit, after_id=after_id)
+    def get_messages(chat_id: int, limit: int = 50, after_id: int = None,
+                     before_id: int = None) -> List[Dict[str, Any]]:
+        """
+        Return a page of messages for a chat (id ascending).
+        The newest page is followed by sends still waiting in the outbox.
+        """
+        msgs = User.get_messages(chat_id, limit=limit, after_id=after_id, before_id=before_id) or []
+        if before_id:
+            return msgs
+        return msgs + get_outbox().pending_messages(chat_id)
+
+    @staticmethod
+    def search_messages(user_id: int, query: str, limit: int = 20, cursor=None) -> Dict[str, Any]:
+        """Search the user's chats; pass the returned `next_cursor` back to get the next page."""
+        return User.search_messages(user_id, query, limit=limit, cursor=cursor)
 
     @staticmethod
-    def send_message(chat_id: int, sender_id: int, message: str) -> bool:
+    def send_message(chat_id: int, sender_id: int, message: str) -> Optional[Dict[str, Any]]:
         """
         Send a message in a chat.
         Uses `message` column in `chat_messages` table.
+        Returns the new message's id/sent_at (see User.send_message) or None.
         """
         return User.send_message(chat_id, sender_id, message)
 
     @staticmethod
-    def edit_message(message_id: int, user_id: int, new_message: str) -> bool:
+    def edit_message(message_id: int, user_id: int, new_message: str, client_msg_id: str = None) -> bool:
         """
         Edit a message (sender only).
-        Updates `message` column.
+        Updates `message` column; pending outbox sends are addressed by client_msg_id.
         """
-        return User.edit_message(message_id, user_id, new_message)
+        return User.edit_message(message_id, user_id, new_message, client_msg_id=client_msg_id)
 
     @staticmethod
-    def delete_message(message_id: int, user_id: int) -> bool:
+    def delete_message(message_id: int, user_id: int, client_msg_id: str = None) -> bool:
         """Delete (mark) a message (sender only)."""
-        return User.delete_message(message_id, user_id)
+        return User.delete_message(message_id, user_id, client_msg_id=client_msg_id)
 
     @staticmethod
-    def mark_messages_read(chat_id: int, user_id: int) -> bool:
-        """Mark messages read for a user."""
-        return User.mark_messages_read(chat_id, user_id)
+    def mark_messages_read(chat_id: int, user_id: int, up_to_id: int = None) -> bool:
+        """Advance the user's read watermark; returns True only if it moved."""
+        return User.mark_messages_read(chat_id, user_id, up_to_id=up_to_id)
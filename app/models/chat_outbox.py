@@ -0,0 +1,365 @@
+"""
+Chat Outbox
+-----------
+Durable queue for chat writes (send / edit / delete) made while the database is
+unreachable. Operations are persisted to ``app/data/chat_outbox.json`` with a
+client-generated idempotency key and replayed to MySQL in batches by a
+background worker once the database is reachable again.
+
+An operation the server rejects (rather than one that failed because the
+database went away) is moved to ``app/data/chat_outbox_rejected.json`` so it
+cannot hold up the operations queued behind it.
+"""
+
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.utils.database import get_connection, is_database_available
+
+logger = logging.getLogger(__name__)
+
+_DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+_OUTBOX_FILE = _DATA_DIR / "chat_outbox.json"
+_REJECTED_FILE = _DATA_DIR / "chat_outbox_rejected.json"
+
+OP_SEND = "send"
+OP_EDIT = "edit"
+OP_DELETE = "delete"
+
+
+def new_client_msg_id() -> str:
+    """Return a new client-side idempotency key for a chat message."""
+    return uuid.uuid4().hex
+
+
+class ChatOutbox:
+    """
+    Persistent FIFO of pending chat operations.
+
+    Each entry is a dict with at least ``key`` (unique per operation), ``op`` and
+    ``queued_at``. Sends carry ``client_msg_id`` which is also written to
+    ``chat_messages.client_msg_id`` so a replayed send can never create a second
+    row. Edits and deletes target either a server ``message_id`` or the
+    ``client_msg_id`` of a message that was itself sent offline.
+    """
+
+    def __init__(self, path: Path = _OUTBOX_FILE, rejected_path: Path = _REJECTED_FILE):
+        self._path = Path(path)
+        self._rejected_path = Path(rejected_path)
+        self._lock = threading.RLock()
+        self._entries: List[Dict[str, Any]] = self._load()
+        # None = unknown, True/False = result of the last contact with the DB
+        self.db_healthy: Optional[bool] = None
+        # keys of entries currently being replayed; these must not be mutated in place
+        self._in_flight = set()
+        self._wake = threading.Event()
+        self._worker: Optional["OutboxWorker"] = None
+
+    # --- persistence ---
+    def _load(self, path: Path = None) -> List[Dict[str, Any]]:
+        try:
+            with (path or self._path).open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, list) else []
+        except Exception:
+            return []
+
+    def _save(self, path: Path = None, entries: List[Dict[str, Any]] = None) -> bool:
+        path = path or self._path
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(self._entries if entries is None else entries, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            # atomic swap so a crash never leaves a half-written outbox
+            os.replace(tmp, path)
+            return True
+        except Exception as e:
+            logger.error(f"Could not persist chat outbox: {e}")
+            return False
+
+    def _reject(self, entries: List[Dict[str, Any]]) -> bool:
+        """Append entries the server refused to the rejected file (caller holds the lock)."""
+        rejected_at = datetime.now().isoformat(timespec="seconds")
+        for entry in entries:
+            logger.error(f"Chat outbox: dropping rejected {entry.get('op')} operation {entry['key']}")
+        return self._save(self._rejected_path,
+                          self._load(self._rejected_path) + [dict(e, rejected_at=rejected_at) for e in entries])
+
+    # --- queueing ---
+    def _append(self, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        entry.setdefault("key", uuid.uuid4().hex)
+        entry["queued_at"] = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            self._entries.append(entry)
+            if not self._save():
+                self._entries.pop()
+                return None
+        self._wake.set()
+        return entry
+
+    def enqueue_send(self, chat_id: int, sender_id: int, text: str,
+                     client_msg_id: str = None) -> Optional[Dict[str, Any]]:
+        """Queue a message send. Returns the queued entry or None if it could not be persisted."""
+        return self._append({
+            "op": OP_SEND,
+            "client_msg_id": client_msg_id or new_client_msg_id(),
+            "chat_id": int(chat_id),
+            "sender_id": int(sender_id),
+            "message": text,
+        })
+
+    def enqueue_edit(self, user_id: int, new_text: str, message_id: int = None,
+                     client_msg_id: str = None) -> bool:
+        """Queue an edit. Edits of a still-pending send are folded into that send."""
+        with self._lock:
+            pending = self._pending_send(client_msg_id)
+            if pending is not None:
+                if int(pending["sender_id"]) != int(user_id):
+                    return False
+                pending["message"] = new_text
+                return self._save()
+        return self._append({
+            "op": OP_EDIT,
+            "message_id": message_id,
+            "client_msg_id": client_msg_id,
+            "user_id": int(user_id),
+            "message": new_text,
+        }) is not None
+
+    def enqueue_delete(self, user_id: int, message_id: int = None,
+                       client_msg_id: str = None) -> bool:
+        """Queue a delete. Deleting a still-pending send simply drops it (and its edits)."""
+        with self._lock:
+            pending = self._pending_send(client_msg_id)
+            if pending is not None:
+                if int(pending["sender_id"]) != int(user_id):
+                    return False
+                self._entries = [e for e in self._entries if e.get("client_msg_id") != client_msg_id]
+                return self._save()
+        return self._append({
+            "op": OP_DELETE,
+            "message_id": message_id,
+            "client_msg_id": client_msg_id,
+            "user_id": int(user_id),
+        }) is not None
+
+    def _pending_send(self, client_msg_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not client_msg_id:
+            return None
+        return next((e for e in self._entries
+                     if e.get("op") == OP_SEND and e.get("client_msg_id") == client_msg_id
+                     and e["key"] not in self._in_flight), None)
+
+    # --- inspection ---
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def pending_messages(self, chat_id: int) -> List[Dict[str, Any]]:
+        """Return queued sends for chat_id shaped like chat_messages rows (flagged ``pending``)."""
+        with self._lock:
+            return [{
+                "id": None,
+                "client_msg_id": e["client_msg_id"],
+                "chat_id": e["chat_id"],
+                "sender_id": e["sender_id"],
+                "message": e["message"],
+                "sent_at": e.get("queued_at"),
+                "edited": False,
+                "deleted": False,
+                "read_status": 0,
+                "pending": True,
+            } for e in self._entries if e.get("op") == OP_SEND and int(e.get("chat_id")) == int(chat_id)]
+
+    # --- replay ---
+    def replay(self, batch_size: int = 100) -> int:
+        """
+        Replay queued operations to the database in batches.
+
+        Each batch is applied in a single transaction on one connection; the
+        batch is removed from the outbox only after commit. Sends use
+        ``ON DUPLICATE KEY UPDATE`` on ``client_msg_id`` so replaying a batch
+        that was committed but not yet acknowledged is harmless.
+
+        If a batch fails while the database is still reachable, the server
+        rejected one of its operations: the batch is then applied one
+        operation at a time and the rejected ones are moved to the rejected
+        file, so one bad entry cannot block the queue. If the database went
+        away, the batch stays queued for the next attempt.
+
+        Returns:
+            int: number of operations applied, or -1 if the database is unreachable.
+        """
+        applied = 0
+        while True:
+            with self._lock:
+                batch = [dict(e) for e in self._entries[:batch_size]]
+                self._in_flight = {e["key"] for e in batch}
+            if not batch:
+                return applied
+            try:
+                conn = get_connection()
+                if not conn:
+                    self.db_healthy = False
+                    return -1 if applied == 0 else applied
+                self.db_healthy = True
+                if self._apply_batch(conn, batch):
+                    done, rejected, reachable = batch, [], True
+                elif not is_database_available():
+                    self.db_healthy = False
+                    return applied
+                else:
+                    done, rejected, reachable = self._apply_singly(batch)
+                finished = {e["key"] for e in done + rejected}
+                with self._lock:
+                    if rejected and not self._reject(rejected):
+                        # keep them queued rather than lose them
+                        finished -= {e["key"] for e in rejected}
+                    self._entries = [e for e in self._entries if e["key"] not in finished]
+                    self._save()
+            finally:
+                with self._lock:
+                    self._in_flight = set()
+            applied += len(done)
+            if not reachable:
+                self.db_healthy = False
+                return applied
+
+    def _apply_singly(self, batch: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], bool]:
+        """
+        Apply a batch one operation per transaction, in queue order.
+
+        Returns:
+            tuple: (applied entries, rejected entries, whether the database
+            stayed reachable); on an outage the rest of the batch is left untouched.
+        """
+        done, rejected = [], []
+        for entry in batch:
+            conn = get_connection()
+            if not conn:
+                return done, rejected, False
+            if self._apply_batch(conn, [entry]):
+                done.append(entry)
+            elif is_database_available():
+                rejected.append(entry)
+            else:
+                return done, rejected, False
+        return done, rejected, True
+
+    @staticmethod
+    def _apply_batch(conn, batch: List[Dict[str, Any]]) -> bool:
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            conn.start_transaction()
+            sends = [e for e in batch if e.get("op") == OP_SEND]
+            if sends:
+                cursor.executemany(
+                    "INSERT INTO chat_messages (chat_id, sender_id, message, read_status, client_msg_id) "
+                    "VALUES (%s, %s, %s, 0, %s) ON DUPLICATE KEY UPDATE id = id",
+                    [(e["chat_id"], e["sender_id"], e["message"], e["client_msg_id"]) for e in sends],
+                )
+                chat_ids = sorted({int(e["chat_id"]) for e in sends})
+                placeholders = ", ".join(["%s"] * len(chat_ids))
+                cursor.execute(f"UPDATE chats SET updated_at = CURRENT_TIMESTAMP WHERE id IN ({placeholders})",
+                               tuple(chat_ids))
+            # edits/deletes keep queue order; every send they can reference is already applied above
+            for e in batch:
+                if e.get("op") == OP_EDIT:
+                    cursor.execute(
+                        "UPDATE chat_messages SET message = %s, edited = 1, edited_at = CURRENT_TIMESTAMP "
+                        "WHERE (id = %s OR client_msg_id = %s) AND sender_id = %s AND deleted = 0",
+                        (e["message"], e.get("message_id"), e.get("client_msg_id"), e["user_id"]),
+                    )
+                elif e.get("op") == OP_DELETE:
+                    cursor.execute(
+                        "UPDATE chat_messages SET deleted = 1, deleted_at = CURRENT_TIMESTAMP, message = '' "
+                        "WHERE (id = %s OR client_msg_id = %s) AND sender_id = %s",
+                        (e.get("message_id"), e.get("client_msg_id"), e["user_id"]),
+                    )
+            conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Chat outbox replay failed: {e}")
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            return False
+        finally:
+            if cursor:
+                cursor.close()
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    # --- worker control ---
+    def start_worker(self, interval: float = 5.0) -> "OutboxWorker":
+        """Start the background replay worker (idempotent)."""
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = OutboxWorker(self, interval)
+                self._worker.start()
+            return self._worker
+
+    def stop_worker(self):
+        """Stop the background replay worker if running."""
+        with self._lock:
+            worker = self._worker
+            self._worker = None
+        if worker:
+            worker.stop()
+
+    def wake(self):
+        """Ask the worker to attempt a replay now."""
+        self._wake.set()
+
+
+class OutboxWorker(threading.Thread):
+    """Daemon thread that drains the outbox whenever it has entries and the DB is reachable."""
+
+    def __init__(self, outbox: ChatOutbox, interval: float = 5.0, batch_size: int = 100):
+        super().__init__(name="chat-outbox", daemon=True)
+        self.outbox = outbox
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.is_set():
+            self.outbox._wake.wait(self.interval)
+            self.outbox._wake.clear()
+            if self._stopped.is_set():
+                break
+            if len(self.outbox):
+                try:
+                    self.outbox.replay(self.batch_size)
+                except Exception as e:
+                    logger.error(f"Chat outbox worker error: {e}")
+
+    def stop(self):
+        self._stopped.set()
+        self.outbox._wake.set()
+
+
+_OUTBOX: Optional[ChatOutbox] = None
+_OUTBOX_LOCK = threading.Lock()
+
+
+def get_outbox() -> ChatOutbox:
+    """Return the process-wide chat outbox."""
+    global _OUTBOX
+    with _OUTBOX_LOCK:
+        if _OUTBOX is None:
+            _OUTBOX = ChatOutbox()
+        return _OUTBOX
@@ -0,0 +1,152 @@
+"""
+Group Chat Model
+----------------
+Course-wide conversations (teacher announcements to a class).
+
+A group is keyed to a course; members are the course's active students from
+`student_courses` plus the owning teacher. A message is stored once in
+`chat_group_messages` no matter how many members the group has, and each
+member's read state is a single watermark in `chat_group_members`.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from app.utils.database import execute_query, execute_in_transaction
+
+
+class GroupChat:
+    """Static helpers for course group conversations."""
+
+    @staticmethod
+    def send_course_announcement(course_id: int, teacher_id: int, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Post one announcement to everyone enrolled in a course.
+
+        Runs a fixed number of statements in a single transaction regardless of
+        class size: upsert the course group, sync membership from student_courses
+        (one INSERT ... SELECT for new students, one DELETE for members no longer
+        actively enrolled), insert the message row once, and advance the sender's
+        own watermark.
+
+        Args:
+            course_id (int): The course to announce to.
+            teacher_id (int): Sender; must be the course's teacher.
+            text (str): Announcement text.
+
+        Returns:
+            dict: {"group_id", "message_id", "recipients"} or None on failure.
+        """
+        if not course_id or not teacher_id or not (text or "").strip():
+            return None
+
+        def _announce(cursor):
+            cursor.execute("SELECT name FROM courses WHERE id = %s AND teacher_id = %s", (course_id, teacher_id))
+            course = cursor.fetchone()
+            if not course:
+                # not this teacher's course
+                return None
+            # LAST_INSERT_ID(id) makes lastrowid the existing group's id on duplicate
+            cursor.execute(
+                "INSERT INTO chat_groups (course_id, owner_id, name) VALUES (%s, %s, %s) "
+                "ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id), owner_id = VALUES(owner_id)",
+                (course_id, teacher_id, course["name"]),
+            )
+            group_id = cursor.lastrowid
+            cursor.execute(
+                "INSERT IGNORE INTO chat_group_members (group_id, user_id) "
+                "SELECT %s, student_id FROM student_courses WHERE course_id = %s AND active = 1",
+                (group_id, course_id),
+            )
+            # dropped or deactivated students stop receiving the course's announcements (the owner stays)
+            cursor.execute(
+                "DELETE gm FROM chat_group_members gm "
+                "LEFT JOIN student_courses sc ON sc.student_id = gm.user_id AND sc.course_id = %s AND sc.active = 1 "
+                "WHERE gm.group_id = %s AND gm.user_id != %s AND sc.student_id IS NULL",
+                (course_id, group_id, teacher_id),
+            )
+            cursor.execute(
+                "INSERT INTO chat_group_messages (group_id, sender_id, message) VALUES (%s, %s, %s)",
+                (group_id, teacher_id, text),
+            )
+            message_id = cursor.lastrowid
+            cursor.execute(
+                "INSERT INTO chat_group_members (group_id, user_id, last_read_message_id) VALUES (%s, %s, %s) "
+                "ON DUPLICATE KEY UPDATE last_read_message_id = GREATEST(last_read_message_id, VALUES(last_read_message_id))",
+                (group_id, teacher_id, message_id),
+            )
+            cursor.execute(
+                "SELECT COUNT(*) AS recipients FROM chat_group_members WHERE group_id = %s AND user_id != %s",
+                (group_id, teacher_id),
+            )
+            recipients = cursor.fetchone()["recipients"]
+            return {"group_id": group_id, "message_id": message_id, "recipients": recipients}
+
+        return execute_in_transaction(_announce)
+
+    @staticmethod
+    def post_message(group_id: int, sender_id: int, text: str) -> bool:
+        """Post to an existing group. Only the group owner (the teacher) may post."""
+        if not group_id or not sender_id or not (text or "").strip():
+            return False
+        result = execute_query(
+            "INSERT INTO chat_group_messages (group_id, sender_id, message) "
+            "SELECT id, %s, %s FROM chat_groups WHERE id = %s AND owner_id = %s",
+            (sender_id, text, group_id, sender_id), commit=True)
+        return bool(result)
+
+    @staticmethod
+    def get_groups(user_id: int) -> List[Dict[str, Any]]:
+        """
+        Return the groups user_id belongs to with last message and unread count.
+        Unread counts compare ids against the member's watermark.
+        """
+        if not user_id:
+            return []
+        query = """
+            SELECT
+                g.id AS group_id,
+                g.course_id,
+                g.owner_id,
+                g.name,
+                gm.last_read_message_id AS last_read_id,
+                lm.message AS last_message,
+                lm.sent_at AS last_at,
+                (SELECT COUNT(*) FROM chat_group_messages m
+                 WHERE m.group_id = g.id AND m.id > gm.last_read_message_id AND m.sender_id != %(uid)s) AS unread_count
+            FROM chat_group_members gm
+            JOIN chat_groups g ON g.id = gm.group_id
+            LEFT JOIN chat_group_messages lm ON lm.id = (SELECT MAX(m2.id) FROM chat_group_messages m2 WHERE m2.group_id = g.id)
+            WHERE gm.user_id = %(uid)s
+            ORDER BY last_at DESC
+        """
+        return execute_query(query, {"uid": user_id}, fetch=True) or []
+
+    @staticmethod
+    def get_messages(group_id: int, limit: int = 50, after_id: int = None,
+                     before_id: int = None) -> List[Dict[str, Any]]:
+        """Return a page of group messages ordered by id ascending (same keyset rules as Chat.get_messages)."""
+        if not group_id:
+            return []
+        cols = "id, group_id, sender_id, message, sent_at"
+        if after_id:
+            q = f"SELECT {cols} FROM chat_group_messages WHERE group_id = %s AND id > %s ORDER BY id ASC LIMIT %s"
+            params = (group_id, after_id, limit)
+        elif before_id:
+            q = f"SELECT {cols} FROM chat_group_messages WHERE group_id = %s AND id < %s ORDER BY id DESC LIMIT %s"
+            params = (group_id, before_id, limit)
+        else:
+            q = f"SELECT {cols} FROM chat_group_messages WHERE group_id = %s ORDER BY id DESC LIMIT %s"
+            params = (group_id, limit)
+        rows = execute_query(q, params, fetch=True) or []
+        return rows if after_id else rows[::-1]
+
+    @staticmethod
+    def mark_read(group_id: int, user_id: int, up_to_id: int) -> bool:
+        """Advance a member's watermark; writes only when it moves forward."""
+        if not group_id or not user_id or not up_to_id:
+            return False
+        result = execute_query(
+            "UPDATE chat_group_members SET last_read_message_id = %s "
+            "WHERE group_id = %s AND user_id = %s AND last_read_message_id < %s",
+            (up_to_id, group_id, user_id, up_to_id), commit=True)
+        return bool(result)
@@ -4,13 +4,15 @@ User Model
 Represents a user in the system and provides methods for user-related operations.
 """
 
-from app.utils.database import execute_query, execute_transaction, get_connection
+from app.utils.database import (execute_query, execute_transaction, execute_in_transaction, get_connection,
+                                is_database_available)
+from app.models.chat_outbox import get_outbox, new_client_msg_id
 from app.utils.crypto import hash_password, verify_password
+from app.utils.search_index import InvertedIndex, tokenize
 import logging
 import json
 from pathlib import Path
-from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 _DATA_DIR = Path(__file__).resolve().parents[1] / "data"
 _CHATS_FILE = _DATA_DIR / "chats.json"
@@ -50,26 +52,70 @@ def _next_message_id(data: Dict[str, Any]) -> int:
     data["next_message_id"] = nid + 1
     return nid
 
+_SEARCH_INDEX = InvertedIndex()
+_SEARCH_INDEX_MTIME = None
+
+def _json_search_index() -> InvertedIndex:
+    """Return the JSON-store search index, syncing it if chats.json changed since the last search."""
+    global _SEARCH_INDEX_MTIME
+    try:
+        mtime = _CHATS_FILE.stat().st_mtime
+    except OSError:
+        mtime = 0
+    if mtime != _SEARCH_INDEX_MTIME:
+        data = _load_chats_json()
+        _SEARCH_INDEX.sync(dict(m, chat_id=c.get("id")) for c in data.get("chats", []) for m in c.get("messages", []))
+        _SEARCH_INDEX_MTIME = mtime
+    return _SEARCH_INDEX
+
+def _json_watermark_key(chat: Dict[str, Any], user_id: int) -> str:
+    """Name of the read-watermark field for user_id on a JSON-store chat."""
+    return "user1_last_read_id" if int(chat.get("user1_id")) == int(user_id) else "user2_last_read_id"
+
+# InnoDB FULLTEXT defaults: shorter words and these stopwords are not indexed
+_FT_MIN_TOKEN_SIZE = 3
+_FT_STOPWORDS = frozenset((
+    "a", "about", "an", "are", "as", "at", "be", "by", "com", "de", "en", "for", "from", "how", "i", "in",
+    "is", "it", "la", "of", "on", "or", "that", "the", "this", "to", "was", "what", "when", "where", "who",
+    "will", "with", "und", "www",
+))
+
+def _fulltext_query(query: str) -> str:
+    """
+    Build a MySQL boolean-mode query requiring every word; the last word matches as a prefix.
+    Words the index does not hold (too short, stopwords) are left out, since requiring them
+    would match nothing; returns "" if no word is left.
+    """
+    terms = tokenize(query)
+    required = [f"+{t}" for t in terms[:-1] if len(t) >= _FT_MIN_TOKEN_SIZE and t not in _FT_STOPWORDS]
+    if terms and len(terms[-1]) >= _FT_MIN_TOKEN_SIZE and terms[-1] not in _FT_STOPWORDS:
+        required.append(f"+{terms[-1]}*")
+    return " ".join(required)
+
 logger = logging.getLogger(__name__)
 
-_CHAT_META_SUPPORTED = None
+_COLUMN_SUPPORT = {}
 
 def _db_supports_chat_meta() -> bool:
     """
     Detect whether the DB chat_messages table contains edited/deleted columns.
-    Cache the result in _CHAT_META_SUPPORTED.
     """
-    global _CHAT_META_SUPPORTED
-    if _CHAT_META_SUPPORTED is not None:
-        return _CHAT_META_SUPPORTED
-    try:
-        # try a lightweight read that references one of the new columns
-        # If the column is missing this will raise and we catch it.
-        execute_query("SELECT edited FROM chat_messages LIMIT 1", fetch=True)
-        _CHAT_META_SUPPORTED = True
-    except Exception:
-        _CHAT_META_SUPPORTED = False
-    return _CHAT_META_SUPPORTED
+    return _db_has_column("chat_messages", "edited")
+
+def _db_has_column(table: str, column: str) -> bool:
+    """
+    Detect whether a newer optional column (added by a migration) exists.
+    Only a definite answer is cached so the check is retried after an outage.
+    """
+    key = (table, column)
+    if key in _COLUMN_SUPPORT:
+        return _COLUMN_SUPPORT[key]
+    if execute_query(f"SELECT {column} FROM {table} LIMIT 1", fetch=True) is not None:
+        _COLUMN_SUPPORT[key] = True
+        return True
+    if is_database_available():
+        _COLUMN_SUPPORT[key] = False
+    return False
 
 class User:
     """
@@ -475,11 +521,38 @@ class User:
     # Controller code can call User.get_chats(user_id) etc.
     @staticmethod
     def get_chats(user_id: int) -> List[Dict[str, Any]]:
-        """Return list of chats for user_id. Try DB first; on failure, use JSON store."""
+        """
+        Return list of chats for user_id. Try DB first; on failure, use JSON store.
+
+        Unread counts compare message ids against the user's read watermark
+        (chats.user1_last_read_id / user2_last_read_id), a range scan on idx_chat_id.
+        """
         if not user_id:
             return []
-        # Try DB
-        try:
+        if _db_has_column("chats", "user1_last_read_id"):
+            query = """
+                SELECT
+                    c.id AS chat_id,
+                    CASE WHEN c.user1_id = %(uid)s THEN c.user2_id ELSE c.user1_id END AS other_user_id,
+                    u.username AS other_username,
+                    u.first_name,
+                    u.last_name,
+                    lm.message AS last_message,
+                    lm.sent_at AS last_at,
+                    CASE WHEN c.user1_id = %(uid)s THEN c.user1_last_read_id ELSE c.user2_last_read_id END AS last_read_id,
+                    (SELECT COUNT(*) FROM chat_messages m
+                     WHERE m.chat_id = c.id
+                       AND m.id > CASE WHEN c.user1_id = %(uid)s THEN c.user1_last_read_id ELSE c.user2_last_read_id END
+                       AND m.sender_id != %(uid)s) AS unread_count
+                FROM chats c
+                LEFT JOIN users u ON u.id = CASE WHEN c.user1_id = %(uid)s THEN c.user2_id ELSE c.user1_id END
+                LEFT JOIN chat_messages lm ON lm.id = (SELECT MAX(m2.id) FROM chat_messages m2 WHERE m2.chat_id = c.id)
+                WHERE c.user1_id = %(uid)s OR c.user2_id = %(uid)s
+                ORDER BY last_at DESC
+            """
+            params = {"uid": user_id}
+        else:
+            # pre-watermark schema: count per-row read flags
             # Use ANY_VALUE for non-aggregated user columns so query works with ONLY_FULL_GROUP_BY
             query = """
                 SELECT
@@ -499,49 +572,53 @@ class User:
                 ORDER BY last_at DESC
             """
             # parameters: user_id used in CASE, in SUM, in LEFT JOIN CASE, and twice in WHERE
-            rows = execute_query(query, (user_id, user_id, user_id, user_id, user_id), fetch=True) or []
+            params = (user_id, user_id, user_id, user_id, user_id)
+        rows = execute_query(query, params, fetch=True)
+        if rows is not None:
             return rows
-        except Exception:
-            # Fallback to JSON file
-            data = _load_chats_json()
-            chats_out = []
-            for c in data.get("chats", []):
-                if int(c.get("user1_id")) == int(user_id) or int(c.get("user2_id")) == int(user_id):
-                    other_id = c["user2_id"] if int(c["user1_id"]) == int(user_id) else c["user1_id"]
-                    last_msg = None
-                    last_at = None
-                    unread = 0
-                    msgs = c.get("messages", [])
-                    if msgs:
-                        last = msgs[-1]
-                        last_msg = last.get("message")
-                        last_at = last.get("sent_at")
-                        for m in msgs:
-                            if m.get("sender_id") != user_id and user_id not in m.get("read_by", []):
-                                unread += 1
-                    # try to fetch user fields
-                    try:
-                        u = User.get_by_id(other_id)
-                        other_username = u.username if u else None
-                        first_name = getattr(u, "first_name", "")
-                        last_name = getattr(u, "last_name", "")
-                    except Exception:
-                        other_username = None
-                        first_name = ""
-                        last_name = ""
-                    chats_out.append({
-                        "chat_id": c.get("id"),
-                        "other_user_id": other_id,
-                        "other_username": other_username,
-                        "first_name": first_name,
-                        "last_name": last_name,
-                        "last_message": last_msg,
-                        "last_at": last_at,
-                        "unread_count": unread
-                    })
-            # sort by last_at (most recent first)
-            chats_out.sort(key=lambda x: x.get("last_at") or "", reverse=True)
-            return chats_out
+        # Fallback to JSON file
+        data = _load_chats_json()
+        chats_out = []
+        for c in data.get("chats", []):
+            if int(c.get("user1_id")) == int(user_id) or int(c.get("user2_id")) == int(user_id):
+                other_id = c["user2_id"] if int(c["user1_id"]) == int(user_id) else c["user1_id"]
+                last_msg = None
+                last_at = None
+                unread = 0
+                msgs = c.get("messages", [])
+                if msgs:
+                    last = msgs[-1]
+                    last_msg = last.get("message")
+                    last_at = last.get("sent_at")
+                    last_read = int(c.get(_json_watermark_key(c, user_id)) or 0)
+                    for m in msgs:
+                        if int(m.get("sender_id")) != int(user_id) and int(m.get("id", 0)) > last_read \
+                                and int(user_id) not in m.get("read_by", []):
+                            unread += 1
+                # try to fetch user fields
+                try:
+                    u = User.get_by_id(other_id)
+                    other_username = u.username if u else None
+                    first_name = getattr(u, "first_name", "")
+                    last_name = getattr(u, "last_name", "")
+                except Exception:
+                    other_username = None
+                    first_name = ""
+                    last_name = ""
+                chats_out.append({
+                    "chat_id": c.get("id"),
+                    "other_user_id": other_id,
+                    "other_username": other_username,
+                    "first_name": first_name,
+                    "last_name": last_name,
+                    "last_message": last_msg,
+                    "last_at": last_at,
+                    "last_read_id": int(c.get(_json_watermark_key(c, user_id)) or 0),
+                    "unread_count": unread
+                })
+        # sort by last_at (most recent first)
+        chats_out.sort(key=lambda x: x.get("last_at") or "", reverse=True)
+        return chats_out
 
     @staticmethod
     def get_or_create_chat(user1_id: int, user2_id: int) -> int:
@@ -554,10 +631,13 @@ class User:
             r = execute_query(q, (user1_id, user2_id, user2_id, user1_id), fetch=True)
             if r and len(r) > 0:
                 return r[0].get("id")
-            insert_q = "INSERT INTO chats (user1_id, user2_id) VALUES (%s, %s)"
-            execute_query(insert_q, (user1_id, user2_id), commit=True)
-            last = execute_query("SELECT LAST_INSERT_ID() as id", fetch=True)
-            return last[0].get("id") if last else None
+            # insert and read the id on the same connection (LAST_INSERT_ID is per connection);
+            # a concurrent create of the same pair resolves to the existing row
+            def _create(cursor):
+                cursor.execute("INSERT INTO chats (user1_id, user2_id) VALUES (%s, %s) "
+                               "ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)", (user1_id, user2_id))
+                return cursor.lastrowid
+            return execute_in_transaction(_create)
         except Exception:
             # JSON fallback
             data = _load_chats_json()
@@ -574,159 +654,287 @@ class User:
             return cid
 
     @staticmethod
-    def get_messages(chat_id: int, limit: int = 200, after_id: int = None) -> List[Dict[str, Any]]:
-        """Return list of messages for chat_id ordered asc. DB-first, JSON fallback."""
+    def get_messages(chat_id: int, limit: int = 50, after_id: int = None,
+                     before_id: int = None) -> List[Dict[str, Any]]:
+        """
+        Return a page of messages for chat_id ordered by id ascending. DB-first, JSON fallback.
+
+        Pagination is keyset-based on the message id (served by idx_chat_id, which
+        carries the primary key):
+          - no cursor: the newest `limit` messages
+          - before_id: the `limit` messages just older than before_id ("load older")
+          - after_id:  the `limit` messages just newer than after_id (polling)
+        """
         if not chat_id:
             return []
-        # Try DB first; select columns depending on DB support
-        try:
-            if _db_supports_chat_meta():
-                if after_id:
-                    q = ("SELECT id, chat_id, sender_id, message, edited, edited_at, deleted, deleted_at, "
-                         "read_status, sent_at FROM chat_messages WHERE chat_id = %s AND id > %s ORDER BY sent_at ASC LIMIT %s")
-                    params = (chat_id, after_id, limit)
-                else:
-                    q = ("SELECT id, chat_id, sender_id, message, edited, edited_at, deleted, deleted_at, "
-                         "read_status, sent_at FROM chat_messages WHERE chat_id = %s ORDER BY sent_at ASC LIMIT %s")
-                    params = (chat_id, limit)
-            else:
-                if after_id:
-                    q = "SELECT id, chat_id, sender_id, message, read_status, sent_at FROM chat_messages WHERE chat_id = %s AND id > %s ORDER BY sent_at ASC LIMIT %s"
-                    params = (chat_id, after_id, limit)
-                else:
-                    q = "SELECT id, chat_id, sender_id, message, read_status, sent_at FROM chat_messages WHERE chat_id = %s ORDER BY sent_at ASC LIMIT %s"
-                    params = (chat_id, limit)
-            rows = execute_query(q, params, fetch=True) or []
-            return rows
-        except Exception:
-            # Fallback to JSON file if DB unavailable or query fails
-            data = _load_chats_json()
-            chat = next((c for c in data.get("chats", []) if int(c.get("id")) == int(chat_id)), None)
-            if not chat:
-                return []
-            msgs = chat.get("messages", [])
-            if after_id:
-                msgs = [m for m in msgs if int(m.get("id", 0)) > int(after_id)]
-            return msgs[-limit:] if limit else msgs
+        if _db_supports_chat_meta():
+            cols = "id, chat_id, sender_id, message, edited, edited_at, deleted, deleted_at, read_status, sent_at"
+        else:
+            cols = "id, chat_id, sender_id, message, read_status, sent_at"
+        if after_id:
+            q = f"SELECT {cols} FROM chat_messages WHERE chat_id = %s AND id > %s ORDER BY id ASC LIMIT %s"
+            params = (chat_id, after_id, limit)
+        elif before_id:
+            q = f"SELECT {cols} FROM chat_messages WHERE chat_id = %s AND id < %s ORDER BY id DESC LIMIT %s"
+            params = (chat_id, before_id, limit)
+        else:
+            q = f"SELECT {cols} FROM chat_messages WHERE chat_id = %s ORDER BY id DESC LIMIT %s"
+            params = (chat_id, limit)
+        rows = execute_query(q, params, fetch=True)
+        if rows is not None:
+            return rows if after_id else rows[::-1]
+        # Fallback to JSON file if DB unavailable or query fails
+        data = _load_chats_json()
+        chat = next((c for c in data.get("chats", []) if int(c.get("id")) == int(chat_id)), None)
+        if not chat:
+            return []
+        msgs = sorted(chat.get("messages", []), key=lambda m: int(m.get("id", 0)))
+        if after_id:
+            msgs = [m for m in msgs if int(m.get("id", 0)) > int(after_id)]
+            return msgs[:limit] if limit else msgs
+        if before_id:
+            msgs = [m for m in msgs if int(m.get("id", 0)) < int(before_id)]
+        return msgs[-limit:] if limit else msgs
 
     @staticmethod
-    def send_message(chat_id: int, sender_id: int, text: str) -> bool:
-        """Insert a chat message (DB-first, JSON fallback)."""
-        if not chat_id or not sender_id or not text:
+    def mark_messages_read(chat_id: int, user_id: int, up_to_id: int = None) -> bool:
+        """
+        Advance user_id's read watermark in chat_id to up_to_id (default: the newest message).
+
+        The update is conditional and monotonic: it only writes when the watermark
+        actually moves forward, so repeated calls for an already-read chat are
+        a single indexed no-op statement. `updated_at` is pinned so reading does
+        not count as chat activity.
+
+        Returns:
+            bool: True if the watermark moved.
+        """
+        if not chat_id or not user_id:
             return False
-        # try DB insert
-        try:
-            q = "INSERT INTO chat_messages (chat_id, sender_id, message, read_status) VALUES (%s, %s, %s, 0)"
-            execute_query(q, (chat_id, sender_id, text), commit=True)
-            try:
-                execute_query("UPDATE chats SET updated_at = CURRENT_TIMESTAMP WHERE id = %s", (chat_id,), commit=True)
-            except Exception:
-                pass
-            return True
-        except Exception:
-            data = _load_chats_json()
-            chat = next((c for c in data.get("chats", []) if int(c.get("id")) == int(chat_id)), None)
-            if not chat:
-                return False
-            mid = _next_message_id(data)
-            sent_at = datetime.utcnow().isoformat()
-            msg = {
-                "id": mid,
-                "sender_id": int(sender_id),
-                "message": text,
-                "sent_at": sent_at,
-                "read_by": [int(sender_id)],
-                "edited": False,
-                "edited_at": None,
-                "deleted": False,
-                "deleted_at": None,
-                "read_status": False
-            }
-            chat.setdefault("messages", []).append(msg)
-            saved = _save_chats_json(data)
-            return saved
+        if up_to_id is None:
+            r = execute_query("SELECT MAX(id) AS max_id FROM chat_messages WHERE chat_id = %s", (chat_id,), fetch=True)
+            if r is None:
+                return User._mark_read_json(chat_id, user_id, up_to_id)
+            up_to_id = (r[0].get("max_id") if r else None) or 0
+        if not up_to_id:
+            return False
+        q = """
+            UPDATE chats
+            SET user1_last_read_id = CASE WHEN user1_id = %(uid)s AND user1_last_read_id < %(mid)s
+                                          THEN %(mid)s ELSE user1_last_read_id END,
+                user2_last_read_id = CASE WHEN user2_id = %(uid)s AND user2_last_read_id < %(mid)s
+                                          THEN %(mid)s ELSE user2_last_read_id END,
+                updated_at = updated_at
+            WHERE id = %(cid)s
+              AND ((user1_id = %(uid)s AND user1_last_read_id < %(mid)s)
+                   OR (user2_id = %(uid)s AND user2_last_read_id < %(mid)s))
+        """
+        result = execute_query(q, {"uid": user_id, "mid": int(up_to_id), "cid": chat_id}, commit=True)
+        if result is None and not is_database_available():
+            return User._mark_read_json(chat_id, user_id, up_to_id)
+        return bool(result)
 
     @staticmethod
-    def edit_message(message_id: int, user_id: int, new_text: str) -> bool:
-        """Allow the sender to edit their message. Returns True on success."""
-        if not message_id or not user_id or new_text is None:
+    def _mark_read_json(chat_id: int, user_id: int, up_to_id: int = None) -> bool:
+        """JSON-store counterpart of mark_messages_read."""
+        data = _load_chats_json()
+        chat = next((c for c in data.get("chats", []) if int(c.get("id")) == int(chat_id)), None)
+        if not chat or int(user_id) not in (int(chat.get("user1_id")), int(chat.get("user2_id"))):
             return False
-        # Try DB
-        try:
-            r = execute_query("SELECT sender_id FROM chat_messages WHERE id = %s", (message_id,), fetch=True)
-            if not r:
-                return False
-            if int(r[0].get("sender_id")) != int(user_id):
-                return False
-            # Try rich update first, fallback to simple update if server lacks columns
-            try:
-                execute_query("UPDATE chat_messages SET message = %s, edited = 1, edited_at = CURRENT_TIMESTAMP WHERE id = %s",
-                              (new_text, message_id), commit=True)
-            except Exception as ex:
-                # If edited column missing, fallback to updating only message
-                if "Unknown column" in str(ex) or "edited" in str(ex).lower():
-                    execute_query("UPDATE chat_messages SET message = %s WHERE id = %s", (new_text, message_id), commit=True)
-                else:
-                    raise
-            return True
-        except Exception:
-            # JSON fallback
-            data = _load_chats_json()
-            changed = False
-            for c in data.get("chats", []):
-                for m in c.get("messages", []):
-                    if int(m.get("id")) == int(message_id):
-                        if int(m.get("sender_id")) != int(user_id):
-                            return False
-                        m["message"] = new_text
-                        m["edited"] = True
-                        m["edited_at"] = datetime.utcnow().isoformat()
-                        changed = True
-                        break
-                if changed:
-                    break
-            if changed:
-                return _save_chats_json(data)
+        if up_to_id is None:
+            up_to_id = max((int(m.get("id", 0)) for m in chat.get("messages", [])), default=0)
+        key = _json_watermark_key(chat, user_id)
+        if int(chat.get(key) or 0) >= int(up_to_id):
             return False
+        chat[key] = int(up_to_id)
+        return _save_chats_json(data)
+
+    @staticmethod
+    def search_messages(user_id: int, query: str, limit: int = 20, cursor=None) -> Dict[str, Any]:
+        """
+        Full-text search over the messages of the chats user_id takes part in.
+
+        Uses the FULLTEXT index on chat_messages.message (boolean mode, ranked by
+        relevance); a query made only of words the index skips (short words,
+        stopwords) falls back to a substring match over the user's chats,
+        newest first. When the database is unreachable the JSON chat store is
+        searched through an in-process inverted index.
+
+        Args:
+            user_id (int): The searching user; results are limited to their chats.
+            query (str): Search text.
+            limit (int): Page size.
+            cursor (tuple, optional): `next_cursor` from the previous page, i.e. (score, message_id).
+
+        Returns:
+            dict: {"results": [message rows with a `score`], "next_cursor": tuple or None}
+        """
+        empty = {"results": [], "next_cursor": None}
+        terms = tokenize(query)
+        if not user_id or not terms:
+            return empty
+        ft_query = _fulltext_query(query)
+        if ft_query:
+            score, score_params = "MATCH(m.message) AGAINST (%s IN BOOLEAN MODE)", [ft_query]
+            match, match_params = score, [ft_query]
+        else:
+            # nothing the index can look up: substring match (every word), all scored 0, newest first
+            score, score_params = "0", []
+            match = " AND ".join(["m.message LIKE %s"] * len(terms))
+            match_params = ["%" + t.replace("_", "\\_") + "%" for t in terms]
+        not_deleted = "AND m.deleted = 0" if _db_supports_chat_meta() else ""
+        having, params = "", score_params + [user_id, user_id] + match_params
+        if cursor:
+            having = "HAVING score < %s OR (score = %s AND id < %s)"
+            params += [float(cursor[0]), float(cursor[0]), int(cursor[1])]
+        q = f"""
+            SELECT m.id, m.chat_id, m.sender_id, m.message, m.sent_at,
+                   {score} AS score
+            FROM chats c
+            JOIN chat_messages m ON m.chat_id = c.id
+            WHERE (c.user1_id = %s OR c.user2_id = %s)
+              AND {match}
+              {not_deleted}
+            {having}
+            ORDER BY score DESC, m.id DESC
+            LIMIT %s
+        """
+        rows = execute_query(q, tuple(params + [limit + 1]), fetch=True)
+        if rows is not None:
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = (float(rows[-1]["score"]), int(rows[-1]["id"]))
+            return {"results": rows, "next_cursor": next_cursor}
+        if is_database_available():
+            logger.error("Chat search failed; is the ft_chat_messages_message FULLTEXT index installed?")
+            return empty
+
+        # JSON fallback: incremental in-process inverted index
+        data = _load_chats_json()
+        chats = [c for c in data.get("chats", [])
+                 if int(c.get("user1_id")) == int(user_id) or int(c.get("user2_id")) == int(user_id)]
+        hits, next_cursor = _json_search_index().search(query, [c.get("id") for c in chats], limit, cursor)
+        by_id = {int(m.get("id")): dict(m, chat_id=c.get("id")) for c in chats for m in c.get("messages", [])}
+        results = [dict(by_id[mid], score=score) for mid, score in hits if mid in by_id]
+        return {"results": results, "next_cursor": next_cursor}
+
+    @staticmethod
+    def send_message(chat_id: int, sender_id: int, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Insert a chat message and touch its chat in one transaction.
+
+        When the database is unreachable the send is queued in the chat outbox
+        (see app.models.chat_outbox) and replayed later, so the call still succeeds.
+
+        Returns:
+            dict: {"id", "sent_at", "client_msg_id", "pending"} describing the stored
+                  (or queued, with id None) message so callers can append it without
+                  a refetch; None on failure.
+        """
+        if not chat_id or not sender_id or not text:
+            return None
+        outbox = get_outbox()
+        client_msg_id = new_client_msg_id()
+
+        def _queue():
+            entry = outbox.enqueue_send(chat_id, sender_id, text, client_msg_id)
+            if entry is None:
+                return None
+            return {"id": None, "sent_at": entry.get("queued_at"), "client_msg_id": client_msg_id, "pending": True}
+
+        # known offline: queue immediately instead of blocking on a connect attempt
+        if outbox.db_healthy is False:
+            return _queue()
+        with_client_id = _db_has_column("chat_messages", "client_msg_id")
+
+        def _send(cursor):
+            if with_client_id:
+                cursor.execute("INSERT INTO chat_messages (chat_id, sender_id, message, read_status, client_msg_id) "
+                               "VALUES (%s, %s, %s, 0, %s)", (chat_id, sender_id, text, client_msg_id))
+            else:
+                cursor.execute("INSERT INTO chat_messages (chat_id, sender_id, message, read_status) "
+                               "VALUES (%s, %s, %s, 0)", (chat_id, sender_id, text))
+            message_id = cursor.lastrowid
+            cursor.execute("UPDATE chats SET updated_at = CURRENT_TIMESTAMP WHERE id = %s", (chat_id,))
+            cursor.execute("SELECT sent_at FROM chat_messages WHERE id = %s", (message_id,))
+            row = cursor.fetchone() or {}
+            return {"id": message_id, "sent_at": row.get("sent_at"),
+                    "client_msg_id": client_msg_id if with_client_id else None, "pending": False}
+
+        result = execute_in_transaction(_send)
+        if result is not None:
+            outbox.db_healthy = True
+            return result
+        if is_database_available():
+            # DB is up but rejected the insert (bad chat id, constraint...) - do not retry forever
+            return None
+        outbox.db_healthy = False
+        return _queue()
 
     @staticmethod
-    def delete_message(message_id: int, user_id: int) -> bool:
-        """Allow the sender to mark their message as deleted. Returns True on success."""
-        if not message_id or not user_id:
+    def edit_message(message_id: int, user_id: int, new_text: str, client_msg_id: str = None) -> bool:
+        """
+        Allow the sender to edit their message. Returns True on success.
+
+        Ownership is enforced by the UPDATE itself (`sender_id` in the WHERE
+        clause), so this is a single statement; only when it changes no row
+        (the text is unchanged) does a lookup confirm the message is still the
+        user's to edit. `client_msg_id` identifies a
+        message still waiting in the outbox; edits made while offline are
+        queued and replayed later.
+        """
+        if (not message_id and not client_msg_id) or not user_id or new_text is None:
             return False
-        # Try DB
-        try:
-            r = execute_query("SELECT sender_id FROM chat_messages WHERE id = %s", (message_id,), fetch=True)
-            if not r:
+        outbox = get_outbox()
+        if client_msg_id and not message_id:
+            return outbox.enqueue_edit(user_id, new_text, client_msg_id=client_msg_id)
+        if outbox.db_healthy is not False:
+            not_deleted = " AND deleted = 0" if _db_supports_chat_meta() else ""
+            if not_deleted:
+                q = ("UPDATE chat_messages SET message = %s, edited = 1, edited_at = CURRENT_TIMESTAMP "
+                     "WHERE id = %s AND sender_id = %s" + not_deleted)
+            else:
+                q = "UPDATE chat_messages SET message = %s WHERE id = %s AND sender_id = %s"
+            result = execute_query(q, (new_text, message_id, user_id), commit=True)
+            if result:
+                return True
+            if result is not None:
+                # 0 changed rows also means nothing differed (same text, edited again within
+                # the same second): that is a success if the message is the user's to edit
+                rows = execute_query("SELECT id FROM chat_messages WHERE id = %s AND sender_id = %s" + not_deleted,
+                                     (message_id, user_id), fetch=True)
+                if rows is not None:
+                    return bool(rows)
+            if is_database_available():
                 return False
-            if int(r[0].get("sender_id")) != int(user_id):
+            outbox.db_healthy = False
+        return outbox.enqueue_edit(user_id, new_text, message_id=message_id)
+
+    @staticmethod
+    def delete_message(message_id: int, user_id: int, client_msg_id: str = None) -> bool:
+        """
+        Allow the sender to mark their message as deleted. Returns True on success.
+
+        Single conditional UPDATE, like edit_message. Deletes made while offline
+        are queued in the outbox; deleting a message that has not been replayed
+        yet just drops it from the outbox.
+        """
+        if (not message_id and not client_msg_id) or not user_id:
+            return False
+        outbox = get_outbox()
+        if client_msg_id and not message_id:
+            return outbox.enqueue_delete(user_id, client_msg_id=client_msg_id)
+        if outbox.db_healthy is not False:
+            if _db_supports_chat_meta():
+                q = ("UPDATE chat_messages SET deleted = 1, deleted_at = CURRENT_TIMESTAMP, message = '' "
+                     "WHERE id = %s AND sender_id = %s AND deleted = 0")
+            else:
+                q = "UPDATE chat_messages SET message = '' WHERE id = %s AND sender_id = %s"
+            result = execute_query(q, (message_id, user_id), commit=True)
+            if result is not None:
+                return result > 0
+            if is_database_available():
                 return False
-            # Try rich delete first; if columns missing, fall back to blanking message only
-            try:
-                execute_query("UPDATE chat_messages SET deleted = 1, deleted_at = CURRENT_TIMESTAMP, message = '' WHERE id = %s",
-                              (message_id,), commit=True)
-            except Exception as ex:
-                if "Unknown column" in str(ex) or "deleted" in str(ex).lower():
-                    execute_query("UPDATE chat_messages SET message = '' WHERE id = %s", (message_id,), commit=True)
-                else:
-                    raise
-            return True
-        except Exception:
-            # JSON fallback
-            data = _load_chats_json()
-            changed = False
-            for c in data.get("chats", []):
-                for m in c.get("messages", []):
-                    if int(m.get("id")) == int(message_id):
-                        if int(m.get("sender_id")) != int(user_id):
-                            return False
-                        m["deleted"] = True
-                        m["deleted_at"] = datetime.utcnow().isoformat()
-                        m["message"] = ""
-                        changed = True
-                        break
-                if changed:
-                    break
-            if changed:
-                return _save_chats_json(data)
-            return False
\ No newline at end of file
+            outbox.db_healthy = False
+        return outbox.enqueue_delete(user_id, message_id=message_id)
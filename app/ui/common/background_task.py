@@ -0,0 +1,107 @@
+"""
+Background Task
+---------------
+Runs a long job (import, report, export) on a worker thread and reports back
+on the GUI thread through signals, so the window stays responsive.
+
+The job is called as job(progress, cancelled): progress(stage, done, total)
+may be called from the worker at any rate (updates are forwarded as signals),
+and cancelled() returns True once cancel() was requested.
+"""
+
+import threading
+from typing import Any, Callable
+
+from PyQt5 import QtCore, QtWidgets
+
+
+class BackgroundTask(QtCore.QObject):
+    """
+    One job on a worker thread.
+
+    Signals:
+        progress(str, int, int): stage, done, total.
+        finished(object): The job's return value.
+        failed(str): The exception message if the job raised.
+    """
+
+    progress = QtCore.pyqtSignal(str, int, int)
+    finished = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, job: Callable[..., Any], parent=None):
+        super().__init__(parent)
+        self._job = job
+        self._cancel = threading.Event()
+        self._thread = None
+
+    def start(self):
+        def _run():
+            try:
+                result = self._job(self._report, self._cancel.is_set)
+            except Exception as e:
+                self.failed.emit(str(e))
+                return
+            self.finished.emit(result)
+
+        self._thread = threading.Thread(target=_run, daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        """Ask the job to stop at its next cancelled() check."""
+        self._cancel.set()
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _report(self, stage, done, total):
+        self.progress.emit(str(stage), int(done), int(total))
+
+
+def run_with_progress(parent, title, job, on_finished, on_failed=None):
+    """
+    Run job in a BackgroundTask behind a cancellable progress dialog.
+
+    Args:
+        parent (QWidget): Dialog parent.
+        title (str): Dialog title.
+        job (callable): job(progress, cancelled) run on the worker thread.
+        on_finished (callable): Receives the job's result on the GUI thread.
+        on_failed (callable, optional): Receives the error message (default: warning box).
+
+    Returns:
+        BackgroundTask: The running task (keep a reference while it runs).
+    """
+    dialog = QtWidgets.QProgressDialog(title, "Cancel", 0, 0, parent)
+    dialog.setWindowTitle(title)
+    dialog.setWindowModality(QtCore.Qt.WindowModal)
+    dialog.setMinimumDuration(300)
+    task = BackgroundTask(job, parent)
+
+    def _progress(stage, done, total):
+        if total:
+            dialog.setLabelText(f"{stage.capitalize()}… {done:,} / {total:,}")
+        else:  # open-ended job (e.g. a streamed report): show the count so far
+            dialog.setLabelText(f"{stage.capitalize()}… {done:,}" if done else f"{stage.capitalize()}…")
+        dialog.setMaximum(max(total, 0))
+        dialog.setValue(min(done, total) if total else 0)
+
+    def _done(result):
+        dialog.reset()
+        dialog.deleteLater()
+        on_finished(result)
+
+    def _failed(message):
+        dialog.reset()
+        dialog.deleteLater()
+        if on_failed is not None:
+            on_failed(message)
+        else:
+            QtWidgets.QMessageBox.warning(parent, title, message)
+
+    task.progress.connect(_progress)
+    task.finished.connect(_done)
+    task.failed.connect(_failed)
+    dialog.canceled.connect(task.cancel)
+    task.start()
+    return task
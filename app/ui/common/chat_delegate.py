@@ -0,0 +1,165 @@
+"""
+Chat Bubble Delegate
+--------------------
+Paints chat messages from MessageListModel as bubbles. Text layouts
+(QStaticText) and row sizes are cached per message content and view width,
+so scrolling only blits cached layouts and an edit/delete re-lays out just
+the row whose content changed.
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from app.ui.common.message_model import MessageRole
+
+_PAD = 8          # inner bubble padding
+_MARGIN = 6       # space between bubble and view edge / next bubble
+_MAX_RATIO = 0.7  # bubble width as a share of the viewport
+
+
+class ChatBubbleDelegate(QtWidgets.QStyledItemDelegate):
+    """
+    Delegate drawing one bubble per message.
+
+    Own messages are right-aligned; others show the sender name. Layouts are
+    cached in a bounded LRU keyed by (message key, content, width).
+    """
+
+    def __init__(self, current_user_getter: Callable[[], Optional[int]],
+                 name_resolver: Callable[[Any], str], parent=None, cache_size: int = 2000):
+        super().__init__(parent)
+        self._current_user = current_user_getter
+        self._name = name_resolver
+        self._cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._cache_size = cache_size
+
+    # --- layout cache ---
+    @staticmethod
+    def _body(m: Dict[str, Any]) -> str:
+        if m.get("deleted"):
+            return "[deleted]"
+        return m.get("message") or ""
+
+    @staticmethod
+    def _footer(m: Dict[str, Any]) -> str:
+        ts = m.get("deleted_at") if m.get("deleted") else m.get("sent_at")
+        parts = [str(ts)] if ts else []
+        if m.get("edited") and not m.get("deleted"):
+            parts.append("edited")
+        if m.get("pending"):
+            parts.append("sending…")
+        return " · ".join(parts)
+
+    def _layout(self, m: Dict[str, Any], width: int, font: QtGui.QFont) -> Dict[str, Any]:
+        own = self._is_own(m)
+        header = "" if own else self._name(m.get("sender_id"))
+        body, footer = self._body(m), self._footer(m)
+        key = (m.get("id") or m.get("client_msg_id"), header, body, footer, width, font.key())
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+
+        max_text = max(int(width * _MAX_RATIO) - 2 * _PAD, 40)
+        small = QtGui.QFont(font)
+        if font.pointSizeF() > 0:
+            small.setPointSizeF(max(font.pointSizeF() * 0.8, 6))
+        else:
+            small.setPixelSize(max(int(font.pixelSize() * 0.8), 8))
+        bold = QtGui.QFont(small)
+        bold.setBold(True)
+
+        def _static(text, f):
+            st = QtGui.QStaticText(text)
+            st.setTextFormat(QtCore.Qt.PlainText)
+            st.setTextWidth(max_text)
+            st.prepare(QtGui.QTransform(), f)
+            return st
+
+        body_font = QtGui.QFont(font)
+        body_font.setItalic(bool(m.get("deleted")))
+        body_st = _static(body, body_font)
+        head_st = _static(header, bold) if header else None
+        foot_st = _static(footer, small) if footer else None
+        parts = [p for p in (head_st, body_st, foot_st) if p is not None]
+        text_w = max(int(p.size().width()) for p in parts)
+        text_h = sum(int(p.size().height()) for p in parts) + 2 * (len(parts) - 1)
+        entry = {
+            "own": own, "body": body_st, "head": head_st, "foot": foot_st,
+            "fonts": (body_font, bold, small), "deleted": bool(m.get("deleted")),
+            "bubble": QtCore.QSize(text_w + 2 * _PAD, text_h + 2 * _PAD),
+        }
+        self._cache[key] = entry
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return entry
+
+    def _is_own(self, m: Dict[str, Any]) -> bool:
+        try:
+            uid = self._current_user()
+            return uid is not None and int(m.get("sender_id") or 0) == int(uid)
+        except Exception:
+            return False
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    def _width(self, option) -> int:
+        # list views often pass an empty rect to sizeHint; fall back to the viewport
+        width = option.rect.width()
+        view = self.parent()
+        if width <= 0 and isinstance(view, QtWidgets.QAbstractScrollArea):
+            width = view.viewport().width()
+        return width if width > 0 else 400
+
+    # --- QStyledItemDelegate ---
+    def sizeHint(self, option, index):
+        m = index.data(MessageRole)
+        if not isinstance(m, dict):
+            return super().sizeHint(option, index)
+        width = self._width(option)
+        entry = self._layout(m, width, option.font)
+        return QtCore.QSize(width, entry["bubble"].height() + _MARGIN)
+
+    def paint(self, painter, option, index):
+        m = index.data(MessageRole)
+        if not isinstance(m, dict):
+            return super().paint(painter, option, index)
+        entry = self._layout(m, self._width(option), option.font)
+        size = entry["bubble"]
+        x = (option.rect.right() - _MARGIN - size.width()) if entry["own"] else option.rect.left() + _MARGIN
+        bubble = QtCore.QRect(x, option.rect.top() + _MARGIN // 2, size.width(), size.height())
+
+        painter.save()
+        painter.setRenderHint(QtGui.QPainter.Antialiasing, True)
+        palette = option.palette
+        if entry["own"]:
+            fill = QtGui.QColor("#d7ebff")
+        else:
+            fill = palette.color(QtGui.QPalette.AlternateBase)
+        if option.state & QtWidgets.QStyle.State_Selected:
+            fill = fill.darker(110)
+        painter.setPen(QtCore.Qt.NoPen)
+        painter.setBrush(fill)
+        painter.drawRoundedRect(bubble, 8, 8)
+
+        text_color = palette.color(QtGui.QPalette.Text)
+        muted = palette.color(QtGui.QPalette.Disabled, QtGui.QPalette.Text)
+        font, bold, small = entry["fonts"]
+        y = bubble.top() + _PAD
+        if entry["head"] is not None:
+            painter.setFont(bold)
+            painter.setPen(text_color)
+            painter.drawStaticText(bubble.left() + _PAD, y, entry["head"])
+            y += int(entry["head"].size().height()) + 2
+        painter.setFont(font)
+        painter.setPen(muted if entry["deleted"] else text_color)
+        painter.drawStaticText(bubble.left() + _PAD, y, entry["body"])
+        y += int(entry["body"].size().height()) + 2
+        if entry["foot"] is not None:
+            painter.setFont(small)
+            painter.setPen(muted)
+            painter.drawStaticText(bubble.left() + _PAD, y, entry["foot"])
+        painter.restore()
@@ -0,0 +1,258 @@
+"""
+Filter Controller
+-----------------
+Debounced, cancellable table filtering. Keystrokes restart a short timer; when
+it fires the current filter widgets are turned into a parameterized query,
+which runs on a worker thread. Starting a new query cancels the previous one
+(KILL QUERY through CancellableQuery) and results are only applied if they
+belong to the latest request, so the newest filter always wins.
+
+With a page size the controller also pages the table: rows are fetched in
+keyset order on the current sort column (``ORDER BY col, id`` with a
+``(col, id) > (last_col, last_id)`` cursor), header clicks re-sort on the
+server through a whitelist of sortable columns, and the model asks for the
+next page via fetchMore as the view scrolls.
+"""
+
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from PyQt5 import QtCore
+
+from app.utils.database import CancellableQuery
+
+# build_query() -> (select_sql, where_clauses, params); called on the UI thread so it may read widgets
+QueryBuilder = Callable[[], Tuple[str, List[str], List[Any]]]
+
+
+class SortColumn:
+    """
+    A server-side sortable column.
+
+    Args:
+        expr (str): SQL expression to ORDER BY (should be indexed).
+        key (str): Key of the value in result rows, used for the keyset cursor.
+        nullable (bool): Whether the column may be NULL (NULLs sort first ascending).
+    """
+
+    def __init__(self, expr: str, key: str, nullable: bool = False):
+        self.expr = expr
+        self.key = key
+        self.nullable = nullable
+
+
+def keyset_predicate(sort: SortColumn, id_expr: str, descending: bool, last_value: Any,
+                     last_id: Any) -> Tuple[str, List[Any]]:
+    """
+    WHERE fragment selecting rows after (last_value, last_id) in ORDER BY sort, id order.
+
+    Written as OR'ed comparisons rather than a row constructor so MySQL can
+    use a range scan on the sort column's index. MySQL sorts NULLs first
+    ascending and last descending.
+    """
+    col = sort.expr
+    op = "<" if descending else ">"
+    if last_value is None and sort.nullable:
+        if descending:
+            return f"({col} IS NULL AND {id_expr} < %s)", [last_id]
+        return f"(({col} IS NULL AND {id_expr} > %s) OR {col} IS NOT NULL)", [last_id]
+    sql = f"({col} {op} %s OR ({col} = %s AND {id_expr} {op} %s)"
+    if sort.nullable and descending:
+        sql += f" OR {col} IS NULL"
+    return sql + ")", [last_value, last_value, last_id]
+
+
+class FilterController(QtCore.QObject):
+    """
+    Runs a table's filter query off the UI thread, latest request wins.
+
+    Args:
+        build_query (callable): Returns (select_sql, where_clauses, params) for the current filter state.
+        apply (callable): apply(rows, append) receives result rows on the UI thread;
+            append is True for follow-up pages.
+        delay_ms (int): Debounce delay for trigger().
+        page_size (int, optional): Rows per page; None loads everything in one query.
+        sort_columns (dict, optional): {view column index: SortColumn} allowed for server sorting.
+        id_expr (str): Unique tie-breaker column for ordering and the keyset cursor.
+        before_load (callable, optional): Called on the worker thread right before each
+            first-page query, e.g. to start a change-probe watermark for the full load.
+    """
+
+    _finished = QtCore.pyqtSignal(int, bool, object)
+
+    def __init__(self, build_query: QueryBuilder, apply: Callable[[List[Dict[str, Any]], bool], None],
+                 delay_ms: int = 250, page_size: Optional[int] = None,
+                 sort_columns: Optional[Dict[int, SortColumn]] = None, id_expr: str = "id",
+                 before_load: Optional[Callable[[], Any]] = None, parent=None):
+        super().__init__(parent)
+        self._build_query = build_query
+        self._before_load = before_load
+        self._apply = apply
+        self._page_size = page_size
+        self._sort_columns = dict(sort_columns or {})
+        self._id_expr = id_expr
+        self._sort: Optional[SortColumn] = None
+        self._descending = False
+        self._generation = 0
+        self._current: Optional[CancellableQuery] = None
+        self._has_more = False
+        self._loading_more = False
+        self._last_row: Optional[Dict[str, Any]] = None
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self.run_now)
+        self._finished.connect(self._on_finished)
+
+    # --- query composition ---
+    def _compose(self, after: Optional[Dict[str, Any]] = None, paged: bool = True) -> Tuple[str, List[Any]]:
+        sql, where, params = self._build_query()
+        where, params = list(where or []), list(params or [])
+        if after is not None:
+            clause, extra = self._after(after)
+            where.append(clause)
+            params.extend(extra)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        direction = "DESC" if self._descending else "ASC"
+        order = [f"{self._sort.expr} {direction}"] if self._sort is not None else []
+        order.append(f"{self._id_expr} {direction}")
+        sql += " ORDER BY " + ", ".join(order)
+        if self._page_size and paged:
+            sql += " LIMIT %s"
+            params.append(self._page_size)
+        return sql, params
+
+    def _after(self, row: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        """Keyset condition for the rows after row in the current order."""
+        id_key = self._id_expr.split(".")[-1]
+        if self._sort is not None:
+            return keyset_predicate(self._sort, self._id_expr, self._descending,
+                                    row.get(self._sort.key), row.get(id_key))
+        return f"{self._id_expr} {'<' if self._descending else '>'} %s", [row.get(id_key)]
+
+    def _start(self, append: bool, after: Optional[Dict[str, Any]] = None):
+        try:
+            sql, params = self._compose(after)
+        except Exception as e:
+            print(f"Error building filter query: {e}")
+            return
+        if self._current is not None:
+            self._current.cancel()
+        generation = self._generation
+        query = CancellableQuery(sql, params)
+        self._current = query
+
+        def _work():
+            if not append and self._before_load is not None:
+                try:
+                    self._before_load()
+                except Exception as e:
+                    print(f"Error preparing table load: {e}")
+            rows = query.run()
+            if not query.cancelled:
+                self._finished.emit(generation, append, rows)
+
+        threading.Thread(target=_work, daemon=True).start()
+
+    # --- public API ---
+    def trigger(self, *args):
+        """Schedule a refresh after the debounce delay (restarts the delay on every call)."""
+        self._timer.start()
+
+    def run_now(self):
+        """Cancel any running query and load the first page for the current filter state."""
+        self._timer.stop()
+        self._generation += 1
+        self._has_more = False
+        self._loading_more = False
+        self._last_row = None
+        self._start(append=False)
+
+    def full_query(self) -> Tuple[str, List[Any]]:
+        """The current filter and sort as one unpaged query (every matching row), e.g. for exports."""
+        return self._compose(paged=False)
+
+    def loaded_window(self) -> Tuple[List[str], List[Any]]:
+        """
+        WHERE clauses limiting a query to the pages loaded so far (none when
+        every row is loaded). Rows patched in from outside the window would sit
+        out of order and then be skipped by the page that should bring them.
+        """
+        if not self._page_size or not self._has_more or self._last_row is None:
+            return [], []
+        clause, params = self._after(self._last_row)
+        # IS NOT TRUE: the cursor condition is NULL for NULL sort values, which sort first ascending
+        return [f"{clause} IS NOT TRUE"], params
+
+    def sort_order(self) -> Tuple[Optional[str], str, bool]:
+        """The order rows are loaded in: (sort key or None, id key, descending)."""
+        return (self._sort.key if self._sort is not None else None,
+                self._id_expr.split(".")[-1], self._descending)
+
+    def has_more(self) -> bool:
+        """True when paging and the last page was full."""
+        return self._has_more and not self._loading_more
+
+    def fetch_more(self):
+        """Load the page after the last loaded row (ignored while a page is in flight)."""
+        if not self._has_more or self._loading_more or self._last_row is None:
+            return
+        self._loading_more = True
+        self._start(append=True, after=self._last_row)
+
+    def sort(self, column: int, order) -> bool:
+        """
+        Re-sort on the server by a whitelisted column and reload from the first page.
+
+        Returns:
+            bool: False if the column is not sortable on the server.
+        """
+        sort = self._sort_columns.get(column)
+        if sort is None:
+            return False
+        self._sort = sort
+        self._descending = order == QtCore.Qt.DescendingOrder
+        self.run_now()
+        return True
+
+    def cancel(self):
+        """Drop the pending debounce and stop the in-flight query."""
+        self._timer.stop()
+        self._generation += 1
+        self._loading_more = False
+        if self._current is not None:
+            self._current.cancel()
+            self._current = None
+
+    def _on_finished(self, generation: int, append: bool, rows):
+        if generation != self._generation:
+            return  # a newer filter or sort superseded this one
+        self._current = None
+        if append:
+            self._loading_more = False
+        if rows is None:
+            return  # query failed: keep what is shown
+        if self._page_size:
+            self._has_more = len(rows) >= self._page_size
+            if rows:
+                self._last_row = rows[-1]
+        self._apply(rows, append)
+
+
+def debounced(callback: Callable[[], None], delay_ms: int = 250, parent=None) -> Callable[..., None]:
+    """
+    Wrap callback so bursts of calls (e.g. textChanged) run it once, delay_ms after the last call.
+
+    Returns:
+        callable: A slot accepting and ignoring any signal arguments.
+    """
+    timer = QtCore.QTimer(parent)
+    timer.setSingleShot(True)
+    timer.setInterval(delay_ms)
+    timer.timeout.connect(callback)
+
+    def _restart(*args):
+        timer.start()
+    _restart.timer = timer
+    return _restart
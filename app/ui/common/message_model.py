@@ -0,0 +1,194 @@
+"""
+Message List Model
+------------------
+Qt item model backing the chat message view. Messages are loaded in pages
+(newest first) through a loader callable and older pages are prepended on
+demand, so opening a large conversation only costs one page query.
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+
+from PyQt5 import QtCore
+
+# loader(before_id, after_id, limit) -> messages ordered by id ascending
+MessageLoader = Callable[[Optional[int], Optional[int], int], List[Dict[str, Any]]]
+
+MessageRole = QtCore.Qt.UserRole + 1
+
+
+class MessageListModel(QtCore.QAbstractListModel):
+    """
+    List model over chat messages ordered oldest -> newest.
+
+    Server rows (with an ``id``) are kept in id order; rows flagged ``pending``
+    (sends still waiting in the chat outbox) are always shown after them.
+    """
+
+    def __init__(self, loader: MessageLoader, formatter: Callable[[Dict[str, Any]], str] = None,
+                 page_size: int = 50, parent=None):
+        super().__init__(parent)
+        self._loader = loader
+        self._formatter = formatter or (lambda m: m.get("message") or "")
+        self.page_size = page_size
+        self._rows: List[Dict[str, Any]] = []
+        self._display: List[str] = []
+        self._has_older = False
+        # highest id seen through the loader; locally appended rows do not move it,
+        # so concurrent messages with lower ids are still picked up by poll()
+        self._synced_id = 0
+
+    # --- Qt model interface ---
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._rows):
+            return None
+        if role == QtCore.Qt.DisplayRole:
+            return self._display[index.row()]
+        if role in (MessageRole, QtCore.Qt.UserRole):
+            return self._rows[index.row()]
+        return None
+
+    # --- helpers ---
+    def message_at(self, row: int) -> Optional[Dict[str, Any]]:
+        return self._rows[row] if 0 <= row < len(self._rows) else None
+
+    def _oldest_id(self) -> Optional[int]:
+        return next((int(m["id"]) for m in self._rows if m.get("id")), None)
+
+    def newest_id(self) -> Optional[int]:
+        return next((int(m["id"]) for m in reversed(self._rows) if m.get("id")), None)
+
+    def has_older(self) -> bool:
+        return self._has_older
+
+    def update_row(self, row: int, changes: Dict[str, Any]):
+        """Apply local changes (e.g. after an edit) to one row and repaint only that row."""
+        if not 0 <= row < len(self._rows):
+            return
+        self._rows[row] = dict(self._rows[row], **changes)
+        self._display[row] = self._formatter(self._rows[row])
+        idx = self.index(row)
+        self.dataChanged.emit(idx, idx)
+
+    # --- loading ---
+    def reset(self):
+        """Load the newest page, replacing the current contents."""
+        rows = self._loader(None, None, self.page_size) or []
+        self.beginResetModel()
+        self._rows = list(rows)
+        self._display = [self._formatter(m) for m in self._rows]
+        self._has_older = len([m for m in rows if not m.get("pending")]) >= self.page_size
+        self._synced_id = self.newest_id() or 0
+        self.endResetModel()
+
+    def clear(self):
+        self.beginResetModel()
+        self._rows, self._display = [], []
+        self._has_older = False
+        self._synced_id = 0
+        self.endResetModel()
+
+    def load_older(self) -> int:
+        """
+        Prepend the page of messages just before the oldest loaded one.
+
+        Returns:
+            int: number of rows inserted.
+        """
+        oldest = self._oldest_id()
+        if not self._has_older or oldest is None:
+            return 0
+        rows = [m for m in (self._loader(oldest, None, self.page_size) or []) if not m.get("pending")]
+        self._has_older = len(rows) >= self.page_size
+        if not rows:
+            return 0
+        self.beginInsertRows(QtCore.QModelIndex(), 0, len(rows) - 1)
+        self._rows[0:0] = rows
+        self._display[0:0] = [self._formatter(m) for m in rows]
+        self.endInsertRows()
+        return len(rows)
+
+    def append_local(self, message: Dict[str, Any]):
+        """
+        Append a message the user just sent (optimistic, no refetch).
+        The row is placed before the pending tail; poll() later refreshes it in place.
+        """
+        if message.get("id") and any(m.get("id") == message["id"] for m in self._rows):
+            return
+        pos = next((i for i, m in enumerate(self._rows) if m.get("pending")), len(self._rows))
+        if message.get("pending"):
+            pos = len(self._rows)
+        self.beginInsertRows(QtCore.QModelIndex(), pos, pos)
+        self._rows.insert(pos, message)
+        self._display.insert(pos, self._formatter(message))
+        self.endInsertRows()
+
+    def poll(self) -> int:
+        """
+        Merge in new messages and refresh the newest page in place.
+
+        New rows are fetched with ``after_id`` (keyset on the last synced id);
+        rows of the newest page that changed (edits/deletes) emit dataChanged
+        instead of rebuilding the list. Returns the number of new server rows.
+        """
+        if self.newest_id() is None:
+            before = len(self._rows)
+            self.reset()
+            return len(self._rows) - before
+
+        # refresh the latest page for edits/deletes and pick up the pending tail
+        latest = self._loader(None, None, self.page_size) or []
+        by_id = {int(m["id"]): m for m in latest if m.get("id")}
+        pending = [m for m in latest if m.get("pending")]
+        for row, m in enumerate(self._rows):
+            mid = m.get("id")
+            if mid and int(mid) in by_id and by_id[int(mid)] != m:
+                self._rows[row] = by_id[int(mid)]
+                self._display[row] = self._formatter(self._rows[row])
+                idx = self.index(row)
+                self.dataChanged.emit(idx, idx)
+
+        # page through anything newer than what was synced (covers gaps larger than a page)
+        synced = self._synced_id
+        new_rows = [m for m in latest if m.get("id") and int(m["id"]) > synced]
+        if len(new_rows) >= self.page_size:
+            new_rows, after = [], synced
+            while True:
+                chunk = [m for m in (self._loader(None, after, self.page_size) or []) if m.get("id")]
+                new_rows.extend(chunk)
+                if len(chunk) < self.page_size:
+                    break
+                after = int(chunk[-1]["id"])
+        if new_rows:
+            self._synced_id = max(int(m["id"]) for m in new_rows)
+        present = {int(m["id"]) for m in self._rows if m.get("id")}
+        new_rows = [m for m in new_rows if int(m["id"]) not in present]
+        added = len(new_rows)
+
+        # drop the old pending tail (sends that landed now come back as server rows)
+        first_pending = next((i for i, m in enumerate(self._rows) if m.get("pending")), len(self._rows))
+        if first_pending < len(self._rows):
+            self.beginRemoveRows(QtCore.QModelIndex(), first_pending, len(self._rows) - 1)
+            del self._rows[first_pending:]
+            del self._display[first_pending:]
+            self.endRemoveRows()
+
+        newest = self.newest_id() or 0
+        if new_rows and int(new_rows[0]["id"]) < newest:
+            # a concurrent message landed below a locally appended one: re-sort in place
+            self.layoutAboutToBeChanged.emit()
+            merged = sorted(self._rows + new_rows, key=lambda m: int(m["id"]))
+            self._rows = merged
+            self._display = [self._formatter(m) for m in merged]
+            self.layoutChanged.emit()
+            new_rows = []
+        tail = new_rows + pending
+        if tail:
+            start = len(self._rows)
+            self.beginInsertRows(QtCore.QModelIndex(), start, start + len(tail) - 1)
+            self._rows.extend(tail)
+            self._display.extend(self._formatter(m) for m in tail)
+            self.endInsertRows()
+        return added
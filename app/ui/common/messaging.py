@@ -2,23 +2,34 @@ from PyQt5 import QtWidgets, QtCore
 from PyQt5.QtWidgets import QInputDialog, QMessageBox, QMenu
 from typing import Callable, Optional
 from app.models.chat_model import Chat
+from app.models.chat_outbox import get_outbox
+from app.models.group_chat_model import GroupChat
 from app.models.user_model import User
+from app.ui.common.message_model import MessageListModel
+from app.ui.common.chat_delegate import ChatBubbleDelegate
 from datetime import datetime
 
+# chatsList items carry the conversation id in UserRole and its kind ("chat"/"group") here
+ConversationKindRole = QtCore.Qt.UserRole + 1
+
 def attach_messaging(ui, current_user_getter: Optional[Callable[[], Optional[int]]] = None):
     """
     Attach messaging behavior to `ui`.
     ui must provide: chatsList (QListWidget), messagesList (QListWidget), messageInput (QLineEdit),
                      sendMessageButton (QPushButton), newChatButton (QPushButton)
+    messagesList is replaced by a QListView backed by MessageListModel (ui.messages_model),
+    which loads history newest-first in pages and fetches older pages on scroll-to-top;
+    rows are painted as bubbles by ChatBubbleDelegate (ui.messages_delegate).
     current_user_getter: callable returning current user id (int) or None. If None, ui.set_current_user(id) can be used.
     Adds methods on ui:
       - set_current_user(user_id)
       - populate_chats()
-      - populate_messages(chat_id)
+      - populate_messages(chat_id, kind="chat")
       - send_message()
       - new_chat()
       - edit_message(message_id)
       - delete_message(message_id)
+      - search_messages(text)
     """
 
     # --- minimal UI checks ---
@@ -28,7 +39,8 @@ def attach_messaging(ui, current_user_getter: Optional[Callable[[], Optional[int
 
     ui._messaging_current_user = None
     ui._messaging_current_chat = None
-    ui._messaging_last_messages = []
+    ui._messaging_current_kind = "chat"  # "chat" (1:1) or "group" (course announcements)
+    ui._messaging_read_marks = {}  # (kind, id) -> last_read_id known to be stored server-side
 
     # --- helper: get current user ---
     def _get_current_user():
@@ -71,61 +83,157 @@ def attach_messaging(ui, current_user_getter: Optional[Callable[[], Optional[int
             it = QtWidgets.QListWidgetItem(label)
             it.setData(QtCore.Qt.UserRole, r.get('chat_id'))
             ui.chatsList.addItem(it)
+            if r.get('chat_id') is not None:
+                ui._messaging_read_marks[("chat", r.get('chat_id'))] = int(r.get('last_read_id') or 0)
+        # course groups are read-only for members; only the owning teacher can post
+        try:
+            groups = GroupChat.get_groups(uid) or []
+        except Exception:
+            groups = []
+        for g in groups:
+            last = (g.get('last_message') or "")[:80]
+            label = f"📢 {g.get('name')} — {last}"
+            if int(g.get('unread_count') or 0):
+                label = f"[{g.get('unread_count')}] {label}"
+            it = QtWidgets.QListWidgetItem(label)
+            it.setData(QtCore.Qt.UserRole, g.get('group_id'))
+            it.setData(ConversationKindRole, "group")
+            ui.chatsList.addItem(it)
+            ui._messaging_read_marks[("group", g.get('group_id'))] = int(g.get('last_read_id') or 0)
     ui.populate_chats = populate_chats
 
     # --- resolve sender name ---
+    _sender_names = {}
+
     def _resolve_sender_name(sender_id):
+        if sender_id in _sender_names:
+            return _sender_names[sender_id]
+        name = str(sender_id)
         try:
             u = User.get_by_id(sender_id)
             if u:
-                return f"{u.first_name} {u.last_name}".strip() or u.username or str(sender_id)
+                name = f"{u.first_name} {u.last_name}".strip() or u.username or str(sender_id)
         except Exception:
             pass
-        return str(sender_id)
+        _sender_names[sender_id] = name
+        return name
 
-    # --- populate messages list ---
-    def populate_messages(chat_id):
-        if not chat_id:
-            ui.messagesList.clear()
-            ui.messagesList.addItem("Select a chat")
-            return
-        ui._messaging_current_chat = int(chat_id)
+    def _format_message(m):
+        sender = m.get("sender_id") or m.get("sender") or 0
+        sender_name = _resolve_sender_name(sender)
+        if m.get("deleted"):
+            ts = m.get("deleted_at") or ""
+            return f"{sender_name}: [deleted] ({ts})"
+        txt = m.get("message") or ""
+        ts = m.get("sent_at") or m.get("created_at") or ""
+        display = f"{sender_name}: {txt}" + (" (edited)" if m.get("edited") else "") + (f" — {ts}" if ts else "")
+        if m.get("pending"):
+            display += " (sending…)"
+        return display
+
+    # --- message view: swap the QListWidget for a model-backed QListView ---
+    def _load_page(before_id, after_id, limit):
+        if not ui._messaging_current_chat:
+            return []
+        if ui._messaging_current_kind == "group":
+            return GroupChat.get_messages(ui._messaging_current_chat, limit=limit,
+                                          after_id=after_id, before_id=before_id) or []
+        return Chat.get_messages(ui._messaging_current_chat, limit=limit,
+                                 after_id=after_id, before_id=before_id) or []
+
+    def _install_message_view():
+        old = ui.messagesList
+        if isinstance(old, QtWidgets.QListView) and not isinstance(old, QtWidgets.QListWidget):
+            return old
+        parent = old.parentWidget()
+        view = QtWidgets.QListView(parent)
+        view.setObjectName("messagesList")
+        view.setUniformItemSizes(False)
+        view.setWordWrap(True)
+        view.setVerticalScrollMode(QtWidgets.QAbstractItemView.ScrollPerPixel)
+        if isinstance(parent, QtWidgets.QSplitter):
+            parent.replaceWidget(parent.indexOf(old), view)
+        elif parent is not None and parent.layout() is not None:
+            parent.layout().replaceWidget(old, view)
+        old.hide()
+        old.deleteLater()
+        ui.messagesList = view
+        return view
+
+    _install_message_view()
+    ui.messages_model = MessageListModel(_load_page, _format_message, parent=ui.messagesList)
+    ui.messagesList.setModel(ui.messages_model)
+    # bubbles are painted from model data with cached layouts; edits/deletes only repaint their row
+    ui.messages_delegate = ChatBubbleDelegate(_get_current_user, _resolve_sender_name, parent=ui.messagesList)
+    ui.messagesList.setItemDelegate(ui.messages_delegate)
+    ui.messagesList.setResizeMode(QtWidgets.QListView.Adjust)
+    ui.messagesList.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+
+    def _at_bottom():
+        bar = ui.messagesList.verticalScrollBar()
+        return bar.value() >= bar.maximum() - 4
+
+    def _load_older():
+        bar = ui.messagesList.verticalScrollBar()
+        old_max, old_value = bar.maximum(), bar.value()
         try:
-            msgs = Chat.get_messages(chat_id) or []
+            inserted = ui.messages_model.load_older()
         except Exception:
-            msgs = []
+            inserted = 0
+        if inserted:
+            # lay out synchronously so the prepended rows do not shift the viewport
+            ui.messagesList.doItemsLayout()
+            bar.setValue(old_value + (bar.maximum() - old_max))
+
+    def _on_scroll(value):
+        if value == ui.messagesList.verticalScrollBar().minimum() and ui.messages_model.has_older():
+            _load_older()
+    ui.messagesList.verticalScrollBar().valueChanged.connect(_on_scroll)
 
-        # --- avoid UI flicker: update only if messages changed ---
-        if msgs == ui._messaging_last_messages:
+    def _mark_read(chat_id, kind="chat"):
+        # only write when the newest visible message is past the stored watermark
+        newest = ui.messages_model.newest_id()
+        cur_user = _get_current_user()
+        if not newest or not cur_user or newest <= ui._messaging_read_marks.get((kind, chat_id), 0):
             return
-        ui._messaging_last_messages = msgs
-
-        ui.messagesList.clear()
-        for m in msgs:
-            mid = int(m.get("id") or 0)
-            sender = m.get("sender_id") or m.get("sender") or 0
-            sender_name = _resolve_sender_name(sender)
-            if m.get("deleted") or m.get("deleted", False):
-                text = "[deleted]"
-                ts = m.get("deleted_at") or ""
-                display = f"{sender_name}: {text} ({ts})"
-            else:
-                txt = m.get("message") or ""
-                edited = m.get("edited") or False
-                ts = m.get("sent_at") or m.get("created_at") or ""
-                display = f"{sender_name}: {txt}" + (" (edited)" if edited else "") + (f" — {ts}" if ts else "")
-            item = QtWidgets.QListWidgetItem(display)
-            item.setData(QtCore.Qt.UserRole, {"message_id": mid, "sender_id": int(sender)})
-            ui.messagesList.addItem(item)
-
-        # mark messages read
+        ui._messaging_read_marks[(kind, chat_id)] = newest
         try:
-            cur_user = _get_current_user()
-            if cur_user:
-                Chat.mark_messages_read(chat_id, cur_user)
+            if kind == "group":
+                moved = GroupChat.mark_read(chat_id, cur_user, newest)
+            else:
+                moved = Chat.mark_messages_read(chat_id, cur_user, newest)
+            if moved:
                 populate_chats()
         except Exception:
             pass
+
+    # --- populate messages list ---
+    def populate_messages(chat_id, kind="chat"):
+        if not chat_id:
+            ui._messaging_current_chat = None
+            ui.messages_model.clear()
+            return
+        if (ui._messaging_current_kind, ui._messaging_current_chat) != (kind, int(chat_id)):
+            # open a conversation: one newest-page query regardless of its length
+            ui._messaging_current_chat = int(chat_id)
+            ui._messaging_current_kind = kind
+            try:
+                ui.messages_model.reset()
+            except Exception:
+                ui.messages_model.clear()
+            ui.messagesList.scrollToBottom()
+            _mark_read(chat_id, kind)
+            return
+        # same conversation: incremental refresh via the id keyset
+        stick = _at_bottom()
+        try:
+            appended = ui.messages_model.poll()
+        except Exception:
+            appended = 0
+        if stick:
+            ui.messagesList.scrollToBottom()
+        if appended:
+            _mark_read(chat_id, kind)
     ui.populate_messages = populate_messages
 
     # --- handle chat selection ---
@@ -135,7 +243,7 @@ def attach_messaging(ui, current_user_getter: Optional[Callable[[], Optional[int
             return
         cid = item.data(QtCore.Qt.UserRole)
         try:
-            populate_messages(cid)
+            populate_messages(cid, item.data(ConversationKindRole) or "chat")
         except Exception:
             pass
     ui.chatsList.itemSelectionChanged.connect(_on_chat_selected)
@@ -147,26 +255,108 @@ def attach_messaging(ui, current_user_getter: Optional[Callable[[], Optional[int
             QMessageBox.warning(None, "Send Message", "Select a chat first.")
             return
         chat_id = item.data(QtCore.Qt.UserRole)
+        kind = item.data(ConversationKindRole) or "chat"
         text = ui.messageInput.text().strip()
         if not text:
             return
         try:
             cur_user = _get_current_user()
-            ok = Chat.send_message(chat_id, cur_user, text)
+            if kind == "group":
+                ok = GroupChat.post_message(chat_id, cur_user, text)
+            else:
+                ok = Chat.send_message(chat_id, cur_user, text)
         except Exception:
             ok = False
         if ok:
             ui.messageInput.clear()
             try:
-                populate_messages(chat_id)
+                if isinstance(ok, dict) and (kind, chat_id) == (ui._messaging_current_kind, ui._messaging_current_chat):
+                    # the write returned id/sent_at: append without refetching the conversation
+                    ui.messages_model.append_local({
+                        "id": ok.get("id"), "client_msg_id": ok.get("client_msg_id"), "chat_id": chat_id,
+                        "sender_id": cur_user, "message": text, "sent_at": ok.get("sent_at"),
+                        "edited": False, "deleted": False, "pending": ok.get("pending", False),
+                    })
+                    ui.messagesList.scrollToBottom()
+                else:
+                    populate_messages(chat_id, kind)
                 populate_chats()
             except Exception:
                 pass
         else:
-            QMessageBox.warning(None, "Send Message", "Failed to send message.")
+            msg = ("Only the course teacher can post to this group." if kind == "group"
+                   else "Failed to send message.")
+            QMessageBox.warning(None, "Send Message", msg)
     ui.sendMessageButton.clicked.connect(send_message)
     ui.send_message = send_message
 
+    # --- message search ---
+    def _ensure_search_input():
+        box = getattr(ui, "messageSearchInput", None)
+        if box is not None:
+            return box
+        layout = getattr(ui, "messagesLayout", None)
+        if layout is None:
+            return None
+        box = QtWidgets.QLineEdit(ui.messagesList.parentWidget())
+        box.setObjectName("messageSearchInput")
+        box.setPlaceholderText("Search messages...")
+        layout.insertWidget(max(layout.indexOf(ui.messagesList), 0), box)
+        ui.messageSearchInput = box
+        return box
+
+    def _open_chat(chat_id):
+        for i in range(ui.chatsList.count()):
+            it = ui.chatsList.item(i)
+            if it.data(QtCore.Qt.UserRole) == chat_id and (it.data(ConversationKindRole) or "chat") == "chat":
+                ui.chatsList.setCurrentRow(i)
+                return
+
+    def search_messages(text=None):
+        query = (text if text is not None else ui.messageSearchInput.text()).strip()
+        cur_user = _get_current_user()
+        if not query or not cur_user:
+            return
+        dialog = QtWidgets.QDialog(ui.messagesList.window())
+        dialog.setWindowTitle(f'Search: "{query}"')
+        dialog.setMinimumSize(480, 360)
+        layout = QtWidgets.QVBoxLayout(dialog)
+        results = QtWidgets.QListWidget(dialog)
+        more_btn = QtWidgets.QPushButton("Load more", dialog)
+        layout.addWidget(results)
+        layout.addWidget(more_btn)
+        state = {"cursor": None}
+
+        def _load_page():
+            try:
+                page = Chat.search_messages(cur_user, query, limit=20, cursor=state["cursor"])
+            except Exception:
+                page = {"results": [], "next_cursor": None}
+            for m in page.get("results", []):
+                it = QtWidgets.QListWidgetItem(f"{_resolve_sender_name(m.get('sender_id'))}: "
+                                               f"{(m.get('message') or '')[:120]} — {m.get('sent_at') or ''}")
+                it.setData(QtCore.Qt.UserRole, m.get("chat_id"))
+                results.addItem(it)
+            state["cursor"] = page.get("next_cursor")
+            more_btn.setEnabled(state["cursor"] is not None)
+            if not results.count():
+                results.addItem("No messages found")
+
+        def _on_activated(item):
+            chat_id = item.data(QtCore.Qt.UserRole)
+            if chat_id:
+                dialog.accept()
+                _open_chat(chat_id)
+
+        more_btn.clicked.connect(_load_page)
+        results.itemDoubleClicked.connect(_on_activated)
+        _load_page()
+        dialog.exec_()
+    ui.search_messages = search_messages
+
+    if _ensure_search_input() is not None:
+        ui.messageSearchInput.returnPressed.connect(lambda: search_messages())
+
     # --- start new chat ---
     def new_chat():
         username, ok = QInputDialog.getText(None, "New Chat", "Enter username to start chat:")
@@ -194,59 +384,57 @@ def attach_messaging(ui, current_user_getter: Optional[Callable[[], Optional[int
 
     # --- message context menu (edit/delete) ---
     def _on_message_context(point):
-        item = ui.messagesList.itemAt(point)
-        if not item:
+        index = ui.messagesList.indexAt(point)
+        if not index.isValid():
             return
-        meta = item.data(QtCore.Qt.UserRole) or {}
-        mid = meta.get("message_id")
-        sender_id = meta.get("sender_id")
+        meta = ui.messages_model.message_at(index.row()) or {}
+        sender_id = meta.get("sender_id") or 0
         cur_user = _get_current_user()
         menu = QMenu(ui.messagesList)
-        if cur_user and int(sender_id) == int(cur_user):
+        editable = ui._messaging_current_kind == "chat" and not meta.get("deleted")
+        if editable and cur_user and int(sender_id) == int(cur_user):
             edit_act = menu.addAction("Edit")
             delete_act = menu.addAction("Delete")
             act = menu.exec_(ui.messagesList.mapToGlobal(point))
             if act == edit_act:
-                _edit_message(mid, cur_user)
+                _edit_message(index.row(), meta, cur_user)
             elif act == delete_act:
-                _delete_message(mid, cur_user)
+                _delete_message(index.row(), meta, cur_user)
         else:
             menu.addAction("No actions available").setDisabled(True)
             menu.exec_(ui.messagesList.mapToGlobal(point))
 
-    def _edit_message(message_id, cur_user):
-        current_text = ""
-        try:
-            msgs = Chat.get_messages(ui._messaging_current_chat) or []
-            for m in msgs:
-                if int(m.get("id")) == int(message_id):
-                    current_text = m.get("message") or ""
-                    break
-        except Exception:
-            pass
-        new_text, ok = QInputDialog.getText(None, "Edit Message", "Edit message:", text=current_text)
+    def _edit_message(row, meta, cur_user):
+        new_text, ok = QInputDialog.getText(None, "Edit Message", "Edit message:", text=meta.get("message") or "")
         if not ok:
             return
         try:
-            ok2 = Chat.edit_message(message_id, cur_user, new_text)
+            ok2 = Chat.edit_message(meta.get("id"), cur_user, new_text, client_msg_id=meta.get("client_msg_id"))
         except Exception:
             ok2 = False
         if ok2:
-            populate_messages(ui._messaging_current_chat)
+            changes = {"message": new_text}
+            if not meta.get("pending"):
+                changes["edited"] = True
+            ui.messages_model.update_row(row, changes)
             populate_chats()
         else:
             QMessageBox.warning(None, "Edit Message", "Failed to edit message.")
 
-    def _delete_message(message_id, cur_user):
+    def _delete_message(row, meta, cur_user):
         reply = QMessageBox.question(None, "Delete Message", "Delete this message?", QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply != QMessageBox.Yes:
             return
         try:
-            ok = Chat.delete_message(message_id, cur_user)
+            ok = Chat.delete_message(meta.get("id"), cur_user, client_msg_id=meta.get("client_msg_id"))
         except Exception:
             ok = False
         if ok:
-            populate_messages(ui._messaging_current_chat)
+            if meta.get("pending"):
+                populate_messages(ui._messaging_current_chat)
+            else:
+                ui.messages_model.update_row(row, {"deleted": True, "message": "",
+                                                   "deleted_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")})
             populate_chats()
         else:
             QMessageBox.warning(None, "Delete Message", "Failed to delete message.")
@@ -259,7 +447,7 @@ def attach_messaging(ui, current_user_getter: Optional[Callable[[], Optional[int
     def _auto_refresh_messages():
         if ui._messaging_current_chat and _get_current_user():
             try:
-                populate_messages(ui._messaging_current_chat)
+                populate_messages(ui._messaging_current_chat, ui._messaging_current_kind)
             except Exception:
                 pass
 
@@ -267,6 +455,12 @@ def attach_messaging(ui, current_user_getter: Optional[Callable[[], Optional[int
     ui._messaging_timer.timeout.connect(_auto_refresh_messages)
     ui._messaging_timer.start(2000)  # تحديث كل ثانيتين
 
+    # --- replay messages queued while the database was unreachable ---
+    try:
+        get_outbox().start_worker()
+    except Exception:
+        pass
+
     # --- initial population ---
     try:
         if getattr(ui, "current_user_id", None):
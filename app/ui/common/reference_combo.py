@@ -0,0 +1,148 @@
+"""
+Reference Combo
+---------------
+Type-ahead pickers over the shared reference lists (app.utils.reference_data).
+
+Instead of filling a combo with every student or course, the combo holds the
+first few entries plus the current one, and typing shows a completion popup
+with the entries matching the typed words (word-prefix lookup in memory, no
+query). Picking an entry selects it in the combo, so currentData() keeps
+returning the chosen id as before. Typed text that is left without picking is
+resolved against the list when editing finishes; if it names no entry or
+several, accept_when_resolved keeps the dialog open with a message instead of
+saving whatever the combo showed before.
+"""
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+# Entries shown in a dropdown or completion popup
+COMBO_LIMIT = 50
+
+
+class _ReferenceCompleter(QtWidgets.QCompleter):
+    """Completer whose entries are recomputed from a ReferenceList as the user types."""
+
+    def __init__(self, ref, limit, parent=None):
+        super().__init__(parent)
+        self._ref = ref
+        self._limit = limit
+        self._model = QtGui.QStandardItemModel(self)
+        self.setModel(self._model)
+        # the list is already filtered by the prefix index; don't let QCompleter filter again
+        self.setCompletionMode(QtWidgets.QCompleter.UnfilteredPopupCompletion)
+        self.setCaseSensitivity(QtCore.Qt.CaseInsensitive)
+
+    def update_matches(self, text):
+        self._model.clear()
+        for item_id, label in self._ref.items(text, self._limit):
+            item = QtGui.QStandardItem(label)
+            item.setData(item_id, QtCore.Qt.UserRole)
+            self._model.appendRow(item)
+        if text and self._model.rowCount():
+            self.complete()
+
+
+def attach_reference_combo(combo, ref, current_id=None, limit=COMBO_LIMIT):
+    """
+    Fill a QComboBox from a reference list with type-ahead completion.
+
+    Args:
+        combo (QComboBox): Combo to fill (made editable; typed text is never inserted).
+        ref (ReferenceList): Source list, e.g. reference_data()["students"].
+        current_id: Id to select initially (kept even if it is not among the first entries).
+        limit (int): Entries in the dropdown and in the completion popup.
+
+    Returns:
+        QCompleter: The completer attached to the combo.
+    """
+    combo.clear()
+    for item_id, label in ref.items(limit=limit):
+        combo.addItem(label, item_id)
+    if current_id is not None and combo.findData(current_id) < 0:
+        label = ref.label_of(current_id)
+        if label is not None:
+            combo.insertItem(0, label, current_id)
+    if current_id is not None and combo.findData(current_id) >= 0:
+        combo.setCurrentIndex(combo.findData(current_id))
+
+    combo.setEditable(True)
+    combo.setInsertPolicy(QtWidgets.QComboBox.NoInsert)
+    completer = _ReferenceCompleter(ref, limit, combo)
+    combo.setCompleter(completer)
+    combo.lineEdit().textEdited.connect(completer.update_matches)
+
+    def _pick(index):
+        item_id = index.data(QtCore.Qt.UserRole)
+        pos = combo.findData(item_id)
+        if pos < 0:
+            combo.addItem(index.data(QtCore.Qt.DisplayRole), item_id)
+            pos = combo.count() - 1
+        combo.setCurrentIndex(pos)
+
+    def _settle():
+        """Select the entry the typed text names. Returns None, or why the text names no single entry."""
+        text = combo.currentText().strip()
+        if not text:
+            return "Please choose an entry from the list."
+        pos = combo.findText(text, QtCore.Qt.MatchFixedString)
+        if pos < 0:
+            matches = ref.items(text, 2)
+            if not matches:
+                return f"Nothing matches \"{text}\"; please choose an entry from the list."
+            if len(matches) > 1:
+                return f"\"{text}\" matches several entries; please choose one from the list."
+            item_id, label = matches[0]
+            pos = combo.findData(item_id)
+            if pos < 0:
+                combo.addItem(label, item_id)
+                pos = combo.count() - 1
+        combo.setCurrentIndex(pos)
+        combo.setEditText(combo.itemText(pos))
+        return None
+
+    completer.activated[QtCore.QModelIndex].connect(_pick)
+    combo.lineEdit().editingFinished.connect(_settle)
+    combo.resolve_reference = _settle
+    return completer
+
+
+def accept_when_resolved(dialog, *combos):
+    """
+    Slot for a dialog's OK button: accept only if the typed text of every
+    reference combo names exactly one entry (see attach_reference_combo).
+
+    Args:
+        dialog (QDialog): Dialog to accept.
+        combos (QComboBox): Reference combos to check; None entries are skipped.
+
+    Returns:
+        callable: Connect it to the button box's accepted signal.
+    """
+    def _accept():
+        for combo in combos:
+            resolve = getattr(combo, "resolve_reference", None)
+            error = resolve() if resolve is not None else None
+            if error:
+                QtWidgets.QMessageBox.warning(dialog, "Validation Error", error)
+                combo.setFocus()
+                combo.lineEdit().selectAll()
+                return
+        dialog.accept()
+    return _accept
+
+
+def attach_reference_completer(line_edit, ref, limit=COMBO_LIMIT):
+    """
+    Add type-ahead completion from a reference list to a QLineEdit (free text stays allowed).
+
+    Args:
+        line_edit (QLineEdit): Input to complete, e.g. the schedule room field.
+        ref (ReferenceList): Source list, e.g. reference_data()["rooms"].
+
+    Returns:
+        QCompleter: The completer attached to the input.
+    """
+    completer = _ReferenceCompleter(ref, limit, line_edit)
+    line_edit.setCompleter(completer)
+    line_edit.textEdited.connect(completer.update_matches)
+    return completer
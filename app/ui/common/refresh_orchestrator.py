@@ -0,0 +1,128 @@
+"""
+Refresh Orchestrator
+--------------------
+Runs a dashboard's independent loaders at the same time instead of one after
+another. Each section is split into a fetch (DB work, runs on a thread pool
+with a pooled connection) and an apply (widget updates, runs on the GUI
+thread as soon as that section's result arrives), so a full refresh takes
+about as long as the slowest query rather than the sum of all of them.
+
+While a section is in flight its placeholder is shown (e.g. "…" in a stat
+label). A section's late result is dropped if it was refreshed again meanwhile.
+"""
+
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from PyQt5 import QtCore
+
+
+class Section:
+    """
+    One independently loadable part of a dashboard.
+
+    Args:
+        name (str): Section name.
+        fetch (callable): fetch() -> result. Runs on a worker thread: DB access only, no widgets.
+        apply (callable): apply(result) updates the widgets on the GUI thread; result is
+            None when the fetch failed.
+        placeholder (callable, optional): Shows a loading state on the GUI thread before the fetch.
+    """
+
+    def __init__(self, name: str, fetch: Callable[[], Any], apply: Callable[[Any], None],
+                 placeholder: Optional[Callable[[], None]] = None):
+        self.name = name
+        self.fetch = fetch
+        self.apply = apply
+        self.placeholder = placeholder
+
+
+class _FetchTask(QtCore.QRunnable):
+    """Runs one section's fetch and posts the result back through the orchestrator's signal."""
+
+    def __init__(self, orchestrator: "RefreshOrchestrator", generation: int, section: Section):
+        super().__init__()
+        self._orchestrator = orchestrator
+        self._generation = generation
+        self._section = section
+
+    def run(self):
+        try:
+            result, error = self._section.fetch(), None
+        except Exception as e:
+            result, error = None, e
+        # emitted from the pool thread; the connection is queued onto the GUI thread
+        self._orchestrator._fetched.emit(self._generation, self._section.name, result, error)
+
+
+class RefreshOrchestrator(QtCore.QObject):
+    """
+    Issues all registered sections' fetches at once and applies results as they arrive.
+
+    Args:
+        max_workers (int): Thread pool size (keep it at or below the DB connection pool size).
+    """
+
+    section_loaded = QtCore.pyqtSignal(str)
+    finished = QtCore.pyqtSignal(float)  # elapsed seconds for the whole refresh
+
+    _fetched = QtCore.pyqtSignal(int, str, object, object)
+
+    def __init__(self, max_workers: int = 8, parent=None):
+        super().__init__(parent)
+        self._sections: Dict[str, Section] = {}
+        self._pool = QtCore.QThreadPool(self)
+        self._pool.setMaxThreadCount(max_workers)
+        self._generations: Dict[str, int] = {}
+        self._pending: set = set()
+        self._started = 0.0
+        self._fetched.connect(self._on_fetched)
+
+    def add(self, name: str, fetch: Callable[[], Any], apply: Callable[[Any], None],
+            placeholder: Optional[Callable[[], None]] = None):
+        """Register a section (see Section)."""
+        self._sections[name] = Section(name, fetch, apply, placeholder)
+
+    def is_running(self) -> bool:
+        return bool(self._pending)
+
+    def run(self, *names: str):
+        """
+        Start fetching the named sections (default: all) concurrently.
+
+        Re-running a section that is still in flight supersedes it: the late
+        result of the older fetch is discarded.
+        """
+        sections: List[Section] = [self._sections[n] for n in (names or self._sections) if n in self._sections]
+        if not self._pending:
+            self._started = time.perf_counter()
+        for section in sections:
+            self._generations[section.name] = self._generations.get(section.name, 0) + 1
+            self._pending.add(section.name)
+        for section in sections:
+            if section.placeholder is not None:
+                try:
+                    section.placeholder()
+                except Exception as e:
+                    print(f"Error showing placeholder for {section.name}: {e}")
+        for section in sections:
+            self._pool.start(_FetchTask(self, self._generations[section.name], section))
+
+    def wait(self, timeout_ms: int = -1) -> bool:
+        """Block until all fetches are done (e.g. before closing the window)."""
+        return self._pool.waitForDone(timeout_ms)
+
+    def _on_fetched(self, generation: int, name: str, result, error):
+        if generation != self._generations.get(name) or name not in self._pending:
+            return  # superseded by a newer run
+        self._pending.discard(name)
+        section = self._sections[name]
+        if error is not None:
+            print(f"Error loading {name}: {error}")
+        try:
+            section.apply(result)
+        except Exception as e:
+            print(f"Error updating {name}: {e}")
+        self.section_loaded.emit(name)
+        if not self._pending:
+            self.finished.emit(time.perf_counter() - self._started)
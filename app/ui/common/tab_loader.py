@@ -0,0 +1,83 @@
+"""
+Tab Loader
+----------
+Loads a dashboard tab's data when the tab is first shown instead of loading
+every tab at construction time.
+
+Each tab page registers the loaders that fill it. All loaders start stale;
+activating a tab runs its stale loaders once. After a write, the other tabs
+are marked stale and reload on their next activation, so the visible tab is
+the only one that pays for a query up front. A loader shared by several tabs
+(e.g. filling course filter combos) runs once per stale cycle.
+"""
+
+from typing import Callable, Dict, List, Optional
+
+from PyQt5 import QtCore, QtWidgets
+
+
+class TabLoader(QtCore.QObject):
+    """
+    Tab-activation-driven data loading for a QTabWidget.
+
+    Args:
+        tab_widget (QTabWidget): The dashboard's tab widget.
+    """
+
+    def __init__(self, tab_widget: QtWidgets.QTabWidget, parent=None):
+        super().__init__(parent)
+        self._tabs = tab_widget
+        self._loaders: Dict[QtWidgets.QWidget, List[Callable[[], None]]] = {}
+        self._stale = set()
+        tab_widget.currentChanged.connect(self._on_current_changed)
+
+    def register(self, page: QtWidgets.QWidget, *loaders: Callable[[], None]):
+        """Attach loaders to a tab page (run in order on activation). They start stale."""
+        if page is None:
+            return
+        self._loaders.setdefault(page, []).extend(loaders)
+        self._stale.update(loaders)
+
+    def ensure_loaded(self, page: Optional[QtWidgets.QWidget]):
+        """Run the page's stale loaders now."""
+        for loader in list(self._loaders.get(page, [])):
+            if loader not in self._stale:
+                continue
+            # clear first so a loader that triggers another activation does not run twice
+            self._stale.discard(loader)
+            try:
+                loader()
+            except Exception as e:
+                print(f"Error loading tab data: {e}")
+
+    def load_current(self):
+        """Load the visible tab if it is stale."""
+        self.ensure_loaded(self._tabs.currentWidget())
+
+    def is_stale(self, page: QtWidgets.QWidget) -> bool:
+        return any(loader in self._stale for loader in self._loaders.get(page, []))
+
+    def mark_stale(self, *pages: QtWidgets.QWidget):
+        """
+        Mark pages (default: all) as stale. The visible one is reloaded immediately,
+        hidden ones on their next activation.
+        """
+        for page in pages or list(self._loaders):
+            self._stale.update(self._loaders.get(page, []))
+        self.load_current()
+
+    def mark_others_stale(self):
+        """Call after a write: every tab except the visible one reloads on its next activation."""
+        current = self._tabs.currentWidget()
+        for page, loaders in self._loaders.items():
+            if page is not current:
+                self._stale.update(loaders)
+        # loaders shared with the visible tab were just refreshed by the caller
+        self._stale.difference_update(self._loaders.get(current, []))
+
+    def refresh(self):
+        """Full refresh: everything stale, load the visible tab now."""
+        self.mark_stale()
+
+    def _on_current_changed(self, index: int):
+        self.ensure_loaded(self._tabs.widget(index))
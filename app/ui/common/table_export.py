@@ -0,0 +1,149 @@
+"""
+Table Export
+------------
+Exports what a table shows (a QTableWidget or a model-backed QTableView) to
+CSV, gzip CSV or JSON Lines behind a cancellable progress dialog.
+
+Qt models may only be read on the GUI thread, so the rows are read there in
+chunks of CHUNK_ROWS, one chunk per event-loop turn, and handed through a
+bounded exporter.RowQueue to the export running on a BackgroundTask, which
+does the encoding, compression and file writes. The window stays responsive
+and memory is bounded by the queue, not the table size.
+"""
+
+import re
+
+from PyQt5 import QtCore, QtWidgets
+
+from app.ui.common.background_task import run_with_progress
+from app.utils import exporter
+
+# Table rows read per event-loop turn
+CHUNK_ROWS = 500
+
+EXPORT_FILTERS = "CSV Files (*.csv);;Compressed CSV (*.csv.gz);;JSON Lines (*.jsonl)"
+
+_SUFFIX = re.compile(r"\(\*(\.[\w.]+)\)")
+
+
+def ask_export_path(parent, title, default_name, filters=EXPORT_FILTERS):
+    """
+    Ask where to export, adding the extension of the chosen filter if the name has none.
+
+    Returns:
+        str: The path, or None if the dialog was cancelled.
+    """
+    path, selected = QtWidgets.QFileDialog.getSaveFileName(parent, title, default_name, filters)
+    if not path:
+        return None
+    suffixes = _SUFFIX.findall(filters)
+    if not path.lower().endswith(tuple(suffixes)):
+        match = _SUFFIX.search(selected or "")
+        path += match.group(1) if match else suffixes[0]
+    return path
+
+
+def export_columns(model):
+    """
+    Columns worth exporting: those with a header, except a painted actions column.
+
+    Returns:
+        tuple: (column indexes, header texts).
+    """
+    columns, headers = [], []
+    for column in range(model.columnCount()):
+        header = model.headerData(column, QtCore.Qt.Horizontal, QtCore.Qt.DisplayRole)
+        header = "" if header is None else str(header)
+        if header and header != "Actions":
+            columns.append(column)
+            headers.append(header)
+    return columns, headers
+
+
+def export_model(parent, model, path, title, on_finished, headers=None, columns=None):
+    """
+    Export a model's rows as displayed, in model order, on a background writer.
+
+    Args:
+        parent (QWidget): Progress dialog parent.
+        model (QAbstractItemModel): Model to read (a view's proxy exports what the view shows).
+        path (str): Output file (.csv, .csv.gz, .jsonl or .jsonl.gz).
+        title (str): Progress dialog title.
+        on_finished (callable): Receives the exporter.ExportResult on the GUI thread.
+        headers (list, optional): Column names (default: the model's headers).
+        columns (list, optional): Model columns to export (default: see export_columns).
+
+    Returns:
+        BackgroundTask: The running export (keep a reference while it runs).
+    """
+    if columns is None:
+        columns, default_headers = export_columns(model)
+        headers = headers or default_headers
+    total = model.rowCount()
+    rows = exporter.RowQueue()
+
+    def _job(progress, cancelled):
+        return exporter.export_batches(path, headers, rows, progress=progress, cancelled=cancelled, total=total)
+
+    task = run_with_progress(parent, title, _job, on_finished)
+    timer = QtCore.QTimer(task)
+    timer.setInterval(0)
+    position = [0]
+
+    def _feed():
+        if not task.is_running():  # finished early (cancelled or write error)
+            timer.stop()
+            rows.cancel()
+            return
+        if rows.full():
+            return
+        start = position[0]
+        end = min(start + CHUNK_ROWS, total, model.rowCount())
+        chunk = []
+        for row in range(start, end):
+            values = (model.index(row, column).data(QtCore.Qt.DisplayRole) for column in columns)
+            chunk.append(["" if value is None else value for value in values])
+        rows.put(chunk)
+        position[0] = end
+        if end >= min(total, model.rowCount()):
+            timer.stop()
+            rows.close()
+
+    timer.timeout.connect(_feed)
+    timer.start()
+    return task
+
+
+def export_table(parent, view, title, default_name, headers=None):
+    """
+    Ask for a file and export a table's visible rows to it, reporting the outcome in a message box.
+
+    Args:
+        parent (QWidget): Dialog parent.
+        view (QTableView): Table to export (QTableWidget works too).
+        title (str): Dialog title, e.g. "Export Grades".
+        default_name (str): Suggested file name.
+        headers (list, optional): Column names to write instead of the table's headers.
+
+    Returns:
+        BackgroundTask: The running export, or None if nothing was exported.
+    """
+    model = view.model()
+    if model is None or model.rowCount() == 0:
+        QtWidgets.QMessageBox.warning(parent, title, "There is nothing to export.")
+        return None
+    path = ask_export_path(parent, title, default_name)
+    if not path:
+        return None
+
+    def _finished(result):
+        if result.error:
+            QtWidgets.QMessageBox.warning(parent, title, result.summary())
+        else:
+            QtWidgets.QMessageBox.information(parent, title, result.summary())
+
+    columns = None
+    if headers is not None:
+        columns = list(range(min(len(headers), model.columnCount())))
+        headers = list(headers)[:len(columns)]
+    return export_model(parent, model, path, title, _finished, headers=headers, columns=columns)
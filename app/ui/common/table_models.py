@@ -0,0 +1,474 @@
+"""
+Record Table Models
+-------------------
+Model/view replacement for QTableWidget tables that used one QTableWidgetItem
+per cell and a QWidget with two QPushButtons per row for the actions column.
+
+Rows are kept as the dicts returned by execute_query; cells are formatted on
+demand in data(), so loading N rows costs one model reset instead of N rows
+of widget construction. The actions column is painted by ActionsDelegate, and
+searching/filtering/sorting is done by RecordFilterProxyModel without going
+back to the database.
+"""
+
+import datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from PyQt5 import QtCore, QtWidgets
+
+RecordRole = QtCore.Qt.UserRole + 1
+
+
+class Column:
+    """
+    One table column.
+
+    Args:
+        key (str, optional): Record key shown (and sorted) in this column.
+        fmt (callable, optional): record -> display text. Without a key the
+            formatted text is also the sort value.
+    """
+
+    def __init__(self, key: Optional[str] = None, fmt: Callable[[Dict[str, Any]], str] = None):
+        self.key = key
+        self.fmt = fmt
+
+    def value(self, record: Dict[str, Any]) -> Any:
+        if self.key:
+            return record.get(self.key)
+        return self.fmt(record) if self.fmt else None
+
+    def display(self, record: Dict[str, Any]) -> str:
+        if self.fmt:
+            try:
+                return self.fmt(record)
+            except Exception:
+                return ""
+        value = record.get(self.key) if self.key else None
+        return "" if value is None else str(value)
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    # None first, then numbers/durations, then dates, then text; keeps mixed columns comparable
+    if value is None:
+        return (0, 0)
+    if isinstance(value, (bool, int, float, Decimal)):
+        return (1, float(value))
+    if isinstance(value, datetime.timedelta):
+        return (1, value.total_seconds())
+    if isinstance(value, (datetime.date, datetime.time)):
+        return (2, value.isoformat())
+    return (3, str(value).lower())
+
+
+class RecordTableModel(QtCore.QAbstractTableModel):
+    """
+    Table model over a list of record dicts.
+
+    Records are identified by ``id_key`` so single rows can be replaced or
+    removed without reloading the table (see upsert/remove).
+    """
+
+    def __init__(self, columns: Sequence[Column], headers: Sequence[str], id_key: str = "id",
+                 actions_column: Optional[int] = None, parent=None):
+        super().__init__(parent)
+        self._columns = list(columns)
+        self._headers = list(headers)
+        self._id_key = id_key
+        self._actions_column = actions_column
+        self._rows: List[Dict[str, Any]] = []
+        self._row_of: Dict[Any, int] = {}
+        self._search_cache: Dict[int, str] = {}
+        self._sort: Tuple[int, int] = (-1, QtCore.Qt.AscendingOrder)
+        self._pager = None
+
+    # --- Qt model interface ---
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._headers)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal and 0 <= section < len(self._headers):
+            return self._headers[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._rows):
+            return None
+        record = self._rows[index.row()]
+        if role in (RecordRole, QtCore.Qt.UserRole):
+            return record
+        col = index.column()
+        if col == self._actions_column or col >= len(self._columns):
+            return None
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.ToolTipRole):
+            return self._columns[col].display(record)
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()):
+        return not parent.isValid() and self._pager is not None and self._pager.has_more()
+
+    def fetchMore(self, parent=QtCore.QModelIndex()):
+        if self.canFetchMore(parent):
+            self._pager.fetch_more()
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        """
+        Sort rows by a column's raw value, keeping persistent indexes (selection) on their records.
+        With a pager, sortable columns are sorted on the server instead.
+        """
+        if self._pager is not None:
+            self._pager.sort(column, order)
+            return
+        self._sort = (column, order)
+        if column < 0 or column >= len(self._columns) or not self._rows:
+            return
+        col = self._columns[column]
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        tracked = [(self._rows[i.row()], i.column()) if i.row() < len(self._rows) else (None, 0) for i in persistent]
+        self._rows.sort(key=lambda r: _sort_key(col.value(r)), reverse=(order == QtCore.Qt.DescendingOrder))
+        self._reindex()
+        position = {id(r): i for i, r in enumerate(self._rows)}
+        self.changePersistentIndexList(
+            persistent,
+            [self.index(position[id(r)], c) if r is not None else QtCore.QModelIndex() for r, c in tracked],
+        )
+        self.layoutChanged.emit()
+
+    # --- records ---
+    def _reindex(self):
+        self._row_of = {r.get(self._id_key): i for i, r in enumerate(self._rows)}
+        self._search_cache = {}
+
+    def set_rows(self, rows: Iterable[Dict[str, Any]]):
+        """Replace all records (one model reset); re-applies the current sort."""
+        self.beginResetModel()
+        self._rows = list(rows or [])
+        self._reindex()
+        self.endResetModel()
+        column, order = self._sort
+        if column >= 0:
+            self.sort(column, order)
+
+    def set_pager(self, pager):
+        """
+        Page rows from the server. pager provides has_more(), fetch_more() and
+        sort(column, order) (see FilterController); rows arrive via set_rows/append_rows.
+        """
+        self._pager = pager
+
+    def append_rows(self, rows: Iterable[Dict[str, Any]]):
+        """Append a page of records (rows already present by id are skipped)."""
+        rows = [r for r in (rows or []) if r.get(self._id_key) not in self._row_of]
+        if not rows:
+            return
+        start = len(self._rows)
+        self.beginInsertRows(QtCore.QModelIndex(), start, start + len(rows) - 1)
+        self._rows.extend(rows)
+        for i, r in enumerate(rows, start):
+            self._row_of[r.get(self._id_key)] = i
+        self.endInsertRows()
+
+    def export_headers(self) -> List[str]:
+        """Headers of the data columns (without the actions column)."""
+        return self._headers[:len(self._columns)]
+
+    def display_values(self, record: Dict[str, Any]) -> List[str]:
+        """A record's cells as displayed; makes no Qt calls, so exports can use it off the GUI thread."""
+        return [column.display(record) for column in self._columns]
+
+    def records(self) -> List[Dict[str, Any]]:
+        return self._rows
+
+    def record_at(self, row: int) -> Optional[Dict[str, Any]]:
+        return self._rows[row] if 0 <= row < len(self._rows) else None
+
+    def row_of(self, record_id: Any) -> int:
+        """Row of the record with this id, or -1."""
+        return self._row_of.get(record_id, -1)
+
+    def _insert_position(self, record: Dict[str, Any]) -> int:
+        """Row a new record belongs at in the current order (the server's with a pager; the end when unsorted)."""
+        if self._pager is not None:
+            key, id_key, descending = self._pager.sort_order()
+
+            def order(r):
+                return (_sort_key(r.get(key)) if key else (0, 0), _sort_key(r.get(id_key)))
+        else:
+            column, sort_order = self._sort
+            if column < 0 or column >= len(self._columns):
+                return len(self._rows)
+            col = self._columns[column]
+            descending = sort_order == QtCore.Qt.DescendingOrder
+
+            def order(r):
+                return _sort_key(col.value(r))
+        target = order(record)
+        low, high = 0, len(self._rows)
+        while low < high:  # first row that sorts after the record
+            mid = (low + high) // 2
+            value = order(self._rows[mid])
+            if (value < target) if descending else (value > target):
+                high = mid
+            else:
+                low = mid + 1
+        return low
+
+    def upsert(self, record: Dict[str, Any]):
+        """Replace the record with the same id in place, or insert it where the current sort puts it."""
+        row = self.row_of(record.get(self._id_key))
+        if row >= 0:
+            self._rows[row] = record
+            self._search_cache.pop(row, None)
+            self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+            return
+        row = self._insert_position(record)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self._rows.insert(row, record)
+        self._reindex()
+        self.endInsertRows()
+
+    def remove(self, record_id: Any) -> bool:
+        """Remove the record with this id. Returns True if a row was removed."""
+        row = self.row_of(record_id)
+        if row < 0:
+            return False
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        del self._rows[row]
+        self._reindex()
+        self.endRemoveRows()
+        return True
+
+    def remove_many(self, record_ids: Iterable[Any]) -> int:
+        """Remove several records (one removal per contiguous run of rows). Returns the number removed."""
+        rows = sorted({self.row_of(i) for i in record_ids} - {-1}, reverse=True)
+        runs = []
+        for row in rows:
+            if runs and runs[-1][0] == row + 1:
+                runs[-1][0] = row
+            else:
+                runs.append([row, row])
+        for first, last in runs:  # bottom-up, so earlier row numbers stay valid
+            self.beginRemoveRows(QtCore.QModelIndex(), first, last)
+            del self._rows[first:last + 1]
+            self.endRemoveRows()
+        if rows:
+            self._reindex()
+        return len(rows)
+
+    def search_text(self, row: int, keys: Sequence[str]) -> str:
+        """Lower-cased concatenation of the given keys for row (cached until the row changes)."""
+        text = self._search_cache.get(row)
+        if text is None:
+            record = self._rows[row]
+            text = "\x1f".join(str(record.get(k) or "") for k in keys).lower()
+            self._search_cache[row] = text
+        return text
+
+
+class RecordFilterProxyModel(QtCore.QSortFilterProxyModel):
+    """
+    Proxy adding substring search over ``search_keys`` and exact-match filters
+    on record keys. Sorting is delegated to the source model, which sorts the
+    records list directly instead of comparing index pairs through lessThan.
+    """
+
+    def __init__(self, search_keys: Sequence[str] = (), parent=None):
+        super().__init__(parent)
+        self._search_keys = tuple(search_keys)
+        self._search = ""
+        self._equals: Dict[str, str] = {}
+
+    def set_filters(self, search: Optional[str] = None, **equals):
+        """
+        Update the search text and/or key filters and re-filter once.
+        A filter value of None or "" removes that filter.
+        """
+        if search is not None:
+            self._search = search.strip().lower()
+        for key, value in equals.items():
+            if value is None or value == "":
+                self._equals.pop(key, None)
+            else:
+                self._equals[key] = str(value).lower()
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        model = self.sourceModel()
+        record = model.record_at(source_row)
+        if record is None:
+            return False
+        for key, value in self._equals.items():
+            if str(record.get(key, "")).lower() != value:
+                return False
+        if self._search and self._search_keys:
+            return self._search in model.search_text(source_row, self._search_keys)
+        return True
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        self.sourceModel().sort(column, order)
+
+    def record_at(self, proxy_row: int) -> Optional[Dict[str, Any]]:
+        source = self.mapToSource(self.index(proxy_row, 0))
+        return self.sourceModel().record_at(source.row()) if source.isValid() else None
+
+
+class ActionsDelegate(QtWidgets.QStyledItemDelegate):
+    """
+    Paints a row of push buttons in a cell and reports clicks.
+
+    Emits actionTriggered(action_name, record) where record is the row's dict.
+    """
+
+    actionTriggered = QtCore.pyqtSignal(str, object)
+
+    _SPACING = 4
+
+    def __init__(self, actions: Sequence[Tuple[str, str]], parent=None):
+        super().__init__(parent)
+        self._actions = list(actions)  # [(name, label), ...]
+
+    def _button_rects(self, rect: QtCore.QRect) -> List[QtCore.QRect]:
+        count = len(self._actions)
+        if not count:
+            return []
+        inner = rect.adjusted(2, 2, -2, -2)
+        width = max((inner.width() - self._SPACING * (count - 1)) // count, 1)
+        return [QtCore.QRect(inner.left() + i * (width + self._SPACING), inner.top(), width, inner.height())
+                for i in range(count)]
+
+    def paint(self, painter, option, index):
+        if option.state & QtWidgets.QStyle.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+        widget = option.widget
+        style = widget.style() if widget else QtWidgets.QApplication.style()
+        for (name, label), rect in zip(self._actions, self._button_rects(option.rect)):
+            button = QtWidgets.QStyleOptionButton()
+            button.rect = rect
+            button.text = label
+            button.state = QtWidgets.QStyle.State_Enabled | QtWidgets.QStyle.State_Raised
+            style.drawControl(QtWidgets.QStyle.CE_PushButton, button, painter, widget)
+
+    def sizeHint(self, option, index):
+        metrics = option.fontMetrics
+        width = sum(metrics.horizontalAdvance(label) + 24 for _, label in self._actions)
+        width += self._SPACING * max(len(self._actions) - 1, 0) + 4
+        return QtCore.QSize(width, metrics.height() + 12)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QtCore.QEvent.MouseButtonRelease and event.button() == QtCore.Qt.LeftButton:
+            for (name, _), rect in zip(self._actions, self._button_rects(option.rect)):
+                if rect.contains(event.pos()):
+                    self.actionTriggered.emit(name, index.data(RecordRole))
+                    return True
+        return super().editorEvent(event, model, option, index)
+
+
+def attach_record_table(ui, name: str, columns: Sequence[Column], search_keys: Sequence[str] = (),
+                        actions: Sequence[Tuple[str, str]] = (),
+                        on_action: Callable[[str, Dict[str, Any]], None] = None):
+    """
+    Replace the QTableWidget ``ui.<name>`` with a QTableView over a RecordTableModel.
+
+    Headers are taken from the existing widget so the generated UI stays the
+    source of truth. When ``actions`` is given the last column is painted by
+    an ActionsDelegate whose clicks call ``on_action(action_name, record)``.
+
+    Returns:
+        tuple: (model, proxy); the view is available as ``ui.<name>`` afterwards.
+    """
+    old = getattr(ui, name)
+    headers = []
+    for i in range(old.columnCount()):
+        item = old.horizontalHeaderItem(i) if hasattr(old, "horizontalHeaderItem") else None
+        headers.append(item.text() if item is not None else "")
+    expected = len(columns) + (1 if actions else 0)
+    while len(headers) < expected:
+        headers.append("Actions" if actions and len(headers) == expected - 1 else "")
+    actions_column = len(headers) - 1 if actions else None
+
+    if isinstance(old, QtWidgets.QTableView) and not isinstance(old, QtWidgets.QTableWidget):
+        view = old
+    else:
+        parent = old.parentWidget()
+        view = QtWidgets.QTableView(parent)
+        view.setObjectName(old.objectName())
+        if isinstance(parent, QtWidgets.QSplitter):
+            parent.replaceWidget(parent.indexOf(old), view)
+        elif parent is not None and parent.layout() is not None:
+            parent.layout().replaceWidget(old, view)
+        old.hide()
+        old.deleteLater()
+        setattr(ui, name, view)
+
+    model = RecordTableModel(columns, headers, actions_column=actions_column, parent=view)
+    proxy = RecordFilterProxyModel(search_keys, parent=view)
+    proxy.setSourceModel(model)
+    view.setModel(proxy)
+
+    view.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+    # Ctrl/Shift-click selects several rows for bulk actions
+    view.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+    view.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+    view.setAlternatingRowColors(True)
+    view.setWordWrap(False)
+    # fixed row heights: the view never measures rows it does not show
+    view.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+    view.verticalHeader().setDefaultSectionSize(view.fontMetrics().height() + 14)
+    view.verticalHeader().hide()
+    view.horizontalHeader().setStretchLastSection(True)
+    # no sort until the user clicks a header (setSortingEnabled sorts immediately otherwise)
+    view.horizontalHeader().setSortIndicator(-1, QtCore.Qt.AscendingOrder)
+    view.setSortingEnabled(True)
+
+    if actions:
+        delegate = ActionsDelegate(actions, parent=view)
+        view.setItemDelegateForColumn(actions_column, delegate)
+        if on_action is not None:
+            delegate.actionTriggered.connect(on_action)
+        # keep a reference so the delegate is not garbage collected
+        view._actions_delegate = delegate
+    return model, proxy
+
+
+def selected_records(view: QtWidgets.QAbstractItemView) -> List[Dict[str, Any]]:
+    """Records of the selected rows, in view order."""
+    selection = view.selectionModel()
+    if selection is None:
+        return []
+    rows = sorted(selection.selectedRows(), key=lambda index: index.row())
+    return [r for r in (index.data(RecordRole) for index in rows) if r is not None]
+
+
+def enable_prefetch(view: QtWidgets.QAbstractItemView, pages_ahead: float = 2.0):
+    """
+    Ask the model for more rows while the user is still a few screens from the end.
+
+    Qt only calls fetchMore once the scrollbar reaches its maximum; this starts
+    the next page load ``pages_ahead`` viewport heights earlier so it is usually
+    in place before it scrolls into view.
+    """
+    bar = view.verticalScrollBar()
+
+    def _check(value):
+        model = view.model()
+        if model is not None and value >= bar.maximum() - int(bar.pageStep() * pages_ahead) \
+                and model.canFetchMore(QtCore.QModelIndex()):
+            model.fetchMore(QtCore.QModelIndex())
+    bar.valueChanged.connect(_check)
+
+
+def fit_columns(view: QtWidgets.QTableView, sample_rows: int = 200):
+    """Resize columns to their contents, measuring only the first ``sample_rows`` rows."""
+    header = view.horizontalHeader()
+    header.setResizeContentsPrecision(sample_rows)
+    view.resizeColumnsToContents()
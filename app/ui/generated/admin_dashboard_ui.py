@@ -82,6 +82,50 @@ class Ui_AdminDashboard(object):
         self.tabWidget = QtWidgets.QTabWidget(self.centralwidget)
         self.tabWidget.setObjectName("tabWidget")
 
+        # Overview tab (KPI cards, filled from app.utils.kpi)
+        self.overviewTab = QtWidgets.QWidget()
+        self.overviewTab.setObjectName("overviewTab")
+        self.overviewLayout = QtWidgets.QVBoxLayout(self.overviewTab)
+
+        self.overviewToolbar = QtWidgets.QHBoxLayout()
+        self.overviewUpdatedLabel = QtWidgets.QLabel(self.overviewTab)
+        self.overviewUpdatedLabel.setObjectName("overviewUpdatedLabel")
+        self.overviewToolbar.addWidget(self.overviewUpdatedLabel)
+        self.overviewToolbar.addStretch()
+        self.refreshOverviewButton = QtWidgets.QPushButton("Refresh", self.overviewTab)
+        self.refreshOverviewButton.setObjectName("refreshOverviewButton")
+        self.overviewToolbar.addWidget(self.refreshOverviewButton)
+        self.overviewLayout.addLayout(self.overviewToolbar)
+
+        # One card per figure: <name>Group with a large <name>Label and a <name>DetailLabel
+        self.overviewGrid = QtWidgets.QGridLayout()
+        kpi_font = QtGui.QFont()
+        kpi_font.setPointSize(24)
+        kpi_font.setBold(True)
+        for index, (name, title) in enumerate((
+                ("activeStudents", "Active Students"), ("activeCourses", "Active Courses"),
+                ("revenueMonth", "Revenue This Month"), ("overduePayments", "Overdue Payments"),
+                ("roomUtilization", "Room Utilization"), ("unreadMessages", "Unread Messages"))):
+            group = QtWidgets.QGroupBox(title, self.overviewTab)
+            group.setObjectName(f"{name}Group")
+            group_layout = QtWidgets.QVBoxLayout(group)
+            value_label = QtWidgets.QLabel("…", group)
+            value_label.setFont(kpi_font)
+            value_label.setAlignment(QtCore.Qt.AlignCenter)
+            value_label.setObjectName(f"{name}Label")
+            group_layout.addWidget(value_label)
+            detail_label = QtWidgets.QLabel(group)
+            detail_label.setAlignment(QtCore.Qt.AlignCenter)
+            detail_label.setObjectName(f"{name}DetailLabel")
+            group_layout.addWidget(detail_label)
+            self.overviewGrid.addWidget(group, index // 3, index % 3)
+            setattr(self, f"{name}Group", group)
+            setattr(self, f"{name}Label", value_label)
+            setattr(self, f"{name}DetailLabel", detail_label)
+        self.overviewLayout.addLayout(self.overviewGrid)
+        self.overviewLayout.addStretch()
+        self.tabWidget.addTab(self.overviewTab, "Overview")
+
         # Users tab
         self.usersTab = QtWidgets.QWidget()
         self.usersTab.setObjectName("usersTab")
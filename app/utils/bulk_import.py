@@ -0,0 +1,436 @@
+"""
+Bulk Import
+-----------
+CSV import for users, courses, enrollments and payments.
+
+The file is streamed in chunks. Each row is first checked on its own
+(required fields, formats, enum values); for large files this runs in worker
+processes. Rows are then checked against the database: usernames/emails must
+be unique and referenced students, teachers and courses must exist. These
+checks use in-memory sets loaded with one query per set, not one query per
+row. Accepted rows are written with multi-row INSERTs in a single transaction
+(all or nothing); rejected rows go to a reject file next to the input, with
+the reason in an extra "error" column.
+
+Usage:
+    result = import_csv("users", "students.csv", progress=print)
+"""
+
+import csv
+import multiprocessing
+import os
+import re
+import time
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from app.utils.database import execute_in_transaction, execute_query
+
+# Rows handed to a validation worker at a time
+CHUNK_ROWS = 1000
+# Rows per INSERT statement
+INSERT_ROWS = 500
+# Files with at least this many rows are validated in worker processes
+PARALLEL_MIN_ROWS = 5000
+
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_TRUE = {"1", "yes", "y", "true", "active"}
+_FALSE = {"0", "no", "n", "false", "inactive"}
+
+
+# --- per-row checks (run in worker processes: pure functions, no DB) ---
+def _required(row, key):
+    value = (row.get(key) or "").strip()
+    if not value:
+        raise ValueError(f"{key} is required")
+    return value
+
+
+def _optional(row, key):
+    value = (row.get(key) or "").strip()
+    return value or None
+
+
+def _flag(row, key, default=1):
+    value = (row.get(key) or "").strip().lower()
+    if not value:
+        return default
+    if value in _TRUE:
+        return 1
+    if value in _FALSE:
+        return 0
+    raise ValueError(f"{key} must be yes/no")
+
+
+def _choice(row, key, choices, default=None):
+    value = (row.get(key) or "").strip().lower()
+    if not value and default is not None:
+        return default
+    if value not in choices:
+        raise ValueError(f"{key} must be one of: {', '.join(choices)}")
+    return value
+
+
+def _money(row, key):
+    try:
+        value = Decimal(_required(row, key).replace(",", "").lstrip("$"))
+    except InvalidOperation:
+        raise ValueError(f"{key} must be a number")
+    if value < 0:
+        raise ValueError(f"{key} must not be negative")
+    return value.quantize(Decimal("0.01"))
+
+
+def _date(row, key, required=True):
+    value = (row.get(key) or "").strip()
+    if not value:
+        if required:
+            raise ValueError(f"{key} is required")
+        return None
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y"):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            pass
+    raise ValueError(f"{key} must be a date (YYYY-MM-DD)")
+
+
+def _check_user(row):
+    email = _required(row, "email")
+    if not _EMAIL_RE.match(email):
+        raise ValueError("email is not valid")
+    return {
+        "username": _required(row, "username"),
+        # stored as entered, like AdminDashboardView.add_user
+        "password": _required(row, "password"),
+        "first_name": _required(row, "first_name"),
+        "last_name": _required(row, "last_name"),
+        "email": email,
+        "user_type": _choice(row, "user_type", ("admin", "teacher", "student"), default="student"),
+        "active": _flag(row, "active"),
+    }
+
+
+def _check_course(row):
+    return {
+        "name": _required(row, "name"),
+        "language": _required(row, "language"),
+        "level": _required(row, "level"),
+        "description": _optional(row, "description"),
+        "price": _money(row, "price"),
+        "teacher": _required(row, "teacher"),
+        "active": _flag(row, "active"),
+    }
+
+
+def _check_enrollment(row):
+    return {
+        "student": _required(row, "student"),
+        "course": _required(row, "course"),
+        "enrollment_date": _date(row, "enrollment_date", required=False) or date.today(),
+        "active": _flag(row, "active"),
+    }
+
+
+def _check_payment(row):
+    return {
+        "student": _required(row, "student"),
+        "course": _required(row, "course"),
+        "amount": _money(row, "amount"),
+        "due_date": _date(row, "due_date"),
+        "payment_date": _date(row, "payment_date", required=False),
+        "status": _choice(row, "status", ("pending", "paid", "overdue"), default="pending"),
+        "payment_method": _optional(row, "payment_method"),
+        "notes": _optional(row, "notes"),
+    }
+
+
+# kind -> (table, required CSV columns, row check, inserted columns)
+SPECS = {
+    "users": ("users", ("username", "password", "first_name", "last_name", "email"), _check_user,
+              ("username", "password", "first_name", "last_name", "email", "user_type", "active")),
+    "courses": ("courses", ("name", "language", "level", "price", "teacher"), _check_course,
+                ("name", "language", "level", "description", "price", "teacher_id", "active")),
+    "enrollments": ("student_courses", ("student", "course"), _check_enrollment,
+                    ("student_id", "course_id", "enrollment_date", "active")),
+    "payments": ("payments", ("student", "course", "amount", "due_date"), _check_payment,
+                 ("student_id", "course_id", "amount", "due_date", "payment_date", "status",
+                  "payment_method", "notes")),
+}
+
+
+def _check_chunk(kind, rows):
+    """
+    Worker entry point: check a chunk of (line_no, row) pairs.
+
+    Returns:
+        list: (line_no, row, values, error) with values None when error is set.
+    """
+    check = SPECS[kind][2]
+    result = []
+    for line_no, row in rows:
+        try:
+            result.append((line_no, row, check(row), None))
+        except ValueError as e:
+            result.append((line_no, row, None, str(e)))
+    return result
+
+
+def _check_chunk_args(args):
+    return _check_chunk(*args)
+
+
+# --- checks against the database (parent process, in-memory sets) ---
+class _References:
+    """Id sets and username maps loaded with one query each."""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.usernames = set()
+        self.emails = set()
+        self.people = {}      # user_type -> (ids, {lower(username): id})
+        self.course_ids = set()
+        self.enrolled = set()
+
+    def load(self):
+        """Returns False if a query failed."""
+        if self.kind == "users":
+            rows = execute_query("SELECT username, email FROM users", fetch=True)
+            if rows is None:
+                return False
+            # MySQL's default collation compares case-insensitively
+            self.usernames = {r["username"].lower() for r in rows}
+            self.emails = {r["email"].lower() for r in rows}
+            return True
+        needed = ["teacher"] if self.kind == "courses" else ["student"]
+        rows = execute_query("SELECT id, username, user_type FROM users WHERE user_type IN (%s)"
+                             % ", ".join(["%s"] * len(needed)), needed, fetch=True)
+        if rows is None:
+            return False
+        for user_type in needed:
+            typed = [r for r in rows if r["user_type"] == user_type]
+            self.people[user_type] = ({r["id"] for r in typed}, {r["username"].lower(): r["id"] for r in typed})
+        if self.kind in ("enrollments", "payments"):
+            rows = execute_query("SELECT id FROM courses", fetch=True)
+            if rows is None:
+                return False
+            self.course_ids = {r["id"] for r in rows}
+        if self.kind == "enrollments":
+            rows = execute_query("SELECT student_id, course_id FROM student_courses", fetch=True)
+            if rows is None:
+                return False
+            self.enrolled = {(r["student_id"], r["course_id"]) for r in rows}
+        return True
+
+    def _person(self, user_type, token):
+        ids, by_username = self.people[user_type]
+        if token.isdigit() and int(token) in ids:
+            return int(token)
+        return by_username.get(token.lower())
+
+    def check(self, values):
+        """
+        Resolve references and check uniqueness; accepted keys are remembered so
+        duplicates later in the same file are rejected too.
+
+        Returns:
+            str: Error message, or None if the row can be inserted.
+        """
+        if self.kind == "users":
+            username, email = values["username"].lower(), values["email"].lower()
+            if username in self.usernames:
+                return "username already exists"
+            if email in self.emails:
+                return "email already exists"
+            self.usernames.add(username)
+            self.emails.add(email)
+            return None
+        if self.kind == "courses":
+            teacher_id = self._person("teacher", values.pop("teacher"))
+            if teacher_id is None:
+                return "teacher not found"
+            values["teacher_id"] = teacher_id
+            return None
+        student_id = self._person("student", values.pop("student"))
+        if student_id is None:
+            return "student not found"
+        course = values.pop("course")
+        course_id = int(course) if course.isdigit() else None
+        if course_id not in self.course_ids:
+            return "course not found"
+        values["student_id"], values["course_id"] = student_id, course_id
+        if self.kind == "enrollments":
+            if (student_id, course_id) in self.enrolled:
+                return "student already enrolled in course"
+            self.enrolled.add((student_id, course_id))
+        return None
+
+
+class ImportResult:
+    """
+    Outcome of an import.
+
+    Attributes:
+        total (int): Data rows read.
+        imported (int): Rows inserted (0 if the transaction failed).
+        rejected (int): Rows written to the reject file.
+        reject_path (str): Reject file, or None if every row was accepted.
+        error (str): Why nothing was imported, or None.
+        elapsed (float): Seconds taken.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.imported = 0
+        self.rejected = 0
+        self.reject_path = None
+        self.error = None
+        self.elapsed = 0.0
+
+    def summary(self):
+        if self.error:
+            return f"Import failed: {self.error}"
+        text = f"Imported {self.imported} of {self.total} rows in {self.elapsed:.1f}s."
+        if self.rejected:
+            text += f" {self.rejected} rejected rows were written to {self.reject_path}."
+        return text
+
+
+def _chunks(reader, size):
+    chunk = []
+    for row in reader:
+        # line_num is the file line of this row (the header is line 1)
+        chunk.append((reader.line_num, row))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _count_rows(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return max(sum(1 for _ in f) - 1, 0)
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"Error removing {path}: {e}")
+
+
+def _discard_rejects(result):
+    """Drop the reject file of a cancelled import (it lists only the rows checked before the cancel)."""
+    if result.reject_path:
+        _remove_file(result.reject_path)
+    result.reject_path = None
+    result.rejected = 0
+
+
+def import_csv(kind, path, progress=None, cancelled=None, reject_path=None, workers=None):
+    """
+    Import a CSV file.
+
+    Args:
+        kind (str): "users", "courses", "enrollments" or "payments" (see SPECS for columns).
+        path (str): CSV file with a header row.
+        progress (callable, optional): progress(stage, done, total); stage is
+            "validating" or "inserting".
+        cancelled (callable, optional): Returns True to stop; nothing is imported then.
+        reject_path (str, optional): Where to write rejected rows (default: <name>.rejects.csv).
+        workers (int, optional): Validation processes for large files (default: CPU count, max 4).
+
+    Returns:
+        ImportResult: Counts, reject file and error.
+    """
+    started = time.perf_counter()
+    result = ImportResult()
+    table, required, _, columns = SPECS[kind]
+    progress = progress or (lambda stage, done, total: None)
+    cancelled = cancelled or (lambda: False)
+    reject_path = reject_path or os.path.splitext(path)[0] + ".rejects.csv"
+    # a reject file left by an earlier run must not be taken for this run's
+    _remove_file(reject_path)
+
+    refs = _References(kind)
+    if not refs.load():
+        result.error = "could not read existing data from the database"
+        return result
+
+    total = _count_rows(path)
+    accepted = []
+    reject_file = reject_writer = None
+    pool = None
+    try:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            reader.fieldnames = [(h or "").strip().lower() for h in (reader.fieldnames or [])]
+            missing = [c for c in required if c not in reader.fieldnames]
+            if missing:
+                result.error = f"missing columns: {', '.join(missing)}"
+                return result
+
+            chunks = ((kind, chunk) for chunk in _chunks(reader, CHUNK_ROWS))
+            workers = workers or min(os.cpu_count() or 1, 4)
+            if total >= PARALLEL_MIN_ROWS and workers > 1:
+                # spawn, not fork: the caller may be a multi-threaded GUI process
+                pool = multiprocessing.get_context("spawn").Pool(workers)
+                checked_chunks = pool.imap(_check_chunk_args, chunks)
+            else:
+                checked_chunks = (_check_chunk(*args) for args in chunks)
+
+            for checked in checked_chunks:
+                if cancelled():
+                    result.error = "cancelled"
+                    return result
+                for line_no, row, values, error in checked:
+                    result.total += 1
+                    if error is None:
+                        error = refs.check(values)
+                    if error is None:
+                        accepted.append(tuple(values[c] for c in columns))
+                        continue
+                    if reject_writer is None:
+                        reject_file = open(reject_path, "w", newline="", encoding="utf-8")
+                        reject_writer = csv.writer(reject_file)
+                        reject_writer.writerow(["line"] + reader.fieldnames + ["error"])
+                    reject_writer.writerow([line_no] + [row.get(h, "") for h in reader.fieldnames] + [error])
+                    result.rejected += 1
+                progress("validating", result.total, max(total, result.total))
+    finally:
+        if pool is not None:
+            pool.terminate()
+        if reject_file is not None:
+            reject_file.close()
+            result.reject_path = reject_path
+        if result.error == "cancelled":
+            _discard_rejects(result)
+
+    if accepted:
+        row_sql = "(" + ", ".join(["%s"] * len(columns)) + ")"
+        head = f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+
+        def _insert(cursor):
+            done = 0
+            for start in range(0, len(accepted), INSERT_ROWS):
+                if cancelled():
+                    return None
+                chunk = accepted[start:start + INSERT_ROWS]
+                cursor.execute(head + ", ".join([row_sql] * len(chunk)),
+                               [value for row in chunk for value in row])
+                done += len(chunk)
+                progress("inserting", done, len(accepted))
+            return done
+
+        inserted = execute_in_transaction(_insert)
+        if inserted is None:
+            result.error = "cancelled" if cancelled() else "database error while inserting (nothing was imported)"
+            if result.error == "cancelled":
+                _discard_rejects(result)
+        else:
+            result.imported = inserted
+    result.elapsed = time.perf_counter() - started
+    return result
@@ -0,0 +1,243 @@
+"""
+Change Probe
+------------
+Cheap change detection for table refreshes.
+
+Before reloading a table, run one probe query over it:
+
+    SELECT COUNT(*), MAX(updated_at), MAX(id), NOW(),
+           (SELECT COUNT(*) FROM t WHERE id > <last max id>)
+
+and compare it with the watermark taken at the last load:
+
+- nothing moved: skip the reload entirely;
+- rows were inserted or updated: fetch only the ids with
+  ``updated_at >= <last MAX(updated_at)>`` or ``id > <last MAX(id)>``;
+- the count is lower than "previous count + inserted rows": something was
+  deleted (the tables keep no tombstones), so reload in full.
+
+A probe can also watch tables the listing joins (e.g. course names shown in
+the schedules table); a change there forces a full reload.
+
+A check does not move the watermark: the caller passes the result to
+advance() once it has applied it, so a result that is dropped (superseded by
+a newer check, or fetched for a table that was reloaded meanwhile) leaves
+its changes for the next check instead of losing them. Probes are
+thread-safe; the lock is only held to read or swap the watermark, never
+while a probe query runs, so checks and marks can run on worker threads.
+"""
+
+import copy
+import threading
+
+from app.utils.database import execute_query
+
+UNCHANGED = "unchanged"
+CHANGED = "changed"
+RELOAD = "reload"
+
+
+class TableChange:
+    """
+    Result of a probe.
+
+    Attributes:
+        kind (str): UNCHANGED, CHANGED (patch changed_ids) or RELOAD (load in
+            full; the load calls mark() to start a new watermark).
+        changed_ids (list): Ids inserted or updated since the watermark (CHANGED only).
+    """
+
+    def __init__(self, kind, changed_ids=None, marks=None, base=None):
+        self.kind = kind
+        self.changed_ids = list(changed_ids or [])
+        # watermark ChangeProbe.advance() moves to, and the one this result was compared with
+        self._marks = marks
+        self._base = base
+
+    def __repr__(self):
+        return f"TableChange({self.kind!r}, {len(self.changed_ids)} ids)"
+
+
+class _Watermark:
+    """State of one table at the last probe."""
+
+    def __init__(self, row):
+        self.count = int(row.get('row_count') or 0)
+        self.last_updated = row.get('last_updated')
+        self.max_id = int(row.get('max_id') or 0)
+        self.probed_at = row.get('probed_at')
+
+    def same_as(self, other):
+        return (self.count, self.last_updated, self.max_id) == (other.count, other.last_updated, other.max_id)
+
+
+def _probe(table, since_id=0):
+    """
+    Run the probe query for one table.
+
+    Args:
+        table (str): Table name (trusted identifier, not user input).
+        since_id (int): Previous MAX(id); rows above it are counted as inserts.
+
+    Returns:
+        dict: row_count, last_updated, max_id, probed_at and inserted, or None on error.
+    """
+    query = f"""
+        SELECT COUNT(*) AS row_count, MAX(updated_at) AS last_updated, MAX(id) AS max_id,
+               NOW() AS probed_at,
+               (SELECT COUNT(*) FROM {table} WHERE id > %s) AS inserted
+        FROM {table}
+    """
+    result = execute_query(query, (since_id,), fetch=True)
+    return result[0] if result else None
+
+
+class ChangeProbe:
+    """
+    Watermark-based change detection for one table.
+
+    Args:
+        table (str): Table whose rows the listing shows (needs id and updated_at).
+        depends_on (tuple): Joined tables; any change there means RELOAD.
+    """
+
+    def __init__(self, table, depends_on=()):
+        self.table = table
+        self.depends_on = tuple(depends_on)
+        self._marks = {}
+        self._lock = threading.Lock()
+        # bumped by the owner (begin_load, reset) so results of checks started earlier can be told apart
+        self.epoch = 0
+
+    def begin_load(self):
+        """
+        Note that a full load is starting (its mark() may run later, on a
+        worker): results of checks started before now are outdated.
+        """
+        self.epoch += 1
+
+    def mark(self):
+        """
+        Record the current watermark. Call just before a full load so changes
+        made while the load runs are picked up by the next check.
+
+        Returns:
+            bool: False if the probe query failed (the next check reloads).
+        """
+        marks = {}
+        for table in (self.table,) + self.depends_on:
+            row = _probe(table)
+            if row is None:
+                marks = {}
+                break
+            marks[table] = _Watermark(row)
+        with self._lock:
+            self._marks = marks
+        return bool(marks)
+
+    def reset(self):
+        """Forget the watermark so the next check asks for a full reload."""
+        self.epoch += 1
+        with self._lock:
+            self._marks = {}
+
+    def removed(self, count):
+        """
+        Account for rows the caller deleted itself (and already removed from
+        the listing), so the next check does not take them for someone else's
+        deletions and ask for a full reload. Checks started before this no
+        longer advance the watermark.
+
+        Args:
+            count (int): Rows deleted from the probed table.
+        """
+        with self._lock:
+            mark = self._marks.get(self.table)
+            if mark is None:
+                return
+            mark = copy.copy(mark)
+            mark.count = max(0, mark.count - int(count or 0))
+            self._marks = dict(self._marks)
+            self._marks[self.table] = mark
+
+    def check(self):
+        """
+        Compare the tables with the last watermark (which is left where it is).
+
+        Returns:
+            TableChange: What the caller has to do to bring the listing up to
+            date; pass it to advance() once done.
+        """
+        with self._lock:
+            base = self._marks
+        if not base:
+            return TableChange(RELOAD)
+
+        previous = base[self.table]
+        row = _probe(self.table, previous.max_id)
+        if row is None:
+            return TableChange(RELOAD)
+        current = _Watermark(row)
+        marks = dict(base)
+        marks[self.table] = current
+
+        for table in self.depends_on:
+            dep_row = _probe(table)
+            if dep_row is None or not _Watermark(dep_row).same_as(base[table]) \
+                    or self._open_second(base[table]):
+                return TableChange(RELOAD)
+
+        if current.same_as(previous) and not self._open_second(previous):
+            return TableChange(UNCHANGED, marks=marks, base=base)
+
+        inserted = int(row.get('inserted') or 0)
+        if current.count < previous.count + inserted:
+            return TableChange(RELOAD)  # rows were deleted
+
+        ids = self._changed_ids(previous)
+        if ids is None:
+            return TableChange(RELOAD)
+        return TableChange(CHANGED if ids else UNCHANGED, ids, marks=marks, base=base)
+
+    def advance(self, change):
+        """
+        Move the watermark to where a check found the tables, once its result
+        has been applied. Ignored if the watermark was marked, reset or
+        adjusted since that check started (a newer check covers the changes).
+
+        Args:
+            change (TableChange): Result of check().
+
+        Returns:
+            bool: True if the watermark moved.
+        """
+        if change._marks is None:
+            return False
+        with self._lock:
+            if self._marks is not change._base:
+                return False
+            self._marks = change._marks
+            return True
+
+    @staticmethod
+    def _open_second(mark):
+        """
+        updated_at has one-second resolution: if the newest change fell in the
+        same second as the probe, later writes in that second keep MAX(updated_at)
+        equal, so the watermark cannot prove "unchanged".
+        """
+        return mark.last_updated is not None and mark.probed_at is not None \
+            and mark.last_updated >= mark.probed_at
+
+    def _changed_ids(self, previous):
+        """Ids updated at or after the watermark second, plus rows inserted since."""
+        if previous.last_updated is None:
+            query = f"SELECT id FROM {self.table} WHERE id > %s"
+            params = (previous.max_id,)
+        else:
+            query = f"SELECT id FROM {self.table} WHERE updated_at >= %s OR id > %s"
+            params = (previous.last_updated, previous.max_id)
+        result = execute_query(query, params, fetch=True)
+        if result is None:
+            return None
+        return [r['id'] for r in result]
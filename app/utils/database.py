@@ -6,12 +6,15 @@ Provides functions for connecting to the database and executing queries.
 
 import os
 import sys
+import threading
 from dotenv import load_dotenv
 
 # Try to import mysql.connector, provide helpful error if not installed
 try:
     import mysql.connector
     from mysql.connector import Error
+    from mysql.connector import pooling
+    from mysql.connector.errors import PoolError
 except ImportError:
     print("Error: mysql-connector-python package is not installed.")
     print("Please install it using one of the following commands:")
@@ -33,14 +36,57 @@ DB_CONFIG = {
     'auth_plugin': 'mysql_native_password'
 }
 
+# Connection pool size (0 disables pooling). Dashboard sections load in parallel,
+# so reusing open connections saves a connect/auth round trip per query.
+POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '8'))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool():
+    """
+    Return the shared connection pool, creating it on first use.
+
+    Returns:
+        MySQLConnectionPool: The pool, or None if pooling is disabled or the
+        server could not be reached (the next call retries).
+    """
+    global _pool
+    if _pool is None and POOL_SIZE > 0:
+        with _pool_lock:
+            if _pool is None:
+                try:
+                    _pool = pooling.MySQLConnectionPool(pool_name="language_school",
+                                                        pool_size=min(POOL_SIZE, 32),
+                                                        pool_reset_session=True,
+                                                        **DB_CONFIG)
+                except Error as e:
+                    print(f"Error creating MySQL connection pool: {e}")
+    return _pool
+
 def get_connection():
     """
     Create and return a connection to the database.
+
+    Connections come from the shared pool when it is available; close()
+    returns them to the pool. If the pool is exhausted a dedicated connection
+    is opened instead.
     
     Returns:
         mysql.connector.connection.MySQLConnection: Database connection object
         or None if connection fails.
     """
+    pool = _get_pool()
+    if pool is not None:
+        try:
+            connection = pool.get_connection()
+            if connection.is_connected():
+                return connection
+            connection.close()
+        except PoolError:
+            pass  # all pooled connections are in use
+        except Error as e:
+            print(f"Error getting pooled MySQL connection: {e}")
     try:
         connection = mysql.connector.connect(**DB_CONFIG)
         if connection.is_connected():
@@ -49,6 +95,36 @@ def get_connection():
         print(f"Error connecting to MySQL database: {e}")
     return None
 
+def _release(connection):
+    """
+    Close a connection. A pooled connection goes back to the pool even if it
+    dropped (the pool reconnects it on reuse), so an outage does not use up
+    the pool's slots.
+    """
+    try:
+        connection.close()
+    except Error:
+        pass
+
+def is_database_available():
+    """
+    Check whether the database server can be reached.
+
+    Used to tell a rejected statement apart from an outage, since
+    execute_query returns None in both cases.
+
+    Returns:
+        bool: True if a connection could be opened, False otherwise.
+    """
+    connection = get_connection()
+    if not connection:
+        return False
+    try:
+        connection.close()
+    except Error:
+        pass
+    return True
+
 def execute_query(query, params=None, fetch=False, commit=False, many=False):
     """
     Execute a SQL query.
@@ -96,11 +172,44 @@ def execute_query(query, params=None, fetch=False, commit=False, many=False):
     finally:
         if cursor:
             cursor.close()
-        if connection.is_connected():
-            connection.close()
+        _release(connection)
     
     return result
 
+def execute_insert(query, params=None):
+    """
+    Execute a single INSERT and commit it.
+
+    Args:
+        query (str): INSERT statement to execute.
+        params (tuple, list, dict, optional): Parameters for the query.
+
+    Returns:
+        int: The AUTO_INCREMENT id of the new row, or None if error.
+    """
+    connection = get_connection()
+    if not connection:
+        return None
+
+    cursor = None
+    result = None
+
+    try:
+        cursor = connection.cursor()
+        cursor.execute(query, params or ())
+        connection.commit()
+        result = cursor.lastrowid
+    except Error as e:
+        print(f"Error executing query: {e}")
+        connection.rollback()
+        result = None
+    finally:
+        if cursor:
+            cursor.close()
+        _release(connection)
+
+    return result
+
 def execute_transaction(queries):
     """
     Execute multiple queries as a transaction.
@@ -139,11 +248,233 @@ def execute_transaction(queries):
     finally:
         if cursor:
             cursor.close()
-        if connection.is_connected():
-            connection.close()
+        _release(connection)
     
     return success
 
+def execute_in_transaction(work):
+    """
+    Run `work(cursor)` inside a single transaction on one connection.
+
+    Use this when later statements depend on earlier ones (e.g. lastrowid or
+    rowcount) and everything must commit or roll back together.
+
+    Args:
+        work (callable): Receives a dictionary cursor; its return value is returned.
+            Raise an exception (or return None) to abort; raising rolls back.
+
+    Returns:
+        Any: The value returned by `work`, or None if the connection or transaction failed.
+    """
+    connection = get_connection()
+    if not connection:
+        return None
+
+    cursor = None
+    result = None
+
+    try:
+        cursor = connection.cursor(dictionary=True)
+        connection.start_transaction()
+        result = work(cursor)
+        if result is None:
+            connection.rollback()
+        else:
+            connection.commit()
+    except Error as e:
+        print(f"Error executing transaction: {e}")
+        connection.rollback()
+        result = None
+    finally:
+        if cursor:
+            cursor.close()
+        _release(connection)
+
+    return result
+
+def execute_for_ids(query, ids, params=None, chunk_size=500):
+    """
+    Run a set-based statement over many ids in one transaction.
+
+    The statement is executed once per chunk of ids, with `{ids}` in the query
+    replaced by the chunk's placeholders, e.g.
+    execute_for_ids("UPDATE users SET active = 0 WHERE id IN ({ids})", ids).
+
+    Args:
+        query (str): SQL containing `{ids}` where the IN list goes.
+        ids (list): Ids to apply the statement to.
+        params (tuple, list, optional): Parameters preceding the ids in every chunk.
+        chunk_size (int, optional): Ids per statement. Defaults to 500.
+
+    Returns:
+        int: Total affected rows, or None if error (nothing is committed then).
+    """
+    ids = list(ids)
+    if not ids:
+        return 0
+
+    def _work(cursor):
+        affected = 0
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            cursor.execute(query.format(ids=", ".join(["%s"] * len(chunk))), list(params or []) + chunk)
+            affected += cursor.rowcount
+        return affected
+
+    return execute_in_transaction(_work)
+
+def escape_like(text):
+    """
+    Escape LIKE wildcards so user input matches literally.
+
+    Args:
+        text (str): Raw search text.
+
+    Returns:
+        str: Text with backslash, % and _ escaped.
+    """
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def build_prefix_search(columns, text):
+    """
+    Build an index-friendly search predicate from free text.
+
+    Every whitespace-separated term must be a prefix of at least one of the
+    columns (`col LIKE 'term%'`), which MySQL can serve from an index on each
+    column, unlike `LIKE '%term%'`.
+
+    Args:
+        columns (list): Column expressions to search, e.g. ["u.username", "u.email"].
+        text (str): Search text as typed by the user.
+
+    Returns:
+        tuple: (sql, params) where sql is "" when there is nothing to search.
+    """
+    terms = (text or "").split()
+    if not terms or not columns:
+        return "", []
+    clauses, params = [], []
+    for term in terms:
+        pattern = escape_like(term) + "%"
+        clauses.append("(" + " OR ".join(f"{col} LIKE %s" for col in columns) + ")")
+        params.extend([pattern] * len(columns))
+    return " AND ".join(clauses), params
+
+class CancellableQuery:
+    """
+    A SELECT that can be stopped from another thread.
+
+    run() executes on its own connection and remembers the server-side
+    connection id; cancel() issues KILL QUERY for it from a second connection,
+    so a stale search does not keep running after a newer one has started.
+    The KILL is sent under the same lock run() takes before it forgets the id
+    and closes the connection: pooled connections keep their server thread id,
+    so a late KILL would otherwise hit whichever query reuses the connection.
+    """
+
+    def __init__(self, query, params=None):
+        self.query = query
+        self.params = params
+        self.cancelled = False
+        self._connection_id = None
+        self._lock = threading.Lock()
+
+    def run(self):
+        """
+        Execute the query and fetch all rows.
+
+        Returns:
+            list: Result rows, or None if the query failed or was cancelled.
+        """
+        connection = get_connection()
+        if not connection:
+            return None
+        cursor = None
+        try:
+            with self._lock:
+                if self.cancelled:
+                    return None
+                self._connection_id = connection.connection_id
+            cursor = connection.cursor(dictionary=True)
+            if self.params:
+                cursor.execute(self.query, self.params)
+            else:
+                cursor.execute(self.query)
+            return cursor.fetchall()
+        except Error as e:
+            if not self.cancelled:
+                print(f"Error executing query: {e}")
+            return None
+        finally:
+            with self._lock:
+                self._connection_id = None
+            if cursor:
+                try:
+                    cursor.close()
+                except Error:
+                    pass
+            _release(connection)
+
+    def cancel(self):
+        """Stop the query if it is still running (no-op otherwise)."""
+        with self._lock:
+            self.cancelled = True
+            if self._connection_id:
+                execute_query(f"KILL QUERY {int(self._connection_id)}")
+
+class QueryStream(CancellableQuery):
+    """
+    A SELECT whose rows are read from the server in batches.
+
+    Iterating yields lists of up to batch_size row dicts from an unbuffered
+    cursor, so only one batch is held in memory at a time. Iteration stops
+    early on error (printed and kept in `error`) or after cancel().
+    """
+
+    def __init__(self, query, params=None, batch_size=1000):
+        super().__init__(query, params)
+        self.batch_size = batch_size
+        self.error = None
+
+    def __iter__(self):
+        connection = get_connection()
+        if not connection:
+            self.error = "Could not connect to the database."
+            return
+        cursor = None
+        exhausted = False
+        try:
+            with self._lock:
+                if self.cancelled:
+                    return
+                self._connection_id = connection.connection_id
+            cursor = connection.cursor(dictionary=True, buffered=False)
+            cursor.execute(self.query, self.params or ())
+            while not self.cancelled:
+                batch = cursor.fetchmany(self.batch_size)
+                if not batch:
+                    exhausted = True
+                    break
+                yield batch
+        except Error as e:
+            if not self.cancelled:
+                print(f"Error executing query: {e}")
+                self.error = str(e)
+        finally:
+            with self._lock:
+                self._connection_id = None
+            if not exhausted:
+                try:
+                    connection.consume_results()  # leave the connection reusable
+                except Error:
+                    pass
+            if cursor:
+                try:
+                    cursor.close()
+                except Error:
+                    pass
+            _release(connection)
+
 def initialize_database():
     """
     Initialize the database by creating tables if they don't exist.
@@ -197,8 +528,7 @@ def initialize_database():
     finally:
         if cursor:
             cursor.close()
-        if connection.is_connected():
-            connection.close()
+        _release(connection)
     
     return success
 
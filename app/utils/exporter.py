@@ -0,0 +1,313 @@
+"""
+Exporter
+--------
+Streaming export of rows to CSV, gzip-compressed CSV or JSON Lines.
+
+Rows are encoded into an in-memory text buffer that is flushed to the file
+(through gzip for the .gz formats) whenever it reaches BUFFER_SIZE, so an
+export holds at most one buffer and one batch of rows however large it is.
+
+Rows come either from the database (export_query streams them with
+database.QueryStream) or from any iterable of batches (export_batches), e.g.
+a RowQueue filled from a table model on the GUI thread while the export runs
+on a BackgroundTask. The output is written under a temporary name and
+renamed when complete, so a failed or cancelled export leaves nothing behind.
+
+Nothing here depends on Qt.
+
+Usage:
+    result = export_query("payments.csv.gz", "SELECT * FROM payments", headers=["id", ...])
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import queue
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from app.utils.database import QueryStream
+
+# Encoded text buffered before each write to the file
+BUFFER_SIZE = 256 * 1024
+# Rows read from the server per batch
+BATCH_ROWS = 1000
+# Batches a RowQueue holds before the producer has to wait
+QUEUE_BATCHES = 8
+
+# Longest suffix first, so "x.csv.gz" is not taken for plain CSV
+FORMATS = ("csv.gz", "jsonl.gz", "csv", "jsonl")
+
+
+class _BufferedExportWriter:
+    """Base for the writers: encodes rows into a text buffer and flushes it in BUFFER_SIZE pieces."""
+
+    def __init__(self, path, headers, compress=False):
+        self.headers = list(headers)
+        self._raw = open(path, "wb")
+        self._file = gzip.GzipFile(fileobj=self._raw, mode="wb", compresslevel=6) if compress else self._raw
+        self._buffer = io.StringIO()
+
+    def _flush(self):
+        text = self._buffer.getvalue()
+        if text:
+            self._file.write(text.encode("utf-8"))
+            self._buffer.seek(0)
+            self._buffer.truncate()
+
+    def _encode(self, rows):
+        raise NotImplementedError
+
+    def write_rows(self, rows):
+        self._encode(rows)
+        if self._buffer.tell() >= BUFFER_SIZE:
+            self._flush()
+
+    def flush(self):
+        """Write out every row so far (gzip output is sync-flushed, so it is readable up to here)."""
+        self._flush()
+        self._file.flush()
+
+    def close(self):
+        try:
+            self._flush()
+            if self._file is not self._raw:
+                self._file.close()
+        finally:
+            self._raw.close()
+
+
+class CsvExportWriter(_BufferedExportWriter):
+    """CSV with a header row (gzip-compressed with compress=True)."""
+
+    def __init__(self, path, headers, compress=False):
+        super().__init__(path, headers, compress)
+        self._writer = csv.writer(self._buffer)
+        self._writer.writerow(self.headers)
+
+    def _encode(self, rows):
+        self._writer.writerows(rows)
+
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (timedelta, bytes)):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class JsonLinesExportWriter(_BufferedExportWriter):
+    """One JSON object per row, keyed by the headers (gzip-compressed with compress=True)."""
+
+    def _encode(self, rows):
+        for values in rows:
+            self._buffer.write(json.dumps(dict(zip(self.headers, values)), default=_json_value,
+                                          ensure_ascii=False))
+            self._buffer.write("\n")
+
+
+def format_of(path):
+    """
+    Returns:
+        str: One of FORMATS, from the file extension (csv for anything else).
+    """
+    lower = path.lower()
+    for fmt in FORMATS:
+        if lower.endswith("." + fmt):
+            return fmt
+    return "csv"
+
+
+def open_writer(path, headers, fmt=None):
+    """
+    Args:
+        path (str): Output file.
+        headers (list): Column names (CSV header row, JSON keys).
+        fmt (str, optional): One of FORMATS (default: from the extension).
+
+    Returns:
+        CsvExportWriter or JsonLinesExportWriter: Writer with write_rows(rows) and close().
+    """
+    fmt = fmt or format_of(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown export format {fmt!r}")
+    writer = JsonLinesExportWriter if fmt.startswith("jsonl") else CsvExportWriter
+    return writer(path, headers, compress=fmt.endswith(".gz"))
+
+
+class ExportResult:
+    """
+    Outcome of an export.
+
+    Attributes:
+        path (str): Written file (None if nothing was written).
+        rows (int): Data rows written.
+        error (str): Why the export was not written, or None.
+        elapsed (float): Seconds taken.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.rows = 0
+        self.error = None
+        self.elapsed = 0.0
+
+    def summary(self):
+        if self.error:
+            return f"Export failed: {self.error}"
+        return f"Wrote {self.rows} rows to {self.path} in {self.elapsed:.1f}s."
+
+
+class RowQueue:
+    """
+    Bounded hand-over of row batches from a producer thread to an export.
+
+    The producer (e.g. the GUI thread reading a table model) calls put() while
+    not full(), then close(); the export iterates the batches. At most
+    max_batches batches wait at a time, so memory stays bounded even if the
+    producer is faster than the file.
+    """
+
+    _END = object()
+
+    def __init__(self, max_batches=QUEUE_BATCHES):
+        self._queue = queue.Queue(max_batches)
+        self._stopped = False
+
+    def full(self):
+        return self._queue.full()
+
+    def put(self, rows):
+        self._queue.put(list(rows))
+
+    def close(self):
+        self._queue.put(self._END)
+
+    def cancel(self):
+        """Stop iterating even if the producer never closes the queue."""
+        self._stopped = True
+
+    def __iter__(self):
+        while not self._stopped:
+            try:
+                batch = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            if batch is self._END:
+                return
+            yield batch
+
+
+def export_batches(path, headers, batches, fmt=None, progress=None, cancelled=None, total=0):
+    """
+    Write batches of rows to a file.
+
+    Args:
+        path (str): Output file (.csv, .csv.gz, .jsonl or .jsonl.gz).
+        headers (list): Column names.
+        batches (iterable): Lists of row value sequences, in header order. If it
+            has a cancel() method (QueryStream, RowQueue) it is called on cancel.
+        fmt (str, optional): One of FORMATS (default: from the extension).
+        progress (callable, optional): progress(stage, done, total).
+        cancelled (callable, optional): Returns True to stop.
+        total (int, optional): Expected row count for progress (0 if unknown).
+
+    Returns:
+        ExportResult: Rows written and error.
+    """
+    started = time.perf_counter()
+    result = ExportResult()
+    progress = progress or (lambda stage, done, total: None)
+    cancelled = cancelled or (lambda: False)
+    partial = path + ".part"
+    try:
+        writer = open_writer(partial, headers, fmt or format_of(path))
+    except (OSError, ValueError) as e:
+        print(f"Error opening export file: {e}")
+        result.error = str(e)
+        return result
+    try:
+        progress("exporting", 0, total)
+        for batch in batches:
+            if cancelled():
+                if hasattr(batches, "cancel"):
+                    batches.cancel()
+                result.error = "cancelled"
+                break
+            writer.write_rows(batch)
+            result.rows += len(batch)
+            progress("exporting", result.rows, total)
+        if getattr(batches, "error", None) and not result.error:
+            result.error = batches.error
+    except (OSError, csv.Error, TypeError, ValueError) as e:
+        print(f"Error writing export: {e}")
+        result.error = str(e)
+    finally:
+        try:
+            writer.close()
+        except OSError as e:
+            print(f"Error writing export: {e}")
+            result.error = result.error or str(e)
+        if result.error:
+            try:
+                os.remove(partial)
+            except OSError:
+                pass
+        else:
+            os.replace(partial, path)
+            result.path = path
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+class _ValueBatches:
+    """Maps a QueryStream's dict batches to value rows, forwarding cancel() and error."""
+
+    def __init__(self, stream, row_values):
+        self._stream = stream
+        self._row_values = row_values
+
+    @property
+    def error(self):
+        return self._stream.error
+
+    def cancel(self):
+        self._stream.cancel()
+
+    def __iter__(self):
+        for batch in self._stream:
+            yield [self._row_values(row) for row in batch]
+
+
+def export_query(path, query, params=None, headers=None, row_values=None, fmt=None, progress=None,
+                 cancelled=None, batch_size=BATCH_ROWS):
+    """
+    Stream the rows of a query into a file.
+
+    Args:
+        path (str): Output file (.csv, .csv.gz, .jsonl or .jsonl.gz).
+        query (str): SELECT to export.
+        params (tuple, optional): Query parameters.
+        headers (list): Column names.
+        row_values (callable, optional): row dict -> values in header order
+            (default: the row's values in select order).
+        fmt (str, optional): One of FORMATS (default: from the extension).
+        progress (callable, optional): progress(stage, done, total); total is 0.
+        cancelled (callable, optional): Returns True to stop; the query is killed then.
+        batch_size (int, optional): Rows read from the server at a time.
+
+    Returns:
+        ExportResult: Rows written and error.
+    """
+    row_values = row_values or (lambda row: list(row.values()))
+    stream = QueryStream(query, params, batch_size=batch_size)
+    return export_batches(path, headers, _ValueBatches(stream, row_values), fmt=fmt,
+                          progress=progress, cancelled=cancelled)
@@ -0,0 +1,138 @@
+"""
+KPI
+---
+Figures for the admin Overview tab: active students, active courses, revenue
+this month, overdue payments, room utilization and unread messages.
+
+All of them come from one aggregate query (scalar subqueries over indexed
+columns plus the payments rollup for the month's revenue), cached in memory
+for CACHE_TTL seconds, so glancing at the overview costs at most one small
+query per TTL instead of loading the users, courses and payments tables.
+
+Usage:
+    kpis = kpi_cache().get(admin_user_id)   # dict, or None if never loaded
+"""
+
+import threading
+import time
+from datetime import date, datetime
+
+from app.utils.database import execute_query
+from app.utils.rollups import refresh_rollup
+
+# Seconds a result is served from memory before the query runs again
+CACHE_TTL = 30.0
+# Hours per week a room can be booked (12 hours a day, Monday to Saturday)
+ROOM_HOURS_PER_WEEK = 72
+
+_KPI_SQL = """
+    SELECT
+        (SELECT COUNT(*) FROM users WHERE user_type = 'student' AND active = 1) AS active_students,
+        (SELECT COUNT(*) FROM courses WHERE active = 1) AS active_courses,
+        (SELECT COALESCE(SUM(paid_amount), 0) FROM rollup_payments_daily
+         WHERE day >= %s AND day < %s) AS revenue_this_month,
+        o.overdue_payments,
+        o.overdue_amount,
+        (SELECT COALESCE(SUM(TIME_TO_SEC(TIMEDIFF(end_time, start_time))), 0) / 3600
+         FROM schedules WHERE room IS NOT NULL) AS booked_room_hours,
+        (SELECT COUNT(*) FROM rooms) AS rooms,
+        (SELECT COUNT(*)
+         FROM chats c
+         JOIN chat_messages cm ON cm.chat_id = c.id
+             AND cm.id > CASE WHEN c.user1_id = %s THEN c.user1_last_read_id ELSE c.user2_last_read_id END
+         WHERE (c.user1_id = %s OR c.user2_id = %s)
+         AND cm.sender_id <> %s) AS unread_messages
+    FROM (
+        SELECT COUNT(*) AS overdue_payments, COALESCE(SUM(amount), 0) AS overdue_amount
+        FROM payments
+        WHERE status = 'overdue' OR (status = 'pending' AND due_date < CURRENT_DATE)
+    ) o
+"""
+
+
+def _month_bounds(today):
+    start = today.replace(day=1)
+    end = date(start.year + (start.month == 12), start.month % 12 + 1, 1)
+    return start, end
+
+
+def fetch_kpis(user_id):
+    """
+    Compute the overview figures.
+
+    The payments rollup is brought up to date first (incremental, usually a
+    no-op); if that fails the month's revenue may lag slightly.
+
+    Args:
+        user_id (int): The admin whose unread messages are counted.
+
+    Returns:
+        dict: The query's columns plus room_utilization (percent, None without
+        rooms) and computed_at, or None if the query failed.
+    """
+    refresh_rollup("payments_daily")
+    month_start, month_end = _month_bounds(date.today())
+    rows = execute_query(_KPI_SQL, (month_start, month_end, user_id, user_id, user_id, user_id), fetch=True)
+    if not rows:
+        return None
+    kpis = dict(rows[0])
+    capacity = int(kpis['rooms'] or 0) * ROOM_HOURS_PER_WEEK
+    booked = float(kpis['booked_room_hours'] or 0)
+    kpis['room_utilization'] = 100.0 * booked / capacity if capacity else None
+    kpis['computed_at'] = datetime.now()
+    return kpis
+
+
+class KpiCache:
+    """
+    Per-user KPI results, reused for ttl seconds.
+
+    Concurrent callers wait for one query instead of each running it.
+    """
+
+    def __init__(self, ttl=CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, user_id, max_age=None):
+        """
+        Args:
+            user_id (int): The admin the figures are for.
+            max_age (float, optional): Oldest acceptable result in seconds (default: ttl; 0 forces a query).
+
+        Returns:
+            dict: Figures (see fetch_kpis); the previous result if the query
+            failed, or None if there is none.
+        """
+        max_age = self.ttl if max_age is None else max_age
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and time.monotonic() - entry[0] < max_age:
+                return entry[1]
+            kpis = fetch_kpis(user_id)
+            if kpis is None:
+                return entry[1] if entry is not None else None
+            self._entries[user_id] = (time.monotonic(), kpis)
+            return kpis
+
+    def invalidate(self):
+        """Drop every cached result (the next get queries)."""
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = None
+
+
+def kpi_cache():
+    """
+    Get the shared KpiCache.
+
+    Returns:
+        KpiCache: The process-wide cache.
+    """
+    global _cache
+    if _cache is None:
+        _cache = KpiCache()
+    return _cache
@@ -0,0 +1,243 @@
+"""
+Maintenance
+-----------
+Batch jobs for the nightly run (see app.cli): rebuilding the derived stats
+table and archiving or purging old rows.
+
+Archive jobs move rows matching a retention rule (e.g. read notifications
+older than N days) out of their table in chunks of CHUNK_ROWS, one
+transaction per chunk: the chunk is locked, written to a gzip JSON Lines
+file and flushed, and only then deleted and committed. A failure stops the
+job with the rows archived so far kept in the file, so nothing is deleted
+without having been written first (a crash between the write and the commit
+can only leave a row in both places). Purge jobs are the same without the
+file.
+
+Nothing here depends on Qt.
+
+Usage:
+    result = run_archive_job("notifications", days=90, directory="/var/backups/school")
+"""
+
+import os
+import time
+from datetime import datetime, timedelta
+
+from app.utils import exporter
+from app.utils.database import execute_in_transaction
+
+# Rows archived or purged per transaction
+CHUNK_ROWS = 1000
+
+
+class ArchiveJob:
+    """
+    One retention rule.
+
+    Args:
+        name (str): Job name used on the command line.
+        table (str): Table the rows are moved out of (needs an id primary key).
+        where (str): Condition selecting expired rows, with one %s for the cutoff datetime.
+        description (str): One line shown in the job list.
+    """
+
+    def __init__(self, name, table, where, description):
+        self.name = name
+        self.table = table
+        self.where = where
+        self.description = description
+
+
+ARCHIVE_JOBS = {}
+
+
+def register(job):
+    ARCHIVE_JOBS[job.name] = job
+    return job
+
+
+register(ArchiveJob(
+    "notifications", "notifications",
+    "read_status = 1 AND created_at < %s",
+    "read notifications created before the cutoff",
+))
+
+register(ArchiveJob(
+    "deleted_messages", "chat_messages",
+    "deleted = 1 AND deleted_at < %s",
+    "chat messages deleted by their sender before the cutoff",
+))
+
+
+class JobResult:
+    """
+    Outcome of a maintenance job.
+
+    Attributes:
+        name (str): Job name.
+        rows (int): Rows archived, purged or rebuilt.
+        path (str): Archive file written (None for purges or when no row expired).
+        error (str): Why the job stopped, or None.
+        elapsed (float): Seconds taken.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = 0
+        self.path = None
+        self.error = None
+        self.elapsed = 0.0
+
+    def summary(self):
+        target = f" to {self.path}" if self.path else ""
+        text = f"{self.name}: {self.rows} rows{target} in {self.elapsed:.1f}s"
+        return f"{text}; stopped: {self.error}" if self.error else text
+
+
+def run_archive_job(name, days, directory=None, chunk_size=CHUNK_ROWS, progress=None, cancelled=None):
+    """
+    Archive (or, without a directory, purge) the rows of a job older than some days.
+
+    Args:
+        name (str): Job name (see ARCHIVE_JOBS).
+        days (int): Retention in days; rows older than now - days expire.
+        directory (str, optional): Where to write <table>-<timestamp>.jsonl.gz; None deletes only.
+        chunk_size (int, optional): Rows per transaction.
+        progress (callable, optional): progress(stage, done, total); total is 0.
+        cancelled (callable, optional): Returns True to stop after the current chunk.
+
+    Returns:
+        JobResult: Rows moved, archive path and error.
+    """
+    started = time.perf_counter()
+    job = ARCHIVE_JOBS[name]
+    result = JobResult(name)
+    progress = progress or (lambda stage, done, total: None)
+    cancelled = cancelled or (lambda: False)
+    cutoff = datetime.now() - timedelta(days=days)
+    stage = "archiving" if directory else "purging"
+    state = {"writer": None, "headers": None, "path": None, "last_id": 0}
+
+    def _open_writer(headers):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{job.table}-{datetime.now():%Y%m%d-%H%M%S}.jsonl.gz")
+        state.update(writer=exporter.open_writer(path, headers, "jsonl.gz"), headers=headers, path=path)
+
+    def _chunk(cursor):
+        cursor.execute(f"SELECT * FROM {job.table} WHERE {job.where} AND id > %s ORDER BY id LIMIT %s FOR UPDATE",
+                       (cutoff, state["last_id"], chunk_size))
+        rows = cursor.fetchall()
+        if not rows:
+            return 0
+        if directory:
+            try:
+                if state["writer"] is None:
+                    _open_writer(list(rows[0].keys()))
+                state["writer"].write_rows([[row[key] for key in state["headers"]] for row in rows])
+                state["writer"].flush()
+            except (OSError, TypeError, ValueError) as e:
+                print(f"Error writing archive: {e}")
+                result.error = f"could not write the archive: {e}"
+                return None  # rolls back: the rows stay in the table
+        ids = [row["id"] for row in rows]
+        cursor.execute(f"DELETE FROM {job.table} WHERE id IN ({', '.join(['%s'] * len(ids))})", ids)
+        state["last_id"] = ids[-1]
+        return len(ids)
+
+    progress(stage, 0, 0)
+    try:
+        while not cancelled():
+            moved = execute_in_transaction(_chunk)
+            if moved is None:
+                result.error = result.error or "database error"
+                break
+            if moved == 0:
+                break
+            result.rows += moved
+            progress(stage, result.rows, 0)
+        else:
+            result.error = "cancelled"
+    finally:
+        if state["writer"] is not None:
+            state["writer"].close()
+            result.path = state["path"]
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+# Per-student counts, one derived table per fact so no count multiplies another
+_STATS_SQL = """
+    INSERT INTO student_dashboard_stats
+        (student_id, enrolled_courses_count, upcoming_lessons_count, pending_exercises_count, unread_messages_count)
+    SELECT u.id, COALESCE(e.n, 0), COALESCE(l.n, 0), COALESCE(x.n, 0), COALESCE(m.n, 0)
+    FROM users u
+    LEFT JOIN (
+        SELECT student_id, COUNT(*) AS n FROM student_courses WHERE active = 1 GROUP BY student_id
+    ) e ON e.student_id = u.id
+    LEFT JOIN (
+        SELECT sc.student_id, COUNT(*) AS n
+        FROM schedules s
+        JOIN student_courses sc ON s.course_id = sc.course_id
+        WHERE sc.active = 1
+        GROUP BY sc.student_id
+    ) l ON l.student_id = u.id
+    LEFT JOIN (
+        SELECT sc.student_id, COUNT(*) AS n
+        FROM exercises ex
+        JOIN lessons ls ON ex.lesson_id = ls.id
+        JOIN student_courses sc ON ls.course_id = sc.course_id
+        LEFT JOIN student_exercise_submissions ses
+            ON ex.id = ses.exercise_id AND ses.student_id = sc.student_id
+        WHERE sc.active = 1
+        AND (ses.status IS NULL OR ses.status = 'not_submitted')
+        AND ex.due_date >= CURRENT_DATE
+        GROUP BY sc.student_id
+    ) x ON x.student_id = u.id
+    LEFT JOIN (
+        SELECT reader_id, COUNT(*) AS n
+        FROM (
+            SELECT c.user1_id AS reader_id
+            FROM chats c
+            JOIN chat_messages cm ON cm.chat_id = c.id AND cm.id > c.user1_last_read_id
+            WHERE cm.sender_id <> c.user1_id
+            UNION ALL
+            SELECT c.user2_id
+            FROM chats c
+            JOIN chat_messages cm ON cm.chat_id = c.id AND cm.id > c.user2_last_read_id
+            WHERE cm.sender_id <> c.user2_id
+        ) unread
+        GROUP BY reader_id
+    ) m ON m.reader_id = u.id
+    WHERE u.user_type = 'student'
+    ON DUPLICATE KEY UPDATE
+        enrolled_courses_count = VALUES(enrolled_courses_count),
+        upcoming_lessons_count = VALUES(upcoming_lessons_count),
+        pending_exercises_count = VALUES(pending_exercises_count),
+        unread_messages_count = VALUES(unread_messages_count)
+"""
+
+
+def rebuild_dashboard_stats():
+    """
+    Recompute student_dashboard_stats for every student in one statement.
+
+    The counts match the ones the student dashboard queries live.
+
+    Returns:
+        JobResult: Students in the table afterwards, and error.
+    """
+    started = time.perf_counter()
+    result = JobResult("dashboard_stats")
+
+    def _work(cursor):
+        cursor.execute(_STATS_SQL)
+        cursor.execute("SELECT COUNT(*) AS students FROM student_dashboard_stats")
+        return int(cursor.fetchone()["students"])
+
+    students = execute_in_transaction(_work)
+    if students is None:
+        result.error = "database error"
+    else:
+        result.rows = students
+    result.elapsed = time.perf_counter() - started
+    return result
@@ -0,0 +1,261 @@
+"""
+Reference Data
+--------------
+Shared in-memory cache of the lists dialogs pick from (teachers, students,
+courses, rooms).
+
+Each list is loaded once, kept up to date incrementally when the app writes
+(rows_changed) and re-validated with a cheap change probe (see
+app.utils.change_probe) at most every PROBE_INTERVAL seconds, so opening a
+dialog no longer re-queries thousands of students. Lookups go through a
+word-prefix index, so type-ahead completion is a couple of bisects instead of
+a scan or a query.
+"""
+
+import time
+from bisect import bisect_left, bisect_right
+
+from app.utils.change_probe import ChangeProbe, CHANGED, RELOAD
+from app.utils.database import execute_query
+
+# Minimum seconds between change probes of one list
+PROBE_INTERVAL = 10.0
+
+
+class PrefixIndex:
+    """
+    Word-prefix index over labels.
+
+    Every word of every label is kept in one sorted list of (word, id); the
+    ids whose words start with a prefix form one contiguous slice of it.
+    """
+
+    def __init__(self, labels=None):
+        self._entries = []
+        if labels:
+            self.rebuild(labels)
+
+    def rebuild(self, labels):
+        """
+        Args:
+            labels (dict): {id: label}.
+        """
+        self._entries = sorted(
+            (word, item_id) for item_id, label in labels.items() for word in str(label).lower().split()
+        )
+
+    def _ids_for(self, prefix):
+        lo = bisect_left(self._entries, (prefix,))
+        hi = bisect_right(self._entries, (prefix + "\uffff",))
+        return {item_id for _, item_id in self._entries[lo:hi]}
+
+    def match(self, text):
+        """
+        Ids whose label has, for every term of text, a word starting with that term.
+
+        Returns:
+            set: Matching ids, or None when text has no terms (everything matches).
+        """
+        terms = (text or "").lower().split()
+        if not terms:
+            return None
+        ids = self._ids_for(terms[0])
+        for term in terms[1:]:
+            if not ids:
+                break
+            ids &= self._ids_for(term)
+        return ids
+
+
+class ReferenceList:
+    """
+    One cached list.
+
+    Args:
+        name (str): List name.
+        select (str): SELECT ... FROM ... without WHERE/ORDER BY.
+        where (list): Conditions every row must meet (e.g. active = 1).
+        id_column (str): Column used for id lookups in SQL.
+        id_key (str): Key of the id in result rows.
+        label (callable): label(row) -> str shown in combos.
+        sort_key (callable): sort_key(row) ordering the list.
+        probe_table (str, optional): Table probed for changes; None means static.
+    """
+
+    def __init__(self, name, select, where, id_column, id_key, label, sort_key, probe_table=None):
+        self.name = name
+        self.select = select
+        self.where = list(where)
+        self.id_column = id_column
+        self.id_key = id_key
+        self.label = label
+        self.sort_key = sort_key
+        self.probe = ChangeProbe(probe_table) if probe_table else None
+        self.probe_table = probe_table
+        self._rows = None
+        self._order = []
+        self._position = {}
+        self._index = PrefixIndex()
+        self._dirty = False
+        self._checked_at = 0.0
+
+    # --- loading ---
+    def _query(self, extra_where=None):
+        where = self.where + list(extra_where or [])
+        sql = self.select
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return sql
+
+    def load(self):
+        """Load the whole list. Returns False (keeping the old data) if the query fails."""
+        if self.probe is not None:
+            self.probe.mark()
+        rows = execute_query(self._query(), fetch=True)
+        if rows is None:
+            if self.probe is not None:
+                self.probe.reset()
+            return False
+        self._rows = {r[self.id_key]: r for r in rows}
+        self._dirty = True
+        self._checked_at = time.monotonic()
+        return True
+
+    def reload_ids(self, ids):
+        """Re-read some rows: changed ones are replaced, ones that no longer qualify dropped."""
+        ids = [i for i in ids if i is not None]
+        if self._rows is None or not ids:
+            return
+        placeholders = ", ".join(["%s"] * len(ids))
+        rows = execute_query(self._query([f"{self.id_column} IN ({placeholders})"]), ids, fetch=True)
+        if rows is None:
+            self.invalidate()  # unsure what changed: reload on next use
+            return
+        found = {r[self.id_key]: r for r in rows}
+        for item_id in ids:
+            if item_id in found:
+                self._rows[item_id] = found[item_id]
+            else:
+                self._rows.pop(item_id, None)
+        self._dirty = True
+
+    def ensure_fresh(self):
+        """Load on first use; afterwards probe for changes at most every PROBE_INTERVAL seconds."""
+        if self._rows is None:
+            self.load()
+            return
+        if self.probe is None or time.monotonic() - self._checked_at < PROBE_INTERVAL:
+            return
+        self._checked_at = time.monotonic()
+        change = self.probe.check()
+        if change.kind == RELOAD:
+            self.load()
+            return
+        if change.kind == CHANGED:
+            self.reload_ids(change.changed_ids)
+        self.probe.advance(change)
+
+    def _reindex(self):
+        if not self._dirty:
+            return
+        rows = self._rows or {}
+        self._order = sorted(rows, key=lambda i: self.sort_key(rows[i]))
+        self._position = {item_id: pos for pos, item_id in enumerate(self._order)}
+        self._index.rebuild({i: self.label(r) for i, r in rows.items()})
+        self._dirty = False
+
+    # --- lookups ---
+    def items(self, text="", limit=None):
+        """
+        (id, label) pairs in list order, optionally only those matching text by word prefix.
+
+        Args:
+            text (str): Typed text; every term must prefix a word of the label.
+            limit (int, optional): Maximum number of pairs.
+
+        Returns:
+            list: [(id, label), ...]
+        """
+        self.ensure_fresh()
+        self._reindex()
+        rows = self._rows or {}
+        matched = self._index.match(text)
+        ids = self._order if matched is None else sorted(matched, key=self._position.get)
+        if limit is not None:
+            ids = ids[:limit]
+        return [(item_id, self.label(rows[item_id])) for item_id in ids]
+
+    def invalidate(self):
+        """Drop the cached rows (reloaded on next use)."""
+        self._rows = None
+
+    def label_of(self, item_id):
+        """Label for an id, or None if it is not in the list."""
+        self.ensure_fresh()
+        row = (self._rows or {}).get(item_id)
+        return self.label(row) if row is not None else None
+
+
+def _person(row):
+    return f"{row['first_name']} {row['last_name']}"
+
+
+class ReferenceDataStore:
+    """The shared reference lists: teachers, students, courses and rooms."""
+
+    def __init__(self):
+        self.lists = {}
+        for ref in (
+            ReferenceList("teachers", "SELECT id, first_name, last_name FROM users",
+                          ["user_type = 'teacher'", "active = 1"], "id", "id", _person,
+                          lambda r: (r['last_name'], r['first_name']), probe_table="users"),
+            ReferenceList("students", "SELECT id, first_name, last_name FROM users",
+                          ["user_type = 'student'", "active = 1"], "id", "id", _person,
+                          lambda r: (r['last_name'], r['first_name']), probe_table="users"),
+            ReferenceList("courses", "SELECT id, name FROM courses", ["active = 1"], "id", "id",
+                          lambda r: r['name'], lambda r: r['name'], probe_table="courses"),
+            # rooms are fixed seed data without updated_at: loaded once
+            ReferenceList("rooms", "SELECT room_number FROM rooms", [], "room_number", "room_number",
+                          lambda r: str(r['room_number']), lambda r: r['room_number']),
+        ):
+            self.lists[ref.name] = ref
+
+    def __getitem__(self, name):
+        return self.lists[name]
+
+    def items(self, name, text="", limit=None):
+        """See ReferenceList.items."""
+        return self.lists[name].items(text, limit)
+
+    def rows_changed(self, table, ids):
+        """
+        Apply a write made by this app without waiting for the probe.
+
+        Args:
+            table (str): Table written to ("users", "courses", ...).
+            ids (list): Ids of the inserted, updated or deleted rows.
+        """
+        for ref in self.lists.values():
+            if ref.probe_table == table:
+                ref.reload_ids(ids)
+
+    def invalidate(self):
+        """Drop all cached lists (they reload on next use)."""
+        for ref in self.lists.values():
+            ref.invalidate()
+
+
+_store = None
+
+
+def reference_data():
+    """
+    Get the shared ReferenceDataStore.
+
+    Returns:
+        ReferenceDataStore: The process-wide store.
+    """
+    global _store
+    if _store is None:
+        _store = ReferenceDataStore()
+    return _store
@@ -0,0 +1,245 @@
+"""
+Report Cache
+------------
+On-disk cache of report results in ``app/data/report_cache/``.
+
+An entry is keyed by the report's SQL and parameters (so the report type, the
+date range and any change to the query give a new key) and by a data version:
+COUNT(*), MAX(id) and MAX(updated_at) of every table the report reads. Any
+insert, update or delete in one of those tables changes the version, so an
+entry is never served after its data changed; it is removed when the entry
+for the new version is stored.
+
+Rows are stored as a sequence of pickled batches, so entries are written and
+read back batch by batch, the same way rows stream from the database.
+
+Usage:
+    cache = report_cache()
+    key = cache.key(sql, params, ("users", "payments"))
+    reader = cache.get(key)          # None on a miss
+"""
+
+import hashlib
+import os
+import pickle
+import threading
+from pathlib import Path
+
+from app.utils.database import execute_query
+
+_CACHE_DIR = Path(__file__).resolve().parents[1] / "data" / "report_cache"
+
+# Entries kept on disk; the least recently used ones are removed beyond this
+MAX_ENTRIES = 64
+
+
+def data_version(tables):
+    """
+    Version of the data in some tables.
+
+    Returns:
+        str: Version string, or None if it cannot be trusted: the query failed,
+        or a table changed within the current second (updated_at has one-second
+        resolution, so a second write in that second could leave it unchanged).
+    """
+    tables = sorted(set(tables))
+    if not tables:
+        return "static"
+    query = " UNION ALL ".join(
+        f"SELECT '{table}' AS tbl, COUNT(*) AS row_count, MAX(id) AS max_id, "
+        f"MAX(updated_at) AS last_updated, NOW() AS probed_at FROM {table}"
+        for table in tables
+    )
+    rows = execute_query(query, fetch=True)
+    if not rows:
+        return None
+    parts = []
+    for row in rows:
+        if row['last_updated'] is not None and row['last_updated'] >= row['probed_at']:
+            return None
+        parts.append(f"{row['tbl']}:{row['row_count']}:{row['max_id']}:{row['last_updated']}")
+    return ";".join(parts)
+
+
+class CacheKey:
+    """
+    Identifies one entry.
+
+    Attributes:
+        query_hash (str): Hash of the SQL and parameters.
+        version_hash (str): Hash of the data version.
+    """
+
+    def __init__(self, query_hash, version_hash):
+        self.query_hash = query_hash
+        self.version_hash = version_hash
+
+    @property
+    def filename(self):
+        return f"{self.query_hash}-{self.version_hash}.rows"
+
+
+class CachedRows:
+    """
+    Batches of a cache entry, read lazily.
+
+    Behaves like database.QueryStream: iterate for batches, check `error`
+    afterwards, cancel() stops the iteration.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.error = None
+        self.cancelled = False
+
+    def __iter__(self):
+        try:
+            with open(self.path, "rb") as f:
+                while not self.cancelled:
+                    try:
+                        batch = pickle.load(f)
+                    except EOFError:
+                        break
+                    yield batch
+        except (OSError, pickle.UnpicklingError) as e:
+            print(f"Error reading report cache entry: {e}")
+            self.error = "cached report could not be read"
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class CacheWriter:
+    """Collects the batches of a new entry; commit() makes it visible, discard() drops it."""
+
+    def __init__(self, cache, key):
+        self._cache = cache
+        self._key = key
+        self._partial = cache.directory / (key.filename + f".{threading.get_ident()}.part")
+        self._file = open(self._partial, "wb")
+
+    def add(self, batch):
+        pickle.dump(batch, self._file, pickle.HIGHEST_PROTOCOL)
+
+    def commit(self):
+        self._file.close()
+        self._cache._store(self._key, self._partial)
+
+    def discard(self):
+        self._file.close()
+        try:
+            os.remove(self._partial)
+        except OSError:
+            pass
+
+
+class ReportCache:
+    """
+    Directory of cached report results.
+
+    Args:
+        directory (Path, optional): Where entries are kept.
+        max_entries (int, optional): Entries kept before the oldest are removed.
+    """
+
+    def __init__(self, directory=_CACHE_DIR, max_entries=MAX_ENTRIES):
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def key(self, sql, params, tables):
+        """
+        Build the key for a query over the current data.
+
+        Returns:
+            CacheKey: The key, or None if the data version cannot be determined
+            (the result must not be cached then).
+        """
+        version = data_version(tables)
+        if version is None:
+            return None
+        query_hash = hashlib.sha1(f"{sql}\0{params!r}".encode("utf-8")).hexdigest()[:20]
+        version_hash = hashlib.sha1(version.encode("utf-8")).hexdigest()[:20]
+        return CacheKey(query_hash, version_hash)
+
+    def get(self, key):
+        """
+        Returns:
+            CachedRows: The entry's batches, or None on a miss.
+        """
+        if key is None:
+            return None
+        path = self.directory / key.filename
+        if not path.exists():
+            return None
+        try:
+            os.utime(path)  # recently used entries are pruned last
+        except OSError:
+            return None
+        return CachedRows(path)
+
+    def writer(self, key):
+        """
+        Start writing an entry.
+
+        Returns:
+            CacheWriter: Writer, or None if the cache directory is not writable.
+        """
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            return CacheWriter(self, key)
+        except OSError as e:
+            print(f"Error writing report cache entry: {e}")
+            return None
+
+    def store(self, key, batches):
+        """Write a complete entry from an iterable of batches."""
+        writer = self.writer(key) if key is not None else None
+        if writer is None:
+            return
+        for batch in batches:
+            writer.add(batch)
+        writer.commit()
+
+    def _store(self, key, partial):
+        with self._lock:
+            try:
+                os.replace(partial, self.directory / key.filename)
+                # entries for older versions of the same query can never be served again
+                for path in self.directory.glob(f"{key.query_hash}-*.rows"):
+                    if path.name != key.filename:
+                        path.unlink()
+                entries = sorted(self.directory.glob("*.rows"), key=lambda p: p.stat().st_mtime)
+                for path in entries[:-self.max_entries]:
+                    path.unlink()
+            except OSError as e:
+                print(f"Error writing report cache entry: {e}")
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            for path in self.directory.glob("*.rows"):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+
+_cache = None
+
+
+def report_cache():
+    """
+    Get the shared ReportCache.
+
+    Returns:
+        ReportCache: The process-wide cache.
+    """
+    global _cache
+    if _cache is None:
+        _cache = ReportCache()
+    return _cache
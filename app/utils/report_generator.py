@@ -0,0 +1,669 @@
+"""
+Report Generator
+----------------
+Declarative report definitions and a streaming report runner.
+
+A report is a ReportDefinition: a SELECT with named date-range slots (e.g.
+``{paid}``), the column each slot filters on, and the output columns. The date
+range is pushed into the query as ``col >= start AND col < end + 1 day`` (an
+index on the column can serve it) instead of being filtered afterwards.
+
+run_report streams the rows from the server in batches straight into an XLSX
+writer or one of the app.utils.exporter writers (CSV, gzip CSV, JSON Lines),
+so memory use stays flat however many rows a report has; preview_report
+fetches only the first rows (LIMIT in the query). Results are kept in the
+on-disk report cache (app.utils.report_cache), so running the same report
+over unchanged data again skips the query.
+
+Course-level totals (revenue, enrollments, attendance) are read from the
+per-day rollup tables (app.utils.rollups), which are brought up to date
+incrementally before such a report runs; per-student reports still read the
+raw rows, with the date range pushed down.
+
+Nothing here depends on Qt: the admin view runs reports on a BackgroundTask,
+scripts can call run_report directly.
+
+Usage:
+    result = run_report("payment_summary", "payments.xlsx", date(2024, 1, 1), date(2024, 3, 31))
+"""
+
+import csv
+import os
+import pickle
+import re
+import string
+import time
+import zipfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from app.utils import exporter
+from app.utils.database import QueryStream, execute_query
+from app.utils.report_cache import report_cache
+from app.utils.rollups import refresh_rollups
+
+# Rows read from the server per batch while writing a report
+BATCH_ROWS = 1000
+# Rows shown in the Reports tab preview
+PREVIEW_ROWS = 100
+
+FORMATS = ("xlsx",) + exporter.FORMATS
+
+
+class ReportDefinition:
+    """
+    One report.
+
+    Args:
+        name (str): Registry key, e.g. "payment_summary".
+        title (str): Label shown to users.
+        query (str): SELECT without LIMIT; each ``{slot}`` is replaced with a
+            date-range condition on date_columns[slot] (or ``1 = 1`` without a range).
+        columns (list): (result key, header) pairs in output order.
+        date_columns (dict, optional): {slot: column expression}.
+        tables (tuple, optional): Tables the query reads; their data version
+            keys the cached results (for rollups: the rollup's source table).
+        rollups (tuple, optional): Rollups (app.utils.rollups) the query reads;
+            refreshed before the report runs.
+    """
+
+    def __init__(self, name, title, query, columns, date_columns=None, tables=(), rollups=()):
+        self.name = name
+        self.title = title
+        self.query = query
+        self.columns = list(columns)
+        self.date_columns = dict(date_columns or {})
+        self.tables = tuple(tables)
+        self.rollups = tuple(rollups)
+
+    @property
+    def headers(self):
+        return [header for _, header in self.columns]
+
+    @property
+    def uses_dates(self):
+        return bool(self.date_columns)
+
+    def build_query(self, start_date=None, end_date=None, limit=None):
+        """
+        Build the SQL for a date range.
+
+        Args:
+            start_date (date, optional): First day included.
+            end_date (date, optional): Last day included.
+            limit (int, optional): Maximum number of rows.
+
+        Returns:
+            tuple: (sql, params)
+        """
+        conditions, params = {}, []
+        # params follow the order the slots appear in the query
+        for _, slot, _, _ in string.Formatter().parse(self.query):
+            if slot is None:
+                continue
+            column = self.date_columns[slot]
+            parts = []
+            if start_date is not None:
+                parts.append(f"{column} >= %s")
+                params.append(start_date)
+            if end_date is not None:
+                parts.append(f"{column} < %s")
+                params.append(end_date + timedelta(days=1))
+            conditions[slot] = "(" + " AND ".join(parts) + ")" if parts else "1 = 1"
+        sql = self.query.format(**conditions)
+        if limit is not None:
+            sql += " LIMIT %s"
+            params.append(int(limit))
+        return sql, params
+
+
+REPORTS = {}
+
+
+def register(definition):
+    """
+    Add a report to the registry (replacing one with the same name).
+
+    Returns:
+        ReportDefinition: The definition, so it can be used as a module-level constant.
+    """
+    REPORTS[definition.name] = definition
+    return definition
+
+
+def available_reports():
+    """
+    Returns:
+        list: (name, title) pairs in registration order.
+    """
+    return [(r.name, r.title) for r in REPORTS.values()]
+
+
+def get_report(name):
+    """
+    Returns:
+        ReportDefinition: The registered report, or None if the name is unknown.
+    """
+    return REPORTS.get(name)
+
+
+# --- Report definitions ---
+#
+# Each fact table (payments, student_courses, attendance, schedules) is
+# aggregated in a derived table grouped by the key it is joined on before the
+# join, so every join is one-to-one and no row is counted once per unrelated
+# row of another table.
+
+register(ReportDefinition(
+    "user_activity", "User Activity",
+    """
+        SELECT u.id, u.username, u.first_name, u.last_name, u.email,
+               COALESCE(e.courses_enrolled, 0) AS courses_enrolled,
+               COALESCE(p.payments_made, 0) AS payments_made
+        FROM users u
+        LEFT JOIN (SELECT student_id, COUNT(*) AS courses_enrolled FROM student_courses
+                   WHERE {enrolled} GROUP BY student_id) e ON e.student_id = u.id
+        LEFT JOIN (SELECT student_id, COUNT(*) AS payments_made FROM payments
+                   WHERE {paid} GROUP BY student_id) p ON p.student_id = u.id
+        WHERE u.active = 1 AND u.user_type = 'student'
+        ORDER BY u.last_name, u.first_name, u.id
+    """,
+    [("id", "ID"), ("username", "Username"), ("first_name", "First Name"), ("last_name", "Last Name"),
+     ("email", "Email"), ("courses_enrolled", "Courses Enrolled"), ("payments_made", "Payments Made")],
+    {"enrolled": "enrollment_date", "paid": "payment_date"},
+    tables=("users", "student_courses", "payments"),
+))
+
+register(ReportDefinition(
+    "course_enrollment", "Course Enrollment",
+    """
+        SELECT c.id, c.name, c.language, c.level, c.price,
+               COALESCE(s.schedules_count, 0) AS schedules_count,
+               COALESCE(e.students_enrolled, 0) AS students_enrolled
+        FROM courses c
+        LEFT JOIN (SELECT course_id, COUNT(*) AS schedules_count FROM schedules
+                   GROUP BY course_id) s ON s.course_id = c.id
+        LEFT JOIN (SELECT course_id, SUM(enrollments) AS students_enrolled FROM rollup_enrollments_daily
+                   WHERE {enrolled} GROUP BY course_id) e ON e.course_id = c.id
+        WHERE c.active = 1
+        ORDER BY c.name, c.id
+    """,
+    [("id", "ID"), ("name", "Course"), ("language", "Language"), ("level", "Level"), ("price", "Price"),
+     ("schedules_count", "Schedules"), ("students_enrolled", "Students Enrolled")],
+    {"enrolled": "day"},
+    tables=("courses", "schedules", "student_courses"),
+    rollups=("enrollments_daily",),
+))
+
+register(ReportDefinition(
+    "payment_summary", "Payment Summary",
+    """
+        SELECT u.id, u.username, u.first_name, u.last_name,
+               p.total_paid, p.payments_count
+        FROM users u
+        JOIN (SELECT student_id, SUM(amount) AS total_paid, COUNT(*) AS payments_count FROM payments
+              WHERE {paid} GROUP BY student_id) p ON p.student_id = u.id
+        WHERE u.active = 1
+        ORDER BY u.last_name, u.first_name, u.id
+    """,
+    [("id", "ID"), ("username", "Username"), ("first_name", "First Name"), ("last_name", "Last Name"),
+     ("total_paid", "Total Paid"), ("payments_count", "Payments")],
+    {"paid": "payment_date"},
+    tables=("users", "payments"),
+))
+
+register(ReportDefinition(
+    "student_enrollment", "Student Enrollment",
+    """
+        SELECT c.name AS course_name, c.language, c.level,
+               COALESCE(e.total_students, 0) AS total_students
+        FROM courses c
+        LEFT JOIN (SELECT course_id, SUM(enrollments) AS total_students FROM rollup_enrollments_daily
+                   WHERE {enrolled} GROUP BY course_id) e ON e.course_id = c.id
+        ORDER BY c.name, c.id
+    """,
+    [("course_name", "Course Name"), ("language", "Language"), ("level", "Level"),
+     ("total_students", "Total Students")],
+    {"enrolled": "day"},
+    tables=("courses", "student_courses"),
+    rollups=("enrollments_daily",),
+))
+
+register(ReportDefinition(
+    "course_revenue", "Course Revenue",
+    """
+        SELECT c.name AS course_name,
+               COALESCE(e.total_students, 0) AS total_students,
+               COALESCE(r.revenue, 0) AS revenue
+        FROM courses c
+        LEFT JOIN (SELECT course_id, SUM(enrollments) AS total_students FROM rollup_enrollments_daily
+                   GROUP BY course_id) e ON e.course_id = c.id
+        LEFT JOIN (SELECT course_id, SUM(amount) AS revenue FROM rollup_payments_daily
+                   WHERE {paid} GROUP BY course_id) r ON r.course_id = c.id
+        ORDER BY revenue DESC, c.name
+    """,
+    [("course_name", "Course Name"), ("total_students", "Total Students"), ("revenue", "Revenue")],
+    {"paid": "day"},
+    tables=("courses", "student_courses", "payments"),
+    rollups=("enrollments_daily", "payments_daily"),
+))
+
+register(ReportDefinition(
+    "daily_revenue", "Daily Revenue",
+    """
+        SELECT r.day, SUM(r.payments) AS payments, SUM(r.amount) AS amount,
+               SUM(r.paid_amount) AS paid_amount
+        FROM rollup_payments_daily r
+        WHERE {paid}
+        GROUP BY r.day
+        ORDER BY r.day
+    """,
+    [("day", "Day"), ("payments", "Payments"), ("amount", "Amount"), ("paid_amount", "Paid")],
+    {"paid": "r.day"},
+    tables=("payments",),
+    rollups=("payments_daily",),
+))
+
+register(ReportDefinition(
+    "teacher_performance", "Teacher Performance",
+    """
+        SELECT CONCAT(u.first_name, ' ', u.last_name) AS teacher_name,
+               COALESCE(c.courses, 0) AS courses,
+               COALESCE(s.students, 0) AS students
+        FROM users u
+        LEFT JOIN (SELECT teacher_id, COUNT(*) AS courses FROM courses
+                   GROUP BY teacher_id) c ON c.teacher_id = u.id
+        LEFT JOIN (SELECT tc.teacher_id, COUNT(DISTINCT sc.student_id) AS students
+                   FROM student_courses sc JOIN courses tc ON tc.id = sc.course_id
+                   WHERE {enrolled} GROUP BY tc.teacher_id) s ON s.teacher_id = u.id
+        WHERE u.user_type = 'teacher'
+        ORDER BY u.last_name, u.first_name
+    """,
+    [("teacher_name", "Teacher Name"), ("courses", "Courses"), ("students", "Students")],
+    {"enrolled": "sc.enrollment_date"},
+    tables=("users", "courses", "student_courses"),
+))
+
+register(ReportDefinition(
+    "student_attendance", "Student Attendance",
+    """
+        SELECT CONCAT(u.first_name, ' ', u.last_name) AS student_name, c.name AS course_name,
+               COALESCE(a.classes_attended, 0) AS classes_attended
+        FROM student_courses sc
+        JOIN users u ON u.id = sc.student_id
+        JOIN courses c ON c.id = sc.course_id
+        LEFT JOIN (SELECT student_id, course_id, COUNT(*) AS classes_attended FROM attendance
+                   WHERE status <> 'absent' AND {attended}
+                   GROUP BY student_id, course_id) a
+               ON a.student_id = sc.student_id AND a.course_id = sc.course_id
+        WHERE u.user_type = 'student'
+        ORDER BY u.last_name, u.first_name, c.name
+    """,
+    [("student_name", "Student Name"), ("course_name", "Course Name"), ("classes_attended", "Classes Attended")],
+    {"attended": "attendance_date"},
+    tables=("users", "student_courses", "courses", "attendance"),
+))
+
+register(ReportDefinition(
+    "course_attendance", "Course Attendance",
+    """
+        SELECT c.name AS course_name, COALESCE(a.present, 0) AS present,
+               COALESCE(a.late, 0) AS late, COALESCE(a.absent, 0) AS absent
+        FROM courses c
+        LEFT JOIN (SELECT course_id, SUM(present) AS present, SUM(late) AS late, SUM(absent) AS absent
+                   FROM rollup_attendance_daily WHERE {attended} GROUP BY course_id) a ON a.course_id = c.id
+        ORDER BY c.name, c.id
+    """,
+    [("course_name", "Course Name"), ("present", "Present"), ("late", "Late"), ("absent", "Absent")],
+    {"attended": "day"},
+    tables=("courses", "attendance"),
+    rollups=("attendance_daily",),
+))
+
+register(ReportDefinition(
+    "payment_history", "Payment History",
+    """
+        SELECT CONCAT(u.first_name, ' ', u.last_name) AS student_name, c.name AS course_name,
+               COALESCE(p.amount, 0) AS amount, COALESCE(p.status, 'Not Paid') AS status
+        FROM student_courses sc
+        JOIN users u ON u.id = sc.student_id
+        JOIN courses c ON c.id = sc.course_id
+        LEFT JOIN payments p ON p.student_id = sc.student_id AND p.course_id = sc.course_id AND {paid}
+        WHERE u.user_type = 'student'
+        ORDER BY u.last_name, u.first_name, c.name
+    """,
+    [("student_name", "Student Name"), ("course_name", "Course Name"), ("amount", "Amount"),
+     ("status", "Status")],
+    {"paid": "p.payment_date"},
+    tables=("users", "student_courses", "courses", "payments"),
+))
+
+
+# --- Writers ---
+
+# Characters XML 1.0 does not allow (they would make the workbook unreadable)
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_XLSX_STATIC = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _column_letter(index):
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+class XlsxReportWriter:
+    """
+    Writes rows to a one-sheet XLSX workbook as they arrive.
+
+    The sheet XML is written straight into the zip entry, row by row, with
+    inline strings (no shared-string table to hold in memory), so no extra
+    package is needed and memory use does not grow with the row count.
+    """
+
+    def __init__(self, path, headers, sheet_name="Report"):
+        self._zip = zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED)
+        for name, content in _XLSX_STATIC.items():
+            self._zip.writestr(name, content)
+        self._zip.writestr("xl/workbook.xml", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets><sheet name="{escape(sheet_name[:31])}" sheetId="1" r:id="rId1"/></sheets>'
+            '</workbook>'
+        ))
+        self._letters = [_column_letter(i) for i in range(len(headers))]
+        self._row = 0
+        self._sheet = self._zip.open("xl/worksheets/sheet1.xml", "w", force_zip64=True)
+        self._sheet.write(
+            b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+        )
+        self.write_rows([headers])
+
+    def _cell(self, ref, value):
+        if value is None:
+            return ""
+        if isinstance(value, bool):
+            return f'<c r="{ref}"><v>{int(value)}</v></c>'
+        if isinstance(value, (int, float, Decimal)):
+            return f'<c r="{ref}"><v>{value}</v></c>'
+        if isinstance(value, (date, datetime)):
+            value = value.isoformat(sep=" ") if isinstance(value, datetime) else value.isoformat()
+        text = escape(_XML_ILLEGAL.sub("", str(value)))
+        return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+    def write_rows(self, rows):
+        parts = []
+        for values in rows:
+            self._row += 1
+            cells = "".join(self._cell(f"{letter}{self._row}", value)
+                            for letter, value in zip(self._letters, values))
+            parts.append(f'<row r="{self._row}">{cells}</row>')
+        self._sheet.write("".join(parts).encode("utf-8"))
+
+    def close(self):
+        self._sheet.write(b"</sheetData></worksheet>")
+        self._sheet.close()
+        self._zip.close()
+
+
+def format_of(path):
+    """
+    Returns:
+        str: "xlsx" or one of the exporter formats, from the file extension (csv for anything else).
+    """
+    return "xlsx" if path.lower().endswith(".xlsx") else exporter.format_of(path)
+
+
+def open_writer(path, headers, fmt=None):
+    """
+    Args:
+        path (str): Output file.
+        headers (list): Header row.
+        fmt (str, optional): One of FORMATS (default: from the extension).
+
+    Returns:
+        XlsxReportWriter or an exporter writer: Writer with write_rows(rows) and close().
+    """
+    fmt = fmt or format_of(path)
+    if fmt == "xlsx":
+        return XlsxReportWriter(path, headers)
+    return exporter.open_writer(path, headers, fmt)
+
+
+# --- Running reports ---
+
+class ReportResult:
+    """
+    Outcome of run_report.
+
+    Attributes:
+        path (str): Written file (None if nothing was written).
+        rows (int): Data rows written.
+        cached (bool): Whether the rows came from the report cache.
+        error (str): Why the report was not written, or None.
+        elapsed (float): Seconds taken.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.rows = 0
+        self.cached = False
+        self.error = None
+        self.elapsed = 0.0
+
+    def summary(self):
+        if self.error:
+            return f"Report failed: {self.error}"
+        source = " (cached)" if self.cached else ""
+        return f"Wrote {self.rows} rows to {self.path} in {self.elapsed:.1f}s{source}."
+
+
+def _cache_key(definition, sql, params, use_cache):
+    return report_cache().key(sql, params, definition.tables) if use_cache else None
+
+
+def _refresh_rollups(definition):
+    """Bring the report's rollups up to date. Returns False if one could not be refreshed."""
+    if not definition.rollups:
+        return True
+    return all(buckets is not None for buckets in refresh_rollups(definition.rollups).values())
+
+
+def run_report(name, path, start_date=None, end_date=None, fmt=None, progress=None, cancelled=None,
+               batch_size=BATCH_ROWS, use_cache=True):
+    """
+    Stream a report into a file.
+
+    The file is written under a temporary name and renamed when complete, so a
+    failed or cancelled run never leaves a truncated report behind.
+
+    Args:
+        name (str): Registered report name.
+        path (str): Output file (.xlsx, .csv, .csv.gz, .jsonl or .jsonl.gz).
+        start_date (date, optional): First day of the range.
+        end_date (date, optional): Last day of the range.
+        fmt (str, optional): One of FORMATS (default: from the extension).
+        progress (callable, optional): progress(stage, done, total); total is 0
+            because the row count is not known in advance.
+        cancelled (callable, optional): Returns True to stop; the query is killed then.
+        batch_size (int, optional): Rows read from the server at a time.
+        use_cache (bool, optional): Serve and store the rows in the report cache.
+
+    Returns:
+        ReportResult: Rows written and error.
+    """
+    started = time.perf_counter()
+    result = ReportResult()
+    definition = get_report(name)
+    if definition is None:
+        result.error = f"unknown report {name!r}"
+        return result
+    progress = progress or (lambda stage, done, total: None)
+    cancelled = cancelled or (lambda: False)
+    if not _refresh_rollups(definition):
+        result.error = "could not update the report rollup tables"
+        return result
+
+    sql, params = definition.build_query(start_date, end_date)
+    cache_key = _cache_key(definition, sql, params, use_cache)
+    stream = report_cache().get(cache_key)
+    cache_writer = None
+    if stream is not None:
+        result.cached = True
+    else:
+        stream = QueryStream(sql, params, batch_size=batch_size)
+        if cache_key is not None:
+            cache_writer = report_cache().writer(cache_key)
+    keys = [key for key, _ in definition.columns]
+    partial = path + ".part"
+    try:
+        writer = open_writer(partial, definition.headers, fmt or format_of(path))
+    except (OSError, ValueError) as e:
+        print(f"Error opening report file: {e}")
+        stream.cancel()
+        if cache_writer is not None:
+            cache_writer.discard()
+        result.error = str(e)
+        return result
+    completed = False
+    try:
+        progress("exporting", 0, 0)
+        for batch in stream:
+            if cancelled():
+                stream.cancel()
+                result.error = "cancelled"
+                break
+            writer.write_rows([[row.get(key) for key in keys] for row in batch])
+            if cache_writer is not None:
+                try:
+                    cache_writer.add(batch)
+                except (OSError, pickle.PicklingError) as e:
+                    # the report itself is still fine, it just is not cached
+                    print(f"Error writing report cache entry: {e}")
+                    cache_writer.discard()
+                    cache_writer = None
+            result.rows += len(batch)
+            progress("exporting", result.rows, 0)
+        if stream.error and not result.error:
+            result.error = stream.error
+        completed = True
+    except (OSError, csv.Error, TypeError, ValueError) as e:
+        print(f"Error writing report: {e}")
+        stream.cancel()
+        result.error = str(e)
+    finally:
+        try:
+            writer.close()
+        except (OSError, ValueError) as e:
+            print(f"Error writing report: {e}")
+            result.error = result.error or str(e)
+        # anything that did not run to the end (including an exception not caught above) drops the file
+        if result.error or not completed:
+            try:
+                os.remove(partial)
+            except OSError:
+                pass
+        else:
+            os.replace(partial, path)
+            result.path = path
+        # only a complete, successful run is cached; every other path drops the partial entry
+        if cache_writer is not None:
+            if completed and not result.error:
+                cache_writer.commit()
+            else:
+                cache_writer.discard()
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def _cached_rows(reader, limit=None):
+    rows = []
+    for batch in reader:
+        rows.extend(batch)
+        if limit is not None and len(rows) >= limit:
+            reader.cancel()
+            break
+    if reader.error:
+        return None
+    return rows if limit is None else rows[:limit]
+
+
+def preview_report(name, start_date=None, end_date=None, limit=PREVIEW_ROWS, use_cache=True):
+    """
+    Fetch the first rows of a report (from the cached full report when there is one).
+
+    Returns:
+        tuple: (headers, rows) with rows as lists in header order, or None on error.
+    """
+    definition = get_report(name)
+    if definition is None or not _refresh_rollups(definition):
+        return None
+    sql, params = definition.build_query(start_date, end_date)
+    reader = report_cache().get(_cache_key(definition, sql, params, use_cache))
+    rows = _cached_rows(reader, limit) if reader is not None else None
+    if rows is None:
+        sql, params = definition.build_query(start_date, end_date, limit=limit)
+        rows = execute_query(sql, params, fetch=True)
+    if rows is None:
+        return None
+    keys = [key for key, _ in definition.columns]
+    return definition.headers, [[row.get(key) for key in keys] for row in rows]
+
+
+def fetch_report(name, start_date=None, end_date=None, use_cache=True):
+    """
+    Fetch a whole report into memory, keyed by header (for small reports and callers
+    that need a list; use run_report to write files).
+
+    Returns:
+        list: Row dicts {header: value}, or None on error.
+    """
+    definition = get_report(name)
+    if definition is None or not _refresh_rollups(definition):
+        return None
+    sql, params = definition.build_query(start_date, end_date)
+    cache_key = _cache_key(definition, sql, params, use_cache)
+    reader = report_cache().get(cache_key)
+    rows = _cached_rows(reader) if reader is not None else None
+    if rows is None:
+        rows = execute_query(sql, params, fetch=True)
+        if rows is None:
+            return None
+        if cache_key is not None:
+            report_cache().store(cache_key, [rows[i:i + BATCH_ROWS] for i in range(0, len(rows), BATCH_ROWS)])
+    return [{header: row.get(key) for key, header in definition.columns} for row in rows]
@@ -0,0 +1,207 @@
+"""
+Rollups
+-------
+Per-day, per-course rollup tables for the date-range reports.
+
+Each rollup keeps one row per (day, course_id) with the aggregates of a source
+table (payments, student_courses, attendance), so a report over any range
+reads O(days x courses) rollup rows instead of every source row.
+
+Rollups are maintained incrementally from ``updated_at`` watermarks, kept in
+``rollup_state``:
+
+- rows updated at or after the watermark second, or inserted above the last
+  MAX(id), are the changed rows;
+- a COUNT(*) lower than "previous count + inserted rows" means rows were
+  deleted; those are the ids in the rollup's key table that are no longer in
+  the source;
+- the key table (``<rollup>_keys``: source id -> day, course_id) tells which
+  bucket each changed or deleted row was counted in before, so moved rows
+  leave their old bucket;
+- only the affected buckets are recomputed from the source.
+
+A refresh runs in one transaction (one consistent snapshot), and the state
+row is locked, so concurrent refreshes do not interleave. Reports refresh the
+rollups they read before querying them; scripts/refresh_rollups.py keeps
+them current in the background.
+"""
+
+from app.utils.database import execute_in_transaction
+
+# Ids or buckets per IN (...) list
+CHUNK_SIZE = 500
+
+
+class Rollup:
+    """
+    One rollup table.
+
+    Args:
+        name (str): Rollup name; the table is rollup_<name>, its key table rollup_<name>_keys.
+        source (str): Source table (needs id, course_id and updated_at).
+        day_column (str): Source date column the rows are bucketed by (NULL dates are skipped).
+        measures (list): (rollup column, aggregate over the source rows) pairs.
+    """
+
+    def __init__(self, name, source, day_column, measures):
+        self.name = name
+        self.table = f"rollup_{name}"
+        self.keys_table = f"rollup_{name}_keys"
+        self.source = source
+        self.day_column = day_column
+        self.measures = list(measures)
+
+    def aggregate_sql(self, where):
+        """INSERT ... SELECT that aggregates the source rows matching where into the rollup table."""
+        columns = ", ".join(column for column, _ in self.measures)
+        aggregates = ", ".join(expr for _, expr in self.measures)
+        return (
+            f"INSERT INTO {self.table} (day, course_id, {columns}) "
+            f"SELECT {self.day_column}, course_id, {aggregates} FROM {self.source} "
+            f"WHERE {self.day_column} IS NOT NULL AND {where} "
+            f"GROUP BY {self.day_column}, course_id"
+        )
+
+
+ROLLUPS = {}
+
+
+def register(rollup):
+    ROLLUPS[rollup.name] = rollup
+    return rollup
+
+
+register(Rollup("payments_daily", "payments", "payment_date", [
+    ("payments", "COUNT(*)"),
+    ("amount", "SUM(amount)"),
+    ("paid_amount", "SUM(CASE WHEN status = 'paid' THEN amount ELSE 0 END)"),
+]))
+
+register(Rollup("enrollments_daily", "student_courses", "enrollment_date", [
+    ("enrollments", "COUNT(*)"),
+    ("active_enrollments", "SUM(active)"),
+]))
+
+register(Rollup("attendance_daily", "attendance", "attendance_date", [
+    ("present", "SUM(status = 'present')"),
+    ("late", "SUM(status = 'late')"),
+    ("absent", "SUM(status = 'absent')"),
+]))
+
+
+def _chunks(items, size=CHUNK_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _in_list(count, width=1):
+    one = "%s" if width == 1 else "(" + ", ".join(["%s"] * width) + ")"
+    return ", ".join([one] * count)
+
+
+def _rebuild(cursor, rollup):
+    cursor.execute(f"DELETE FROM {rollup.table}")
+    cursor.execute(f"DELETE FROM {rollup.keys_table}")
+    cursor.execute(f"INSERT INTO {rollup.keys_table} (id, day, course_id) "
+                   f"SELECT id, {rollup.day_column}, course_id FROM {rollup.source}")
+    cursor.execute(rollup.aggregate_sql("1 = 1"))
+    cursor.execute(f"SELECT COUNT(*) AS buckets FROM {rollup.table}")
+    return int(cursor.fetchone()['buckets'])
+
+
+def _changed_ids(cursor, rollup, state):
+    if state['last_updated'] is None:
+        cursor.execute(f"SELECT id FROM {rollup.source} WHERE id > %s", (state['max_id'],))
+    else:
+        cursor.execute(f"SELECT id FROM {rollup.source} WHERE updated_at >= %s OR id > %s",
+                       (state['last_updated'], state['max_id']))
+    return [row['id'] for row in cursor.fetchall()]
+
+
+def _deleted_ids(cursor, rollup):
+    cursor.execute(f"SELECT k.id FROM {rollup.keys_table} k "
+                   f"LEFT JOIN {rollup.source} s ON s.id = k.id WHERE s.id IS NULL")
+    return [row['id'] for row in cursor.fetchall()]
+
+
+def _update(cursor, rollup, changed, deleted):
+    """Recompute the buckets touched by changed and deleted rows and move their keys."""
+    buckets = set()
+    for chunk in _chunks(changed + deleted):
+        cursor.execute(f"SELECT DISTINCT day, course_id FROM {rollup.keys_table} "
+                       f"WHERE id IN ({_in_list(len(chunk))}) AND day IS NOT NULL", chunk)
+        buckets.update((row['day'], row['course_id']) for row in cursor.fetchall())
+    for chunk in _chunks(changed):
+        cursor.execute(f"SELECT DISTINCT {rollup.day_column} AS day, course_id FROM {rollup.source} "
+                       f"WHERE id IN ({_in_list(len(chunk))}) AND {rollup.day_column} IS NOT NULL", chunk)
+        buckets.update((row['day'], row['course_id']) for row in cursor.fetchall())
+
+    for chunk in _chunks(sorted(buckets)):
+        # (course_id, day) order matches the source indexes on (course_id, <day column>)
+        params = [value for day, course_id in chunk for value in (course_id, day)]
+        cursor.execute(f"DELETE FROM {rollup.table} WHERE (course_id, day) IN ({_in_list(len(chunk), 2)})",
+                       params)
+        cursor.execute(rollup.aggregate_sql(
+            f"(course_id, {rollup.day_column}) IN ({_in_list(len(chunk), 2)})"), params)
+
+    for chunk in _chunks(changed + deleted):
+        cursor.execute(f"DELETE FROM {rollup.keys_table} WHERE id IN ({_in_list(len(chunk))})", chunk)
+    for chunk in _chunks(changed):
+        cursor.execute(f"INSERT INTO {rollup.keys_table} (id, day, course_id) "
+                       f"SELECT id, {rollup.day_column}, course_id FROM {rollup.source} "
+                       f"WHERE id IN ({_in_list(len(chunk))})", chunk)
+    return len(buckets)
+
+
+def refresh_rollup(name, rebuild=False):
+    """
+    Bring one rollup up to date with its source table.
+
+    Args:
+        name (str): Rollup name (see ROLLUPS).
+        rebuild (bool, optional): Recompute everything instead of the changed buckets.
+
+    Returns:
+        int: Buckets recomputed (all of them on a rebuild), or None if error.
+    """
+    rollup = ROLLUPS[name]
+
+    def _work(cursor):
+        cursor.execute("SELECT last_updated, max_id, row_count FROM rollup_state WHERE rollup = %s FOR UPDATE",
+                       (rollup.name,))
+        state = cursor.fetchone()
+        cursor.execute(
+            f"SELECT COUNT(*) AS row_count, MAX(updated_at) AS last_updated, "
+            f"COALESCE(MAX(id), 0) AS max_id, "
+            f"(SELECT COUNT(*) FROM {rollup.source} WHERE id > %s) AS inserted FROM {rollup.source}",
+            (state['max_id'] if state else 0,))
+        probe = cursor.fetchone()
+
+        if state is None or rebuild:
+            buckets = _rebuild(cursor, rollup)
+        else:
+            changed = _changed_ids(cursor, rollup, state)
+            deleted = []
+            if int(probe['row_count']) < int(state['row_count']) + int(probe['inserted']):
+                deleted = _deleted_ids(cursor, rollup)
+            buckets = _update(cursor, rollup, changed, deleted) if changed or deleted else 0
+
+        cursor.execute(
+            "INSERT INTO rollup_state (rollup, last_updated, max_id, row_count) VALUES (%s, %s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE last_updated = VALUES(last_updated), max_id = VALUES(max_id), "
+            "row_count = VALUES(row_count), refreshed_at = CURRENT_TIMESTAMP",
+            (rollup.name, probe['last_updated'], probe['max_id'], probe['row_count']))
+        return buckets
+
+    return execute_in_transaction(_work)
+
+
+def refresh_rollups(names=None, rebuild=False):
+    """
+    Refresh several rollups (all of them by default).
+
+    Returns:
+        dict: {name: buckets recomputed or None if that rollup failed}.
+    """
+    return {name: refresh_rollup(name, rebuild) for name in (names or list(ROLLUPS))}
@@ -0,0 +1,151 @@
+"""
+Search Index
+------------
+In-process inverted index used for chat search when MySQL is not available
+(the JSON chat store). The index is updated incrementally: only messages that
+are new or whose text changed since the last sync are (re)tokenized.
+"""
+
+import bisect
+import math
+import re
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lower-case word tokens."""
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+class InvertedIndex:
+    """
+    Term -> postings index over chat messages.
+
+    Postings map a message id to its term frequency. Ranking is TF-IDF summed
+    over the query terms; the last query term also matches as a prefix so
+    results update while typing. Results are paginated with a keyset cursor
+    on (score, message id).
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self._terms: List[str] = []  # sorted, for prefix lookups
+        self._docs: Dict[int, Tuple[int, str]] = {}  # message id -> (chat_id, text)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    # --- maintenance ---
+    def add(self, message_id: int, chat_id: int, text: str):
+        """Index (or re-index) a single message."""
+        with self._lock:
+            current = self._docs.get(message_id)
+            if current is not None and current == (chat_id, text):
+                return
+            if current is not None:
+                self.remove(message_id)
+            self._docs[message_id] = (chat_id, text)
+            counts: Dict[str, int] = defaultdict(int)
+            for tok in tokenize(text):
+                counts[tok] += 1
+            for tok, tf in counts.items():
+                if tok not in self._postings:
+                    bisect.insort(self._terms, tok)
+                self._postings[tok][message_id] = tf
+
+    def remove(self, message_id: int):
+        """Drop a message from the index."""
+        with self._lock:
+            doc = self._docs.pop(message_id, None)
+            if doc is None:
+                return
+            for tok in set(tokenize(doc[1])):
+                postings = self._postings.get(tok)
+                if postings is None:
+                    continue
+                postings.pop(message_id, None)
+                if not postings:
+                    del self._postings[tok]
+                    i = bisect.bisect_left(self._terms, tok)
+                    if i < len(self._terms) and self._terms[i] == tok:
+                        del self._terms[i]
+
+    def sync(self, messages: Iterable[Dict[str, Any]]):
+        """
+        Bring the index in line with `messages` (dicts with id, chat_id, message, deleted).
+        Unchanged messages cost a dict lookup; deleted or vanished ones are removed.
+        """
+        with self._lock:
+            seen = set()
+            for m in messages:
+                mid = int(m.get("id") or 0)
+                if not mid:
+                    continue
+                if m.get("deleted"):
+                    self.remove(mid)
+                    continue
+                seen.add(mid)
+                self.add(mid, int(m.get("chat_id") or 0), m.get("message") or "")
+            for mid in [mid for mid in self._docs if mid not in seen]:
+                self.remove(mid)
+
+    # --- querying ---
+    def _expand(self, term: str, prefix: bool) -> List[str]:
+        if not prefix:
+            return [term] if term in self._postings else []
+        i = bisect.bisect_left(self._terms, term)
+        out = []
+        while i < len(self._terms) and self._terms[i].startswith(term):
+            out.append(self._terms[i])
+            i += 1
+        return out
+
+    def search(self, query: str, chat_ids: Optional[Iterable[int]] = None, limit: int = 20,
+               cursor: Optional[Tuple[float, int]] = None) -> Tuple[List[Tuple[int, float]], Optional[Tuple[float, int]]]:
+        """
+        Rank messages matching every query term.
+
+        Args:
+            query (str): User search text.
+            chat_ids (iterable, optional): Restrict results to these chats.
+            limit (int): Page size.
+            cursor (tuple, optional): (score, message_id) of the last result of the previous page.
+
+        Returns:
+            tuple: ([(message_id, score), ...], next_cursor or None)
+        """
+        terms = tokenize(query)
+        if not terms:
+            return [], None
+        allowed = set(int(c) for c in chat_ids) if chat_ids is not None else None
+        with self._lock:
+            n_docs = max(len(self._docs), 1)
+            scores: Optional[Dict[int, float]] = None
+            for i, term in enumerate(terms):
+                term_scores: Dict[int, float] = defaultdict(float)
+                for tok in self._expand(term, prefix=(i == len(terms) - 1)):
+                    postings = self._postings[tok]
+                    idf = math.log(1 + n_docs / len(postings))
+                    for mid, tf in postings.items():
+                        term_scores[mid] += tf * idf
+                if scores is None:
+                    scores = dict(term_scores)
+                else:
+                    # all terms must match
+                    scores = {mid: s + term_scores[mid] for mid, s in scores.items() if mid in term_scores}
+                if not scores:
+                    return [], None
+            if allowed is not None:
+                scores = {mid: s for mid, s in scores.items() if self._docs[mid][0] in allowed}
+        ranked = sorted(((round(s, 6), mid) for mid, s in scores.items()), reverse=True)
+        if cursor is not None:
+            c_score, c_id = round(float(cursor[0]), 6), int(cursor[1])
+            ranked = [(s, mid) for s, mid in ranked if s < c_score or (s == c_score and mid < c_id)]
+        page = ranked[:limit]
+        next_cursor = (page[-1][0], page[-1][1]) if len(ranked) > limit else None
+        return [(mid, s) for s, mid in page], next_cursor
@@ -6,9 +6,10 @@ functionality for the Language School Management System.
 """
 
 from PyQt5.QtWidgets import (
-    QMainWindow, QTableWidgetItem, QMessageBox, QDialog, QVBoxLayout, 
+    QMainWindow, QMessageBox, QDialog, QVBoxLayout, 
     QHBoxLayout, QLabel, QLineEdit, QComboBox, QDateEdit, QPushButton, 
-    QDialogButtonBox, QListWidgetItem, QWidget, QFileDialog, QTimeEdit
+    QDialogButtonBox, QListWidgetItem, QFileDialog, QTimeEdit, QAction, QInputDialog, QMenu,
+    QTableWidgetItem
 )
 from PyQt5.QtCore import Qt, pyqtSlot, QDate, pyqtSignal, QTimer, QTime
 from datetime import datetime
@@ -23,49 +24,47 @@ from app.models.report_model import Report  # Add this import
 from app.utils import database
 from app.utils.crypto import hash_password  # Will use plaintext instead of hashing
 from app.ui.common.messaging import attach_messaging
+from app.ui.common.table_models import Column, attach_record_table, enable_prefetch, fit_columns, selected_records
+from app.ui.common.filter_controller import FilterController, SortColumn
+from app.ui.common.tab_loader import TabLoader
+from app.utils.change_probe import ChangeProbe, TableChange, CHANGED, RELOAD
+from app.utils.reference_data import reference_data
+from app.utils import bulk_import
+from app.ui.common.reference_combo import accept_when_resolved, attach_reference_combo, attach_reference_completer
+from app.ui.common.background_task import BackgroundTask, run_with_progress
+from app.ui.common.table_export import EXPORT_FILTERS, ask_export_path
+from app.ui.common.refresh_orchestrator import RefreshOrchestrator
+from app.utils import exporter, report_generator
+from app.utils.kpi import ROOM_HOURS_PER_WEEK, kpi_cache
 
 
+# Rows fetched per page for the paged admin tables (users, courses, payments)
+TABLE_PAGE_SIZE = 200
+# Periodic refresh; cheap because unchanged tables are skipped by the change probes
+TABLE_REFRESH_INTERVAL_MS = 30000
+
+# Actions painted in the last column of every admin table: (action name, button label)
+ROW_ACTIONS = [("edit", "Edit"), ("delete", "Delete")]
+
+
+def _yes_no(key):
+    return lambda r: "Yes" if r.get(key) else "No"
 
-# Attempt to import real report generators; provide safe fallbacks if module is missing
-try:
-    from app.utils.report_generator import (
-        generate_user_activity_report,
-        generate_course_enrollment_report,
-        generate_payment_summary_report,
-    )
-except Exception:
-    # Fallback minimal implementations (write CSV) so IDE/linter/runtimes don't fail.
-    def _write_csv(path, rows):
-        import csv, os
-        p = path
-        if p.endswith(".xlsx"):
-            p = p[:-5] + ".csv"
-        os.makedirs(os.path.dirname(p) or ".", exist_ok=True)
-        if not rows:
-            with open(p, "w", newline="", encoding="utf-8") as f:
-                f.write("no_data\n")
-            return
-        # rows expected as list of dicts
-        with open(p, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            if isinstance(rows, list) and isinstance(rows[0], dict):
-                headers = list(rows[0].keys())
-                writer.writerow(headers)
-                for r in rows:
-                    writer.writerow([r.get(h, "") for h in headers])
-            else:
-                # generic fallback
-                for r in rows:
-                    writer.writerow([str(r)])
 
-    def generate_user_activity_report(path, data):
-        _write_csv(path, data)
+def _money(key):
+    return lambda r: f"${r[key]:.2f}" if r.get(key) is not None else ""
 
-    def generate_course_enrollment_report(path, data):
-        _write_csv(path, data)
 
-    def generate_payment_summary_report(path, data):
-        _write_csv(path, data)
+def _full_name(r):
+    return f"{r.get('first_name') or ''} {r.get('last_name') or ''}".strip()
+
+
+def _time_or_date(key, fmt):
+    # MySQL returns DATE as datetime.date and TIME as timedelta (no strftime)
+    def _format(r):
+        value = r.get(key)
+        return value.strftime(fmt) if hasattr(value, "strftime") else str(value or "")
+    return _format
 
 
 class AdminDashboardView(BaseDashboardView):
@@ -88,12 +87,50 @@ class AdminDashboardView(BaseDashboardView):
 
         # Ensure UI elements exist
         self._setup_missing_ui_elements()
+
+        # Model-backed tables (must exist before signals are connected and data loaded)
+        self._setup_tables()
+        self._setup_reports()
+        self._setup_overview()
         
         # Connect signals
         self._connect_signals()
+
+        # Change probes make refreshes skip unchanged tables (the joined tables are watched too)
+        self._probes = {
+            "users": ChangeProbe("users"),
+            "courses": ChangeProbe("courses", depends_on=("users",)),
+            "schedules": ChangeProbe("schedules", depends_on=("courses", "users")),
+            "payments": ChangeProbe("payments", depends_on=("users", "courses")),
+        }
+        self._table_pages = {
+            "users": self.ui.usersTab,
+            "courses": self.ui.coursesTab,
+            "schedules": self.ui.schedulesTab,
+            "payments": self.ui.paymentsTab,
+        }
+        # Probes and changed-row reads run on a worker thread; patches are applied on the GUI thread
+        self._patch_queries = {}
+        self.table_refresh = RefreshOrchestrator(max_workers=2, parent=self)
+        for table in self._table_pages:
+            self.table_refresh.add(table, lambda t=table: self._fetch_changes(t),
+                                   lambda result, t=table: self._apply_changes(t, result))
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setInterval(TABLE_REFRESH_INTERVAL_MS)
+        self._refresh_timer.timeout.connect(self.refresh_data)
+
+        # Load each tab's data when it is first shown
+        self.tabs = TabLoader(self.ui.tabWidget, self)
+        self.tabs.register(self.ui.overviewTab, self.load_overview)
+        self.tabs.register(self.ui.usersTab, self.load_users)
+        self.tabs.register(self.ui.coursesTab, self.load_courses)
+        self.tabs.register(self.ui.schedulesTab, self.load_schedules)
+        self.tabs.register(self.ui.paymentsTab, self.load_payments)
+        self.tabs.register(self.ui.messagesTab, self._load_chats)
         
         # Load initial data
-        self.refresh_data()
+        self.tabs.refresh()
+        self._refresh_timer.start()
 
     def _setup_missing_ui_elements(self):
         """Ensure all required UI elements exist"""
@@ -123,6 +160,13 @@ class AdminDashboardView(BaseDashboardView):
             except Exception:
                 pass
 
+        # Payment status filter ships with only "All Status"; add the payments.status values
+        try:
+            if self.ui.paymentStatusFilter.count() <= 1:
+                self.ui.paymentStatusFilter.addItems(["Pending", "Paid", "Overdue"])
+        except Exception:
+            pass
+
         # Set welcome message defensively
         try:
             first = getattr(self.user, "first_name", "") or ""
@@ -132,6 +176,420 @@ class AdminDashboardView(BaseDashboardView):
         except Exception:
             pass
 
+    def _setup_tables(self):
+        """Replace the QTableWidgets with QTableViews over RecordTableModel + proxy."""
+        self.users_model, self.users_proxy = attach_record_table(
+            self.ui, "usersTable",
+            [Column("id"), Column("username"), Column("first_name"), Column("last_name"),
+             Column("email"), Column("user_type"), Column("active", _yes_no("active"))],
+            actions=ROW_ACTIONS, on_action=self._row_action_handler(self.edit_user, self.delete_user))
+        self.courses_model, self.courses_proxy = attach_record_table(
+            self.ui, "coursesTable",
+            [Column("id"), Column("name"), Column("language"), Column("level"), Column(fmt=_full_name),
+             Column("price", _money("price")), Column("active", _yes_no("active"))],
+            actions=ROW_ACTIONS, on_action=self._row_action_handler(self.edit_course, self.delete_course))
+        self.schedules_model, self.schedules_proxy = attach_record_table(
+            self.ui, "schedulesTable",
+            [Column("id"), Column("date"), Column("start_time", _time_or_date("start_time", "%H:%M")),
+             Column("end_time", _time_or_date("end_time", "%H:%M")), Column("location"), Column("notes"),
+             Column("course_name"), Column(fmt=_full_name)],
+            actions=ROW_ACTIONS, on_action=self._row_action_handler(self.edit_schedule, self.delete_schedule))
+        self.payments_model, self.payments_proxy = attach_record_table(
+            self.ui, "paymentsTable",
+            [Column("id"), Column("amount", _money("amount")), Column("date", _time_or_date("date", "%Y-%m-%d")),
+             Column("status"), Column(fmt=_full_name), Column("course_name")],
+            actions=ROW_ACTIONS, on_action=self._row_action_handler(self.edit_payment, self.delete_payment))
+
+        # Filtering runs in SQL: debounced, off the UI thread, stale queries cancelled.
+        # Users, courses and payments are paged with keyset cursors and sorted on the
+        # server (header click) over the indexed columns listed here.
+        self.users_filter = FilterController(
+            self._users_query, self._rows_applier(self.users_model, "usersTable"),
+            page_size=TABLE_PAGE_SIZE, id_expr="u.id", parent=self,
+            before_load=lambda: self._probes["users"].mark(),
+            sort_columns={
+                0: SortColumn("u.id", "id"), 1: SortColumn("u.username", "username"),
+                2: SortColumn("u.first_name", "first_name"), 3: SortColumn("u.last_name", "last_name"),
+                4: SortColumn("u.email", "email"), 5: SortColumn("u.user_type", "user_type"),
+                6: SortColumn("u.active", "active"),
+            })
+        self.courses_filter = FilterController(
+            self._courses_query, self._rows_applier(self.courses_model, "coursesTable"),
+            page_size=TABLE_PAGE_SIZE, id_expr="c.id", parent=self,
+            before_load=lambda: self._probes["courses"].mark(),
+            sort_columns={
+                0: SortColumn("c.id", "id"), 1: SortColumn("c.name", "name"),
+                2: SortColumn("c.language", "language"), 3: SortColumn("c.level", "level"),
+                4: SortColumn("u.last_name", "last_name"), 5: SortColumn("c.price", "price"),
+                6: SortColumn("c.active", "active"),
+            })
+        self.schedules_filter = FilterController(
+            self._schedules_query, self._rows_applier(self.schedules_model, "schedulesTable"),
+            id_expr="s.id", before_load=lambda: self._probes["schedules"].mark(), parent=self)
+        self.payments_filter = FilterController(
+            self._payments_query, self._rows_applier(self.payments_model, "paymentsTable"),
+            page_size=TABLE_PAGE_SIZE, id_expr="p.id", parent=self,
+            before_load=lambda: self._probes["payments"].mark(),
+            sort_columns={
+                0: SortColumn("p.id", "id"), 1: SortColumn("p.amount", "amount"),
+                2: SortColumn("p.payment_date", "date", nullable=True), 3: SortColumn("p.status", "status"),
+                4: SortColumn("u.last_name", "last_name"), 5: SortColumn("c.name", "course_name"),
+            })
+        # Bulk actions on the selected rows (right-click menu)
+        for table, name in (("users", "usersTable"), ("courses", "coursesTable"),
+                            ("schedules", "schedulesTable"), ("payments", "paymentsTable")):
+            view = getattr(self.ui, name)
+            view.setContextMenuPolicy(Qt.CustomContextMenu)
+            view.customContextMenuRequested.connect(
+                lambda pos, table=table, view=view: self._show_bulk_menu(table, view, pos))
+
+        # Single-row refresh after writes: (model, query builder, id column, controller)
+        self._row_sources = {
+            "users": (self.users_model, self._users_query, "u.id", self.users_filter),
+            "courses": (self.courses_model, self._courses_query, "c.id", self.courses_filter),
+            "schedules": (self.schedules_model, self._schedules_query, "s.id", self.schedules_filter),
+            "payments": (self.payments_model, self._payments_query, "p.id", self.payments_filter),
+        }
+        for model, controller, table in ((self.users_model, self.users_filter, "usersTable"),
+                                         (self.courses_model, self.courses_filter, "coursesTable"),
+                                         (self.payments_model, self.payments_filter, "paymentsTable")):
+            model.set_pager(controller)
+            enable_prefetch(getattr(self.ui, table))
+
+    def _setup_reports(self):
+        """Fill the report picker from the report registry and default to the last month."""
+        self._report_task = None
+        self._preview_task = None
+        try:
+            self.ui.reportTypeCombo.clear()
+            for name, title in report_generator.available_reports():
+                self.ui.reportTypeCombo.addItem(title, name)
+            self.ui.endDateEdit.setDate(QDate.currentDate())
+            self.ui.startDateEdit.setDate(QDate.currentDate().addMonths(-1))
+            self.ui.reportTypeCombo.currentIndexChanged.connect(self._on_report_type_changed)
+            self._on_report_type_changed()
+        except Exception:
+            pass
+
+    def _setup_overview(self):
+        """Fetch the Overview figures on a worker thread (one cached aggregate query, see app.utils.kpi)."""
+        self._overview_max_age = None
+        self.overview_refresh = RefreshOrchestrator(max_workers=1, parent=self)
+        self.overview_refresh.add("kpis", self._fetch_kpis, self._apply_kpis)
+        self.ui.refreshOverviewButton.clicked.connect(lambda: self.load_overview(force=True))
+
+    def load_overview(self, force=False):
+        """
+        Refresh the Overview cards in the background.
+
+        Within the KPI cache TTL this reuses the last result without a query;
+        force=True (the Refresh button) always queries.
+        """
+        self._overview_max_age = 0 if force else None
+        self.overview_refresh.run("kpis")
+
+    def _fetch_kpis(self):
+        """Get the overview figures (worker thread)."""
+        user_id = getattr(self.user, "user_id", getattr(self.user, "id", None))
+        return kpi_cache().get(user_id, max_age=self._overview_max_age)
+
+    def _apply_kpis(self, kpis):
+        """Show the overview figures; keeps the previous ones if the query failed."""
+        if kpis is None:
+            self.ui.overviewUpdatedLabel.setText("Overview could not be loaded.")
+            return
+        self.ui.activeStudentsLabel.setText(f"{kpis['active_students']:,}")
+        self.ui.activeCoursesLabel.setText(f"{kpis['active_courses']:,}")
+        self.ui.revenueMonthLabel.setText(f"${float(kpis['revenue_this_month']):,.2f}")
+        self.ui.revenueMonthDetailLabel.setText(f"Paid in {kpis['computed_at']:%B %Y}")
+        self.ui.overduePaymentsLabel.setText(f"{kpis['overdue_payments']:,}")
+        self.ui.overduePaymentsDetailLabel.setText(f"${float(kpis['overdue_amount']):,.2f} outstanding")
+        utilization = kpis['room_utilization']
+        self.ui.roomUtilizationLabel.setText("-" if utilization is None else f"{utilization:.0f}%")
+        self.ui.roomUtilizationDetailLabel.setText(
+            f"{float(kpis['booked_room_hours']):,.0f} of {int(kpis['rooms']) * ROOM_HOURS_PER_WEEK:,} "
+            f"room-hours a week")
+        self.ui.unreadMessagesLabel.setText(f"{kpis['unread_messages']:,}")
+        self.ui.unreadMessagesDetailLabel.setText("In your conversations")
+        self.ui.overviewUpdatedLabel.setText(f"Updated {kpis['computed_at']:%H:%M:%S}")
+
+    def _on_report_type_changed(self, *_):
+        """Enable the date range only for reports that filter on dates."""
+        definition = report_generator.get_report(self.ui.reportTypeCombo.currentData())
+        uses_dates = definition is not None and definition.uses_dates
+        self.ui.startDateEdit.setEnabled(uses_dates)
+        self.ui.endDateEdit.setEnabled(uses_dates)
+
+    def _report_criteria(self):
+        """
+        Read and validate the report picker and date range.
+
+        Returns:
+            tuple: (name, start_date, end_date), or None if the input is invalid (a warning was shown).
+        """
+        name = self.ui.reportTypeCombo.currentData()
+        start_date = self.ui.startDateEdit.date().toPyDate()
+        end_date = self.ui.endDateEdit.date().toPyDate()
+        if report_generator.get_report(name) is None:
+            QMessageBox.warning(self, "Validation Error", "Invalid report type.")
+            return None
+        if start_date > end_date:
+            QMessageBox.warning(self, "Validation Error", "Start date must be before end date.")
+            return None
+        return name, start_date, end_date
+
+    def _rows_applier(self, model, table_name):
+        """Build the FilterController callback that shows fetched rows in a table."""
+        def _apply(rows, append=False):
+            if append:
+                model.append_rows(rows)
+                return
+            model.set_rows(rows)
+            fit_columns(getattr(self.ui, table_name))
+        return _apply
+
+    def _load_table(self, table):
+        """
+        Load a table in full. The load's worker starts a new change-probe
+        watermark just before its query (the controllers' before_load); here
+        only the probe epoch moves, so patches probed earlier are dropped.
+        """
+        self._probes[table].begin_load()
+        self._row_sources[table][3].run_now()
+
+    def _refresh_table(self, table, removed=0):
+        """
+        Probe one table and patch its changed rows in the background.
+
+        The table's query and current filters are read here (GUI thread); the
+        probe and the row lookup run on self.table_refresh, and _apply_changes
+        patches the model. Called by refresh_data and after local writes, which
+        also moves the probe watermark past them.
+
+        Args:
+            table (str): Key in self._row_sources ("users", "courses", ...).
+            removed (int, optional): Rows this window just deleted from the table
+                (and removed from the model), so the probe does not reload for them.
+        """
+        probe = self._probes[table]
+        if removed:
+            probe.removed(removed)
+        model, build_query, id_expr, controller = self._row_sources[table]
+        query, where, params = build_query()
+        # rows beyond the loaded pages are left to paging, which brings them in order
+        window, window_params = controller.loaded_window()
+        self._patch_queries[table] = (probe.epoch, query, list(where) + window, list(params) + window_params,
+                                      id_expr)
+        self.table_refresh.run(table)
+
+    def _fetch_changes(self, table):
+        """
+        Probe a table and read its changed rows with the table's own query (worker thread).
+
+        Returns:
+            tuple: (probe epoch, TableChange, rows or None); a failed row lookup is returned as RELOAD.
+        """
+        epoch, query, where, params, id_expr = self._patch_queries[table]
+        change = self._probes[table].check()
+        if change.kind != CHANGED:
+            return epoch, change, None
+        rows = []
+        for start in range(0, len(change.changed_ids), TABLE_PAGE_SIZE):
+            chunk = change.changed_ids[start:start + TABLE_PAGE_SIZE]
+            chunk_where = where + [f"{id_expr} IN ({', '.join(['%s'] * len(chunk))})"]
+            chunk_rows = database.execute_query(query + " WHERE " + " AND ".join(chunk_where),
+                                                params + chunk, fetch=True)
+            if chunk_rows is None:
+                return epoch, TableChange(RELOAD), None
+            rows.extend(chunk_rows)
+        return epoch, change, rows
+
+    def _apply_changes(self, table, result):
+        """
+        Patch fetched rows into the table model (GUI thread).
+
+        Each changed row is updated in place (or inserted at its sorted
+        position when new) if it still matches the filters and lies within the
+        loaded pages, and removed otherwise; selection and scroll position are
+        kept. Deletions, joined-table changes and failures reload the table.
+        """
+        page = self._table_pages[table]
+        if self.tabs.is_stale(page):
+            return  # loads in full when shown
+        if result is None:  # the probe raised: start over with a full load
+            self.tabs.mark_stale(page)
+            return
+        epoch, change, rows = result
+        if epoch != self._probes[table].epoch:
+            return  # the table was reloaded since the probe started
+        if change.kind == RELOAD:
+            self.tabs.mark_stale(page)
+            return
+        if change.kind == CHANGED:
+            model = self._row_sources[table][0]
+            found = set()
+            for row in rows:
+                model.upsert(row)
+                found.add(row.get("id"))
+            model.remove_many(i for i in change.changed_ids if i not in found)
+        # only now that the rows are in does the watermark move past them; a dropped
+        # result (superseded run, reloaded table) leaves them for the next check
+        self._probes[table].advance(change)
+
+    def _patch_row(self, table, record_id):
+        """
+        Bring a table up to date after a write (see _refresh_table), update the
+        reference lists dialogs pick from and mark the other tabs stale.
+
+        Args:
+            table (str): Key in self._row_sources.
+            record_id (int): Id of the written row, or None if the write gave none.
+        """
+        self._refresh_table(table)
+        reference_data().rows_changed(table, [record_id])
+        self.tabs.mark_others_stale()
+
+    def _remove_row(self, table, record_id, deleted):
+        """
+        Drop a deleted record from the table model without reloading the table.
+
+        Args:
+            table (str): Key in self._row_sources.
+            record_id (int): Id of the deleted row.
+            deleted (int): Row count returned by the DELETE (None if it failed).
+        """
+        if deleted:
+            self._row_sources[table][0].remove(record_id)
+            self._refresh_table(table, removed=deleted)
+            reference_data().rows_changed(table, [record_id])
+            self.tabs.mark_others_stale()
+        else:
+            # nothing was deleted (or the statement failed): show the row as it is in the DB
+            self._patch_row(table, record_id)
+
+    def _show_bulk_menu(self, table, view, pos):
+        """Offer bulk actions for the selected rows of a table, and an export of the whole table."""
+        ids = [r["id"] for r in selected_records(view) if r.get("id") is not None]
+        count = len(ids)
+        menu = QMenu(view)
+        if ids:
+            if table in ("users", "courses"):
+                menu.addAction(f"Deactivate {count} selected", lambda: self.bulk_deactivate(table, ids))
+            if table == "courses":
+                menu.addAction(f"Reassign teacher of {count} selected...", lambda: self.bulk_reassign_teacher(ids))
+            menu.addAction(f"Delete {count} selected", lambda: self.bulk_delete(table, ids))
+            menu.addSeparator()
+        menu.addAction("Export all matching rows...", lambda: self.export_table(table))
+        menu.exec_(view.viewport().mapToGlobal(pos))
+
+    def _after_bulk_write(self, table, ids, deleted=None):
+        """
+        Update a table in place after a bulk statement and refresh what depends on it.
+
+        Args:
+            table (str): Key in self._row_sources.
+            ids (list): Ids the statement targeted.
+            deleted (int, optional): Row count of a bulk DELETE (None for updates).
+        """
+        if deleted is not None:
+            self._row_sources[table][0].remove_many(ids)
+        self._refresh_table(table, removed=deleted or 0)
+        reference_data().rows_changed(table, ids)
+        self.tabs.mark_others_stale()
+
+    def bulk_deactivate(self, table, ids):
+        """
+        Deactivate users or courses with one UPDATE per chunk of ids.
+
+        Args:
+            table (str): "users" or "courses".
+            ids (list): Ids of the selected rows.
+        """
+        reply = QMessageBox.question(
+            self, "Confirm Deactivation",
+            f"Are you sure you want to deactivate {len(ids)} {table}?",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+        if reply != QMessageBox.Yes:
+            return
+        changed = database.execute_for_ids(f"UPDATE {table} SET active = 0 WHERE id IN ({{ids}})", ids)
+        if changed is None:
+            QMessageBox.warning(self, "Error", f"Could not deactivate the selected {table}.")
+            return
+        self._after_bulk_write(table, ids)
+        self.ui.statusbar.showMessage(f"{changed} {table} deactivated.")
+
+    def bulk_reassign_teacher(self, course_ids):
+        """
+        Move the selected courses to another teacher with one UPDATE per chunk of ids.
+
+        Args:
+            course_ids (list): Ids of the selected courses.
+        """
+        # Create dialog
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Reassign Teacher")
+        dialog.setMinimumWidth(400)
+        layout = QVBoxLayout(dialog)
+        layout.addWidget(QLabel(f"New teacher for {len(course_ids)} courses:"))
+        teacher_combo = QComboBox()
+        attach_reference_combo(teacher_combo, reference_data()["teachers"])
+        layout.addWidget(teacher_combo)
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(accept_when_resolved(dialog, teacher_combo))
+        buttons.rejected.connect(dialog.reject)
+        layout.addWidget(buttons)
+
+        if dialog.exec_() != QDialog.Accepted:
+            return
+        teacher_id = teacher_combo.currentData()
+        if teacher_id is None:
+            QMessageBox.warning(self, "Validation Error", "Please choose a teacher.")
+            return
+        changed = database.execute_for_ids("UPDATE courses SET teacher_id = %s WHERE id IN ({ids})",
+                                           course_ids, (teacher_id,))
+        if changed is None:
+            QMessageBox.warning(self, "Error", "Could not reassign the selected courses.")
+            return
+        self._after_bulk_write("courses", course_ids)
+        self.ui.statusbar.showMessage(f"{changed} courses reassigned to {teacher_combo.currentText()}.")
+
+    def bulk_delete(self, table, ids):
+        """
+        Delete the selected rows of a table with one DELETE per chunk of ids.
+
+        Args:
+            table (str): "users", "courses", "schedules" or "payments".
+            ids (list): Ids of the selected rows.
+        """
+        reply = QMessageBox.question(
+            self, "Confirm Deletion",
+            f"Are you sure you want to delete {len(ids)} {table}? Related records are deleted too.",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+        if reply != QMessageBox.Yes:
+            return
+        deleted = database.execute_for_ids(f"DELETE FROM {table} WHERE id IN ({{ids}})", ids)
+        if deleted is None:
+            QMessageBox.warning(self, "Error", f"Could not delete the selected {table}; nothing was deleted.")
+            return
+        self._after_bulk_write(table, ids, deleted=deleted)
+        self.ui.statusbar.showMessage(f"{deleted} {table} deleted.")
+
+    def _row_action_handler(self, edit, delete):
+        """Build the ActionsDelegate callback dispatching Edit/Delete clicks to the given methods."""
+        def _handle(action, record):
+            record_id = (record or {}).get("id")
+            if record_id is None:
+                return
+            if action == "edit":
+                edit(record_id)
+            elif action == "delete":
+                delete(record_id)
+        return _handle
+
     def _connect_signals(self):
         """Connect all signals to slots (ensure every clickable widget is connected)."""
         # Main header buttons
@@ -153,6 +611,12 @@ class AdminDashboardView(BaseDashboardView):
             self.ui.actionExit.triggered.connect(self.close)
         except Exception:
             pass
+        try:
+            self.ui.actionImportCsv = QAction("Import CSV...", self)
+            self.ui.menuFile.insertAction(self.ui.actionExit, self.ui.actionImportCsv)
+            self.ui.actionImportCsv.triggered.connect(self.import_csv)
+        except Exception:
+            pass
 
         # Users toolbar
         try:
@@ -308,85 +772,52 @@ class AdminDashboardView(BaseDashboardView):
             pass
 
     def refresh_data(self):
-        """Refresh all data in the dashboard."""
-        self.load_users()
-        self.load_courses()
-        self.load_schedules()
-        self.load_payments()
-        # load messaging data
-        try:
-            self.load_conversations()
-        except Exception:
-            pass
+        """
+        Bring the tables up to date cheaply.
+
+        Each loaded table is probed first (row count and MAX(updated_at), see
+        app.utils.change_probe) on a worker thread: unchanged tables are
+        skipped, changed ones get only their changed rows patched in, and
+        tables with deletions (or a changed joined table) are reloaded, now if
+        visible or on next view.
+        """
+        for table, page in self._table_pages.items():
+            if not self.tabs.is_stale(page):  # stale tables load in full when shown
+                self._refresh_table(table)
+        self.tabs.mark_stale(self.ui.messagesTab, self.ui.overviewTab)
+        if not self._refresh_timer.isActive():
+            self._refresh_timer.start()
+
+    def _load_chats(self):
+        """Load the conversation list when the shared messaging UI is attached."""
+        if hasattr(self.ui, 'populate_chats'):
+            self.ui.populate_chats()
         
     def load_users(self):
         """Load users into the users table."""
-        # Get users with proper columns
+        self._load_table("users")
+
+    def _users_query(self):
+        """Build the users query from the type filter and search box (prefix match on indexed columns)."""
         query = """
             SELECT u.id, u.username, u.first_name, u.last_name, 
                    u.email, u.user_type, u.active 
             FROM users u
         """
+        where, params = [], []
         if self.ui.userTypeFilter.currentIndex() > 0:
-            query += " WHERE u.user_type = %s"
-            params = (self.ui.userTypeFilter.currentText().lower(),)
-        else:
-            params = ()
-
-        users = database.execute_query(query, params, fetch=True) or []  # normalize None -> []
-
-        # Clear and populate table
-        self.ui.usersTable.setRowCount(0)
-        
-        search_text = (self.ui.userSearchInput.text() or "").lower()
-        row = 0
-        for user in users:
-            # Apply search filter
-            if search_text and not (
-                search_text in user['username'].lower() or
-                search_text in user['first_name'].lower() or
-                search_text in user['last_name'].lower() or
-                search_text in user['email'].lower()
-            ):
-                continue
-                
-            self.ui.usersTable.insertRow(row)
-            
-            # Add user data
-            self.ui.usersTable.setItem(row, 0, QTableWidgetItem(str(user['id'])))
-            self.ui.usersTable.setItem(row, 1, QTableWidgetItem(user['username']))
-            self.ui.usersTable.setItem(row, 2, QTableWidgetItem(user['first_name']))
-            self.ui.usersTable.setItem(row, 3, QTableWidgetItem(user['last_name']))
-            self.ui.usersTable.setItem(row, 4, QTableWidgetItem(user['email']))
-            self.ui.usersTable.setItem(row, 5, QTableWidgetItem(user['user_type']))
-            self.ui.usersTable.setItem(row, 6, QTableWidgetItem("Yes" if user['active'] else "No"))
-            
-            # Add edit and delete buttons
-            edit_button = QPushButton("Edit")
-            edit_button.setProperty("user_id", user['id'])
-            edit_button.clicked.connect(lambda checked, uid=user['id']: self.edit_user(uid))
-            
-            delete_button = QPushButton("Delete")
-            delete_button.setProperty("user_id", user['id'])
-            delete_button.clicked.connect(lambda checked, uid=user['id']: self.delete_user(uid))
-            
-            # Create a widget to hold the buttons
-            actions_widget = QWidget()
-            actions_layout = QHBoxLayout(actions_widget)
-            actions_layout.addWidget(edit_button)
-            actions_layout.addWidget(delete_button)
-            actions_layout.setContentsMargins(0, 0, 0, 0)
-            
-            self.ui.usersTable.setCellWidget(row, 7, actions_widget)
-            
-            row += 1
-            
-        # Resize columns to content
-        self.ui.usersTable.resizeColumnsToContents()
+            where.append("u.user_type = %s")
+            params.append(self.ui.userTypeFilter.currentText().lower())
+        search_sql, search_params = database.build_prefix_search(
+            ["u.username", "u.first_name", "u.last_name", "u.email"], self.ui.userSearchInput.text())
+        if search_sql:
+            where.append(search_sql)
+            params.extend(search_params)
+        return query, where, params
         
     def filter_users(self):
-        """Filter users based on search text and user type filter."""
-        self.load_users()
+        """Filter users based on search text and user type filter (debounced)."""
+        self.users_filter.trigger()
         
     def add_user(self):
         """Open dialog to add a new user."""
@@ -501,10 +932,10 @@ class AdminDashboardView(BaseDashboardView):
                 VALUES (%s, %s, %s, %s, %s, %s, %s)
             """
             params = (username, password, first_name, last_name, email, user_type, active)
-            database.execute_query(query, params, commit=True)
+            user_id = database.execute_insert(query, params)
             
-            # Refresh users table
-            self.load_users()
+            # Show the new row
+            self._patch_row("users", user_id)
             
             # Show success message
             self.ui.statusbar.showMessage(f"User {username} added successfully.")
@@ -642,8 +1073,8 @@ class AdminDashboardView(BaseDashboardView):
             # Execute the update
             database.execute_query(query, params, commit=True)
             
-            # Refresh users table
-            self.load_users()
+            # Refresh the edited row
+            self._patch_row("users", user_id)
             
             # Show success message
             self.ui.statusbar.showMessage(f"User {user_id} updated successfully.")
@@ -672,98 +1103,42 @@ class AdminDashboardView(BaseDashboardView):
             # Delete user - this will also delete related records due to foreign key constraints
             query = "DELETE FROM users WHERE id = %s"
             params = (user_id,)
-            database.execute_query(query, params, commit=True)
+            deleted = database.execute_query(query, params, commit=True)
             
-            # Refresh users table
-            self.load_users()
+            # Remove the row from the users table
+            self._remove_row("users", user_id, deleted)
             
             # Show success message
             self.ui.statusbar.showMessage(f"User '{user['username']}' deleted successfully.")
             
     def load_courses(self):
         """Load courses into the courses table."""
-        # Clear the table
-        self.ui.coursesTable.setRowCount(0)
-        
-        # Get search text and filters
-        search_text = (self.ui.courseSearchInput.text() or "").lower()
-        language_index = self.ui.languageFilter.currentIndex()
-        language_filter = self.ui.languageFilter.currentText() if language_index > 0 else None
-        level_index = self.ui.levelFilter.currentIndex()
-        level_filter = self.ui.levelFilter.currentText() if level_index > 0 else None
-        
-        # Get courses
+        self._load_table("courses")
+
+    def _courses_query(self):
+        """Build the courses query from the language/level filters and the name search."""
         query = """
             SELECT c.id, c.name, c.language, c.level, c.description, c.price, c.active,
                    u.first_name, u.last_name
             FROM courses c
             JOIN users u ON c.teacher_id = u.id
         """
-        params = ()
-        
-        # Apply filters
-        where_clauses = []
-        
-        if language_filter:
-            where_clauses.append("c.language = %s")
-            params = params + (language_filter,)
-            
-        if level_filter:
-            where_clauses.append("c.level = %s")
-            params = params + (level_filter,)
-            
-        if where_clauses:
-            query += " WHERE " + " AND ".join(where_clauses)
-            
-        courses = database.execute_query(query, params, fetch=True) or []  # normalize None -> []
-        
-        # Populate the table
-        row = 0
-        for course in courses:
-            # Apply search filter
-            if search_text and not (
-                search_text in course['name'].lower() or
-                search_text in course['description'].lower()
-            ):
-                continue
-                
-            self.ui.coursesTable.insertRow(row)
-            
-            # Add course data
-            self.ui.coursesTable.setItem(row, 0, QTableWidgetItem(str(course['id'])))
-            self.ui.coursesTable.setItem(row, 1, QTableWidgetItem(course['name']))
-            self.ui.coursesTable.setItem(row, 2, QTableWidgetItem(course['language']))
-            self.ui.coursesTable.setItem(row, 3, QTableWidgetItem(course['level']))
-            self.ui.coursesTable.setItem(row, 4, QTableWidgetItem(f"{course['first_name']} {course['last_name']}"))
-            self.ui.coursesTable.setItem(row, 5, QTableWidgetItem(f"${course['price']:.2f}"))
-            self.ui.coursesTable.setItem(row, 6, QTableWidgetItem("Yes" if course['active'] else "No"))
-            
-            # Add edit and delete buttons
-            edit_button = QPushButton("Edit")
-            edit_button.setProperty("course_id", course['id'])
-            edit_button.clicked.connect(lambda checked, cid=course['id']: self.edit_course(cid))
-            
-            delete_button = QPushButton("Delete")
-            delete_button.setProperty("course_id", course['id'])
-            delete_button.clicked.connect(lambda checked, cid=course['id']: self.delete_course(cid))
-            
-            # Create a widget to hold the buttons
-            actions_widget = QWidget()
-            actions_layout = QHBoxLayout(actions_widget)
-            actions_layout.addWidget(edit_button)
-            actions_layout.addWidget(delete_button)
-            actions_layout.setContentsMargins(0, 0, 0, 0)
-            
-            self.ui.coursesTable.setCellWidget(row, 7, actions_widget)
-            
-            row += 1
-            
-        # Resize columns to content
-        self.ui.coursesTable.resizeColumnsToContents()
+        where, params = [], []
+        if self.ui.languageFilter.currentIndex() > 0:
+            where.append("c.language = %s")
+            params.append(self.ui.languageFilter.currentText())
+        if self.ui.levelFilter.currentIndex() > 0:
+            where.append("c.level = %s")
+            params.append(self.ui.levelFilter.currentText())
+        search_sql, search_params = database.build_prefix_search(["c.name"], self.ui.courseSearchInput.text())
+        if search_sql:
+            where.append(search_sql)
+            params.extend(search_params)
+        return query, where, params
         
     def filter_courses(self):
-        """Filter courses based on search text and filters."""
-        self.load_courses()
+        """Filter courses based on search text and filters (debounced)."""
+        self.courses_filter.trigger()
         
     def add_course(self):
         """Open dialog to add a new course."""
@@ -838,17 +1213,8 @@ class AdminDashboardView(BaseDashboardView):
         teacher_label = QLabel("Teacher:")
         teacher_combo = QComboBox()
         
-        # Get teachers
-        query = """
-            SELECT id, first_name, last_name
-            FROM users
-            WHERE user_type = 'teacher' AND active = 1
-            ORDER BY last_name, first_name
-        """
-        teachers = database.execute_query(query, fetch=True) or []  # normalize None -> []
-        
-        for teacher in teachers:
-            teacher_combo.addItem(f"{teacher['first_name']} {teacher['last_name']}", teacher['id'])
+        # Teachers from the shared reference cache, with type-ahead
+        attach_reference_combo(teacher_combo, reference_data()["teachers"])
             
         teacher_layout.addWidget(teacher_label)
         teacher_layout.addWidget(teacher_combo)
@@ -868,7 +1234,7 @@ class AdminDashboardView(BaseDashboardView):
         
         # Add buttons
         buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
-        buttons.accepted.connect(dialog.accept)
+        buttons.accepted.connect(accept_when_resolved(dialog, teacher_combo))
         buttons.rejected.connect(dialog.reject)
         layout.addWidget(buttons)
         
@@ -901,10 +1267,10 @@ class AdminDashboardView(BaseDashboardView):
                 VALUES (%s, %s, %s, %s, %s, %s, %s)
             """
             params = (name, language, level, description, price, teacher_id, active)
-            database.execute_query(query, params, commit=True)
+            course_id = database.execute_insert(query, params)
             
-            # Refresh courses table
-            self.load_courses()
+            # Show the new row
+            self._patch_row("courses", course_id)
             
             # Show success message
             self.ui.statusbar.showMessage(f"Course {name} added successfully.")
@@ -1010,23 +1376,8 @@ class AdminDashboardView(BaseDashboardView):
         teacher_label = QLabel("Teacher:")
         teacher_combo = QComboBox()
         
-        # Get teachers
-        query = """
-            SELECT id, first_name, last_name
-            FROM users
-            WHERE user_type = 'teacher' AND active = 1
-            ORDER BY last_name, first_name
-        """
-        teachers = database.execute_query(query, fetch=True) or []  # normalize None -> []
-        
-        for teacher in teachers:
-            teacher_combo.addItem(f"{teacher['first_name']} {teacher['last_name']}", teacher['id'])
-            
-        # Set current teacher
-        for i in range(teacher_combo.count()):
-            if teacher_combo.itemData(i) == course['teacher_id']:
-                teacher_combo.setCurrentIndex(i)
-                break
+        # Teachers from the shared reference cache, with type-ahead
+        attach_reference_combo(teacher_combo, reference_data()["teachers"], current_id=course['teacher_id'])
                 
         teacher_layout.addWidget(teacher_label)
         teacher_layout.addWidget(teacher_combo)
@@ -1050,7 +1401,7 @@ class AdminDashboardView(BaseDashboardView):
         
         # Add buttons
         buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
-        buttons.accepted.connect(dialog.accept)
+        buttons.accepted.connect(accept_when_resolved(dialog, teacher_combo))
         buttons.rejected.connect(dialog.reject)
         layout.addWidget(buttons)
         
@@ -1086,8 +1437,8 @@ class AdminDashboardView(BaseDashboardView):
             params = (name, language, level, description, price, teacher_id, active, course_id)
             database.execute_query(query, params, commit=True)
             
-            # Refresh courses table
-            self.load_courses()
+            # Refresh the edited row
+            self._patch_row("courses", course_id)
             
             # Show success message
             self.ui.statusbar.showMessage(f"Course {name} updated successfully.")
@@ -1116,31 +1467,24 @@ class AdminDashboardView(BaseDashboardView):
             # Delete course - this will also delete related records due to foreign key constraints
             query = "DELETE FROM courses WHERE id = %s"
             params = (course_id,)
-            database.execute_query(query, params, commit=True)
+            deleted = database.execute_query(query, params, commit=True)
             
-            # Refresh courses table
-            self.load_courses()
+            # Remove the row from the courses table
+            self._remove_row("courses", course_id, deleted)
             
             # Show success message
             self.ui.statusbar.showMessage(f"Course '{course['name']}' deleted successfully.")
             
     def load_schedules(self):
         """Load schedules into the schedules table."""
-        # Clear the table
-        try:
-            self.ui.schedulesTable.setRowCount(0)
-        except Exception:
-            pass
-        
-        # Get selected course (defensive)
-        try:
-            course_id = self.ui.courseFilter.currentData()
-        except Exception:
-            course_id = None
-        
+        self._load_table("schedules")
+
+    def _schedules_query(self):
+        """Build the schedules query from the course and day filters."""
         # Use columns that exist in DB: day_of_week and room
         query = """
             SELECT s.id,
+                   s.course_id,
                    s.day_of_week AS date,
                    s.start_time,
                    s.end_time,
@@ -1153,81 +1497,26 @@ class AdminDashboardView(BaseDashboardView):
             JOIN courses c ON s.course_id = c.id
             LEFT JOIN users u ON c.teacher_id = u.id
         """
-        params = ()
-        if course_id and course_id != -1:
-            query += " WHERE s.course_id = %s"
-            params = (course_id,)
-        
+        where, params = [], []
         try:
-            schedules = database.execute_query(query, params, fetch=True) or []
+            course_id = self.ui.courseFilter.currentData()
         except Exception:
-            schedules = []
-        
-        # Populate the table safely
-        row = 0
-        for schedule in schedules:
-            try:
-                self.ui.schedulesTable.insertRow(row)
-                # schedule['date'] is now day_of_week string (e.g. 'Monday')
-                sid = schedule.get('id') if isinstance(schedule, dict) else schedule[0]
-                day = schedule.get('date') if isinstance(schedule, dict) else schedule[1]
-                start_val = schedule.get('start_time') if isinstance(schedule, dict) else schedule[2]
-                end_val = schedule.get('end_time') if isinstance(schedule, dict) else schedule[3]
-                location = schedule.get('location') if isinstance(schedule, dict) else schedule[4]
-                notes = schedule.get('notes') if isinstance(schedule, dict) else schedule[5]
-                course_name = schedule.get('course_name') if isinstance(schedule, dict) else schedule[6]
-                first = schedule.get('first_name') if isinstance(schedule, dict) else schedule[7]
-                last = schedule.get('last_name') if isinstance(schedule, dict) else (schedule[8] if len(schedule) > 8 else "")
-
-                # Format start/end safely
-                try:
-                    start_str = start_val.strftime("%H:%M") if hasattr(start_val, "strftime") else str(start_val or "")
-                except Exception:
-                    start_str = str(start_val or "")
-                try:
-                    end_str = end_val.strftime("%H:%M") if hasattr(end_val, "strftime") else str(end_val or "")
-                except Exception:
-                    end_str = str(end_val or "")
-
-                self.ui.schedulesTable.setItem(row, 0, QTableWidgetItem(str(sid)))
-                # display day_of_week in "Date" column (keeps UI unchanged)
-                self.ui.schedulesTable.setItem(row, 1, QTableWidgetItem(str(day or "")))
-                self.ui.schedulesTable.setItem(row, 2, QTableWidgetItem(start_str))
-                self.ui.schedulesTable.setItem(row, 3, QTableWidgetItem(end_str))
-                self.ui.schedulesTable.setItem(row, 4, QTableWidgetItem(str(location or "")))
-                self.ui.schedulesTable.setItem(row, 5, QTableWidgetItem(str(notes or "")))
-                self.ui.schedulesTable.setItem(row, 6, QTableWidgetItem(str(course_name or "")))
-                self.ui.schedulesTable.setItem(row, 7, QTableWidgetItem(f"{first or ''} {last or ''}".strip()))
-                
-                # Actions
-                edit_button = QPushButton("Edit")
-                edit_button.setProperty("schedule_id", sid)
-                edit_button.clicked.connect(lambda checked, sid=sid: self.edit_schedule(sid))
-                delete_button = QPushButton("Delete")
-                delete_button.setProperty("schedule_id", sid)
-                delete_button.clicked.connect(lambda checked, sid=sid: self.delete_schedule(sid))
-                actions_widget = QWidget()
-                actions_layout = QHBoxLayout(actions_widget)
-                actions_layout.addWidget(edit_button)
-                actions_layout.addWidget(delete_button)
-                actions_layout.setContentsMargins(0,0,0,0)
-                try:
-                    self.ui.schedulesTable.setCellWidget(row, 8 if self.ui.schedulesTable.columnCount() <= 8 else self.ui.schedulesTable.columnCount()-1, actions_widget)
-                except Exception:
-                    # best-effort
-                    try:
-                        self.ui.schedulesTable.setCellWidget(row, 7, actions_widget)
-                    except Exception:
-                        pass
-
-                row += 1
-            except Exception:
-                continue
-
+            course_id = None
+        if course_id and course_id != -1:
+            where.append("s.course_id = %s")
+            params.append(course_id)
         try:
-            self.ui.schedulesTable.resizeColumnsToContents()
+            day = self.ui.dayFilter.currentData() if self.ui.dayFilter.currentIndex() > 0 else None
         except Exception:
-            pass
+            day = None
+        if day:
+            where.append("s.day_of_week = %s")
+            params.append(day)
+        return query, where, params
+
+    def filter_schedules(self):
+        """Filter schedules by the selected course and day (debounced)."""
+        self.schedules_filter.trigger()
 
     def add_schedule(self):
         """Open dialog to add a new schedule."""
@@ -1273,6 +1562,7 @@ class AdminDashboardView(BaseDashboardView):
         location_layout = QHBoxLayout()
         location_label = QLabel("Room:")
         location_input = QLineEdit()
+        attach_reference_completer(location_input, reference_data()["rooms"])
         location_layout.addWidget(location_label)
         location_layout.addWidget(location_input)
         form_layout.addLayout(location_layout)
@@ -1290,38 +1580,22 @@ class AdminDashboardView(BaseDashboardView):
         course_label = QLabel("Course:")
         course_combo = QComboBox()
         
-        # Get courses
-        query = """
-            SELECT id, name
-            FROM courses
-            WHERE active = 1
-            ORDER BY name
-        """
-        courses = database.execute_query(query, fetch=True) or []  # normalize None -> []
-        
-        for course in courses:
-            course_combo.addItem(course['name'], course['id'])
+        # Courses from the shared reference cache, with type-ahead
+        attach_reference_combo(course_combo, reference_data()["courses"])
             
         course_layout.addWidget(course_label)
         course_layout.addWidget(course_combo)
         form_layout.addLayout(course_layout)
         
         # Teacher (optional, for admin)
+        teacher_combo = None
         if self.user.user_type == 'admin':
             teacher_layout = QHBoxLayout()
             teacher_label = QLabel("Teacher:")
             teacher_combo = QComboBox()
             
-            # Get active teachers
-            query = """
-                SELECT id, first_name, last_name
-                FROM users
-                WHERE user_type = 'teacher' AND active = 1
-                ORDER BY last_name, first_name
-            """
-            teachers = database.execute_query(query, fetch=True) or []  # normalize None -> []
-            for teacher in teachers:
-                teacher_combo.addItem(f"{teacher['first_name']} {teacher['last_name']}", teacher['id'])
+            # Teachers from the shared reference cache, with type-ahead
+            attach_reference_combo(teacher_combo, reference_data()["teachers"])
                 
             teacher_layout.addWidget(teacher_label)
             teacher_layout.addWidget(teacher_combo)
@@ -1341,7 +1615,7 @@ class AdminDashboardView(BaseDashboardView):
         
         # Add buttons
         buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
-        buttons.accepted.connect(dialog.accept)
+        buttons.accepted.connect(accept_when_resolved(dialog, course_combo, teacher_combo))
         buttons.rejected.connect(dialog.reject)
         layout.addWidget(buttons)
         
@@ -1364,8 +1638,8 @@ class AdminDashboardView(BaseDashboardView):
                 VALUES (%s, %s, %s, %s, %s)
             """
             params = (course_id, day_of_week, start_time, end_time, room)
-            database.execute_query(query, params, commit=True)
-            self.load_schedules()
+            schedule_id = database.execute_insert(query, params)
+            self._patch_row("schedules", schedule_id)
             self.ui.statusbar.showMessage("Schedule added successfully.")
 
     def edit_schedule(self, schedule_id):
@@ -1441,6 +1715,7 @@ class AdminDashboardView(BaseDashboardView):
         location_layout = QHBoxLayout()
         location_label = QLabel("Location:")
         location_input = QLineEdit()
+        attach_reference_completer(location_input, reference_data()["rooms"])
         location_input.setText(schedule.get('location') or "")
         location_layout.addWidget(location_label)
         location_layout.addWidget(location_input)
@@ -1460,56 +1735,23 @@ class AdminDashboardView(BaseDashboardView):
         course_label = QLabel("Course:")
         course_combo = QComboBox()
         
-        # Get courses
-        query = """
-            SELECT id, name
-            FROM courses
-            WHERE active = 1
-            ORDER BY name
-        """
-        courses = database.execute_query(query, fetch=True) or []  # normalize None -> []
-        
-        for course in courses:
-            course_combo.addItem(course['name'], course['id'])
-            
-        # Set current course
-        try:
-            idx = course_combo.findData(schedule['course_id'])
-            if idx >= 0:
-                course_combo.setCurrentIndex(idx)
-        except Exception:
-            pass
+        # Courses from the shared reference cache, with type-ahead
+        attach_reference_combo(course_combo, reference_data()["courses"], current_id=schedule.get('course_id'))
         
         course_layout.addWidget(course_label)
         course_layout.addWidget(course_combo)
         form_layout.addLayout(course_layout)
         
         # Teacher (optional, for admin)
+        teacher_combo = None
         if self.user.user_type == 'admin':
             teacher_layout = QHBoxLayout()
             teacher_label = QLabel("Teacher:")
             teacher_combo = QComboBox()
             
-            # Get active teachers
-            query = """
-                SELECT id, first_name, last_name
-                FROM users
-                WHERE user_type = 'teacher' AND active = 1
-                ORDER BY last_name, first_name
-            """
-            teachers = database.execute_query(query, fetch=True) or []  # normalize None -> []
-            
-            for teacher in teachers:
-                teacher_combo.addItem(f"{teacher['first_name']} {teacher['last_name']}", teacher['id'])
-                
-            # Set current teacher (if applicable)
-            try:
-                tval = schedule.get('teacher_id')
-                idx = teacher_combo.findData(tval)
-                if idx >= 0:
-                    teacher_combo.setCurrentIndex(idx)
-            except Exception:
-                pass
+            # Teachers from the shared reference cache, with type-ahead
+            attach_reference_combo(teacher_combo, reference_data()["teachers"],
+                                   current_id=schedule.get('teacher_id'))
             
             teacher_layout.addWidget(teacher_label)
             teacher_layout.addWidget(teacher_combo)
@@ -1533,7 +1775,7 @@ class AdminDashboardView(BaseDashboardView):
         
         # Add buttons
         buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
-        buttons.accepted.connect(dialog.accept)
+        buttons.accepted.connect(accept_when_resolved(dialog, course_combo, teacher_combo))
         buttons.rejected.connect(dialog.reject)
         layout.addWidget(buttons)
         
@@ -1556,7 +1798,7 @@ class AdminDashboardView(BaseDashboardView):
             """
             params = (day_of_week, start_time, end_time, room, course_id, schedule_id)
             database.execute_query(query, params, commit=True)
-            self.load_schedules()
+            self._patch_row("schedules", schedule_id)
             self.ui.statusbar.showMessage("Schedule updated successfully.")
     
     def delete_schedule(self, schedule_id):
@@ -1583,75 +1825,69 @@ class AdminDashboardView(BaseDashboardView):
             # Delete schedule
             query = "DELETE FROM schedules WHERE id = %s"
             params = (schedule_id,)
-            database.execute_query(query, params, commit=True)
+            deleted = database.execute_query(query, params, commit=True)
             
-            # Refresh schedules table
-            self.load_schedules()
+            # Remove the row from the schedules table
+            self._remove_row("schedules", schedule_id, deleted)
             
             # Show success message
             self.ui.statusbar.showMessage("Schedule deleted successfully.")
             
     def load_payments(self):
         """Load payments into the payments table."""
-        # Clear the table
-        try:
-            self.ui.paymentsTable.setRowCount(0)
-        except Exception:
-            pass
+        self._load_table("payments")
 
+    def _payments_query(self):
+        """Build the payments query from the status filter and the student/course search."""
         query = """
             SELECT p.id, p.amount, p.payment_date AS date, p.status, u.first_name, u.last_name, c.name as course_name
             FROM payments p
             JOIN users u ON p.student_id = u.id
             JOIN courses c ON p.course_id = c.id
         """
-        try:
-            payments = database.execute_query(query, (), fetch=True) or []
-        except Exception:
-            payments = []
+        where, params = [], []
+        if self.ui.paymentStatusFilter.currentIndex() > 0:
+            where.append("p.status = %s")
+            params.append(self.ui.paymentStatusFilter.currentText().lower())
+        search_sql, search_params = database.build_prefix_search(
+            ["u.first_name", "u.last_name", "c.name"], self.ui.paymentSearchInput.text())
+        if search_sql:
+            where.append(search_sql)
+            params.extend(search_params)
+        return query, where, params
+
+    def filter_payments(self):
+        """Filter payments by search text (student / course) and status (debounced)."""
+        self.payments_filter.trigger()
+
+    def delete_payment(self, payment_id):
+        """Delete a payment."""
+        query = """
+            SELECT p.id, p.amount, u.first_name, u.last_name
+            FROM payments p
+            JOIN users u ON p.student_id = u.id
+            WHERE p.id = %s
+        """
+        result = database.execute_query(query, (payment_id,), fetch=True)
+        payment = result[0] if result and len(result) > 0 else None
 
-        row = 0
-        for payment in payments:
-            try:
-                self.ui.paymentsTable.insertRow(row)
-                # date may be datetime.date - format safely
-                date_val = payment.get('date') if isinstance(payment, dict) else (payment[2] if len(payment) > 2 else None)
-                try:
-                    date_str = date_val.strftime("%Y-%m-%d") if hasattr(date_val, "strftime") else str(date_val or "")
-                except Exception:
-                    date_str = str(date_val or "")
-
-                self.ui.paymentsTable.setItem(row, 0, QTableWidgetItem(str(payment['id'])))
-                self.ui.paymentsTable.setItem(row, 1, QTableWidgetItem(f"${payment['amount']:.2f}"))
-                self.ui.paymentsTable.setItem(row, 2, QTableWidgetItem(date_str))
-                self.ui.paymentsTable.setItem(row, 3, QTableWidgetItem(payment['status']))
-                self.ui.paymentsTable.setItem(row, 4, QTableWidgetItem(f"{payment['first_name']} {payment['last_name']}"))
-                self.ui.paymentsTable.setItem(row, 5, QTableWidgetItem(payment['course_name']))
-
-                edit_button = QPushButton("Edit")
-                edit_button.setProperty("payment_id", payment['id'])
-                edit_button.clicked.connect(lambda checked, pid=payment['id']: self.edit_payment(pid))
-                delete_button = QPushButton("Delete")
-                delete_button.setProperty("payment_id", payment['id'])
-                delete_button.clicked.connect(lambda checked, pid=payment['id']: self.delete_payment(pid))
-                actions_widget = QWidget()
-                actions_layout = QHBoxLayout(actions_widget)
-                actions_layout.addWidget(edit_button)
-                actions_layout.addWidget(delete_button)
-                actions_layout.setContentsMargins(0,0,0,0)
-                try:
-                    self.ui.paymentsTable.setCellWidget(row, 6, actions_widget)
-                except Exception:
-                    pass
+        if not payment:
+            QMessageBox.warning(self, "Error", "Payment not found.")
+            return
 
-                row += 1
-            except Exception:
-                continue
+        # Confirm deletion
+        reply = QMessageBox.question(
+            self, "Confirm Deletion",
+            f"Are you sure you want to delete the payment of ${payment['amount']:.2f} "
+            f"from {payment['first_name']} {payment['last_name']}?",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
 
-        try:
-            self.ui.paymentsTable.resizeColumnsToContents()
-        except Exception:
-            pass
+        if reply == QMessageBox.Yes:
+            deleted = database.execute_query("DELETE FROM payments WHERE id = %s", (payment_id,), commit=True)
+            self._remove_row("payments", payment_id, deleted)
+            self.ui.statusbar.showMessage("Payment deleted successfully.")
 
     def add_payment(self):
         """Open dialog to add a new payment."""
@@ -1700,17 +1936,8 @@ class AdminDashboardView(BaseDashboardView):
         student_label = QLabel("Student:")
         student_combo = QComboBox()
         
-        # Get students
-        query = """
-            SELECT id, first_name, last_name
-            FROM users
-            WHERE user_type = 'student' AND active = 1
-            ORDER BY last_name, first_name
-        """
-        students = database.execute_query(query, fetch=True) or []  # normalize None -> []
-        
-        for student in students:
-            student_combo.addItem(f"{student['first_name']} {student['last_name']}", student['id'])
+        # Students from the shared reference cache, with type-ahead
+        attach_reference_combo(student_combo, reference_data()["students"])
             
         student_layout.addWidget(student_label)
         student_layout.addWidget(student_combo)
@@ -1721,17 +1948,8 @@ class AdminDashboardView(BaseDashboardView):
         course_label = QLabel("Course:")
         course_combo = QComboBox()
         
-        # Get courses
-        query = """
-            SELECT id, name
-            FROM courses
-            WHERE active = 1
-            ORDER BY name
-        """
-        courses = database.execute_query(query, fetch=True) or []  # normalize None -> []
-        
-        for course in courses:
-            course_combo.addItem(course['name'], course['id'])
+        # Courses from the shared reference cache, with type-ahead
+        attach_reference_combo(course_combo, reference_data()["courses"])
             
         course_layout.addWidget(course_label)
         course_layout.addWidget(course_combo)
@@ -1741,7 +1959,7 @@ class AdminDashboardView(BaseDashboardView):
         
         # Add buttons
         buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
-        buttons.accepted.connect(dialog.accept)
+        buttons.accepted.connect(accept_when_resolved(dialog, student_combo, course_combo))
         buttons.rejected.connect(dialog.reject)
         layout.addWidget(buttons)
         
@@ -1763,8 +1981,8 @@ class AdminDashboardView(BaseDashboardView):
                 VALUES (%s, %s, %s, %s, %s)
             """
             params = (amount, payment_date, status, student_id, course_id)
-            database.execute_query(query, params, commit=True)
-            self.load_payments()
+            payment_id = database.execute_insert(query, params)
+            self._patch_row("payments", payment_id)
             self.ui.statusbar.showMessage("Payment added successfully.")
 
     def edit_payment(self, payment_id):
@@ -1836,25 +2054,8 @@ class AdminDashboardView(BaseDashboardView):
         student_label = QLabel("Student:")
         student_combo = QComboBox()
         
-        # Get students
-        query = """
-            SELECT id, first_name, last_name
-            FROM users
-            WHERE user_type = 'student' AND active = 1
-            ORDER BY last_name, first_name
-        """
-        students = database.execute_query(query, fetch=True) or []  # normalize None -> []
-        
-        for student in students:
-            student_combo.addItem(f"{student['first_name']} {student['last_name']}", student['id'])
-            
-        # Set current student
-        try:
-            idx = student_combo.findData(payment['student_id'])
-            if idx >= 0:
-                student_combo.setCurrentIndex(idx)
-        except Exception:
-            pass
+        # Students from the shared reference cache, with type-ahead
+        attach_reference_combo(student_combo, reference_data()["students"], current_id=payment.get('student_id'))
         
         student_layout.addWidget(student_label)
         student_layout.addWidget(student_combo)
@@ -1865,25 +2066,8 @@ class AdminDashboardView(BaseDashboardView):
         course_label = QLabel("Course:")
         course_combo = QComboBox()
         
-        # Get courses
-        query = """
-            SELECT id, name
-            FROM courses
-            WHERE active = 1
-            ORDER BY name
-        """
-        courses = database.execute_query(query, fetch=True) or []  # normalize None -> []
-        
-        for course in courses:
-            course_combo.addItem(course['name'], course['id'])
-            
-        # Set current course
-        try:
-            idx = course_combo.findData(payment['course_id'])
-            if idx >= 0:
-                course_combo.setCurrentIndex(idx)
-        except Exception:
-            pass
+        # Courses from the shared reference cache, with type-ahead
+        attach_reference_combo(course_combo, reference_data()["courses"], current_id=payment.get('course_id'))
         
         course_layout.addWidget(course_label)
         course_layout.addWidget(course_combo)
@@ -1893,7 +2077,7 @@ class AdminDashboardView(BaseDashboardView):
         
         # Add buttons
         buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
-        buttons.accepted.connect(dialog.accept)
+        buttons.accepted.connect(accept_when_resolved(dialog, student_combo, course_combo))
         buttons.rejected.connect(dialog.reject)
         layout.addWidget(buttons)
         
@@ -1917,111 +2101,142 @@ class AdminDashboardView(BaseDashboardView):
             """
             params = (amount, payment_date, status, student_id, course_id, payment_id)
             database.execute_query(query, params, commit=True)
-            self.load_payments()
+            self._patch_row("payments", payment_id)
             self.ui.statusbar.showMessage("Payment updated successfully.")
 
     def generate_report(self):
-        """Generate a report based on the selected criteria."""
-        # Get selected criteria
-        start_date = self.ui.startDateEdit.date().toPyDate()
-        end_date = self.ui.endDateEdit.date().toPyDate()
-        report_type = self.ui.reportTypeCombo.currentData()
-        
-        # Validate dates
-        if not start_date or not end_date:
-            QMessageBox.warning(self, "Validation Error", "Start date and end date are required.")
-            return
-            
-        if start_date > end_date:
-            QMessageBox.warning(self, "Validation Error", "Start date must be before end date.")
+        """Show a preview of the selected report (first rows only) in the Reports tab."""
+        criteria = self._report_criteria()
+        if criteria is None:
             return
-            
-        # Generate report
+        name, start_date, end_date = criteria
+        if self._preview_task is not None:
+            self._preview_task.cancel()  # a newer preview replaces it
+
+        def _job(progress, cancelled):
+            return report_generator.preview_report(name, start_date, end_date)
+
+        def _finished(preview, task):
+            if task is not self._preview_task:
+                return
+            self._preview_task = None
+            if preview is None:
+                QMessageBox.warning(self, "Error", "Failed to generate report.")
+                return
+            self._show_report_preview(*preview)
+
+        task = BackgroundTask(_job, self)
+        task.finished.connect(lambda preview: _finished(preview, task))
+        task.failed.connect(lambda message: QMessageBox.critical(self, "Error", f"Failed to generate report: {message}"))
+        self._preview_task = task
+        self.ui.statusbar.showMessage("Generating report preview...")
+        task.start()
+
+    def _show_report_preview(self, headers, rows):
+        """Fill the Reports table with preview rows."""
+        table = self.ui.reportsTable
+        table.setUpdatesEnabled(False)
         try:
-            if report_type == "user_activity":
-                self.generate_user_activity_report(start_date, end_date)
-            elif report_type == "course_enrollment":
-                self.generate_course_enrollment_report(start_date, end_date)
-            elif report_type == "payment_summary":
-                self.generate_payment_summary_report(start_date, end_date)
+            table.clear()
+            table.setColumnCount(len(headers))
+            table.setHorizontalHeaderLabels(headers)
+            table.setRowCount(len(rows))
+            for r, values in enumerate(rows):
+                for c, value in enumerate(values):
+                    table.setItem(r, c, QTableWidgetItem("" if value is None else str(value)))
+            table.resizeColumnsToContents()
+        finally:
+            table.setUpdatesEnabled(True)
+        more = " (first rows; export for the full report)" if len(rows) >= report_generator.PREVIEW_ROWS else ""
+        self.ui.statusbar.showMessage(f"Showing {len(rows)} rows{more}.")
+
+    def import_csv(self):
+        """Bulk-import users, courses, enrollments or payments from a CSV file."""
+        kinds = {"Users": "users", "Courses": "courses", "Enrollments": "enrollments", "Payments": "payments"}
+        label, ok = QInputDialog.getItem(self, "Import CSV", "Import:", list(kinds), 0, False)
+        if not ok:
+            return
+        path, _ = QFileDialog.getOpenFileName(self, "Import CSV", "", "CSV Files (*.csv)")
+        if not path:
+            return
+        kind = kinds[label]
+
+        def _job(progress, cancelled):
+            return bulk_import.import_csv(kind, path, progress=progress, cancelled=cancelled)
+
+        def _finished(result):
+            self._import_task = None
+            if result.imported:
+                # many rows changed: reload tables and pickers instead of patching
+                reference_data().invalidate()
+                self.tabs.mark_stale()
+            if result.error:
+                QMessageBox.warning(self, "Import CSV", result.summary())
             else:
-                QMessageBox.warning(self, "Validation Error", "Invalid report type.")
-                return
-                
-            QMessageBox.information(self, "Success", "Report generated successfully.")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to generate report: {str(e)}")
-            
-    def generate_user_activity_report(self, start_date, end_date):
-        """Generate user activity report."""
-        query = """
-            SELECT u.id, u.username, u.first_name, u.last_name, u.email, 
-                   COUNT(DISTINCT c.id) as courses_enrolled, 
-                   COUNT(DISTINCT s.id) as schedules_created,
-                   COUNT(DISTINCT p.id) as payments_made
-            FROM users u
-            LEFT JOIN courses c ON u.id = c.teacher_id
-            LEFT JOIN schedules s ON u.id = s.course_id
-            LEFT JOIN payments p ON u.id = p.student_id
-            WHERE u.active = 1 AND u.user_type = 'student'
-              AND p.payment_date BETWEEN %s AND %s
-            GROUP BY u.id
-            ORDER BY u.last_name, u.first_name
-        """
-        params = (start_date, end_date)
-        report_data = database.execute_query(query, params, fetch=True) or []
-        # ...existing code to generate report...
-        report_file = f"user_activity_report_{start_date}_to_{end_date}.xlsx"
-        from app.utils.report_generator import generate_user_activity_report
-        generate_user_activity_report(report_file, report_data)
-
-    def generate_course_enrollment_report(self, start_date, end_date):
-        """Generate course enrollment report."""
-        # Removed schedule date filtering because schedules store day_of_week; keep aggregated data
-        query = """
-            SELECT c.id, c.name, c.language, c.level, c.price, 
-                   COUNT(s.id) as schedules_count, 
-                   COUNT(DISTINCT sc.student_id) as students_enrolled
-            FROM courses c
-            LEFT JOIN schedules s ON c.id = s.course_id
-            LEFT JOIN student_courses sc ON c.id = sc.course_id
-            WHERE c.active = 1
-            GROUP BY c.id
-            ORDER BY c.name
+                QMessageBox.information(self, "Import CSV", result.summary())
+            self.ui.statusbar.showMessage(result.summary())
+
+        self._import_task = run_with_progress(self, f"Importing {label.lower()}", _job, _finished)
+
+    def export_table(self, table):
         """
-        report_data = database.execute_query(query, fetch=True) or []
-        report_file = f"course_enrollment_report_{start_date}_to_{end_date}.xlsx"
-        from app.utils.report_generator import generate_course_enrollment_report
-        generate_course_enrollment_report(report_file, report_data)
+        Stream every row matching a table's current filter and sort to a file on a background worker.
 
-    def generate_payment_summary_report(self, start_date, end_date):
-        """Generate payment summary report."""
-        query = """
-            SELECT u.id, u.username, u.first_name, u.last_name, 
-                   SUM(p.amount) as total_paid, 
-                   COUNT(p.id) as payments_count
-            FROM users u
-            JOIN payments p ON u.id = p.student_id
-            WHERE u.active = 1 AND p.payment_date BETWEEN %s AND %s
-            GROUP BY u.id
-            ORDER BY u.last_name, u.first_name
+        The rows come straight from the database (not just the pages loaded in
+        the table) and are written as the table shows them.
         """
-        params = (start_date, end_date)
-        report_data = database.execute_query(query, params, fetch=True) or []
-        report_file = f"payment_summary_report_{start_date}_to_{end_date}.xlsx"
-        from app.utils.report_generator import generate_payment_summary_report
-        generate_payment_summary_report(report_file, report_data)
+        model, _, _, controller = self._row_sources[table]
+        path = ask_export_path(self, "Export Table", f"{table}.csv")
+        if not path:
+            return
+        sql, params = controller.full_query()
+        headers = model.export_headers()
+
+        def _job(progress, cancelled):
+            return exporter.export_query(path, sql, params, headers=headers, row_values=model.display_values,
+                                         progress=progress, cancelled=cancelled)
+
+        def _finished(result):
+            self._export_task = None
+            if result.error:
+                QMessageBox.warning(self, "Export Table", result.summary())
+            else:
+                QMessageBox.information(self, "Export Table", result.summary())
+            self.ui.statusbar.showMessage(result.summary())
+
+        self._export_task = run_with_progress(self, f"Exporting {table}", _job, _finished)
 
     def export_report(self):
-        """Export the generated report to a file."""
-        # TODO: Implement report export functionality
-        QMessageBox.information(self, "Info", "Report export functionality is not yet implemented.")
+        """Write the selected report to an XLSX, CSV, gzip CSV or JSON Lines file on a background worker."""
+        criteria = self._report_criteria()
+        if criteria is None:
+            return
+        name, start_date, end_date = criteria
+        default = f"{name}_report_{start_date}_to_{end_date}.xlsx"
+        path = ask_export_path(self, "Export Report", default, "Excel Workbook (*.xlsx);;" + EXPORT_FILTERS)
+        if not path:
+            return
+
+        def _job(progress, cancelled):
+            return report_generator.run_report(name, path, start_date, end_date,
+                                               progress=progress, cancelled=cancelled)
+
+        def _finished(result):
+            self._report_task = None
+            if result.error:
+                QMessageBox.warning(self, "Export Report", result.summary())
+            else:
+                QMessageBox.information(self, "Export Report", result.summary())
+            self.ui.statusbar.showMessage(result.summary())
+
+        self._report_task = run_with_progress(self, "Exporting report", _job, _finished)
     
     def handle_logout(self):
         """Handle logout button click."""
         try:
             if hasattr(self, '_messages_timer') and self._messages_timer.isActive():
                 self._messages_timer.stop()
+            self._refresh_timer.stop()
         except Exception:
             pass
 
@@ -16,6 +16,10 @@ from app.ui.generated.student_dashboard_ui import Ui_StudentDashboard
 from app.views.base_dashboard_view import BaseDashboardView
 from app.models.user_model import User
 from app.models.course_model import Course
+from app.ui.common.filter_controller import debounced
+from app.ui.common.refresh_orchestrator import RefreshOrchestrator
+from app.ui.common.tab_loader import TabLoader
+from app.ui.common.table_export import export_table
 from app.utils.database import execute_query, get_connection
 from datetime import datetime, timedelta  # Fixed import to include timedelta
 
@@ -74,7 +78,8 @@ class StudentDashboardView(BaseDashboardView):
         self.ui.makePaymentButton.clicked.connect(self.make_payment)
         
         # Connect filter signals
-        self.ui.courseSearchInput.textChanged.connect(self.filter_courses)
+        # debounce typing: one reload after the user pauses instead of one per keystroke
+        self.ui.courseSearchInput.textChanged.connect(debounced(self.filter_courses, parent=self))
         self.ui.courseFilterComboBox.currentIndexChanged.connect(self.filter_courses)
         self.ui.scheduleFilterComboBox.currentIndexChanged.connect(self.filter_schedule)
         self.ui.scheduleDateEdit.dateChanged.connect(self.filter_schedule)
@@ -85,8 +90,22 @@ class StudentDashboardView(BaseDashboardView):
         self.ui.paymentsStatusFilterComboBox.currentIndexChanged.connect(self.filter_payments)
         self.ui.chatsList.currentItemChanged.connect(self.load_messages)
         
-        # Set current date for schedule
+        # Set current date for schedule (signals blocked: the schedule tab loads on first view)
+        self.ui.scheduleDateEdit.blockSignals(True)
         self.ui.scheduleDateEdit.setDate(QDate.currentDate())
+        self.ui.scheduleDateEdit.blockSignals(False)
+        
+        # Load each tab's data when it is first shown
+        self._setup_dashboard_sections()
+        self.tabs = TabLoader(self.ui.tabWidget, self)
+        self.tabs.register(self.ui.dashboardTab, self.load_dashboard_stats, self.load_course_progress,
+                           self.load_recent_activity)
+        self.tabs.register(self.ui.coursesTab, self.load_courses)
+        self.tabs.register(self.ui.scheduleTab, self.load_course_filter_combos, self.load_schedule)
+        self.tabs.register(self.ui.lessonsTab, self.load_course_filter_combos, self.load_lessons)
+        self.tabs.register(self.ui.gradesTab, self.load_course_filter_combos, self.load_grades)
+        self.tabs.register(self.ui.paymentsTab, self.load_payments)
+        self.tabs.register(self.ui.messagesTab, self.load_chats)
         
         # Initialize data
         self.refresh_data()
@@ -95,92 +114,99 @@ class StudentDashboardView(BaseDashboardView):
         self.ui.statusLabel.setText("Ready")
         
     def refresh_data(self):
-        """Refresh all data in the dashboard."""
-        self.load_dashboard_stats()
-        self.load_course_progress()
-        self.load_recent_activity()
-        self.load_courses()
-        self.load_course_filter_combos()
-        self.load_schedule()
-        self.load_lessons()
-        self.load_grades()
-        self.load_payments()
-        self.load_chats()
-        
+        """Reload the visible tab; the others reload when next shown."""
+        self.tabs.refresh()
+        
+    def _setup_dashboard_sections(self):
+        """Split the dashboard tab into sections that are fetched in parallel."""
+        self.dashboard_refresh = RefreshOrchestrator(parent=self)
+        for name, label, fetch in (
+            ("enrolled_courses", self.ui.enrolledCoursesCountLabel, self._fetch_enrolled_count),
+            ("upcoming_lessons", self.ui.upcomingLessonsCountLabel, self._fetch_upcoming_count),
+            ("pending_exercises", self.ui.pendingExercisesCountLabel, self._fetch_pending_exercises_count),
+            ("unread_messages", self.ui.unreadMessagesCountLabel, self._fetch_unread_count),
+        ):
+            self.dashboard_refresh.add(name, fetch,
+                                       lambda count, label=label: label.setText(str(count or 0)),
+                                       lambda label=label: label.setText("…"))
+        self.dashboard_refresh.add("course_progress", self._fetch_course_progress,
+                                   self._apply_course_progress, self._show_course_progress_placeholder)
+
     def load_dashboard_stats(self):
-        """Load dashboard statistics."""
-        try:
-            # Get enrolled courses count
-            query = "SELECT COUNT(*) as count FROM student_courses WHERE student_id = %s AND active = 1"
-            params = (self.user.user_id,)
-            result = execute_query(query, params=params, fetch=True)
-            enrolled_count = result[0]['count'] if isinstance(result[0], dict) else result[0][0]
-            self.ui.enrolledCoursesCountLabel.setText(str(enrolled_count))
+        """Load dashboard statistics (the four counts are queried concurrently)."""
+        self.dashboard_refresh.run("enrolled_courses", "upcoming_lessons",
+                                   "pending_exercises", "unread_messages")
 
-            # Get total scheduled lessons count for all enrolled courses
-            query = """
-                SELECT COUNT(*) as count
-                FROM schedules s
-                JOIN student_courses sc ON s.course_id = sc.course_id
-                WHERE sc.student_id = %s 
-                AND sc.active = 1
-            """
-            result = execute_query(query, params=params, fetch=True)
-            upcoming_count = result[0]['count'] if isinstance(result[0], dict) else result[0][0]
-            self.ui.upcomingLessonsCountLabel.setText(str(upcoming_count))
+    def _fetch_count(self, query, params):
+        """Run a COUNT(*) AS count query (worker thread). Returns None on error."""
+        result = execute_query(query, params=params, fetch=True)
+        if not result:
+            return None
+        return result[0]['count'] if isinstance(result[0], dict) else result[0][0]
 
-            # Get pending exercises count
-            query = """
-                SELECT COUNT(*) as count 
-                FROM exercises e
-                JOIN lessons l ON e.lesson_id = l.id
-                JOIN student_courses sc ON l.course_id = sc.course_id
-                LEFT JOIN student_exercise_submissions ses 
-                    ON e.id = ses.exercise_id AND ses.student_id = sc.student_id
-                WHERE sc.student_id = %s AND sc.active = 1
-                AND (ses.status IS NULL OR ses.status = 'not_submitted')
-                AND e.due_date >= CURRENT_DATE
-            """
-            result = execute_query(query, params=params, fetch=True)
-            pending_count = result[0]['count'] if isinstance(result[0], dict) else result[0][0]
-            self.ui.pendingExercisesCountLabel.setText(str(pending_count))
+    def _fetch_enrolled_count(self):
+        """Get enrolled courses count."""
+        query = "SELECT COUNT(*) as count FROM student_courses WHERE student_id = %s AND active = 1"
+        return self._fetch_count(query, (self.user.user_id,))
 
-            # Get unread messages count
-            query = """
-                SELECT COUNT(*) as count
-                FROM chat_messages cm
-                JOIN chats c ON cm.chat_id = c.id
-                WHERE (c.user1_id = %s OR c.user2_id = %s)
-                AND cm.sender_id != %s 
-                AND cm.read_status = 0
-            """
-            params = (self.user.user_id, self.user.user_id, self.user.user_id)
-            result = execute_query(query, params=params, fetch=True)
-            unread_count = result[0]['count'] if isinstance(result[0], dict) else result[0][0]
-            self.ui.unreadMessagesCountLabel.setText(str(unread_count))
+    def _fetch_upcoming_count(self):
+        """Get total scheduled lessons count for all enrolled courses."""
+        query = """
+            SELECT COUNT(*) as count
+            FROM schedules s
+            JOIN student_courses sc ON s.course_id = sc.course_id
+            WHERE sc.student_id = %s 
+            AND sc.active = 1
+        """
+        return self._fetch_count(query, (self.user.user_id,))
 
-        except Exception as e:
-            print(f"Error loading dashboard stats: {str(e)}")
-            # Set default values on error
-            self.ui.enrolledCoursesCountLabel.setText("0")
-            self.ui.upcomingLessonsCountLabel.setText("0")
-            self.ui.pendingExercisesCountLabel.setText("0") 
-            self.ui.unreadMessagesCountLabel.setText("0")
+    def _fetch_pending_exercises_count(self):
+        """Get pending exercises count."""
+        query = """
+            SELECT COUNT(*) as count 
+            FROM exercises e
+            JOIN lessons l ON e.lesson_id = l.id
+            JOIN student_courses sc ON l.course_id = sc.course_id
+            LEFT JOIN student_exercise_submissions ses 
+                ON e.id = ses.exercise_id AND ses.student_id = sc.student_id
+            WHERE sc.student_id = %s AND sc.active = 1
+            AND (ses.status IS NULL OR ses.status = 'not_submitted')
+            AND e.due_date >= CURRENT_DATE
+        """
+        return self._fetch_count(query, (self.user.user_id,))
+
+    def _fetch_unread_count(self):
+        """Get unread messages count (messages past the student's read watermark)."""
+        query = """
+            SELECT COUNT(*) as count
+            FROM chats c
+            JOIN chat_messages cm ON cm.chat_id = c.id
+                AND cm.id > CASE WHEN c.user1_id = %s THEN c.user1_last_read_id ELSE c.user2_last_read_id END
+            WHERE (c.user1_id = %s OR c.user2_id = %s)
+            AND cm.sender_id != %s
+        """
+        user_id = self.user.user_id
+        return self._fetch_count(query, (user_id, user_id, user_id, user_id))
     
     def load_course_progress(self):
-        """Load course progress bars."""
-        # Get enrolled courses
+        """Load course progress bars (fetched on a worker thread)."""
+        self.dashboard_refresh.run("course_progress")
+
+    def _fetch_course_progress(self):
+        """Get enrolled courses for the progress section (worker thread)."""
         query = """
             SELECT c.id, c.name, c.language, c.level 
             FROM courses c
             JOIN student_courses sc ON c.id = sc.course_id
             WHERE sc.student_id = %s AND sc.active = 1
             ORDER BY c.name
+            LIMIT 3
         """
         params = (self.user.user_id,)
-        courses = execute_query(query, params=params, fetch=True)
-        
-        # Clear existing progress bars
+        return execute_query(query, params=params, fetch=True)
+
+    def _clear_course_progress(self):
+        """Remove the progress rows from the progress group."""
         for i in reversed(range(self.ui.verticalLayout_11.count())):
             item = self.ui.verticalLayout_11.itemAt(i)
             if isinstance(item, QHBoxLayout):
@@ -191,9 +217,20 @@ class StudentDashboardView(BaseDashboardView):
                         child.widget().deleteLater()
                 # Remove the layout itself
                 self.ui.verticalLayout_11.removeItem(item)
+
+    def _show_course_progress_placeholder(self):
+        """Show a loading row while the progress section is fetched."""
+        self._clear_course_progress()
+        layout = QHBoxLayout()
+        layout.addWidget(QLabel("Loading…"))
+        self.ui.verticalLayout_11.addLayout(layout)
+
+    def _apply_course_progress(self, courses):
+        """Rebuild the progress bars from the fetched courses."""
+        self._clear_course_progress()
         
         # Add progress bars for each course
-        for i, course in enumerate(courses[:3]):  # Show up to 3 courses
+        for i, course in enumerate((courses or [])[:3]):  # Show up to 3 courses
             # Handle both dictionary and tuple results
             if isinstance(course, dict):
                 course_name = course['name']
@@ -514,6 +551,8 @@ class StudentDashboardView(BaseDashboardView):
                 db.commit()
                 QMessageBox.information(self, "Success", 
                     f"Successfully enrolled in {course_name}")
+                # enrollment changes every tab: reload the visible one, the rest on next view
+                self.tabs.mark_stale()
                 return True
                 
             except Exception as e:
@@ -552,15 +591,18 @@ class StudentDashboardView(BaseDashboardView):
         params = (self.user.user_id,)
         courses = execute_query(query, params=params, fetch=True)
         
-        # Clear and repopulate combo boxes
+        # Clear and repopulate combo boxes, keeping the selection; signals are blocked
+        # so repopulating does not run every tab's filter
         for combo in [
             self.ui.scheduleFilterComboBox,
             self.ui.lessonsCourseFilterComboBox,
             self.ui.gradesCourseFilterComboBox
         ]:
+            selected = combo.currentData()
+            combo.blockSignals(True)
             combo.clear()
             combo.addItem("All Courses", -1)
-            for course in courses:
+            for course in courses or []:
                 # Handle both dictionary and tuple results
                 if isinstance(course, dict):
                     course_id = course['id']
@@ -570,6 +612,9 @@ class StudentDashboardView(BaseDashboardView):
                     course_id = course[0]
                     course_name = course[1]
                 combo.addItem(course_name, course_id)
+            index = combo.findData(selected)
+            combo.setCurrentIndex(index if index >= 0 else 0)
+            combo.blockSignals(False)
                 
     def load_schedule(self):
         """Load schedule for the selected course and date."""
@@ -640,57 +685,9 @@ class StudentDashboardView(BaseDashboardView):
         self.load_schedule()
         
     def export_schedule(self):
-        """Export schedule to a CSV file."""
-        try:
-            # Get current schedule data from table
-            rows = []
-            for row in range(self.ui.scheduleTable.rowCount()):
-                row_data = []
-                for col in range(self.ui.scheduleTable.columnCount()):
-                    item = self.ui.scheduleTable.item(row, col)
-                    row_data.append(item.text() if item else "")
-                rows.append(row_data)
-
-            if not rows:
-                QMessageBox.warning(self, "Export Schedule", "No schedule data to export.")
-                return
-
-            # Create CSV content
-            header = ["Date", "Time", "Course", "Topic", "Teacher", "Room"] 
-            csv_content = ",".join(header) + "\n"
-            for row in rows:
-                csv_content += ",".join(f'"{cell}"' for cell in row) + "\n"
-
-            # Get save location from user
-            from PyQt5.QtWidgets import QFileDialog
-            filename, _ = QFileDialog.getSaveFileName(
-                self,
-                "Export Schedule",
-                "",
-                "CSV Files (*.csv);;All Files (*)"
-            )
-
-            if filename:
-                # Add .csv extension if not present
-                if not filename.lower().endswith('.csv'):
-                    filename += '.csv'
-
-                # Save file
-                with open(filename, 'w', encoding='utf-8') as f:
-                    f.write(csv_content)
-
-                QMessageBox.information(
-                    self,
-                    "Export Schedule",
-                    f"Schedule exported successfully to {filename}"
-                )
-
-        except Exception as e:
-            QMessageBox.critical(
-                self, 
-                "Export Error",
-                f"Failed to export schedule: {str(e)}"
-            )
+        """Export the schedule to a CSV, gzip CSV or JSON Lines file on a background writer."""
+        self._export_task = export_table(self, self.ui.scheduleTable, "Export Schedule", "schedule.csv",
+                                         headers=["Date", "Time", "Course", "Topic", "Teacher", "Room"])
         
     def load_lessons(self):
         """Load lessons and exercises for the selected course and status."""
@@ -920,57 +917,9 @@ class StudentDashboardView(BaseDashboardView):
         self.load_grades()
         
     def export_grades(self):
-        """Export grades to a CSV file."""
-        try:
-            # Get current grades data from table
-            rows = []
-            for row in range(self.ui.gradesTable.rowCount()):
-                row_data = []
-                for col in range(self.ui.gradesTable.columnCount()):
-                    item = self.ui.gradesTable.item(row, col)
-                    row_data.append(item.text() if item else "")
-                rows.append(row_data)
-
-            if not rows:
-                QMessageBox.warning(self, "Export Grades", "No grade data to export.")
-                return
-
-            # Create CSV content
-            header = ["ID", "Course", "Type", "Name", "Date", "Grade", "Feedback"]
-            csv_content = ",".join(header) + "\n"
-            for row in rows:
-                csv_content += ",".join(f'"{cell}"' for cell in row) + "\n"
-
-            # Get save location from user 
-            from PyQt5.QtWidgets import QFileDialog
-            filename, _ = QFileDialog.getSaveFileName(
-                self,
-                "Export Grades",
-                "",
-                "CSV Files (*.csv);;All Files (*)"
-            )
-
-            if filename:
-                # Add .csv extension if not present
-                if not filename.lower().endswith('.csv'):
-                    filename += '.csv'
-
-                # Save file
-                with open(filename, 'w', encoding='utf-8') as f:
-                    f.write(csv_content)
-
-                QMessageBox.information(
-                    self,
-                    "Export Grades",
-                    f"Grades exported successfully to {filename}"
-                )
-
-        except Exception as e:
-            QMessageBox.critical(
-                self,
-                "Export Error", 
-                f"Failed to export grades: {str(e)}"
-            )
+        """Export the grades to a CSV, gzip CSV or JSON Lines file on a background writer."""
+        self._export_task = export_table(self, self.ui.gradesTable, "Export Grades", "grades.csv",
+                                         headers=["ID", "Course", "Type", "Name", "Date", "Grade", "Feedback"])
         
     def load_payments(self):
         """Load payments for the student."""
@@ -1154,9 +1103,15 @@ class StudentDashboardView(BaseDashboardView):
             
             # Refresh payments
             self.load_payments()
+            self.tabs.mark_others_stale()
             
     def load_chats(self):
         """Load chats for the student."""
+        if hasattr(self.ui, "messages_model"):
+            # shared messaging (app.ui.common.messaging) is attached and owns the chat lists
+            self.ui.set_current_user(self.user.user_id)
+            return
+
         # Clear the list
         self.ui.chatsList.clear()
         
@@ -1196,6 +1151,8 @@ class StudentDashboardView(BaseDashboardView):
         
     def load_messages(self, current_item, previous_item):
         """Load messages for the selected chat."""
+        if hasattr(self.ui, "messages_model"):
+            return  # handled by the shared messaging controller
         if not current_item:
             return
             
@@ -1234,6 +1191,8 @@ class StudentDashboardView(BaseDashboardView):
         
     def send_message(self):
         """Send a message in the current chat."""
+        if hasattr(self.ui, "messages_model"):
+            return  # handled by the shared messaging controller
         # Get message text
         message_text = self.ui.messageInput.text().strip()
         
@@ -1265,6 +1224,8 @@ class StudentDashboardView(BaseDashboardView):
         
     def new_chat(self):
         """Open dialog to start a new chat."""
+        if hasattr(self.ui, "messages_model"):
+            return  # handled by the shared messaging controller
         # Create a dialog
         dialog = QDialog(self)
         dialog.setWindowTitle("New Chat")
@@ -16,6 +16,9 @@ from app.ui.generated.teacher_dashboard_ui import Ui_TeacherDashboard
 from app.views.dashboard_view import BaseDashboardView
 from app.models.user_model import User
 from app.models.course_model import Course
+from app.models.group_chat_model import GroupChat
+from app.ui.common.filter_controller import debounced
+from app.ui.common.tab_loader import TabLoader
 from app.utils.database import execute_query, get_connection, database
 
 
@@ -71,7 +74,8 @@ class TeacherDashboardView(BaseDashboardView):
         self.ui.addLessonButton.clicked.connect(self.add_lesson)
         
         # Students tab
-        self.ui.studentSearchInput.textChanged.connect(self.filter_students)
+        # debounce typing: one reload after the user pauses instead of one per keystroke
+        self.ui.studentSearchInput.textChanged.connect(debounced(self.filter_students, parent=self))
         self.ui.studentCourseFilterComboBox.currentIndexChanged.connect(self.filter_students)
         
         # Attendance tab
@@ -89,8 +93,19 @@ class TeacherDashboardView(BaseDashboardView):
         self.ui.sendMessageButton.clicked.connect(self.send_message)
         self.ui.newChatButton.clicked.connect(self.new_chat)
         
-        # Set current date for attendance
+        # Set current date for attendance (signals blocked: the attendance tab loads on first view)
+        self.ui.attendanceDateEdit.blockSignals(True)
         self.ui.attendanceDateEdit.setDate(QDate.currentDate())
+        self.ui.attendanceDateEdit.blockSignals(False)
+        
+        # Load each tab's data when it is first shown
+        self.tabs = TabLoader(self.ui.tabWidget, self)
+        self.tabs.register(self.ui.coursesTab, self.load_courses)
+        self.tabs.register(self.ui.lessonsTab, self.load_course_filter_combos, self.load_lessons)
+        self.tabs.register(self.ui.studentsTab, self.load_course_filter_combos, self.load_students)
+        self.tabs.register(self.ui.attendanceTab, self.load_course_filter_combos, self.load_attendance)
+        self.tabs.register(self.ui.gradesTab, self.load_course_filter_combos, self.load_grades)
+        self.tabs.register(self.ui.messagesTab, self.load_chats)
         
         # Initialize data
         self.refresh_data()
@@ -99,14 +114,8 @@ class TeacherDashboardView(BaseDashboardView):
         self.ui.statusbar.showMessage("Ready")
         
     def refresh_data(self):
-        """Refresh all data in the dashboard."""
-        self.load_courses()
-        self.load_course_filter_combos()
-        self.load_lessons()
-        self.load_students()
-        self.load_attendance()
-        self.load_grades()
-        self.load_chats()
+        """Reload the visible tab; the others reload when next shown."""
+        self.tabs.refresh()
         
     def load_courses(self):
         """Load courses taught by the teacher into the courses table."""
@@ -179,10 +188,15 @@ class TeacherDashboardView(BaseDashboardView):
             view_button.setProperty("course_id", course["id"])
             view_button.clicked.connect(lambda checked, cid=course["id"]: self.view_course_details(cid))
             
+            announce_button = QPushButton("Announce")
+            announce_button.clicked.connect(
+                lambda checked, cid=course["id"], name=course["name"]: self.send_course_announcement(cid, name))
+            
             # Create a widget to hold the buttons
             actions_widget = QWidget()
             actions_layout = QHBoxLayout(actions_widget)
             actions_layout.addWidget(view_button)
+            actions_layout.addWidget(announce_button)
             actions_layout.setContentsMargins(0, 0, 0, 0)
             
             self.ui.coursesTable.setCellWidget(row, 8, actions_widget)
@@ -352,17 +366,23 @@ class TeacherDashboardView(BaseDashboardView):
         params = (self.user.user_id,)
         courses = db.fetch_all(query, params)
         
-        # Clear and repopulate combo boxes
+        # Clear and repopulate combo boxes, keeping the selection; signals are blocked
+        # so repopulating does not run every tab's filter
         for combo in [
             self.ui.courseFilterComboBox,
             self.ui.studentCourseFilterComboBox,
             self.ui.attendanceCourseFilterComboBox,
             self.ui.gradesCourseFilterComboBox
         ]:
+            selected = combo.currentData()
+            combo.blockSignals(True)
             combo.clear()
             combo.addItem("All Courses", -1)
-            for course in courses:
+            for course in courses or []:
                 combo.addItem(course["name"], course["id"])
+            index = combo.findData(selected)
+            combo.setCurrentIndex(index if index >= 0 else 0)
+            combo.blockSignals(False)
                 
     def load_lessons(self):
         """Load lessons for the selected course."""
@@ -992,6 +1012,40 @@ class TeacherDashboardView(BaseDashboardView):
             # Refresh chats
             self.load_chats()
             
+    def send_course_announcement(self, course_id, course_name):
+        """Send one announcement to every student enrolled in a course."""
+        dialog = QDialog(self)
+        dialog.setWindowTitle(f"Announcement to {course_name}")
+        dialog.setMinimumWidth(400)
+        
+        layout = QVBoxLayout(dialog)
+        message_label = QLabel("Announcement:")
+        message_input = QTextEdit()
+        layout.addWidget(message_label)
+        layout.addWidget(message_input)
+        
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.button(QDialogButtonBox.Ok).setText("Send")
+        buttons.accepted.connect(dialog.accept)
+        buttons.rejected.connect(dialog.reject)
+        layout.addWidget(buttons)
+        
+        if dialog.exec_() != QDialog.Accepted:
+            return
+        message = message_input.toPlainText().strip()
+        if not message:
+            QMessageBox.warning(self, "Validation Error", "Announcement text is required.")
+            return
+        
+        # single transaction and a single message row, whatever the class size
+        result = GroupChat.send_course_announcement(course_id, self.user.user_id, message)
+        if not result:
+            QMessageBox.critical(self, "Announcement", "Failed to send the announcement.")
+            return
+        self.ui.statusLabel.setText(
+            f"Announcement sent to {result['recipients']} student(s) in {course_name}.")
+        self.load_chats()
+            
     def load_attendance(self):
         """Load attendance for the selected course and date."""
         # Clear the table
@@ -1238,6 +1292,11 @@ class TeacherDashboardView(BaseDashboardView):
         
     def load_chats(self):
         """Load chats for the teacher."""
+        if hasattr(self.ui, "messages_model"):
+            # shared messaging (app.ui.common.messaging) is attached and owns the chat lists
+            self.ui.set_current_user(self.user.user_id)
+            return
+
         # Clear the list
         self.ui.chatsList.clear()
         
@@ -1267,6 +1326,8 @@ class TeacherDashboardView(BaseDashboardView):
         
     def load_messages(self, current_item, previous_item):
         """Load messages for the selected chat."""
+        if hasattr(self.ui, "messages_model"):
+            return  # handled by the shared messaging controller
         if not current_item:
             return
             
@@ -1305,6 +1366,8 @@ class TeacherDashboardView(BaseDashboardView):
         
     def send_message(self):
         """Send a message in the current chat."""
+        if hasattr(self.ui, "messages_model"):
+            return  # handled by the shared messaging controller
         # Get message text
         message_text = self.ui.messageInput.text().strip()
         
@@ -1336,6 +1399,8 @@ class TeacherDashboardView(BaseDashboardView):
         
     def new_chat(self):
         """Open dialog to start a new chat."""
+        if hasattr(self.ui, "messages_model"):
+            return  # handled by the shared messaging controller
         # Create a dialog
         dialog = QDialog(self)
         dialog.setWindowTitle("New Chat")
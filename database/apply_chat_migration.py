@@ -1,5 +1,10 @@
 """
-Apply migration: add edited/edited_at/deleted/deleted_at to chat_messages if missing.
+Apply migration: add edited/edited_at/deleted/deleted_at/client_msg_id to chat_messages
+if missing, plus the unique index on client_msg_id used by the chat outbox replay and the
+FULLTEXT index on message used by chat search, the per-participant read watermarks
+(user1_last_read_id/user2_last_read_id) on chats, the course group conversation
+tables (chat_groups, chat_group_members, chat_group_messages), and the report rollup
+tables (rollup_state, rollup_*_daily and their *_keys tables).
 
 Usage:
   python apply_chat_migration.py
@@ -20,12 +25,105 @@ DB_USER = os.getenv("MYSQL_USER", os.getenv("APP_DB_USER", "language_school_user
 DB_PASSWORD = os.getenv("MYSQL_PASSWORD", os.getenv("APP_DB_PASSWORD", "change_me"))
 DB_NAME = os.getenv("MYSQL_DATABASE", os.getenv("TARGET_DB", "language_school_db"))
 
+# Tables to ensure (course group conversations)
+TABLES = [
+    ("chat_groups",
+     "CREATE TABLE IF NOT EXISTS chat_groups ("
+     "id INT AUTO_INCREMENT PRIMARY KEY, course_id INT NOT NULL, owner_id INT NOT NULL, name VARCHAR(150) NOT NULL, "
+     "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, "
+     "updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP, "
+     "FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE, "
+     "FOREIGN KEY (owner_id) REFERENCES users(id) ON DELETE CASCADE, "
+     "UNIQUE KEY uq_chat_groups_course_id (course_id))"),
+    ("chat_group_members",
+     "CREATE TABLE IF NOT EXISTS chat_group_members ("
+     "group_id INT NOT NULL, user_id INT NOT NULL, last_read_message_id INT NOT NULL DEFAULT 0, "
+     "joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, PRIMARY KEY (group_id, user_id), "
+     "FOREIGN KEY (group_id) REFERENCES chat_groups(id) ON DELETE CASCADE, "
+     "FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE, INDEX idx_user_id (user_id))"),
+    ("chat_group_messages",
+     "CREATE TABLE IF NOT EXISTS chat_group_messages ("
+     "id INT AUTO_INCREMENT PRIMARY KEY, group_id INT NOT NULL, sender_id INT NOT NULL, message TEXT, "
+     "sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, "
+     "FOREIGN KEY (group_id) REFERENCES chat_groups(id) ON DELETE CASCADE, "
+     "FOREIGN KEY (sender_id) REFERENCES users(id) ON DELETE CASCADE, INDEX idx_group_id (group_id))"),
+    ("rollup_state",
+     "CREATE TABLE IF NOT EXISTS rollup_state ("
+     "rollup VARCHAR(64) PRIMARY KEY, last_updated TIMESTAMP NULL DEFAULT NULL, "
+     "max_id INT NOT NULL DEFAULT 0, row_count INT NOT NULL DEFAULT 0, "
+     "refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"),
+    ("rollup_payments_daily",
+     "CREATE TABLE IF NOT EXISTS rollup_payments_daily ("
+     "day DATE NOT NULL, course_id INT NOT NULL, payments INT NOT NULL DEFAULT 0, "
+     "amount DECIMAL(12,2) NOT NULL DEFAULT 0, paid_amount DECIMAL(12,2) NOT NULL DEFAULT 0, "
+     "PRIMARY KEY (course_id, day), INDEX idx_rollup_payments_daily_day (day))"),
+    ("rollup_payments_daily_keys",
+     "CREATE TABLE IF NOT EXISTS rollup_payments_daily_keys ("
+     "id INT PRIMARY KEY, day DATE NULL, course_id INT NOT NULL)"),
+    ("rollup_enrollments_daily",
+     "CREATE TABLE IF NOT EXISTS rollup_enrollments_daily ("
+     "day DATE NOT NULL, course_id INT NOT NULL, enrollments INT NOT NULL DEFAULT 0, "
+     "active_enrollments INT NOT NULL DEFAULT 0, PRIMARY KEY (course_id, day), "
+     "INDEX idx_rollup_enrollments_daily_day (day))"),
+    ("rollup_enrollments_daily_keys",
+     "CREATE TABLE IF NOT EXISTS rollup_enrollments_daily_keys ("
+     "id INT PRIMARY KEY, day DATE NULL, course_id INT NOT NULL)"),
+    ("rollup_attendance_daily",
+     "CREATE TABLE IF NOT EXISTS rollup_attendance_daily ("
+     "day DATE NOT NULL, course_id INT NOT NULL, present INT NOT NULL DEFAULT 0, "
+     "late INT NOT NULL DEFAULT 0, absent INT NOT NULL DEFAULT 0, PRIMARY KEY (course_id, day), "
+     "INDEX idx_rollup_attendance_daily_day (day))"),
+    ("rollup_attendance_daily_keys",
+     "CREATE TABLE IF NOT EXISTS rollup_attendance_daily_keys ("
+     "id INT PRIMARY KEY, day DATE NULL, course_id INT NOT NULL)"),
+]
+
 # Column definitions to ensure
 COLUMNS = [
-    ("edited", "TINYINT(1) NOT NULL DEFAULT 0"),
-    ("edited_at", "TIMESTAMP NULL DEFAULT NULL"),
-    ("deleted", "TINYINT(1) NOT NULL DEFAULT 0"),
-    ("deleted_at", "TIMESTAMP NULL DEFAULT NULL"),
+    ("chat_messages", "edited", "TINYINT(1) NOT NULL DEFAULT 0"),
+    ("chat_messages", "edited_at", "TIMESTAMP NULL DEFAULT NULL"),
+    ("chat_messages", "deleted", "TINYINT(1) NOT NULL DEFAULT 0"),
+    ("chat_messages", "deleted_at", "TIMESTAMP NULL DEFAULT NULL"),
+    ("chat_messages", "client_msg_id", "VARCHAR(64) NULL DEFAULT NULL"),
+    ("chats", "user1_last_read_id", "INT NOT NULL DEFAULT 0"),
+    ("chats", "user2_last_read_id", "INT NOT NULL DEFAULT 0"),
+]
+
+# Seed values for columns that must not start at their default, run only right after the
+# column is added: the read watermarks start at the legacy per-row read_status flags (else
+# every old message would count as unread).
+SEEDS = {
+    ("chats", "user1_last_read_id"):
+        "c.user1_last_read_id = COALESCE((SELECT MIN(m.id) - 1 FROM chat_messages m "
+        "WHERE m.chat_id = c.id AND m.sender_id != c.user1_id AND m.read_status = 0), "
+        "(SELECT MAX(m.id) FROM chat_messages m WHERE m.chat_id = c.id), 0)",
+    ("chats", "user2_last_read_id"):
+        "c.user2_last_read_id = COALESCE((SELECT MIN(m.id) - 1 FROM chat_messages m "
+        "WHERE m.chat_id = c.id AND m.sender_id != c.user2_id AND m.read_status = 0), "
+        "(SELECT MAX(m.id) FROM chat_messages m WHERE m.chat_id = c.id), 0)",
+}
+
+# Index definitions to ensure
+INDEXES = [
+    ("chat_messages", "uq_chat_messages_client_msg_id", "UNIQUE INDEX `uq_chat_messages_client_msg_id` (`client_msg_id`)"),
+    ("chat_messages", "ft_chat_messages_message", "FULLTEXT INDEX `ft_chat_messages_message` (`message`)"),
+    ("users", "idx_users_user_type", "INDEX `idx_users_user_type` (`user_type`)"),
+    ("users", "idx_users_first_name", "INDEX `idx_users_first_name` (`first_name`)"),
+    ("users", "idx_users_last_name", "INDEX `idx_users_last_name` (`last_name`)"),
+    ("courses", "idx_courses_name", "INDEX `idx_courses_name` (`name`)"),
+    ("courses", "idx_courses_language_level", "INDEX `idx_courses_language_level` (`language`, `level`)"),
+    ("payments", "idx_payments_status", "INDEX `idx_payments_status` (`status`)"),
+    ("payments", "idx_payments_payment_date", "INDEX `idx_payments_payment_date` (`payment_date`)"),
+    ("payments", "idx_payments_amount", "INDEX `idx_payments_amount` (`amount`)"),
+    ("users", "idx_users_updated_at", "INDEX `idx_users_updated_at` (`updated_at`)"),
+    ("courses", "idx_courses_updated_at", "INDEX `idx_courses_updated_at` (`updated_at`)"),
+    ("schedules", "idx_schedules_updated_at", "INDEX `idx_schedules_updated_at` (`updated_at`)"),
+    ("payments", "idx_payments_updated_at", "INDEX `idx_payments_updated_at` (`updated_at`)"),
+    ("student_courses", "idx_student_courses_updated_at", "INDEX `idx_student_courses_updated_at` (`updated_at`)"),
+    ("student_courses", "idx_student_courses_course_date", "INDEX `idx_student_courses_course_date` (`course_id`, `enrollment_date`)"),
+    ("attendance", "idx_attendance_updated_at", "INDEX `idx_attendance_updated_at` (`updated_at`)"),
+    ("attendance", "idx_attendance_course_date", "INDEX `idx_attendance_course_date` (`course_id`, `attendance_date`)"),
+    ("payments", "idx_payments_course_date", "INDEX `idx_payments_course_date` (`course_id`, `payment_date`)"),
 ]
 
 def try_import_connector():
@@ -48,6 +146,15 @@ def column_exists(cursor, schema, table, column):
     cursor.execute(q, (schema, table, column))
     return cursor.fetchone()[0] > 0
 
+def index_exists(cursor, schema, table, index):
+    q = """
+        SELECT COUNT(*) AS cnt
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND INDEX_NAME = %s
+    """
+    cursor.execute(q, (schema, table, index))
+    return cursor.fetchone()[0] > 0
+
 def main():
     name, mod = try_import_connector()
     if mod is None:
@@ -67,9 +174,15 @@ def main():
         sys.exit(1)
 
     try:
-        table = "chat_messages"
         changed = False
-        for col_name, col_def in COLUMNS:
+        added_seeds = []
+        for table, ddl in TABLES:
+            try:
+                cursor.execute(ddl)
+                print(f"Ensured table '{table}'.")
+            except Exception as ex:
+                print(f"Could not create table '{table}': {ex}")
+        for table, col_name, col_def in COLUMNS:
             try:
                 if column_exists(cursor, DB_NAME, table, col_name):
                     print(f"Column '{col_name}' already exists, skipping.")
@@ -83,9 +196,31 @@ def main():
                 cursor.execute(alter_sql)
                 print(f"Added column '{col_name}'.")
                 changed = True
+                if (table, col_name) in SEEDS:
+                    added_seeds.append(SEEDS[(table, col_name)])
             except Exception as ex:
                 # If column exists concurrently or server doesn't support the exact syntax, report and continue
                 print(f"Could not add column '{col_name}': {ex}")
+        if added_seeds:
+            try:
+                # updated_at = updated_at: seeding is not a change the change probes should see
+                cursor.execute(f"UPDATE chats c SET {', '.join(added_seeds)}, c.updated_at = c.updated_at;")
+                print("Seeded chat read watermarks from read_status.")
+            except Exception as ex:
+                print(f"Could not seed chat read watermarks: {ex}")
+        for table, idx_name, idx_def in INDEXES:
+            try:
+                if index_exists(cursor, DB_NAME, table, idx_name):
+                    print(f"Index '{idx_name}' already exists, skipping.")
+                    continue
+            except Exception:
+                print("Warning: could not inspect information_schema; will attempt ALTER and ignore errors.")
+            try:
+                cursor.execute(f"ALTER TABLE `{table}` ADD {idx_def};")
+                print(f"Added index '{idx_name}'.")
+                changed = True
+            except Exception as ex:
+                print(f"Could not add index '{idx_name}': {ex}")
         if changed:
             try:
                 conn.commit()
@@ -6,6 +6,9 @@
 DROP TABLE IF EXISTS notifications;
 DROP TABLE IF EXISTS test_results;
 DROP TABLE IF EXISTS tests;
+DROP TABLE IF EXISTS chat_group_messages;
+DROP TABLE IF EXISTS chat_group_members;
+DROP TABLE IF EXISTS chat_groups;
 DROP TABLE IF EXISTS chat_messages;
 DROP TABLE IF EXISTS chats;
 DROP TABLE IF EXISTS payments;
@@ -34,7 +37,11 @@ CREATE TABLE users (
     user_type ENUM('admin', 'teacher', 'student') NOT NULL,
     active BOOLEAN NOT NULL DEFAULT TRUE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_users_user_type (user_type),
+    INDEX idx_users_first_name (first_name),
+    INDEX idx_users_last_name (last_name),
+    INDEX idx_users_updated_at (updated_at)
 );
 
 -- =========================
@@ -71,7 +78,10 @@ CREATE TABLE courses (
     active BOOLEAN NOT NULL DEFAULT TRUE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    FOREIGN KEY (teacher_id) REFERENCES users(id) ON DELETE CASCADE
+    FOREIGN KEY (teacher_id) REFERENCES users(id) ON DELETE CASCADE,
+    INDEX idx_courses_name (name),
+    INDEX idx_courses_language_level (language, level),
+    INDEX idx_courses_updated_at (updated_at)
 );
 
 -- =========================
@@ -87,7 +97,8 @@ CREATE TABLE schedules (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE,
-    FOREIGN KEY (room) REFERENCES rooms(room_number) ON DELETE SET NULL
+    FOREIGN KEY (room) REFERENCES rooms(room_number) ON DELETE SET NULL,
+    INDEX idx_schedules_updated_at (updated_at)
 );
 
 -- =========================
@@ -103,7 +114,9 @@ CREATE TABLE student_courses (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (student_id) REFERENCES users(id) ON DELETE CASCADE,
     FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE,
-    UNIQUE KEY (student_id, course_id)
+    UNIQUE KEY (student_id, course_id),
+    INDEX idx_student_courses_updated_at (updated_at),
+    INDEX idx_student_courses_course_date (course_id, enrollment_date)
 );
 
 -- =========================
@@ -186,7 +199,9 @@ CREATE TABLE attendance (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (student_id) REFERENCES users(id) ON DELETE CASCADE,
     FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE,
-    UNIQUE KEY (student_id, course_id, attendance_date)
+    UNIQUE KEY (student_id, course_id, attendance_date),
+    INDEX idx_attendance_updated_at (updated_at),
+    INDEX idx_attendance_course_date (course_id, attendance_date)
 );
 
 -- =========================
@@ -205,7 +220,12 @@ CREATE TABLE payments (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (student_id) REFERENCES users(id) ON DELETE CASCADE,
-    FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE
+    FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE,
+    INDEX idx_payments_status (status),
+    INDEX idx_payments_payment_date (payment_date),
+    INDEX idx_payments_amount (amount),
+    INDEX idx_payments_updated_at (updated_at),
+    INDEX idx_payments_course_date (course_id, payment_date)
 );
 
 -- =========================
@@ -215,6 +235,8 @@ CREATE TABLE chats (
     id INT AUTO_INCREMENT PRIMARY KEY,
     user1_id INT NOT NULL,
     user2_id INT NOT NULL,
+    user1_last_read_id INT NOT NULL DEFAULT 0,
+    user2_last_read_id INT NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (user1_id) REFERENCES users(id) ON DELETE CASCADE,
@@ -233,12 +255,52 @@ CREATE TABLE chat_messages (
     edited_at TIMESTAMP NULL DEFAULT NULL,
     read_status BOOLEAN NOT NULL DEFAULT FALSE,
     sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    client_msg_id VARCHAR(64) NULL DEFAULT NULL,
     FOREIGN KEY (chat_id) REFERENCES chats(id) ON DELETE CASCADE,
     FOREIGN KEY (sender_id) REFERENCES users(id) ON DELETE CASCADE,
+    UNIQUE KEY uq_chat_messages_client_msg_id (client_msg_id),
+    FULLTEXT INDEX ft_chat_messages_message (message),
     INDEX idx_sender_id (sender_id),
     INDEX idx_chat_id (chat_id)
 );
 
+-- =========================
+-- Course group conversations
+-- =========================
+CREATE TABLE chat_groups (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    course_id INT NOT NULL,
+    owner_id INT NOT NULL,
+    name VARCHAR(150) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE,
+    FOREIGN KEY (owner_id) REFERENCES users(id) ON DELETE CASCADE,
+    UNIQUE KEY uq_chat_groups_course_id (course_id)
+);
+
+CREATE TABLE chat_group_members (
+    group_id INT NOT NULL,
+    user_id INT NOT NULL,
+    last_read_message_id INT NOT NULL DEFAULT 0,
+    joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (group_id, user_id),
+    FOREIGN KEY (group_id) REFERENCES chat_groups(id) ON DELETE CASCADE,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    INDEX idx_user_id (user_id)
+);
+
+CREATE TABLE chat_group_messages (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    group_id INT NOT NULL,
+    sender_id INT NOT NULL,
+    message TEXT,
+    sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (group_id) REFERENCES chat_groups(id) ON DELETE CASCADE,
+    FOREIGN KEY (sender_id) REFERENCES users(id) ON DELETE CASCADE,
+    INDEX idx_group_id (group_id)
+);
+
 -- =========================
 -- Tests and Test Results
 -- =========================
@@ -296,6 +358,66 @@ CREATE TABLE student_dashboard_stats (
     FOREIGN KEY (student_id) REFERENCES users(id) ON DELETE CASCADE
 );
 
+-- =========================
+-- Report Rollups
+-- =========================
+-- Per-day, per-course aggregates read by the date-range reports, maintained
+-- incrementally by app/utils/rollups.py from updated_at watermarks.
+CREATE TABLE IF NOT EXISTS rollup_state (
+    rollup VARCHAR(64) PRIMARY KEY,
+    last_updated TIMESTAMP NULL DEFAULT NULL,
+    max_id INT NOT NULL DEFAULT 0,
+    row_count INT NOT NULL DEFAULT 0,
+    refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS rollup_payments_daily (
+    day DATE NOT NULL,
+    course_id INT NOT NULL,
+    payments INT NOT NULL DEFAULT 0,
+    amount DECIMAL(12,2) NOT NULL DEFAULT 0,
+    paid_amount DECIMAL(12,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (course_id, day),
+    INDEX idx_rollup_payments_daily_day (day)
+);
+
+CREATE TABLE IF NOT EXISTS rollup_payments_daily_keys (
+    id INT PRIMARY KEY,
+    day DATE NULL,
+    course_id INT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS rollup_enrollments_daily (
+    day DATE NOT NULL,
+    course_id INT NOT NULL,
+    enrollments INT NOT NULL DEFAULT 0,
+    active_enrollments INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (course_id, day),
+    INDEX idx_rollup_enrollments_daily_day (day)
+);
+
+CREATE TABLE IF NOT EXISTS rollup_enrollments_daily_keys (
+    id INT PRIMARY KEY,
+    day DATE NULL,
+    course_id INT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS rollup_attendance_daily (
+    day DATE NOT NULL,
+    course_id INT NOT NULL,
+    present INT NOT NULL DEFAULT 0,
+    late INT NOT NULL DEFAULT 0,
+    absent INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (course_id, day),
+    INDEX idx_rollup_attendance_daily_day (day)
+);
+
+CREATE TABLE IF NOT EXISTS rollup_attendance_daily_keys (
+    id INT PRIMARY KEY,
+    day DATE NULL,
+    course_id INT NOT NULL
+);
+
 -- =========================
 -- Triggers (prevent room/teacher overlap & update dashboard stats)
 -- =========================
@@ -0,0 +1,6 @@
+-- Idempotency key for chat sends so offline sends replayed from the client
+-- outbox never create duplicate rows.
+ALTER TABLE chat_messages
+  ADD COLUMN IF NOT EXISTS client_msg_id VARCHAR(64) NULL DEFAULT NULL;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_chat_messages_client_msg_id ON chat_messages (client_msg_id);
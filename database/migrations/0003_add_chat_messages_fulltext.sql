@@ -0,0 +1,3 @@
+-- FULLTEXT index backing chat search (User.search_messages).
+ALTER TABLE chat_messages
+  ADD FULLTEXT INDEX ft_chat_messages_message (message);
@@ -0,0 +1,17 @@
+-- Per-participant read watermarks: the highest chat_messages.id each side has read.
+-- Unread = messages from the other side with id > watermark (range scan on idx_chat_id).
+-- Plain ADD COLUMN (MySQL 8 has no ADD COLUMN IF NOT EXISTS): run this migration once;
+-- main.py and apply_chat_migration.py add and seed the columns only when they are missing.
+ALTER TABLE chats
+  ADD COLUMN user1_last_read_id INT NOT NULL DEFAULT 0,
+  ADD COLUMN user2_last_read_id INT NOT NULL DEFAULT 0;
+
+-- Seed the watermarks from the legacy per-row read_status flags.
+UPDATE chats c
+SET c.user1_last_read_id = COALESCE((SELECT MIN(m.id) - 1 FROM chat_messages m
+                                     WHERE m.chat_id = c.id AND m.sender_id != c.user1_id AND m.read_status = 0),
+                                    (SELECT MAX(m.id) FROM chat_messages m WHERE m.chat_id = c.id), 0),
+    c.user2_last_read_id = COALESCE((SELECT MIN(m.id) - 1 FROM chat_messages m
+                                     WHERE m.chat_id = c.id AND m.sender_id != c.user2_id AND m.read_status = 0),
+                                    (SELECT MAX(m.id) FROM chat_messages m WHERE m.chat_id = c.id), 0),
+    c.updated_at = c.updated_at;
@@ -0,0 +1,14 @@
+-- Indexes backing the admin dashboard filters: equality on type/language/level/status
+-- and prefix LIKE ('term%') search on names (see database.build_prefix_search).
+-- username and email are already covered by their UNIQUE keys.
+ALTER TABLE users
+  ADD INDEX idx_users_user_type (user_type),
+  ADD INDEX idx_users_first_name (first_name),
+  ADD INDEX idx_users_last_name (last_name);
+
+ALTER TABLE courses
+  ADD INDEX idx_courses_name (name),
+  ADD INDEX idx_courses_language_level (language, level);
+
+ALTER TABLE payments
+  ADD INDEX idx_payments_status (status);
@@ -0,0 +1,5 @@
+-- Sort indexes for the paged admin payments table. Keyset pages are read in
+-- (column, id) order; InnoDB secondary indexes already end with the primary key.
+ALTER TABLE payments
+  ADD INDEX idx_payments_payment_date (payment_date),
+  ADD INDEX idx_payments_amount (amount);
@@ -0,0 +1,6 @@
+-- Watermark indexes for change probes: MAX(updated_at) is read from the end of
+-- the index and "changed since" lookups are range scans instead of table scans.
+ALTER TABLE users ADD INDEX idx_users_updated_at (updated_at);
+ALTER TABLE courses ADD INDEX idx_courses_updated_at (updated_at);
+ALTER TABLE schedules ADD INDEX idx_schedules_updated_at (updated_at);
+ALTER TABLE payments ADD INDEX idx_payments_updated_at (updated_at);
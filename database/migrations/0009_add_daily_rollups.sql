@@ -0,0 +1,67 @@
+-- Per-day, per-course rollups read by the date-range reports (app/utils/rollups.py).
+-- rollup_state keeps each rollup's updated_at watermark; the *_keys tables map
+-- every source row to the bucket it was counted in, so updates that move a row
+-- to another day or course and deletes can be subtracted from the old bucket.
+CREATE TABLE IF NOT EXISTS rollup_state (
+    rollup VARCHAR(64) PRIMARY KEY,
+    last_updated TIMESTAMP NULL DEFAULT NULL,
+    max_id INT NOT NULL DEFAULT 0,
+    row_count INT NOT NULL DEFAULT 0,
+    refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS rollup_payments_daily (
+    day DATE NOT NULL,
+    course_id INT NOT NULL,
+    payments INT NOT NULL DEFAULT 0,
+    amount DECIMAL(12,2) NOT NULL DEFAULT 0,
+    paid_amount DECIMAL(12,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (course_id, day),
+    INDEX idx_rollup_payments_daily_day (day)
+);
+
+CREATE TABLE IF NOT EXISTS rollup_payments_daily_keys (
+    id INT PRIMARY KEY,
+    day DATE NULL,
+    course_id INT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS rollup_enrollments_daily (
+    day DATE NOT NULL,
+    course_id INT NOT NULL,
+    enrollments INT NOT NULL DEFAULT 0,
+    active_enrollments INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (course_id, day),
+    INDEX idx_rollup_enrollments_daily_day (day)
+);
+
+CREATE TABLE IF NOT EXISTS rollup_enrollments_daily_keys (
+    id INT PRIMARY KEY,
+    day DATE NULL,
+    course_id INT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS rollup_attendance_daily (
+    day DATE NOT NULL,
+    course_id INT NOT NULL,
+    present INT NOT NULL DEFAULT 0,
+    late INT NOT NULL DEFAULT 0,
+    absent INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (course_id, day),
+    INDEX idx_rollup_attendance_daily_day (day)
+);
+
+CREATE TABLE IF NOT EXISTS rollup_attendance_daily_keys (
+    id INT PRIMARY KEY,
+    day DATE NULL,
+    course_id INT NOT NULL
+);
+
+-- Watermark lookups and bucket recomputation on the source tables
+ALTER TABLE student_courses
+  ADD INDEX idx_student_courses_updated_at (updated_at),
+  ADD INDEX idx_student_courses_course_date (course_id, enrollment_date);
+ALTER TABLE attendance
+  ADD INDEX idx_attendance_updated_at (updated_at),
+  ADD INDEX idx_attendance_course_date (course_id, attendance_date);
+ALTER TABLE payments ADD INDEX idx_payments_course_date (course_id, payment_date);
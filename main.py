@@ -50,19 +50,113 @@ def apply_chat_migration():
         print("Could not connect to DB for migration:", e)
         return
 
+    tables = [
+        ("chat_groups",
+         "CREATE TABLE IF NOT EXISTS chat_groups ("
+         "id INT AUTO_INCREMENT PRIMARY KEY, course_id INT NOT NULL, owner_id INT NOT NULL, name VARCHAR(150) NOT NULL, "
+         "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, "
+         "updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP, "
+         "FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE, "
+         "FOREIGN KEY (owner_id) REFERENCES users(id) ON DELETE CASCADE, "
+         "UNIQUE KEY uq_chat_groups_course_id (course_id))"),
+        ("chat_group_members",
+         "CREATE TABLE IF NOT EXISTS chat_group_members ("
+         "group_id INT NOT NULL, user_id INT NOT NULL, last_read_message_id INT NOT NULL DEFAULT 0, "
+         "joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, PRIMARY KEY (group_id, user_id), "
+         "FOREIGN KEY (group_id) REFERENCES chat_groups(id) ON DELETE CASCADE, "
+         "FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE, INDEX idx_user_id (user_id))"),
+        ("chat_group_messages",
+         "CREATE TABLE IF NOT EXISTS chat_group_messages ("
+         "id INT AUTO_INCREMENT PRIMARY KEY, group_id INT NOT NULL, sender_id INT NOT NULL, message TEXT, "
+         "sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, "
+         "FOREIGN KEY (group_id) REFERENCES chat_groups(id) ON DELETE CASCADE, "
+         "FOREIGN KEY (sender_id) REFERENCES users(id) ON DELETE CASCADE, INDEX idx_group_id (group_id))"),
+        ("rollup_state",
+         "CREATE TABLE IF NOT EXISTS rollup_state ("
+         "rollup VARCHAR(64) PRIMARY KEY, last_updated TIMESTAMP NULL DEFAULT NULL, "
+         "max_id INT NOT NULL DEFAULT 0, row_count INT NOT NULL DEFAULT 0, "
+         "refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"),
+        ("rollup_payments_daily",
+         "CREATE TABLE IF NOT EXISTS rollup_payments_daily ("
+         "day DATE NOT NULL, course_id INT NOT NULL, payments INT NOT NULL DEFAULT 0, "
+         "amount DECIMAL(12,2) NOT NULL DEFAULT 0, paid_amount DECIMAL(12,2) NOT NULL DEFAULT 0, "
+         "PRIMARY KEY (course_id, day), INDEX idx_rollup_payments_daily_day (day))"),
+        ("rollup_payments_daily_keys",
+         "CREATE TABLE IF NOT EXISTS rollup_payments_daily_keys ("
+         "id INT PRIMARY KEY, day DATE NULL, course_id INT NOT NULL)"),
+        ("rollup_enrollments_daily",
+         "CREATE TABLE IF NOT EXISTS rollup_enrollments_daily ("
+         "day DATE NOT NULL, course_id INT NOT NULL, enrollments INT NOT NULL DEFAULT 0, "
+         "active_enrollments INT NOT NULL DEFAULT 0, PRIMARY KEY (course_id, day), "
+         "INDEX idx_rollup_enrollments_daily_day (day))"),
+        ("rollup_enrollments_daily_keys",
+         "CREATE TABLE IF NOT EXISTS rollup_enrollments_daily_keys ("
+         "id INT PRIMARY KEY, day DATE NULL, course_id INT NOT NULL)"),
+        ("rollup_attendance_daily",
+         "CREATE TABLE IF NOT EXISTS rollup_attendance_daily ("
+         "day DATE NOT NULL, course_id INT NOT NULL, present INT NOT NULL DEFAULT 0, "
+         "late INT NOT NULL DEFAULT 0, absent INT NOT NULL DEFAULT 0, PRIMARY KEY (course_id, day), "
+         "INDEX idx_rollup_attendance_daily_day (day))"),
+        ("rollup_attendance_daily_keys",
+         "CREATE TABLE IF NOT EXISTS rollup_attendance_daily_keys ("
+         "id INT PRIMARY KEY, day DATE NULL, course_id INT NOT NULL)"),
+    ]
     cols = [
-        ("edited", "TINYINT(1) NOT NULL DEFAULT 0"),
-        ("edited_at", "TIMESTAMP NULL DEFAULT NULL"),
-        ("deleted", "TINYINT(1) NOT NULL DEFAULT 0"),
-        ("deleted_at", "TIMESTAMP NULL DEFAULT NULL"),
+        ("chat_messages", "edited", "TINYINT(1) NOT NULL DEFAULT 0"),
+        ("chat_messages", "edited_at", "TIMESTAMP NULL DEFAULT NULL"),
+        ("chat_messages", "deleted", "TINYINT(1) NOT NULL DEFAULT 0"),
+        ("chat_messages", "deleted_at", "TIMESTAMP NULL DEFAULT NULL"),
+        ("chat_messages", "client_msg_id", "VARCHAR(64) NULL DEFAULT NULL"),
+        ("chats", "user1_last_read_id", "INT NOT NULL DEFAULT 0"),
+        ("chats", "user2_last_read_id", "INT NOT NULL DEFAULT 0"),
+    ]
+    # Seed values for columns that must not start at their default, run only right after the
+    # column is added: the read watermarks start at the legacy per-row read_status flags (else
+    # every old message would count as unread).
+    seeds = {
+        ("chats", "user1_last_read_id"):
+            "c.user1_last_read_id = COALESCE((SELECT MIN(m.id) - 1 FROM chat_messages m "
+            "WHERE m.chat_id = c.id AND m.sender_id != c.user1_id AND m.read_status = 0), "
+            "(SELECT MAX(m.id) FROM chat_messages m WHERE m.chat_id = c.id), 0)",
+        ("chats", "user2_last_read_id"):
+            "c.user2_last_read_id = COALESCE((SELECT MIN(m.id) - 1 FROM chat_messages m "
+            "WHERE m.chat_id = c.id AND m.sender_id != c.user2_id AND m.read_status = 0), "
+            "(SELECT MAX(m.id) FROM chat_messages m WHERE m.chat_id = c.id), 0)",
+    }
+    indexes = [
+        ("chat_messages", "uq_chat_messages_client_msg_id", "UNIQUE INDEX `uq_chat_messages_client_msg_id` (`client_msg_id`)"),
+        ("chat_messages", "ft_chat_messages_message", "FULLTEXT INDEX `ft_chat_messages_message` (`message`)"),
+        ("users", "idx_users_user_type", "INDEX `idx_users_user_type` (`user_type`)"),
+        ("users", "idx_users_first_name", "INDEX `idx_users_first_name` (`first_name`)"),
+        ("users", "idx_users_last_name", "INDEX `idx_users_last_name` (`last_name`)"),
+        ("courses", "idx_courses_name", "INDEX `idx_courses_name` (`name`)"),
+        ("courses", "idx_courses_language_level", "INDEX `idx_courses_language_level` (`language`, `level`)"),
+        ("payments", "idx_payments_status", "INDEX `idx_payments_status` (`status`)"),
+        ("payments", "idx_payments_payment_date", "INDEX `idx_payments_payment_date` (`payment_date`)"),
+        ("payments", "idx_payments_amount", "INDEX `idx_payments_amount` (`amount`)"),
+        ("users", "idx_users_updated_at", "INDEX `idx_users_updated_at` (`updated_at`)"),
+        ("courses", "idx_courses_updated_at", "INDEX `idx_courses_updated_at` (`updated_at`)"),
+        ("schedules", "idx_schedules_updated_at", "INDEX `idx_schedules_updated_at` (`updated_at`)"),
+        ("payments", "idx_payments_updated_at", "INDEX `idx_payments_updated_at` (`updated_at`)"),
+        ("student_courses", "idx_student_courses_updated_at", "INDEX `idx_student_courses_updated_at` (`updated_at`)"),
+        ("student_courses", "idx_student_courses_course_date", "INDEX `idx_student_courses_course_date` (`course_id`, `enrollment_date`)"),
+        ("attendance", "idx_attendance_updated_at", "INDEX `idx_attendance_updated_at` (`updated_at`)"),
+        ("attendance", "idx_attendance_course_date", "INDEX `idx_attendance_course_date` (`course_id`, `attendance_date`)"),
+        ("payments", "idx_payments_course_date", "INDEX `idx_payments_course_date` (`course_id`, `payment_date`)"),
     ]
     try:
+        for table, ddl in tables:
+            try:
+                cursor.execute(ddl)
+            except Exception as ex:
+                print(f"Migration: could not create table {table}: {ex}")
         # use information_schema when possible
-        for col_name, col_def in cols:
+        added_seeds = []
+        for table, col_name, col_def in cols:
             try:
                 cursor.execute(
                     "SELECT COUNT(*) FROM information_schema.COLUMNS WHERE TABLE_SCHEMA=%s AND TABLE_NAME=%s AND COLUMN_NAME=%s",
-                    (DB_NAME, "chat_messages", col_name),
+                    (DB_NAME, table, col_name),
                 )
                 exists = cursor.fetchone()[0] > 0
             except Exception:
@@ -71,12 +165,37 @@ def apply_chat_migration():
                 # already present
                 continue
             try:
-                sql = f"ALTER TABLE chat_messages ADD COLUMN `{col_name}` {col_def}"
+                sql = f"ALTER TABLE `{table}` ADD COLUMN `{col_name}` {col_def}"
                 cursor.execute(sql)
                 print(f"Migration: added column {col_name}")
+                if (table, col_name) in seeds:
+                    added_seeds.append(seeds[(table, col_name)])
             except Exception as ex:
                 # ignore if cannot add (e.g., permissions) but report
                 print(f"Migration: could not add {col_name}: {ex}")
+        if added_seeds:
+            try:
+                # updated_at = updated_at: seeding is not a change the change probes should see
+                cursor.execute(f"UPDATE chats c SET {', '.join(added_seeds)}, c.updated_at = c.updated_at")
+                print("Migration: seeded chat read watermarks")
+            except Exception as ex:
+                print(f"Migration: could not seed chat read watermarks: {ex}")
+        for table, idx_name, idx_def in indexes:
+            try:
+                cursor.execute(
+                    "SELECT COUNT(*) FROM information_schema.STATISTICS WHERE TABLE_SCHEMA=%s AND TABLE_NAME=%s AND INDEX_NAME=%s",
+                    (DB_NAME, table, idx_name),
+                )
+                exists = cursor.fetchone()[0] > 0
+            except Exception:
+                exists = False
+            if exists:
+                continue
+            try:
+                cursor.execute(f"ALTER TABLE `{table}` ADD {idx_def}")
+                print(f"Migration: added index {idx_name}")
+            except Exception as ex:
+                print(f"Migration: could not add index {idx_name}: {ex}")
         try:
             conn.commit()
         except Exception:
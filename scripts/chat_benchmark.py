@@ -0,0 +1,700 @@
+"""
+Headless load simulation for the chat feature.
+
+Spawns N simulated users (threads, optionally spread over several processes)
+that pair up into one-to-one chats. Each user sends messages at a
+configurable rate and polls its open chat the way attach_messaging does:
+every poll interval it loads the newest page, pages forward with after_id when
+more than a page arrived, and on new messages advances its read watermark and
+refreshes the chat list.
+
+Targets:
+  mysql   - the application code path (Chat.send_message / get_messages /
+            get_chats / mark_messages_read) against the database configured in
+            .env. Benchmark users are created as bench_<run>_<n> and deleted
+            afterwards (their chats and messages cascade) unless --keep is given.
+  sqlite  - a self-contained SQLite copy of the chat schema running the same
+            statements; useful to compare query shapes without a MySQL server.
+
+Reported:
+  - end-to-end delivery latency (send -> receiver's poll sees the message)
+  - per-operation latency (send, poll, get_chats, mark_read)
+  - statements executed and statements per second
+  - connections opened and peak concurrently open connections
+  - for mysql, server-side deltas of the Questions/Connections status counters
+
+Environment variables: DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, DB_NAME
+(same as the application, read through app.utils.database).
+
+Usage:
+  python scripts/chat_benchmark.py --users 200 --duration 60 --rate 0.2
+  python scripts/chat_benchmark.py --target sqlite --users 1000 --processes 4
+  python scripts/chat_benchmark.py --users 100 --json before.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+PAGE_SIZE = 50  # MessageListModel.page_size
+_STAMP_RE = re.compile(r"\bt=(\d+\.\d+)")
+
+
+# =========================
+# Statistics
+# =========================
+class Stats:
+    """Thread-safe counters and latency samples for one process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.connections = 0
+        self.open_connections = 0
+        self.peak_connections = 0
+        self.sent = 0
+        self.queued = 0
+        self.failed = 0
+        self.errors = 0
+        self.delivery = []
+        self.ops = {}
+
+    def query(self):
+        with self._lock:
+            self.queries += 1
+
+    def connection_opened(self):
+        with self._lock:
+            self.connections += 1
+            self.open_connections += 1
+            self.peak_connections = max(self.peak_connections, self.open_connections)
+
+    def connection_closed(self):
+        with self._lock:
+            self.open_connections -= 1
+
+    def timed(self, op, started):
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.ops.setdefault(op, []).append(elapsed)
+
+    def delivered(self, latency):
+        with self._lock:
+            self.delivery.append(latency)
+
+    def count(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "queries": self.queries, "connections": self.connections,
+                "peak_connections": self.peak_connections, "sent": self.sent,
+                "queued": self.queued, "failed": self.failed, "errors": self.errors,
+                "delivery": list(self.delivery), "ops": {k: list(v) for k, v in self.ops.items()},
+            }
+
+
+def merge_stats(parts):
+    """Combine Stats.to_dict() results from several processes."""
+    total = {"queries": 0, "connections": 0, "peak_connections": 0, "sent": 0, "queued": 0,
+             "failed": 0, "errors": 0, "delivery": [], "ops": {}}
+    for part in parts:
+        for key in ("queries", "connections", "sent", "queued", "failed", "errors"):
+            total[key] += part[key]
+        # per-process peaks can overlap in time, so the sum is an upper bound
+        total["peak_connections"] += part["peak_connections"]
+        total["delivery"].extend(part["delivery"])
+        for op, samples in part["ops"].items():
+            total["ops"].setdefault(op, []).extend(samples)
+    return total
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of an already sorted list (None when empty)."""
+    if not values:
+        return None
+    k = max(0, min(len(values) - 1, int(round(p / 100.0 * len(values) + 0.5)) - 1))
+    return values[k]
+
+
+def summarize(samples):
+    values = sorted(samples)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p90_ms": round(percentile(values, 90) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2),
+    }
+
+
+# =========================
+# MySQL target (application code path)
+# =========================
+class _CountingCursor:
+    def __init__(self, cursor, stats):
+        self._cursor = cursor
+        self._stats = stats
+
+    def execute(self, *args, **kwargs):
+        self._stats.query()
+        return self._cursor.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        self._stats.query()
+        return self._cursor.executemany(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class _CountingConnection:
+    def __init__(self, connection, stats):
+        self._connection = connection
+        self._stats = stats
+        self._closed = False
+        stats.connection_opened()
+
+    def cursor(self, *args, **kwargs):
+        return _CountingCursor(self._connection.cursor(*args, **kwargs), self._stats)
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._stats.connection_closed()
+        return self._connection.close()
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def instrument_app_database(stats):
+    """
+    Route every app connection through counting wrappers.
+
+    Modules that imported get_connection by name (``from app.utils.database
+    import get_connection``) are patched as well.
+    """
+    from app.utils import database
+    original = database.get_connection
+
+    def counting_get_connection():
+        connection = original()
+        return _CountingConnection(connection, stats) if connection else None
+
+    for module in list(sys.modules.values()):
+        if getattr(module, "get_connection", None) is original:
+            module.get_connection = counting_get_connection
+
+
+class MySQLTarget:
+    """Drives the application's Chat model against the configured MySQL database."""
+
+    name = "mysql"
+
+    def __init__(self, args):
+        self.args = args
+        self.prefix = "bench_%s_" % args.run_id
+
+    def start(self, stats):
+        instrument_app_database(stats)
+        from app.models.chat_model import Chat
+        self.chat = Chat
+
+    def setup(self, n_users):
+        from app.models.chat_model import Chat
+        from app.utils.database import execute_query
+        rows = [(f"{self.prefix}{i}", "bench", f"{self.prefix}{i}@bench.local", "Bench", f"User {i}", "student")
+                for i in range(n_users)]
+        inserted = execute_query(
+            "INSERT INTO users (username, password, email, first_name, last_name, user_type, active) "
+            "VALUES (%s, %s, %s, %s, %s, %s, 1)", rows, commit=True, many=True)
+        if inserted is None:
+            raise RuntimeError("could not create benchmark users (is the database reachable?)")
+        found = execute_query("SELECT id FROM users WHERE username LIKE %s ORDER BY id",
+                              (self.prefix + "%",), fetch=True) or []
+        user_ids = [r["id"] for r in found]
+        return user_ids, _pair_chats(user_ids, Chat.get_or_create_chat)
+
+    def teardown(self):
+        if self.args.keep:
+            return
+        from app.utils.database import execute_query
+        execute_query("DELETE FROM users WHERE username LIKE %s", (self.prefix + "%",), commit=True)
+
+    def server_status(self):
+        from app.utils.database import execute_query
+        rows = execute_query("SHOW GLOBAL STATUS WHERE Variable_name IN "
+                             "('Questions', 'Connections', 'Threads_connected')", fetch=True)
+        if not rows:
+            return None
+        return {r["Variable_name"]: int(r["Value"]) for r in rows}
+
+    # --- operations used by SimulatedUser ---
+    def send_message(self, chat_id, sender_id, text):
+        result = self.chat.send_message(chat_id, sender_id, text)
+        if result is None:
+            return None
+        return "queued" if result.get("pending") else "sent"
+
+    def get_messages(self, chat_id, limit, after_id=None):
+        return self.chat.get_messages(chat_id, limit=limit, after_id=after_id)
+
+    def get_chats(self, user_id):
+        return self.chat.get_chats(user_id)
+
+    def mark_read(self, chat_id, user_id, up_to_id):
+        return self.chat.mark_messages_read(chat_id, user_id, up_to_id)
+
+
+# =========================
+# SQLite target (same statements, local file)
+# =========================
+SQLITE_SCHEMA = """
+DROP TABLE IF EXISTS chat_messages;
+DROP TABLE IF EXISTS chats;
+DROP TABLE IF EXISTS users;
+CREATE TABLE users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL UNIQUE,
+    first_name TEXT,
+    last_name TEXT
+);
+CREATE TABLE chats (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user1_id INTEGER NOT NULL,
+    user2_id INTEGER NOT NULL,
+    user1_last_read_id INTEGER NOT NULL DEFAULT 0,
+    user2_last_read_id INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (user1_id, user2_id)
+);
+CREATE TABLE chat_messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id INTEGER NOT NULL,
+    sender_id INTEGER NOT NULL,
+    message TEXT,
+    deleted INTEGER NOT NULL DEFAULT 0,
+    edited INTEGER NOT NULL DEFAULT 0,
+    read_status INTEGER NOT NULL DEFAULT 0,
+    sent_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    client_msg_id TEXT UNIQUE
+);
+CREATE INDEX idx_chat_id ON chat_messages (chat_id, id);
+"""
+
+_SQLITE_CHATS = """
+    SELECT
+        c.id AS chat_id,
+        CASE WHEN c.user1_id = :uid THEN c.user2_id ELSE c.user1_id END AS other_user_id,
+        u.username AS other_username,
+        lm.message AS last_message,
+        lm.sent_at AS last_at,
+        CASE WHEN c.user1_id = :uid THEN c.user1_last_read_id ELSE c.user2_last_read_id END AS last_read_id,
+        (SELECT COUNT(*) FROM chat_messages m
+         WHERE m.chat_id = c.id
+           AND m.id > CASE WHEN c.user1_id = :uid THEN c.user1_last_read_id ELSE c.user2_last_read_id END
+           AND m.sender_id != :uid) AS unread_count
+    FROM chats c
+    LEFT JOIN users u ON u.id = CASE WHEN c.user1_id = :uid THEN c.user2_id ELSE c.user1_id END
+    LEFT JOIN chat_messages lm ON lm.id = (SELECT MAX(m2.id) FROM chat_messages m2 WHERE m2.chat_id = c.id)
+    WHERE c.user1_id = :uid OR c.user2_id = :uid
+    ORDER BY last_at DESC
+"""
+
+_SQLITE_MARK_READ = """
+    UPDATE chats
+    SET user1_last_read_id = CASE WHEN user1_id = :uid AND user1_last_read_id < :mid
+                                  THEN :mid ELSE user1_last_read_id END,
+        user2_last_read_id = CASE WHEN user2_id = :uid AND user2_last_read_id < :mid
+                                  THEN :mid ELSE user2_last_read_id END
+    WHERE id = :cid
+      AND ((user1_id = :uid AND user1_last_read_id < :mid)
+           OR (user2_id = :uid AND user2_last_read_id < :mid))
+"""
+
+_MESSAGE_COLS = "id, chat_id, sender_id, message, edited, deleted, read_status, sent_at"
+
+
+class SQLiteTarget:
+    """
+    Runs the chat statements against a SQLite file.
+
+    Like app.utils.database, every operation opens and closes its own
+    connection, so connection churn is comparable between the two targets.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, args):
+        self.args = args
+        self.path = args.sqlite_path
+        self.stats = None
+
+    def start(self, stats):
+        self.stats = stats
+
+    def _run(self, work, write=False):
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        if self.stats:
+            self.stats.connection_opened()
+        try:
+            cursor = connection.cursor()
+
+            def execute(sql, params=()):
+                if self.stats:
+                    self.stats.query()
+                return cursor.execute(sql, params)
+
+            if write:
+                execute("BEGIN IMMEDIATE")
+            try:
+                result = work(execute, cursor)
+                if write:
+                    execute("COMMIT")
+                return result
+            except Exception:
+                if write:
+                    connection.rollback()
+                raise
+        finally:
+            connection.close()
+            if self.stats:
+                self.stats.connection_closed()
+
+    def setup(self, n_users):
+        connection = sqlite3.connect(self.path)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SQLITE_SCHEMA)
+            connection.executemany("INSERT INTO users (username, first_name, last_name) VALUES (?, 'Bench', ?)",
+                                   [(f"bench_{self.args.run_id}_{i}", f"User {i}") for i in range(n_users)])
+            connection.commit()
+            user_ids = [r[0] for r in connection.execute("SELECT id FROM users ORDER BY id")]
+        finally:
+            connection.close()
+
+        def create_chat(a, b):
+            def _create(execute, cursor):
+                execute("INSERT INTO chats (user1_id, user2_id) VALUES (?, ?)", (a, b))
+                return cursor.lastrowid
+            return self._run(_create, write=True)
+
+        return user_ids, _pair_chats(user_ids, create_chat)
+
+    def teardown(self):
+        if not self.args.keep and self.args.sqlite_path_is_default:
+            for suffix in ("", "-wal", "-shm"):
+                try:
+                    os.remove(self.path + suffix)
+                except OSError:
+                    pass
+
+    def server_status(self):
+        return None
+
+    # --- operations used by SimulatedUser ---
+    def send_message(self, chat_id, sender_id, text):
+        def _send(execute, cursor):
+            execute("INSERT INTO chat_messages (chat_id, sender_id, message, read_status, client_msg_id) "
+                    "VALUES (?, ?, ?, 0, ?)", (chat_id, sender_id, text, uuid.uuid4().hex))
+            message_id = cursor.lastrowid
+            execute("UPDATE chats SET updated_at = CURRENT_TIMESTAMP WHERE id = ?", (chat_id,))
+            execute("SELECT sent_at FROM chat_messages WHERE id = ?", (message_id,)).fetchone()
+            return "sent"
+        return self._run(_send, write=True)
+
+    def get_messages(self, chat_id, limit, after_id=None):
+        def _get(execute, cursor):
+            if after_id:
+                rows = execute(f"SELECT {_MESSAGE_COLS} FROM chat_messages WHERE chat_id = ? AND id > ? "
+                               "ORDER BY id ASC LIMIT ?", (chat_id, after_id, limit)).fetchall()
+                return [dict(r) for r in rows]
+            rows = execute(f"SELECT {_MESSAGE_COLS} FROM chat_messages WHERE chat_id = ? "
+                           "ORDER BY id DESC LIMIT ?", (chat_id, limit)).fetchall()
+            return [dict(r) for r in reversed(rows)]
+        return self._run(_get)
+
+    def get_chats(self, user_id):
+        return self._run(lambda execute, cursor: [dict(r) for r in execute(_SQLITE_CHATS, {"uid": user_id}).fetchall()])
+
+    def mark_read(self, chat_id, user_id, up_to_id):
+        def _mark(execute, cursor):
+            return execute(_SQLITE_MARK_READ, {"uid": user_id, "mid": up_to_id, "cid": chat_id}).rowcount > 0
+        return self._run(_mark, write=True)
+
+
+TARGETS = {"mysql": MySQLTarget, "sqlite": SQLiteTarget}
+
+
+def _pair_chats(user_ids, create_chat):
+    """Pair users (0,1), (2,3), ... into chats. Returns {user_id: (chat_id, partner_id)}."""
+    chats = {}
+    for a, b in zip(user_ids[0::2], user_ids[1::2]):
+        chat_id = create_chat(a, b)
+        if not chat_id:
+            raise RuntimeError(f"could not create chat between {a} and {b}")
+        chats[a] = (chat_id, b)
+        chats[b] = (chat_id, a)
+    return chats
+
+
+# =========================
+# Simulated user
+# =========================
+class SimulatedUser(threading.Thread):
+    """
+    One client: sends into its chat (Poisson arrivals at `rate` per second)
+    and polls it every `poll_interval` seconds like attach_messaging's timer.
+    """
+
+    def __init__(self, target, stats, user_id, chat_id, config):
+        super().__init__(daemon=True)
+        self.target = target
+        self.stats = stats
+        self.user_id = user_id
+        self.chat_id = chat_id
+        self.config = config
+        self.synced_id = 0
+        self.read_mark = 0
+        self.rng = random.Random(user_id)
+
+    def _call(self, op, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        except Exception:
+            self.stats.count("errors")
+            return None
+        finally:
+            self.stats.timed(op, started)
+
+    def _open_chat(self):
+        # set_current_user + selecting the conversation: chat list, newest page, mark read
+        self._call("get_chats", self.target.get_chats, self.user_id)
+        rows = self._call("poll", self.target.get_messages, self.chat_id, PAGE_SIZE) or []
+        self.synced_id = max([int(m["id"]) for m in rows if m.get("id")] or [0])
+        self._mark_read()
+
+    def _mark_read(self):
+        if self.synced_id > self.read_mark:
+            self.read_mark = self.synced_id
+            if self._call("mark_read", self.target.mark_read, self.chat_id, self.user_id, self.synced_id):
+                self._call("get_chats", self.target.get_chats, self.user_id)
+
+    def _poll(self):
+        # MessageListModel.poll(): newest page, then page forward through larger gaps
+        started = time.perf_counter()
+        latest = self.target.get_messages(self.chat_id, PAGE_SIZE) or []
+        new_rows = [m for m in latest if m.get("id") and int(m["id"]) > self.synced_id]
+        if len(new_rows) >= PAGE_SIZE:
+            new_rows, after = [], self.synced_id
+            while True:
+                chunk = [m for m in (self.target.get_messages(self.chat_id, PAGE_SIZE, after) or []) if m.get("id")]
+                new_rows.extend(chunk)
+                if len(chunk) < PAGE_SIZE:
+                    break
+                after = int(chunk[-1]["id"])
+        self.stats.timed("poll", started)
+        now = time.time()
+        for m in new_rows:
+            if int(m.get("sender_id") or 0) == self.user_id:
+                continue
+            stamp = _STAMP_RE.search(m.get("message") or "")
+            if stamp:
+                self.stats.delivered(now - float(stamp.group(1)))
+        if new_rows:
+            self.synced_id = max(int(m["id"]) for m in new_rows)
+            self._mark_read()
+
+    def _send(self):
+        text = f"bench t={time.time():.6f} from {self.user_id}"
+        outcome = self._call("send", self.target.send_message, self.chat_id, self.user_id, text)
+        self.stats.count(outcome if outcome in ("sent", "queued") else "failed")
+
+    def run(self):
+        cfg = self.config
+        time.sleep(max(0.0, cfg["start_at"] - time.time()))
+        send_until = cfg["start_at"] + cfg["duration"]
+        # keep polling a little longer so the last sends can be delivered
+        poll_until = send_until + 2 * cfg["poll_interval"]
+        self._open_chat()
+        now = time.time()
+        next_poll = now + self.rng.uniform(0, cfg["poll_interval"])  # clients do not tick in lockstep
+        next_send = now + self.rng.expovariate(cfg["rate"]) if cfg["rate"] > 0 else float("inf")
+        while True:
+            now = time.time()
+            if now >= poll_until:
+                break
+            if next_send <= now and now < send_until:
+                self._send()
+                next_send = now + self.rng.expovariate(cfg["rate"])
+                continue
+            if next_poll <= now:
+                try:
+                    self._poll()
+                except Exception:
+                    self.stats.count("errors")
+                next_poll += cfg["poll_interval"]
+                continue
+            wake = min(next_poll, next_send if next_send < send_until else poll_until)
+            time.sleep(max(0.0, min(wake, poll_until) - now))
+
+
+def run_users(args, assignments, start_at):
+    """Run one batch of simulated users in this process and return its Stats dict."""
+    stats = Stats()
+    target = TARGETS[args.target](args)
+    target.start(stats)
+    config = {"start_at": start_at, "duration": args.duration, "rate": args.rate,
+              "poll_interval": args.poll_interval}
+    users = [SimulatedUser(target, stats, uid, chat_id, config) for uid, chat_id in assignments]
+    for user in users:
+        user.start()
+    for user in users:
+        user.join()
+    return stats.to_dict()
+
+
+def _run_users_star(packed):
+    return run_users(*packed)
+
+
+# =========================
+# Reporting
+# =========================
+def build_report(args, totals, elapsed, status_before, status_after):
+    sent = totals["sent"]
+    report = {
+        "target": args.target,
+        "users": args.users,
+        "processes": args.processes,
+        "duration_s": args.duration,
+        "rate_per_user": args.rate,
+        "poll_interval_s": args.poll_interval,
+        "elapsed_s": round(elapsed, 2),
+        "messages": {"sent": sent, "queued": totals["queued"], "failed": totals["failed"],
+                     "delivered": len(totals["delivery"]), "errors": totals["errors"]},
+        "delivery_latency": summarize(totals["delivery"]),
+        "operations": {op: summarize(samples) for op, samples in sorted(totals["ops"].items())},
+        "db": {
+            "statements": totals["queries"],
+            "statements_per_s": round(totals["queries"] / elapsed, 1) if elapsed else None,
+            "connections_opened": totals["connections"],
+            "connections_per_s": round(totals["connections"] / elapsed, 1) if elapsed else None,
+            "peak_open_connections": totals["peak_connections"],
+        },
+    }
+    if status_before and status_after:
+        questions = status_after.get("Questions", 0) - status_before.get("Questions", 0)
+        report["db"]["server_questions"] = questions
+        report["db"]["server_qps"] = round(questions / elapsed, 1) if elapsed else None
+        report["db"]["server_connections"] = status_after.get("Connections", 0) - status_before.get("Connections", 0)
+        report["db"]["server_threads_connected"] = status_after.get("Threads_connected")
+    return report
+
+
+def print_report(report):
+    print(f"\nChat benchmark: target={report['target']} users={report['users']} "
+          f"processes={report['processes']} rate={report['rate_per_user']}/s/user "
+          f"poll={report['poll_interval_s']}s duration={report['duration_s']}s")
+    m = report["messages"]
+    print(f"  messages  sent={m['sent']} queued={m['queued']} failed={m['failed']} "
+          f"delivered={m['delivered']} errors={m['errors']}")
+
+    def _line(label, s):
+        if not s.get("count"):
+            print(f"  {label:<10} no samples")
+            return
+        print(f"  {label:<10} n={s['count']:<7} p50={s['p50_ms']:.1f}ms p90={s['p90_ms']:.1f}ms "
+              f"p99={s['p99_ms']:.1f}ms max={s['max_ms']:.1f}ms")
+
+    _line("delivery", report["delivery_latency"])
+    for op, s in report["operations"].items():
+        _line(op, s)
+    db = report["db"]
+    print(f"  db        statements={db['statements']} ({db['statements_per_s']}/s) "
+          f"connections={db['connections_opened']} ({db['connections_per_s']}/s) "
+          f"peak_open={db['peak_open_connections']}")
+    if "server_qps" in db:
+        print(f"  server    questions={db['server_questions']} ({db['server_qps']}/s) "
+              f"connections={db['server_connections']} threads_connected={db['server_threads_connected']}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent chat users and measure DB load.")
+    parser.add_argument("--target", choices=sorted(TARGETS), default="mysql")
+    parser.add_argument("--users", type=int, default=100, help="simulated users (paired into chats)")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of sending")
+    parser.add_argument("--rate", type=float, default=0.1, help="messages per second per user")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="seconds between polls (UI uses 2s)")
+    parser.add_argument("--processes", type=int, default=1, help="spread users over this many processes")
+    parser.add_argument("--sqlite-path", default=None, help="SQLite file (default: a temp file)")
+    parser.add_argument("--keep", action="store_true", help="keep benchmark users/data afterwards")
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    args = parser.parse_args(argv)
+    if args.users < 2:
+        parser.error("--users must be at least 2")
+    args.processes = max(1, min(args.processes, args.users))
+    args.run_id = uuid.uuid4().hex[:8]
+    args.sqlite_path_is_default = args.sqlite_path is None
+    if args.sqlite_path is None:
+        args.sqlite_path = os.path.join(tempfile.gettempdir(), f"chat_benchmark_{args.run_id}.sqlite3")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    target = TARGETS[args.target](args)
+    print(f"Setting up {args.users} users on {args.target}...")
+    try:
+        user_ids, chats = target.setup(args.users)
+    except Exception as e:
+        print(f"Setup failed: {e}")
+        target.teardown()
+        return 1
+
+    assignments = [(uid, chats[uid][0]) for uid in user_ids if uid in chats]
+    batches = [assignments[i::args.processes] for i in range(args.processes)]
+    status_before = target.server_status()
+    start_at = time.time() + 1.0 + 0.1 * args.processes
+    print(f"Running {len(assignments)} users for {args.duration:.0f}s...")
+    try:
+        if args.processes == 1:
+            parts = [run_users(args, assignments, start_at)]
+        else:
+            with multiprocessing.Pool(args.processes) as pool:
+                parts = pool.map(_run_users_star, [(args, batch, start_at) for batch in batches])
+        elapsed = time.time() - start_at
+        status_after = target.server_status()
+    finally:
+        target.teardown()
+
+    report = build_report(args, merge_stats(parts), elapsed, status_before, status_after)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
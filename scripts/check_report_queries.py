@@ -0,0 +1,262 @@
+"""
+Regression check for the report queries on a synthetic dataset.
+
+Builds an in-memory SQLite copy of the tables the reports read, fills it with
+students who each take K courses with several payments and attendance rows
+per course, and then:
+
+  - runs the registered report queries (app.utils.report_generator) and
+    compares every row with totals computed directly in Python, with and
+    without a date range;
+  - measures the work (SQLite VM steps) of the current queries and of the
+    old fan-out shapes (payments / attendance joined by student only) as K
+    doubles. The data grows linearly with K, so linear queries should take
+    about twice the work per doubling; the fan-out shapes take about four
+    times as much and return inflated totals.
+
+Exits non-zero if a result differs or the work grows faster than linearly.
+
+Usage:
+  python scripts/check_report_queries.py
+  python scripts/check_report_queries.py --students 500 --courses 40
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+from collections import defaultdict
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.utils.report_generator import get_report
+from app.utils.rollups import ROLLUPS
+
+SQLITE_SCHEMA = """
+CREATE TABLE users (id INTEGER PRIMARY KEY, username TEXT, first_name TEXT, last_name TEXT, email TEXT,
+                    user_type TEXT, active INTEGER);
+CREATE TABLE courses (id INTEGER PRIMARY KEY, name TEXT, language TEXT, level TEXT, price INTEGER,
+                      teacher_id INTEGER, active INTEGER);
+CREATE TABLE schedules (id INTEGER PRIMARY KEY, course_id INTEGER);
+CREATE TABLE student_courses (id INTEGER PRIMARY KEY, student_id INTEGER, course_id INTEGER,
+                              enrollment_date TEXT, active INTEGER);
+CREATE TABLE payments (id INTEGER PRIMARY KEY, student_id INTEGER, course_id INTEGER, amount INTEGER,
+                       payment_date TEXT, status TEXT);
+CREATE TABLE attendance (id INTEGER PRIMARY KEY, student_id INTEGER, course_id INTEGER,
+                         attendance_date TEXT, status TEXT);
+CREATE INDEX idx_sc_student ON student_courses (student_id);
+CREATE INDEX idx_sc_course ON student_courses (course_id);
+CREATE INDEX idx_payments_student ON payments (student_id);
+CREATE INDEX idx_attendance_student ON attendance (student_id);
+CREATE TABLE rollup_payments_daily (day TEXT, course_id INTEGER, payments INTEGER, amount INTEGER,
+                                    paid_amount INTEGER, PRIMARY KEY (course_id, day));
+CREATE TABLE rollup_enrollments_daily (day TEXT, course_id INTEGER, enrollments INTEGER,
+                                       active_enrollments INTEGER, PRIMARY KEY (course_id, day));
+CREATE TABLE rollup_attendance_daily (day TEXT, course_id INTEGER, present INTEGER, late INTEGER,
+                                      absent INTEGER, PRIMARY KEY (course_id, day));
+"""
+
+# The report shapes before the rewrite: facts joined by student only
+OLD_QUERIES = {
+    "course_revenue": """
+        SELECT c.name AS course_name, COUNT(DISTINCT sc.student_id) AS total_students,
+               COALESCE(SUM(p.amount), 0) AS revenue
+        FROM courses c
+        LEFT JOIN student_courses sc ON c.id = sc.course_id
+        LEFT JOIN payments p ON sc.student_id = p.student_id
+        GROUP BY c.id, c.name
+    """,
+    "student_attendance": """
+        SELECT u.first_name || ' ' || u.last_name AS student_name, c.name AS course_name,
+               COUNT(a.id) AS classes_attended
+        FROM users u
+        JOIN student_courses sc ON u.id = sc.student_id
+        JOIN courses c ON sc.course_id = c.id
+        LEFT JOIN attendance a ON u.id = a.student_id AND a.status <> 'absent'
+        WHERE u.user_type = 'student'
+        GROUP BY u.id, c.id
+    """,
+}
+
+START = date(2024, 1, 1)
+DAYS = 365
+RANGE = (date(2024, 3, 1), date(2024, 8, 31))
+
+
+def _day(rng):
+    return START + timedelta(days=rng.randrange(DAYS))
+
+
+def build_dataset(students, courses, per_student, seed=7):
+    """
+    Create the synthetic database.
+
+    Args:
+        students (int): Students; each takes per_student distinct courses.
+        courses (int): Courses (per_student must not exceed it).
+        per_student (int): K: courses per student; each enrollment has K
+            payments and K attendance rows, so the data grows linearly with K.
+
+    Returns:
+        sqlite3.Connection: The populated in-memory database.
+    """
+    rng = random.Random(seed)
+    db = sqlite3.connect(":memory:")
+    db.row_factory = sqlite3.Row
+    db.create_function("CONCAT", -1, lambda *parts: "".join("" if p is None else str(p) for p in parts))
+    db.executescript(SQLITE_SCHEMA)
+
+    teachers = max(1, courses // 4)
+    users = [(i, f"t{i}", f"Teacher{i}", f"T{i:04d}", f"t{i}@x", "teacher", 1) for i in range(1, teachers + 1)]
+    users += [(i, f"s{i}", f"Student{i}", f"S{i:05d}", f"s{i}@x", "student", int(rng.random() > 0.1))
+              for i in range(teachers + 1, teachers + students + 1)]
+    db.executemany("INSERT INTO users VALUES (?, ?, ?, ?, ?, ?, ?)", users)
+    db.executemany("INSERT INTO courses VALUES (?, ?, 'English', 'A1', 100, ?, ?)",
+                   [(c, f"Course {c:03d}", rng.randint(1, teachers), int(rng.random() > 0.1))
+                    for c in range(1, courses + 1)])
+    db.executemany("INSERT INTO schedules (course_id) VALUES (?)",
+                   [(rng.randint(1, courses),) for _ in range(courses * 2)])
+
+    enrollments, payments, attendance = [], [], []
+    for student_id in range(teachers + 1, teachers + students + 1):
+        for course_id in rng.sample(range(1, courses + 1), per_student):
+            enrollments.append((student_id, course_id, _day(rng).isoformat(), 1))
+            for _ in range(per_student):
+                payment_date = _day(rng).isoformat() if rng.random() > 0.2 else None
+                payments.append((student_id, course_id, rng.randint(10, 500), payment_date,
+                                 "paid" if payment_date else "pending"))
+                attendance.append((student_id, course_id, _day(rng).isoformat(),
+                                   rng.choice(["present", "late", "absent"])))
+    db.executemany("INSERT INTO student_courses (student_id, course_id, enrollment_date, active) "
+                   "VALUES (?, ?, ?, ?)", enrollments)
+    db.executemany("INSERT INTO payments (student_id, course_id, amount, payment_date, status) "
+                   "VALUES (?, ?, ?, ?, ?)", payments)
+    db.executemany("INSERT INTO attendance (student_id, course_id, attendance_date, status) "
+                   "VALUES (?, ?, ?, ?)", attendance)
+    for rollup in ROLLUPS.values():
+        db.execute(rollup.aggregate_sql("1 = 1"))
+    db.commit()
+    return db
+
+
+def _in_range(value, date_range):
+    if date_range is None:
+        return True
+    return value is not None and date_range[0].isoformat() <= value <= date_range[1].isoformat()
+
+
+def expected_rows(db, name, date_range):
+    """Report totals computed in Python from the raw rows, as sorted tuples."""
+    users = {r["id"]: dict(r) for r in db.execute("SELECT * FROM users")}
+    courses = {r["id"]: dict(r) for r in db.execute("SELECT * FROM courses")}
+    enrollments = [dict(r) for r in db.execute("SELECT * FROM student_courses")]
+    payments = [dict(r) for r in db.execute("SELECT * FROM payments")]
+    attendance = [dict(r) for r in db.execute("SELECT * FROM attendance")]
+
+    if name == "course_revenue":
+        students, revenue = defaultdict(int), defaultdict(int)
+        for e in enrollments:
+            students[e["course_id"]] += 1
+        for p in payments:
+            if p["payment_date"] is not None and _in_range(p["payment_date"], date_range):
+                revenue[p["course_id"]] += p["amount"]
+        rows = [(c["name"], students[cid], revenue[cid]) for cid, c in courses.items()]
+    elif name == "student_attendance":
+        attended = defaultdict(int)
+        for a in attendance:
+            if a["status"] != "absent" and _in_range(a["attendance_date"], date_range):
+                attended[(a["student_id"], a["course_id"])] += 1
+        rows = [(f"{users[e['student_id']]['first_name']} {users[e['student_id']]['last_name']}",
+                 courses[e["course_id"]]["name"], attended[(e["student_id"], e["course_id"])])
+                for e in enrollments if users[e["student_id"]]["user_type"] == "student"]
+    elif name == "user_activity":
+        enrolled, paid = defaultdict(int), defaultdict(int)
+        for e in enrollments:
+            if _in_range(e["enrollment_date"], date_range):
+                enrolled[e["student_id"]] += 1
+        for p in payments:
+            if _in_range(p["payment_date"], date_range):
+                paid[p["student_id"]] += 1
+        rows = [(u["id"], u["username"], u["first_name"], u["last_name"], u["email"], enrolled[uid], paid[uid])
+                for uid, u in users.items() if u["active"] and u["user_type"] == "student"]
+    elif name == "teacher_performance":
+        course_count, students = defaultdict(int), defaultdict(set)
+        for c in courses.values():
+            course_count[c["teacher_id"]] += 1
+        for e in enrollments:
+            if _in_range(e["enrollment_date"], date_range):
+                students[courses[e["course_id"]]["teacher_id"]].add(e["student_id"])
+        rows = [(f"{u['first_name']} {u['last_name']}", course_count[uid], len(students[uid]))
+                for uid, u in users.items() if u["user_type"] == "teacher"]
+    else:
+        raise ValueError(name)
+    return sorted(rows)
+
+
+def run(db, sql, params=()):
+    """Run a query; returns (rows as sorted tuples, SQLite VM steps)."""
+    steps = [0]
+
+    def _count():
+        steps[0] += 1
+        return 0
+
+    db.set_progress_handler(_count, 100)
+    try:
+        rows = db.execute(sql.replace("%s", "?"), [str(p) for p in params]).fetchall()
+    finally:
+        db.set_progress_handler(None, 0)
+    return sorted(tuple(r) for r in rows), steps[0] * 100
+
+
+def report_sql(name, date_range=None):
+    return get_report(name).build_query(*(date_range or (None, None)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check report results and scaling on synthetic data.")
+    parser.add_argument("--students", type=int, default=300)
+    parser.add_argument("--courses", type=int, default=40)
+    parser.add_argument("--k", type=int, nargs="+", default=[2, 4, 8], help="courses per student, doubling")
+    args = parser.parse_args()
+
+    failures = 0
+    work = defaultdict(list)
+    for k in args.k:
+        db = build_dataset(args.students, args.courses, k)
+        print(f"K={k}: {db.execute('SELECT COUNT(*) FROM payments').fetchone()[0]} payments, "
+              f"{db.execute('SELECT COUNT(*) FROM attendance').fetchone()[0]} attendance rows")
+        for name in ("course_revenue", "student_attendance", "user_activity", "teacher_performance"):
+            for date_range in (None, RANGE):
+                rows, steps = run(db, *report_sql(name, date_range))
+                ok = rows == expected_rows(db, name, date_range)
+                failures += not ok
+                if date_range is None:
+                    work[name].append(steps)
+                label = "all dates" if date_range is None else "date range"
+                print(f"  {name:20s} {label:10s} {'ok' if ok else 'WRONG':5s} {steps:>12,} steps")
+        for name, sql in OLD_QUERIES.items():
+            rows, steps = run(db, sql)
+            work[f"{name} (old)"].append(steps)
+            correct = rows == expected_rows(db, name, None)
+            print(f"  {name + ' (old)':31s} {'ok' if correct else 'wrong':5s} {steps:>12,} steps")
+        db.close()
+
+    print("\nWork growth per doubling of K (linear ~2x, fan-out ~4x):")
+    for name, steps in work.items():
+        ratios = [b / a for a, b in zip(steps, steps[1:]) if a]
+        text = ", ".join(f"{r:.1f}x" for r in ratios)
+        linear = all(r < 3.0 for r in ratios)
+        if not name.endswith("(old)") and not linear:
+            failures += 1
+        print(f"  {name:28s} {text:20s} {'linear' if linear else 'superlinear'}")
+
+    print("\nOK" if not failures else f"\n{failures} check(s) failed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Keep the report rollup tables up to date.
+
+Runs app.utils.rollups.refresh_rollups once, or every --interval seconds with
+--loop, so reports find the rollups current and their own refresh has little
+or nothing left to do. Each refresh only recomputes the (day, course) buckets
+touched since the last one; --rebuild recomputes everything.
+
+Environment variables: DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, DB_NAME
+(same as the application, read through app.utils.database).
+
+Usage:
+  python scripts/refresh_rollups.py
+  python scripts/refresh_rollups.py --loop --interval 60
+  python scripts/refresh_rollups.py --rebuild payments_daily
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.utils.rollups import ROLLUPS, refresh_rollups
+
+
+def refresh_once(names, rebuild=False):
+    """Refresh the rollups and print one line per rollup. Returns True if all succeeded."""
+    started = time.perf_counter()
+    results = refresh_rollups(names, rebuild=rebuild)
+    elapsed = time.perf_counter() - started
+    for name, buckets in results.items():
+        status = "FAILED" if buckets is None else f"{buckets} buckets recomputed"
+        print(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {name}: {status}")
+    print(f"Refreshed {len(results)} rollups in {elapsed:.2f}s")
+    return all(buckets is not None for buckets in results.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the report rollup tables.")
+    parser.add_argument("rollups", nargs="*",
+                        help=f"rollups to refresh (default: all of {', '.join(ROLLUPS)})")
+    parser.add_argument("--rebuild", action="store_true", help="recompute everything, not just changes")
+    parser.add_argument("--loop", action="store_true", help="keep refreshing every --interval seconds")
+    parser.add_argument("--interval", type=float, default=60.0, help="seconds between refreshes (default: 60)")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.rollups if name not in ROLLUPS]
+    if unknown:
+        parser.error(f"unknown rollups: {', '.join(unknown)}")
+
+    names = args.rollups or None
+    ok = refresh_once(names, rebuild=args.rebuild)
+    while args.loop:
+        time.sleep(args.interval)
+        ok = refresh_once(names)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()